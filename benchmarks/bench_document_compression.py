@@ -0,0 +1,105 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Measures the on-disk size and read cost of history rows stored plain, with zlib and with zstd.
+
+Each run writes the same synthetic responses (prompt, analysis, retrieve result and response text)
+into a fresh sqlite document database, then reads them all back by id. zstd is skipped when the
+zstandard package is not installed; its dictionary is trained on the first connect, so the zstd run
+writes once, reconnects, and writes again.
+
+Run with: python benchmarks/bench_document_compression.py [rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from typing import Any
+
+from engramic.core.interface.db import DB
+from engramic.resources.plugins.db.sqlite.sqlite import DocumentCodec, Sqlite
+
+
+def make_response(index: int) -> dict[str, Any]:
+    topic = ['qubits', 'entanglement', 'error correction', 'photonic links'][index % 4]
+    prompt = {
+        'prompt_str': f'How do {topic} affect network throughput in experiment {index}?',
+        'conversation_id': f'conv-{index // 20}',
+        'repo_ids_filters': ['repo-a', 'repo-b'],
+        'is_lesson': False,
+        'save_in_history': True,
+    }
+    analysis = {'response_length': 'medium', 'user_intent': f'understand {topic}', 'domain': 'quantum networking'}
+    retrieve_result = {
+        'ask_id': f'ask-{index}',
+        'source_id': f'source-{index}',
+        'engram_id_array': [f'engram-{index}-{n}' for n in range(12)],
+    }
+    response = ' '.join(
+        f'{topic.capitalize()} sentence {n} of response {index} covers fidelity, latency and link budget.'
+        for n in range(60)
+    )
+    return {
+        'id': f'response-{index:07}',
+        'response_time': float(index),
+        'prompt': prompt,
+        'analysis': analysis,
+        'retrieve_result': retrieve_result,
+        'response': response,
+        'model': 'benchmark',
+    }
+
+
+def run(codec: str, rows: int) -> tuple[int, float] | None:
+    if codec == DocumentCodec.ZSTD and DocumentCodec.load_zstandard() is None:
+        return None
+
+    with tempfile.TemporaryDirectory() as root:
+        os.environ['LOCAL_STORAGE_ROOT_PATH'] = root
+        settings = {'compression': {'history': codec}, 'zstd_training_rows': min(1000, rows // 2)}
+        docs = [make_response(index) for index in range(rows)]
+        half = len(docs) // 2
+
+        db = Sqlite()
+        db.connect(settings)
+        db.insert_documents(table=DB.DBTables.HISTORY, docs=docs[:half], args=None)
+        db.close(None)
+
+        db = Sqlite()
+        db.connect(settings)
+        db.insert_documents(table=DB.DBTables.HISTORY, docs=docs[half:], args=None)
+
+        (data_bytes,) = db._writer.execute('SELECT sum(length(data)) FROM history').fetchone()
+        ids = [doc['id'] for doc in docs]
+
+        start = time.perf_counter()
+        for offset in range(0, len(ids), 100):
+            db.fetch(table=DB.DBTables.HISTORY, ids=ids[offset : offset + 100], args=None)
+        elapsed = time.perf_counter() - start
+
+        db.close(None)
+        return int(data_bytes), elapsed
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    baseline: tuple[int, float] | None = None
+    for codec in (DocumentCodec.NONE, DocumentCodec.ZLIB, DocumentCodec.ZSTD):
+        result = run(codec, rows)
+        if result is None:
+            print(f'{codec:>5}: skipped, zstandard is not installed')
+            continue
+
+        data_bytes, elapsed = result
+        baseline = baseline or result
+        print(
+            f'{codec:>5}: {data_bytes / rows:8.0f} bytes/row ({data_bytes / baseline[0]:5.1%})  '
+            f'read {elapsed / rows * 1e6:6.1f} us/row ({elapsed / baseline[1]:4.2f}x)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Compares the Sqlite and Lmdb document databases on the access patterns the services use.
+
+Each plugin gets a fresh database and the same synthetic engrams and history rows, then runs:
+
+    insert      engrams written 50 per insert_documents call, as StorageService flushes them
+    fetch ids   engrams read back 12 ids per fetch, as a retrieve result is loaded
+    history     a conversation's 3 newest history rows for its repo filter, as RetrieveService asks
+    scan        every engram read through fetch_iter in pages of 500
+
+Each plugin runs in its own process. Lmdb is skipped when the lmdb package is not installed.
+
+Run with: python benchmarks/bench_document_db.py [engrams]
+"""
+
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from engramic.core.interface.db import DB
+from engramic.resources.plugins.db.sqlite.sqlite import Sqlite
+
+
+def make_engram(index: int) -> dict[str, Any]:
+    content = ' '.join(f'Sentence {n} of engram {index} about link budgets and fidelity.' for n in range(12))
+    return {
+        'id': f'engram-{index:07}',
+        'locations': [f'file://docs/{index % 50}.pdf'],
+        'source_ids': [f'source-{index % 50}'],
+        'content': content,
+        'engram_type': 'native',
+        'created_date': float(index),
+        'context': {'title': f'Document {index % 50}', 'page': str(index % 30)},
+        'repo_ids': ['repo-a'],
+    }
+
+
+def make_history(index: int) -> dict[str, Any]:
+    return {
+        'id': f'response-{index:07}',
+        'response_time': float(index),
+        'prompt': {
+            'prompt_str': f'Question {index}?',
+            'conversation_id': f'conv-{index % 100}',
+            'repo_ids_filters': ['repo-a'],
+        },
+        'response': f'Answer {index}. ' * 40,
+    }
+
+
+def timed(action: Callable[[], object], operations: int) -> float:
+    start = time.perf_counter()
+    action()
+    return (time.perf_counter() - start) / operations * 1e6
+
+
+def run(plugin: DB, engrams: int) -> dict[str, float]:
+    engram_docs = [make_engram(index) for index in range(engrams)]
+    history_docs = [make_history(index) for index in range(engrams)]
+    ids = [doc['id'] for doc in engram_docs]
+    random.seed(7)
+    batches = [random.sample(ids, 12) for _ in range(2000)]
+
+    def insert() -> None:
+        for offset in range(0, engrams, 50):
+            plugin.insert_documents(table=DB.DBTables.ENGRAM, docs=engram_docs[offset : offset + 50], args=None)
+
+    def fetch_ids() -> None:
+        for batch in batches:
+            plugin.fetch(table=DB.DBTables.ENGRAM, ids=batch, args=None)
+
+    def history() -> None:
+        for conversation in range(2000):
+            args = {'conversation_id': f'conv-{conversation % 100}', 'repo_ids_filters': ['repo-a'], 'history_limit': 3}
+            plugin.fetch(table=DB.DBTables.HISTORY, ids=[], args=args)
+
+    def scan() -> None:
+        for _ in plugin.fetch_iter(table=DB.DBTables.ENGRAM, fields=None, page_size=500, after_id=None, args=None):
+            pass
+
+    results = {'insert': timed(insert, engrams)}
+    plugin.insert_documents(table=DB.DBTables.HISTORY, docs=history_docs, args=None)
+    results['fetch ids'] = timed(fetch_ids, len(batches))
+    results['history'] = timed(history, 2000)
+    results['scan'] = timed(scan, engrams)
+    return results
+
+
+def measure(name: str, engrams: int) -> dict[str, float]:
+    plugin_class: Callable[[], DB] = Sqlite
+    if name == 'Lmdb':
+        from engramic.resources.plugins.db.lmdb.lmdb import Lmdb
+
+        plugin_class = Lmdb
+
+    with tempfile.TemporaryDirectory() as root:
+        os.environ['LOCAL_STORAGE_ROOT_PATH'] = root
+        plugin = plugin_class()
+        plugin.connect({})
+        results = run(plugin, engrams)
+        plugin.close({})
+    return results
+
+
+def main() -> None:
+    engrams = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    names = ['Sqlite']
+    if importlib.util.find_spec('lmdb') is not None:
+        names.append('Lmdb')
+    else:
+        print('Lmdb: skipped, lmdb is not installed')
+
+    baseline: dict[str, float] | None = None
+    for name in names:
+        # A fresh process per plugin, so neither run inherits the other's heap and page cache state.
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results = pool.submit(measure, name, engrams).result()
+
+        baseline = baseline or results
+        print(
+            f'{name:>6}: '
+            + '  '.join(
+                f'{pattern} {micros:7.1f} us ({micros / baseline[pattern]:4.2f}x)'
+                for pattern, micros in results.items()
+            )
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Measures render cost per prompt type with and without the compiled template cache.
+
+"cold" clears the TemplateRegistry before every render, which matches the old behavior of building a
+new Mako Template on each call. "warm" renders against the cached compiled template.
+
+Run with: python benchmarks/bench_prompt_render.py [iterations]
+"""
+
+import sys
+import time
+
+from engramic.application.codify.prompt_validate_prompt import PromptValidatePrompt
+from engramic.application.consolidate.prompt_gen_indices import PromptGenIndices as ConsolidateGenIndices
+from engramic.application.response.prompt_main_prompt import PromptMainPrompt
+from engramic.application.retrieve.ask.prompt_analyze_prompt import PromptAnalyzePrompt
+from engramic.application.retrieve.ask.prompt_gen_conversation import PromptGenConversation
+from engramic.application.retrieve.ask.prompt_gen_indices import PromptGenIndices as AskGenIndices
+from engramic.application.retrieve.ask.prompt_gen_query import PromptGenQuery
+from engramic.application.sense.prompt_gen_full_summary import PromptGenFullSummary
+from engramic.application.sense.prompt_gen_meta import PromptGenMeta
+from engramic.application.sense.prompt_scan_page import PromptScanPage
+from engramic.core import Engram, Index, Meta, Prompt
+from engramic.core.engram import EngramType
+from engramic.core.template_registry import TemplateRegistry
+
+ENGRAM = Engram(
+    'e1',
+    ['file://doc.pdf'],
+    ['s1'],
+    'Quantum networks distribute entanglement.' * 10,
+    EngramType.NATIVE,
+    {'h1': 'Intro'},
+)
+META = Meta('m1', 'document', ['file://doc.pdf'], ['s1'], ['quantum', 'network'], None, 'summary', Index('outline'))
+DOC_INFO = {
+    'file_path': '/repo',
+    'file_name': 'doc.pdf',
+    'document_title': 'Intro',
+    'document_format': 'word_processing',
+    'document_type': 'null',
+    'toc': '{}',
+    'summary_initial': 'summary',
+}
+HISTORY = [
+    {
+        'response_time': 0,
+        'response': 'previous response',
+        'prompt': {'prompt_str': 'previous prompt'},
+        'retrieve_result': {'conversation_direction': {'current_user_intent': 'intent', 'working_memory': 'memory'}},
+    }
+]
+
+
+def build_prompts() -> list[Prompt]:
+    return [
+        PromptMainPrompt(
+            prompt_str='What is a quantum network?',
+            input_data={
+                'engram_list': [
+                    {
+                        'engram_type': 'native',
+                        'locations': ['file://doc.pdf'],
+                        'context': {'h1': 'Intro'},
+                        'id': 'e1',
+                        'content': 'content',
+                        'created_date': 0,
+                    }
+                ]
+                * 5,
+                'history': HISTORY,
+                'working_memory': {'working_memory': 'memory', 'current_user_intent': 'intent'},
+                'analysis': {'response_length': 'long', 'user_prompt_type': 'typical'},
+                'all_repos': None,
+                'selected_repos': None,
+                'current_engramic_widget': None,
+            },
+        ),
+        PromptGenConversation(
+            prompt_str='What is a quantum network?',
+            input_data={'history': HISTORY, 'all_repos': None, 'selected_repos': None, 'current_engramic_widget': None},
+        ),
+        AskGenIndices(
+            prompt_str='What is a quantum network?',
+            input_data={'meta_list': [META] * 3, 'current_user_intent': 'intent', 'all_repos': None},
+        ),
+        PromptAnalyzePrompt(
+            prompt_str='What is a quantum network?',
+            input_data={'working_memory': 'memory', 'current_user_intent': 'intent'},
+        ),
+        PromptGenQuery(prompt_str='Summarize doc.pdf', input_data={'file_list': ['file://repo/doc.pdf'] * 20}),
+        PromptGenMeta(input_data={'file_path': '/repo', 'file_name': 'doc.pdf'}),
+        PromptGenFullSummary(input_data={**DOC_INFO, 'full_text': 'page text ' * 500}),
+        PromptScanPage(input_data={**DOC_INFO, 'page_number': 1}),
+        PromptValidatePrompt('What is a quantum network?', input_data={'engram_list': [ENGRAM] * 3, 'response': 'x'}),
+        ConsolidateGenIndices(input_data={'engram': ENGRAM}),
+    ]
+
+
+def time_renders(prompt: Prompt, iterations: int, *, cold: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if cold:
+            TemplateRegistry.clear()
+        prompt.render_prompt()
+    return (time.perf_counter() - start) / iterations
+
+
+def main(iterations: int) -> None:
+    rows: list[tuple[str, float, float]] = []
+    for prompt in build_prompts():
+        name = f'{prompt.__class__.__module__.split(".")[-2]}.{prompt.__class__.__name__}'
+        cold = time_renders(prompt, iterations, cold=True)
+        prompt.render_prompt()
+        warm = time_renders(prompt, iterations, cold=False)
+        rows.append((name, cold, warm))
+
+    print(f'{"prompt":<40} {"cold (us)":>12} {"warm (us)":>12} {"speedup":>9}')
+    for name, cold, warm in rows:
+        print(f'{name:<40} {cold * 1e6:>12.1f} {warm * 1e6:>12.1f} {cold / warm:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,177 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Compares the NumpyMmap and ChromaDB vector databases on the calls RetrieveService and Ask make.
+
+Each plugin gets a fresh directory and the same synthetic, clustered 768 dimension embeddings, spread
+over REPOS repositories, then runs:
+
+    open        importing the plugin and constructing it on an empty directory
+    insert      one insert per engram with 8 index embeddings, as RetrieveService stores them
+    query       4 query embeddings against 'main' filtered to one repo, n_results=10, as Ask fetches engram ids
+    filtered    the same with a type and location filter
+    upsert      storing every engram again with one upsert each
+    batched     the same with one upsert_batch per BATCH_SIZE engrams, as RetrieveService flushes them
+    reopen      constructing the plugin again on the stored data, plus its first query
+
+Times are per operation. "agree" is the share of query results that match the first plugin's.
+"ChromaDB/repo" is ChromaDB with partition="repo", one collection per repo.
+Each plugin runs in its own process. ChromaDB is skipped when chromadb is not installed.
+
+Run with: python benchmarks/bench_vector_db.py [engrams]
+"""
+
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import numpy as np
+
+from engramic.core.index import Index
+from engramic.core.interface.vector_db import VectorDB
+
+DIM = 768
+INDICES_PER_ENGRAM = 8
+QUERIES = 200
+REPOS = 8
+BATCH_SIZE = 200
+
+
+def load(name: str) -> VectorDB:
+    if name.startswith('ChromaDB'):
+        from engramic.resources.plugins.vector_db.chromadb.chromadb import ChromaDB
+
+        return ChromaDB()
+
+    from engramic.resources.plugins.vector_db.numpymmap.numpymmap import NumpyMmap
+
+    return NumpyMmap()
+
+
+def make_data(engrams: int) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+    rng = np.random.default_rng(11)
+    centers = rng.standard_normal((64, DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, 64, engrams * INDICES_PER_ENGRAM)]
+    vectors += 0.6 * rng.standard_normal(vectors.shape).astype(np.float32)
+    queries = vectors[rng.integers(0, len(vectors), QUERIES * 4)] + 0.3 * rng.standard_normal((QUERIES * 4, DIM))
+    return vectors, queries.astype(np.float32)
+
+
+def measure(name: str, engrams: int) -> tuple[dict[str, float], list[list[str]]]:
+    vectors, queries = make_data(engrams)
+    args: dict[str, Any] = {'threshold': 0.6, 'n_results': 10, 'sync': False}
+    if name == 'ChromaDB/repo':
+        args['partition'] = 'repo'
+    results: dict[str, float] = {}
+
+    def item(engram: int) -> dict[str, Any]:
+        rows = vectors[engram * INDICES_PER_ENGRAM : (engram + 1) * INDICES_PER_ENGRAM]
+        return {
+            'index_list': [
+                Index(f'index {engram}', row.tolist(), id=f'index-{engram}-{i}') for i, row in enumerate(rows)
+            ],
+            'obj_id': f'engram-{engram:07}',
+            'filters': [f'repo-{engram % REPOS}'],
+            'type_filter': 'native' if engram % 4 else 'episodic',
+            'location_filter': [f'file://doc-{engram % 20}.pdf'],
+        }
+
+    def run_queries(plugin: VectorDB, **filters: Any) -> list[list[str]]:
+        found = []
+        for offset in range(0, len(queries), 4):
+            ret = plugin.query(
+                collection_name='main',
+                embeddings=queries[offset : offset + 4].tolist(),
+                repo_filters=['repo-0'],
+                args=args,
+                type_filters=filters.get('type_filters'),
+                location_filters=filters.get('location_filters'),
+            )
+            found.append(ret['query_set'])
+        return found
+
+    with tempfile.TemporaryDirectory() as root:
+        os.environ['LOCAL_STORAGE_ROOT_PATH'] = root
+
+        start = time.perf_counter()
+        plugin = load(name)
+        results['open'] = (time.perf_counter() - start) * 1e6
+
+        items = [item(engram) for engram in range(engrams)]
+        start = time.perf_counter()
+        for engram_item in items:
+            plugin.insert(collection_name='main', args=args, **engram_item)
+        results['insert'] = (time.perf_counter() - start) / engrams * 1e6
+
+        start = time.perf_counter()
+        found = run_queries(plugin)
+        results['query'] = (time.perf_counter() - start) / QUERIES * 1e6
+
+        start = time.perf_counter()
+        run_queries(plugin, type_filters=['native'], location_filters=['file://doc-3.pdf', 'file://doc-7.pdf'])
+        results['filtered'] = (time.perf_counter() - start) / QUERIES * 1e6
+
+        start = time.perf_counter()
+        for engram_item in items:
+            plugin.upsert(collection_name='main', args=args, **engram_item)
+        results['upsert'] = (time.perf_counter() - start) / engrams * 1e6
+
+        start = time.perf_counter()
+        for offset in range(0, engrams, BATCH_SIZE):
+            plugin.upsert_batch(collection_name='main', items=items[offset : offset + BATCH_SIZE], args=args)  # type: ignore[attr-defined]
+        results['batched'] = (time.perf_counter() - start) / engrams * 1e6
+
+        del plugin
+        start = time.perf_counter()
+        plugin = load(name)
+        plugin.query(
+            collection_name='main',
+            embeddings=queries[:4].tolist(),
+            repo_filters=['repo-0'],
+            args=args,
+            type_filters=[],
+            location_filters=[],
+        )
+        results['reopen'] = (time.perf_counter() - start) * 1e6
+
+    return results, found
+
+
+def main() -> None:
+    engrams = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    names = ['NumpyMmap']
+    if importlib.util.find_spec('chromadb') is not None:
+        names += ['ChromaDB', 'ChromaDB/repo']
+    else:
+        print('ChromaDB: skipped, chromadb is not installed')
+
+    print(f'{engrams} engrams, {engrams * INDICES_PER_ENGRAM} vectors of dimension {DIM}')
+    baseline: dict[str, float] | None = None
+    baseline_found: list[list[str]] | None = None
+    for name in names:
+        # A fresh process per plugin, so neither run inherits the other's heap and page cache state.
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results, found = pool.submit(measure, name, engrams).result()
+
+        baseline = baseline or results
+        baseline_found = baseline_found or found
+        matched = sum(len(set(ids) & set(expected)) for ids, expected in zip(found, baseline_found, strict=True))
+        total = sum(len(expected) for expected in baseline_found) or 1
+        print(
+            f'{name:>13}: '
+            + '  '.join(
+                f'{pattern} {micros:9.1f} us ({micros / baseline[pattern]:5.2f}x)'
+                for pattern, micros in results.items()
+            )
+            + f'  agree {matched / total:.0%}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Reports recall@k, latency and code size of NumpyMmap's quantized search against its exact search.
+
+The collection holds synthetic, clustered 768 dimension embeddings, INDICES_PER_ENGRAM per engram, and
+every mode answers the same QUERIES single-embedding queries with n_results=K. Two data sets are run:
+
+    isotropic   clusters with noise in every dimension, as in bench_vector_db.py; the worst case for pq
+    low-rank    clusters with noise in a RANK dimension subspace, closer to text embeddings, whose
+                variance is concentrated in far fewer directions than their dimension
+
+and each mode is one of:
+
+    exact       the float32 matrix, searched exactly
+    int8        int8 scalar codes, shortlisting K * rerank rows that are re-scored from the matrix
+    pq          product quantization codes with pq_subvectors bytes per row, re-scored the same way
+
+recall@K is the share of the exact search's K nearest rows (by index id) each mode returns. "raw" is the
+recall of the codes alone (rerank=1), before full precision re-scoring. "train" is the time of the
+background build started by connect, which encodes the collection and for pq trains the codebook.
+"bytes" is what a full scan reads: the float32 matrix for exact search, the codes otherwise.
+
+Run with: python benchmarks/bench_vector_quantization.py [engrams]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+
+from engramic.core.index import Index
+from engramic.resources.plugins.vector_db.numpymmap.numpymmap import NumpyMmap
+
+DIM = 768
+INDICES_PER_ENGRAM = 5
+QUERIES = 200
+K = 10
+RANK = 48
+MODES: list[tuple[str, dict[str, Any]]] = [
+    ('exact', {}),
+    ('int8', {'quantization': 'int8', 'rerank': 4}),
+    ('pq 96', {'quantization': 'pq', 'pq_subvectors': 96, 'rerank': 10}),
+    ('pq 48', {'quantization': 'pq', 'pq_subvectors': 48, 'rerank': 20}),
+]
+
+
+def make_data(engrams: int, kind: str) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+    rng = np.random.default_rng(11)
+    centers = rng.standard_normal((64, DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, 64, engrams * INDICES_PER_ENGRAM)]
+    if kind == 'isotropic':
+        vectors += 0.6 * rng.standard_normal(vectors.shape).astype(np.float32)
+    else:
+        basis = np.linalg.qr(rng.standard_normal((DIM, RANK)))[0].T * np.sqrt(DIM / RANK)
+        vectors += (0.6 * rng.standard_normal((len(vectors), RANK)) @ basis).astype(np.float32)
+        vectors += 0.05 * rng.standard_normal(vectors.shape).astype(np.float32)
+    queries = vectors[rng.integers(0, len(vectors), QUERIES)] + 0.3 * rng.standard_normal((QUERIES, DIM))
+    return vectors, queries.astype(np.float32)
+
+
+def search(plugin: NumpyMmap, queries: np.ndarray[Any, Any], args: dict[str, Any]) -> list[set[str | None]]:
+    found = []
+    for query in queries:
+        ret = plugin.query(
+            collection_name='main',
+            embeddings=[query.tolist()],
+            repo_filters=None,
+            args={'threshold': 2.0, 'n_results': K, 'aggregate': 'max', **args},
+            type_filters=None,
+            location_filters=None,
+        )
+        found.append({index_id for _, _, index_id in ret['scored_set']})
+    return found
+
+
+def recall(found: list[set[str | None]], expected: list[set[str | None]]) -> float:
+    return sum(len(ids & wanted) for ids, wanted in zip(found, expected, strict=True)) / max(
+        sum(len(wanted) for wanted in expected), 1
+    )
+
+
+def run(engrams: int, kind: str) -> None:
+    vectors, queries = make_data(engrams, kind)
+
+    with tempfile.TemporaryDirectory() as root:
+        os.environ['LOCAL_STORAGE_ROOT_PATH'] = root
+        plugin = NumpyMmap()
+        for engram in range(engrams):
+            rows = vectors[engram * INDICES_PER_ENGRAM : (engram + 1) * INDICES_PER_ENGRAM]
+            plugin.insert(
+                collection_name='main',
+                index_list=[
+                    Index(f'index {engram}', row.tolist(), id=f'index-{engram}-{i}') for i, row in enumerate(rows)
+                ],
+                obj_id=f'engram-{engram:07}',
+                args={'sync': False},
+                filters=None,  # type: ignore[arg-type]
+                type_filter=None,  # type: ignore[arg-type]
+                location_filter=None,  # type: ignore[arg-type]
+            )
+
+        print(f'{kind}: {len(vectors)} vectors of dimension {DIM}, recall@{K} over {QUERIES} queries')
+        collection = plugin.collection['main']
+        expected: list[set[str | None]] = []
+        for name, args in MODES:
+            start = time.perf_counter()
+            plugin.connect(collection_name='main', args=args)
+            collection.wait_quantized()
+            train = time.perf_counter() - start
+
+            start = time.perf_counter()
+            found = search(plugin, queries, args)
+            micros = (time.perf_counter() - start) / QUERIES * 1e6
+            expected = expected or found
+
+            if collection.quantized is not None and args:
+                raw = recall(search(plugin, queries, {**args, 'rerank': 1}), expected)
+                nbytes = collection.quantized.nbytes()
+            else:
+                raw = 1.0
+                nbytes = collection.count * collection.dim * 4
+            print(
+                f'{name:>6}: recall {recall(found, expected):6.1%}  raw {raw:6.1%}  query {micros:8.1f} us  '
+                f'train {train:6.2f} s  bytes {nbytes / 2**20:8.1f} MiB'
+            )
+
+
+def main() -> None:
+    engrams = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for kind in ('isotropic', 'low-rank'):
+        run(engrams, kind)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Reports NumpyMmap's query latency with the search split across worker processes (ShardPool).
+
+The collection holds random 768 dimension vectors, and every run answers the same QUERIES single-embedding
+queries with n_results=K through NumpyMmap.query, so the times include the mask, the scatter of the query
+and packed mask to the workers and the merge. "shards 1" is the in-process search. Each setting's first
+query, which starts the workers and maps the files, is not timed.
+
+The speedup is bounded by the cores available (os.cpu_count() is printed) and by memory bandwidth once
+the matrix no longer fits in the CPU caches; below a few hundred thousand rows the scatter costs more
+than it saves, which is what shard_min_rows is for.
+
+Run with: python benchmarks/bench_vector_sharding.py [vectors]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+
+from engramic.resources.plugins.vector_db.numpymmap.numpymmap import NumpyMmap
+
+DIM = 768
+QUERIES = 50
+K = 10
+CHUNK = 50000
+
+
+def query(plugin: NumpyMmap, embedding: np.ndarray[Any, Any], args: dict[str, Any]) -> list[str]:
+    ret = plugin.query(
+        collection_name='main',
+        embeddings=[embedding.tolist()],
+        repo_filters=None,
+        args={'threshold': 2.0, 'n_results': K, 'shard_min_rows': 0, **args},
+        type_filters=None,
+        location_filters=None,
+    )
+    return [obj_id for obj_id, _, _ in ret['scored_set']]
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    rng = np.random.default_rng(13)
+    queries = rng.standard_normal((QUERIES, DIM)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as root:
+        os.environ['LOCAL_STORAGE_ROOT_PATH'] = root
+        plugin = NumpyMmap()
+        collection = plugin.collection['main']
+        for offset in range(0, count, CHUNK):
+            vectors = NumpyMmap._normalize(rng.standard_normal((min(CHUNK, count - offset), DIM)).astype(np.float32))
+            collection.append(vectors, f'chunk-{offset}', None, None, None, sync=False)
+
+        print(f'{count} vectors of dimension {DIM}, {QUERIES} queries, {os.cpu_count()} CPUs')
+        expected: list[list[str]] = []
+        for shards in sorted({1, 2, 4, os.cpu_count() or 1}):
+            args = {'shards': shards}
+            query(plugin, queries[0], args)
+            start = time.perf_counter()
+            found = [query(plugin, embedding, args) for embedding in queries]
+            millis = (time.perf_counter() - start) / QUERIES * 1e3
+            expected = expected or found
+            print(f'shards {shards:>3}: {millis:8.2f} ms per query  same results {found == expected}')
+
+        plugin.close(args={})
+
+
+if __name__ == '__main__':
+    main()
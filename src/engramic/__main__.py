@@ -0,0 +1,145 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Command line entry point, installed as `engramic`.
+
+    engramic maintenance [--profile NAME] [--delete] [--max-pages N] [--full-vacuum]
+    engramic calibrate-hnsw [--collection NAME] [--queries FILE] [--construction-ef LIST] [--m LIST]
+                            [--search-ef LIST] [--n-results N] [--sample N] [--limit N]
+
+The maintenance command starts a host with only the MaintenanceService, runs one pass and prints the
+orphans it found and the space it reclaimed. Without --delete nothing is removed. Run it while no other
+host is using the same local storage.
+
+The calibrate-hnsw command copies a ChromaDB collection's vectors into in-memory indexes built with each
+construction_ef and M, queries them with each search_ef and prints recall and latency, marking the
+recall/latency frontier. Queries come from a JSON lines file of {"embedding": [...], "relevant": [...]}
+records, or else are sampled stored vectors labeled with the obj_ids of their exact nearest neighbors.
+It needs chromadb and reads the local storage under LOCAL_STORAGE_ROOT_PATH.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import logging
+import sys
+
+from engramic.application.maintenance.maintenance_service import MaintenanceService
+from engramic.application.message.message_service import MessageService
+from engramic.core.host import Host
+
+# chromadb is installed with its plugin rather than with engramic, so calibrate-hnsw loads it on use.
+CALIBRATION_MODULE = 'engramic.resources.plugins.vector_db.chromadb.calibration'
+CHROMADB_MODULE = 'engramic.resources.plugins.vector_db.chromadb.chromadb'
+
+
+def emit(line: str) -> None:
+    sys.stdout.write(f'{line}\n')
+
+
+def run_maintenance(args: argparse.Namespace) -> int:
+    host = Host(args.profile, [MessageService, MaintenanceService])
+    try:
+        service = host.get_service(MaintenanceService)
+        if not isinstance(service, MaintenanceService):
+            error = f'Expected MaintenanceService, but got {type(service)}'
+            raise TypeError(error)
+
+        report = asyncio.run_coroutine_threadsafe(
+            service.run_pass(delete=args.delete, vacuum_pages=args.max_pages, full_vacuum=args.full_vacuum), host.loop
+        ).result()
+    finally:
+        host.shutdown()
+        host.wait_for_shutdown()
+
+    emit(f'Orphaned engrams:    {len(report.engram_ids)}')
+    emit(f'Orphaned metas:      {len(report.meta_ids)}')
+    emit(f'Orphaned embeddings: {len(report.embedding_ids)}')
+    for collection, obj_ids in report.vector_obj_ids.items():
+        emit(f'Orphaned vectors ({collection}): {len(obj_ids)}')
+    if not args.delete:
+        emit('Nothing deleted; pass --delete to remove orphans.')
+    emit(f'Reclaimed bytes:     {report.freed_bytes}')
+    emit(f'Free bytes left:     {report.free_bytes}')
+    return 0
+
+
+def run_calibrate_hnsw(args: argparse.Namespace) -> int:
+    calibration = importlib.import_module(CALIBRATION_MODULE)
+    chromadb = importlib.import_module(CHROMADB_MODULE)
+
+    vector_ids, obj_ids, embeddings = calibration.load_vectors(chromadb.ChromaDB().client, args.collection, args.limit)
+    if not vector_ids:
+        emit(f'Collection {args.collection} has no vectors.')
+        return 1
+
+    if args.queries:
+        queries = calibration.load_queries(args.queries)
+    else:
+        queries = calibration.sample_queries(obj_ids, embeddings, args.sample, args.n_results)
+
+    emit(f'{len(vector_ids)} vectors, {len(queries)} queries, recall@{args.n_results}')
+    points = calibration.sweep(
+        vector_ids,
+        obj_ids,
+        embeddings,
+        queries,
+        construction_efs=args.construction_ef,
+        ms=args.m,
+        search_efs=args.search_ef,
+        n_results=args.n_results,
+    )
+    best = calibration.frontier(points)
+    emit('construction_ef      M  search_ef   recall  latency ms  build s')
+    for point in points:
+        emit(
+            f'{point.construction_ef:15d} {point.m:6d} {point.search_ef:10d} {point.recall:8.1%} '
+            f'{point.latency_ms:11.2f} {point.build_seconds:8.1f}' + ('  *' if point in best else '')
+        )
+    emit('* on the recall/latency frontier')
+    return 0
+
+
+def int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='engramic')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    maintenance = commands.add_parser('maintenance', help='Find and remove orphaned data and reclaim space.')
+    maintenance.add_argument('--profile', default='standard', help='Profile whose storage to maintain.')
+    maintenance.add_argument('--delete', action='store_true', help='Delete the orphans found.')
+    maintenance.add_argument(
+        '--max-pages', type=int, default=None, help='Most free pages to vacuum (default all, 0 to skip).'
+    )
+    maintenance.add_argument(
+        '--full-vacuum', action='store_true', help='Rebuild the database file; needed once for older files.'
+    )
+
+    calibrate = commands.add_parser('calibrate-hnsw', help='Sweep ChromaDB HNSW settings for recall and latency.')
+    calibrate.add_argument('--collection', default='main', help='Collection to calibrate (main or meta).')
+    calibrate.add_argument('--queries', default=None, help='JSON lines file of labeled query embeddings.')
+    calibrate.add_argument('--construction-ef', type=int_list, default=[100, 200], help='Comma separated values.')
+    calibrate.add_argument('--m', type=int_list, default=[16, 32], help='Comma separated values.')
+    calibrate.add_argument('--search-ef', type=int_list, default=[10, 20, 50, 100, 200], help='Comma separated values.')
+    calibrate.add_argument('--n-results', type=int, default=10, help='Results per query, as in n_results.')
+    calibrate.add_argument('--sample', type=int, default=200, help='Queries to sample when --queries is not given.')
+    calibrate.add_argument('--limit', type=int, default=None, help='Most vectors to copy from the collection.')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'maintenance':
+        return run_maintenance(args)
+    if args.command == 'calibrate-hnsw':
+        return run_calibrate_hnsw(args)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,13 +16,17 @@ import tomli
 from engramic.application.codify.prompt_validate_prompt import PromptValidatePrompt
 from engramic.core import Engram, Meta, Prompt, PromptAnalysis
 from engramic.core.host import Host
-from engramic.core.interface.db import DB
 from engramic.core.metrics_tracker import MetricPacket, MetricsTracker
 from engramic.core.response import Response
 from engramic.core.retrieve_result import RetrieveResult
 from engramic.infrastructure.repository.engram_repository import EngramRepository
+from engramic.infrastructure.repository.history_repository import HistoryRepository
 from engramic.infrastructure.repository.meta_repository import MetaRepository
-from engramic.infrastructure.repository.observation_repository import ObservationRepository
+from engramic.infrastructure.repository.observation_repository import (
+    ObservationRepository,
+)
+from engramic.infrastructure.system import db_calls
+from engramic.infrastructure.system.llm_calls import submit_llm
 from engramic.infrastructure.system.plugin_manager import PluginManager
 from engramic.infrastructure.system.service import Service
 
@@ -49,6 +53,9 @@ class CodifyService(Service):
         engram_repository (EngramRepository): Repository for accessing and managing engram data.
         meta_repository (MetaRepository): Repository for associated metadata retrieval.
         observation_repository (ObservationRepository): Handles validation and normalization of observation data.
+        history_repository (HistoryRepository): Reads responses through the host's history cache.
+        vector_db_engram_plugin (dict): Vector database plugin holding engram vectors.
+        vector_db_meta_plugin (dict): Vector database plugin holding meta vectors.
         prompt (Prompt): Default prompt object used during validation.
         metrics_tracker (MetricsTracker): Tracks custom CodifyMetric metrics.
         training_mode (bool): Flag indicating whether the system is in training mode.
@@ -62,8 +69,10 @@ class CodifyService(Service):
             Initializes async components, including DB connections.
         on_codify_response(msg: dict[str, Any]) -> None:
             Handles on-demand codification requests for specific response IDs.
-        _fetch_history(response_id: str, repo_ids_filters: list[str]) -> list[dict[str, Any]]:
+        _fetch_history(response_id: str, repo_ids_filters: list[str]) -> dict[str, Any]:
             Asynchronously fetches history for a specific response ID.
+        _delete_response_vectors(response_id: str) -> None:
+            Deletes the vectors of engrams and metas from earlier codifications of a response.
         _on_fetch_history_codify(fut: Future[Any]) -> None:
             Callback that processes fetched history and triggers codification.
         on_main_prompt_complete(response_dict: dict[str, Any], *, is_on_demand: bool = False) -> None:
@@ -92,9 +101,14 @@ class CodifyService(Service):
         self.plugin_manager: PluginManager = host.plugin_manager
         self.llm_validate = self.plugin_manager.get_plugin('llm', 'validate')
         self.db_document_plugin = self.plugin_manager.get_plugin('db', 'document')
-        self.engram_repository: EngramRepository = EngramRepository(self.db_document_plugin)
-        self.meta_repository: MetaRepository = MetaRepository(self.db_document_plugin)
-        self.observation_repository: ObservationRepository = ObservationRepository(self.db_document_plugin)
+        self.engram_repository: EngramRepository = EngramRepository(self.db_document_plugin, host.repository_cache)
+        self.meta_repository: MetaRepository = MetaRepository(self.db_document_plugin, host.repository_cache)
+        self.observation_repository: ObservationRepository = ObservationRepository(
+            self.db_document_plugin, repository_cache=host.repository_cache
+        )
+        self.history_repository: HistoryRepository = HistoryRepository(self.db_document_plugin, host.history_cache)
+        self.vector_db_engram_plugin = self.plugin_manager.get_plugin('vector_db', 'engram')
+        self.vector_db_meta_plugin = self.plugin_manager.get_plugin('vector_db', 'meta')
 
         self.prompt = Prompt('Validate the llm.')
         self.metrics_tracker: MetricsTracker[CodifyMetric] = MetricsTracker[CodifyMetric]()
@@ -110,9 +124,11 @@ class CodifyService(Service):
         await super().stop()
 
     def init_async(self) -> None:
-        self.db_document_plugin['func'].connect(args=None)
         return super().init_async()
 
+    async def connect_plugins_async(self) -> None:
+        await db_calls.connect_db(self.db_document_plugin, args=self.db_document_plugin['args'])
+
     #################
     # Start codify when the user is starting from a response id
 
@@ -122,16 +138,26 @@ class CodifyService(Service):
         fut = self.run_task(self._fetch_history(response_id, repo_ids_filters))
         fut.add_done_callback(self._on_fetch_history_codify)
 
-    async def _fetch_history(self, response_id: str, repo_ids_filters: list[str]) -> list[dict[str, Any]]:
-        plugin = self.db_document_plugin
-        args = plugin['args']
-        args['repo_ids_filters'] = repo_ids_filters
-        args['history_limit'] = 1
-
-        ret_val = await asyncio.to_thread(plugin['func'].fetch, table=DB.DBTables.HISTORY, ids=[response_id], args=args)
-        history_dict: list[dict[str, Any]] = ret_val[0]
+    async def _fetch_history(self, response_id: str, repo_ids_filters: list[str]) -> dict[str, Any]:
+        history_dict: dict[str, Any] = await asyncio.to_thread(
+            self.history_repository.fetch_response, response_id, repo_ids_filters
+        )
+        await self._delete_response_vectors(response_id)
         return history_dict
 
+    async def _delete_response_vectors(self, response_id: str) -> None:
+        # Codifying a response again replaces what earlier codifications of it produced, so their vectors
+        # are deleted before the new observation is stored under the same parent.
+        engram_ids, meta_ids = await asyncio.to_thread(self.observation_repository.load_derived_ids, response_id)
+        for collection_name, plugin, obj_ids in (
+            ('main', self.vector_db_engram_plugin, engram_ids),
+            ('meta', self.vector_db_meta_plugin, meta_ids),
+        ):
+            if obj_ids:
+                await asyncio.to_thread(
+                    plugin['func'].delete, collection_name=collection_name, obj_ids=obj_ids, args=plugin['args']
+                )
+
     def _on_fetch_history_codify(self, fut: Future[Any]) -> None:
         ret = fut.result()
         response = ret['history'][0]
@@ -148,6 +174,9 @@ class CodifyService(Service):
         if __debug__:
             self.host.update_mock_data_input(self, response_dict)
 
+        if not is_on_demand:
+            self.host.history_cache.add(response_dict)
+
         prompt = Prompt(**response_dict['prompt'])
         if not prompt.training_mode:
             return
@@ -242,8 +271,8 @@ class CodifyService(Service):
         )
 
         plugin = self.llm_validate
-        validate_response = await asyncio.to_thread(
-            plugin['func'].submit,
+        validate_response = await submit_llm(
+            plugin,
             prompt=prompt,
             structured_schema=None,
             args=self.host.mock_update_args(plugin),
@@ -2,14 +2,12 @@
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
 
-from mako.template import Template
-
 from engramic.core.prompt import Prompt
 
 
 class PromptValidatePrompt(Prompt):
     def render_prompt(self) -> str:
-        return_string = Template("""
+        return_string = self.get_template("""
 Your task is to study the original_prompt and article forming long term memories called Engrams that are extracted from the original_prompt and article saving your memories as valid TOML file.
 
 You should never form Engrams from data in the <sources></sources>. That data is only provided to help you calculate relevancy and accuracy.
@@ -2,7 +2,6 @@
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
 
-import asyncio
 import json
 import logging
 import time
@@ -18,6 +17,7 @@ from engramic.core.meta import Meta
 from engramic.core.metrics_tracker import MetricPacket, MetricsTracker
 from engramic.core.observation import Observation
 from engramic.infrastructure.repository.observation_repository import ObservationRepository
+from engramic.infrastructure.system.llm_calls import gen_embeddings, submit_llm
 from engramic.infrastructure.system.service import Service
 
 if TYPE_CHECKING:
@@ -88,7 +88,7 @@ class ConsolidateService(Service):
         self.llm_gen_indices: dict[str, Any] = self.plugin_manager.get_plugin('llm', 'gen_indices')
         self.embedding_gen_embed: dict[str, Any] = self.plugin_manager.get_plugin('embedding', 'gen_embed')
         self.db_document: dict[str, Any] = self.plugin_manager.get_plugin('db', 'document')
-        self.observation_repository = ObservationRepository(self.db_document)
+        self.observation_repository = ObservationRepository(self.db_document, repository_cache=host.repository_cache)
         self.engram_builder: dict[str, Engram] = {}
         self.metrics_tracker: MetricsTracker[ConsolidateMetric] = MetricsTracker[ConsolidateMetric]()
 
@@ -132,8 +132,8 @@ class ConsolidateService(Service):
             raise ValueError(error)
 
         plugin = self.embedding_gen_embed
-        embedding_list_ret = await asyncio.to_thread(
-            plugin['func'].gen_embed,
+        embedding_list_ret = await gen_embeddings(
+            plugin,
             strings=[observation.meta.summary_full.text],
             args=self.host.mock_update_args(plugin, 0, str(observation.meta.source_ids)),
         )
@@ -196,8 +196,8 @@ class ConsolidateService(Service):
 
         response_schema = {'index_text_array': list[str]}
 
-        indices = await asyncio.to_thread(
-            plugin['func'].submit,
+        indices = await submit_llm(
+            plugin,
             prompt=prompt,
             structured_schema=response_schema,
             args=self.host.mock_update_args(plugin, index, str(tracking_id)),
@@ -259,8 +259,8 @@ class ConsolidateService(Service):
 
         plugin = self.embedding_gen_embed
 
-        embedding_list_ret = await asyncio.to_thread(
-            plugin['func'].gen_embed,
+        embedding_list_ret = await gen_embeddings(
+            plugin,
             strings=indices,
             args=self.host.mock_update_args(plugin, process_index, tracking_id),
         )
@@ -2,14 +2,12 @@
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
 
-from mako.template import Template
-
 from engramic.core.prompt import Prompt
 
 
 class PromptGenIndices(Prompt):
     def render_prompt(self) -> str:
-        return_str = Template("""
+        return_str = self.get_template("""
 Review the content and generate short yet context rich phrase indexes that can be used as an index to perform a relevance search seeking to find the content. An index should be at least 8 relevant words long.
 
 Do not make redundant indexes.
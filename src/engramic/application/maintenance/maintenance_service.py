@@ -0,0 +1,200 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Future
+from enum import Enum
+from typing import Any, ClassVar
+
+from engramic.application.maintenance.storage_maintenance import MaintenanceReport, StorageMaintenance
+from engramic.core.host import Host
+from engramic.core.metrics_tracker import MetricPacket, MetricsTracker
+from engramic.infrastructure.system import db_calls
+from engramic.infrastructure.system.service import Service
+
+
+class MaintenanceMetric(Enum):
+    PASSES_RUN = 'passes_run'
+    ORPHANS_FOUND = 'orphans_found'
+    ORPHANS_DELETED = 'orphans_deleted'
+    BYTES_RECLAIMED = 'bytes_reclaimed'
+
+
+class MaintenanceService(Service):
+    """
+    Removes orphaned documents and vectors and returns free database space while the host is idle.
+
+    Every PASS_INTERVAL seconds the service waits until no pipeline message has been seen for
+    IDLE_SECONDS, then looks for orphans with StorageMaintenance in a worker thread. Orphans are only
+    deleted once two consecutive passes have found them, so documents that are still being ingested
+    are left alone. After deleting, free pages are returned to the file system VACUUM_STEP_PAGES at a
+    time for as long as the host stays idle, each step queued behind live writes.
+
+    The engramic maintenance command runs one pass on demand through run_pass().
+
+    Attributes:
+        db_document_plugin (dict[str, Any]): The document database plugin.
+        storage_maintenance (StorageMaintenance): Finds and deletes orphans.
+        metrics_tracker (MetricsTracker): Tracks passes, orphans and reclaimed bytes.
+        last_activity (float): Monotonic time of the last pipeline message.
+        pending_report (MaintenanceReport | None): Orphans found by the last pass, awaiting confirmation.
+
+    Methods:
+        start() -> None:
+            Subscribes to pipeline activity and starts the background maintenance loop.
+        stop() -> None:
+            Ends the background maintenance loop, after any pass in progress.
+        on_activity(msg) -> None:
+            Records pipeline activity, which postpones maintenance.
+        run_pass(delete, vacuum_pages, full_vacuum) -> MaintenanceReport:
+            Coroutine that finds orphans, optionally deletes them, and vacuums the database.
+        on_acknowledge(message_in) -> None:
+            Collects current metrics and publishes service status.
+    """
+
+    PASS_INTERVAL = 600.0
+    IDLE_SECONDS = 30.0
+    VACUUM_STEP_PAGES = 256
+    ACTIVITY_TOPICS: ClassVar[tuple[Service.Topic, ...]] = (
+        Service.Topic.SUBMIT_PROMPT,
+        Service.Topic.DOCUMENT_SCAN_DOCUMENT,
+        Service.Topic.ENGRAMS_CREATED,
+        Service.Topic.META_COMPLETE,
+        Service.Topic.INDICES_INSERTED,
+        Service.Topic.STORAGE_COMMITTED,
+        Service.Topic.MAIN_PROMPT_COMPLETE,
+    )
+
+    def __init__(self, host: Host) -> None:
+        super().__init__(host)
+        plugin_manager = host.plugin_manager
+        self.db_document_plugin = plugin_manager.get_plugin('db', 'document')
+        self.storage_maintenance = StorageMaintenance(
+            self.db_document_plugin,
+            {
+                'main': plugin_manager.get_plugin('vector_db', 'engram'),
+                'meta': plugin_manager.get_plugin('vector_db', 'meta'),
+            },
+            host.repository_cache,
+        )
+        self.metrics_tracker: MetricsTracker[MaintenanceMetric] = MetricsTracker[MaintenanceMetric]()
+        self.last_activity = time.monotonic()
+        self.pending_report: MaintenanceReport | None = None
+        self._pass_lock: asyncio.Lock | None = None
+        self._stopping: asyncio.Event | None = None
+        self._loop_future: Future[Any] | None = None
+
+    async def connect_plugins_async(self) -> None:
+        self._pass_lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        await db_calls.connect_db(self.db_document_plugin, args=self.db_document_plugin['args'])
+
+    def start(self) -> None:
+        self.subscribe(Service.Topic.ACKNOWLEDGE, self.on_acknowledge)
+        for topic in MaintenanceService.ACTIVITY_TOPICS:
+            self.subscribe(topic, self.on_activity)
+        self._loop_future = self.run_background(self._maintenance_loop())
+        super().start()
+
+    async def stop(self) -> None:
+        if self._stopping is not None:
+            self._stopping.set()
+        if self._loop_future is not None:
+            await asyncio.wrap_future(self._loop_future)
+        await super().stop()
+
+    def on_activity(self, msg: Any) -> None:
+        del msg
+        self.last_activity = time.monotonic()
+
+    def _idle(self) -> bool:
+        return time.monotonic() - self.last_activity >= MaintenanceService.IDLE_SECONDS
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Sleeps for seconds or until the service stops; returns whether it is stopping."""
+        if self._stopping is None:
+            return True
+        try:
+            await asyncio.wait_for(self._stopping.wait(), seconds)
+        except TimeoutError:
+            return False
+        return True
+
+    async def _maintenance_loop(self) -> None:
+        while not await self._sleep(MaintenanceService.PASS_INTERVAL):
+            while not self._idle():
+                if await self._sleep(MaintenanceService.IDLE_SECONDS):
+                    return
+
+            try:
+                await self._background_pass()
+            except Exception:
+                logging.exception('Maintenance pass failed.')
+
+    async def _background_pass(self) -> None:
+        report = await self.run_pass(delete=False)
+        earlier, self.pending_report = self.pending_report, report
+        if earlier is None:
+            return
+
+        confirmed = report.confirmed_by(earlier)
+        if confirmed.orphan_count and self._idle():
+            await asyncio.to_thread(self.storage_maintenance.delete_orphans, confirmed)
+            self.metrics_tracker.increment(MaintenanceMetric.ORPHANS_DELETED, confirmed.orphan_count)
+            self.pending_report = None
+
+        # Vacuum in small steps and give way as soon as the pipeline is busy again.
+        while self._idle():
+            vacuumed = await asyncio.to_thread(self.storage_maintenance.vacuum, MaintenanceService.VACUUM_STEP_PAGES)
+            self.metrics_tracker.increment(MaintenanceMetric.BYTES_RECLAIMED, vacuumed['freed_bytes'])
+            if vacuumed['freed_bytes'] == 0 or vacuumed['free_bytes'] == 0:
+                break
+
+    async def run_pass(
+        self, *, delete: bool = False, vacuum_pages: int | None = 0, full_vacuum: bool = False
+    ) -> MaintenanceReport:
+        """
+        Finds orphans and, with delete, removes them, then vacuums the database.
+
+        vacuum_pages bounds the pages vacuumed (None for all free pages, 0 to skip). full_vacuum
+        rebuilds the database file instead and should only be used while nothing else is running.
+        """
+        if self._pass_lock is None:
+            error = 'MaintenanceService.run_pass called before the service connected its plugins.'
+            raise RuntimeError(error)
+
+        async with self._pass_lock:
+            report = await asyncio.to_thread(self.storage_maintenance.find_orphans)
+            self.metrics_tracker.increment(MaintenanceMetric.PASSES_RUN)
+            self.metrics_tracker.increment(MaintenanceMetric.ORPHANS_FOUND, report.orphan_count)
+
+            if delete and report.orphan_count:
+                await asyncio.to_thread(self.storage_maintenance.delete_orphans, report)
+                self.metrics_tracker.increment(MaintenanceMetric.ORPHANS_DELETED, report.orphan_count)
+
+            if full_vacuum or vacuum_pages != 0:
+                vacuumed = await asyncio.to_thread(self.storage_maintenance.vacuum, vacuum_pages, full=full_vacuum)
+                report.freed_bytes = vacuumed['freed_bytes']
+                report.free_bytes = vacuumed['free_bytes']
+                self.metrics_tracker.increment(MaintenanceMetric.BYTES_RECLAIMED, report.freed_bytes)
+
+        logging.info(
+            'Maintenance pass found %s orphans%s and reclaimed %s bytes.',
+            report.orphan_count,
+            ' (deleted)' if report.deleted else '',
+            report.freed_bytes,
+        )
+        return report
+
+    def on_acknowledge(self, message_in: str) -> None:
+        del message_in
+
+        metrics_packet: MetricPacket = self.metrics_tracker.get_and_reset_packet()
+
+        self.send_message_async(
+            Service.Topic.STATUS,
+            {'id': self.id, 'name': self.__class__.__name__, 'timestamp': time.time(), 'metrics': metrics_packet},
+        )
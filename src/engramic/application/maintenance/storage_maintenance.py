@@ -0,0 +1,199 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, ClassVar
+
+from engramic.core.interface.db import DB
+from engramic.core.meta import Meta
+from engramic.infrastructure.repository.embedding_repository import EmbeddingRepository
+from engramic.infrastructure.repository.engram_repository import EngramRepository
+from engramic.infrastructure.repository.meta_repository import MetaRepository
+from engramic.infrastructure.system.plugin_manager import has_impl
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from engramic.infrastructure.repository.repository_cache import RepositoryCache
+
+
+@dataclass(slots=True)
+class MaintenanceReport:
+    """
+    Orphans found by one maintenance pass, and the space reclaimed after it.
+
+    Attributes:
+        engram_ids (list[str]): Engrams whose every meta belongs to a deleted or rescanned document.
+        meta_ids (list[str]): Metas of deleted or rescanned documents, and metas no engram lists.
+        embedding_ids (list[str]): Embedding rows whose owning engram or meta is gone.
+        vector_obj_ids (dict[str, list[str]]): Per vector collection, obj_ids with no engram or meta.
+        deleted (bool): Whether the orphans were deleted.
+        freed_bytes (int): Bytes the database file shrank by.
+        free_bytes (int): Bytes still free inside the database file.
+    """
+
+    engram_ids: list[str] = field(default_factory=list)
+    meta_ids: list[str] = field(default_factory=list)
+    embedding_ids: list[str] = field(default_factory=list)
+    vector_obj_ids: dict[str, list[str]] = field(default_factory=dict)
+    deleted: bool = False
+    freed_bytes: int = 0
+    free_bytes: int = 0
+
+    @property
+    def orphan_count(self) -> int:
+        vectors = sum(len(obj_ids) for obj_ids in self.vector_obj_ids.values())
+        return len(self.engram_ids) + len(self.meta_ids) + len(self.embedding_ids) + vectors
+
+    def confirmed_by(self, earlier: MaintenanceReport) -> MaintenanceReport:
+        """Returns the orphans found by both this report and an earlier one."""
+
+        def both(now: list[str], before: list[str]) -> list[str]:
+            seen = set(before)
+            return [orphan_id for orphan_id in now if orphan_id in seen]
+
+        return MaintenanceReport(
+            engram_ids=both(self.engram_ids, earlier.engram_ids),
+            meta_ids=both(self.meta_ids, earlier.meta_ids),
+            embedding_ids=both(self.embedding_ids, earlier.embedding_ids),
+            vector_obj_ids={
+                collection: both(obj_ids, earlier.vector_obj_ids.get(collection, []))
+                for collection, obj_ids in self.vector_obj_ids.items()
+            },
+        )
+
+
+class StorageMaintenance:
+    """
+    Finds and removes documents and vectors that nothing live refers to any more.
+
+    A document meta is stale when a newer scan of its document has stored engrams, or when it came
+    from a repository and its document has been deleted. An engram is an orphan when it lists metas
+    and all of them are stale, so engrams without document metas (responses, lessons, engrams loaded
+    from files) are never removed. A meta is an orphan when it is stale or no engram lists it. Embedding
+    rows and vectors are orphans when the engram or meta they belong to is missing or an orphan.
+
+    Every method blocks on the database and vector plugins, so services call them from a worker thread.
+    A single pass can see a document half way through ingestion (vectors stored before their engram is),
+    so callers should only delete orphans that two passes, some time apart, agree on.
+
+    Attributes:
+        db_plugin (dict[str, Any]): The document database plugin.
+        vector_plugins (dict[str, dict[str, Any]]): Vector database plugins keyed by the collection they hold.
+        engram_repository (EngramRepository): Deletes orphaned engrams.
+        meta_repository (MetaRepository): Deletes orphaned metas.
+        embedding_repository (EmbeddingRepository): Deletes orphaned embedding rows.
+
+    Methods:
+        find_orphans() -> MaintenanceReport:
+            Reads ids from every table and collection and returns the orphans among them.
+        delete_orphans(report) -> None:
+            Deletes the orphans in a report, vectors first so searches stop returning them.
+        vacuum(max_pages, full) -> dict[str, int]:
+            Returns free database pages to the file system, when the plugin supports it.
+    """
+
+    PAGE_SIZE = 1000
+    COLLECTION_TABLES: ClassVar[dict[str, DB.DBTables]] = {'main': DB.DBTables.ENGRAM, 'meta': DB.DBTables.META}
+
+    def __init__(
+        self,
+        db_plugin: dict[str, Any],
+        vector_plugins: dict[str, dict[str, Any]] | None = None,
+        cache: RepositoryCache | None = None,
+    ) -> None:
+        self.db_plugin = db_plugin
+        self.vector_plugins = {name: plugin for name, plugin in (vector_plugins or {}).items() if plugin is not None}
+        self.engram_repository = EngramRepository(db_plugin, cache)
+        self.meta_repository = MetaRepository(db_plugin, cache)
+        self.embedding_repository = EmbeddingRepository(db_plugin)
+
+    def find_orphans(self) -> MaintenanceReport:
+        document_ids = {doc['id'] for doc in self._iter_table(DB.DBTables.DOCUMENT, ['id'])}
+        metas = list(self._iter_table(DB.DBTables.META, ['id', 'type', 'parent_id', 'repo_ids']))
+        engrams = list(self._iter_table(DB.DBTables.ENGRAM, ['id', 'meta_ids', 'created_date']))
+
+        # A meta is as new as the newest engram stored under it.
+        meta_dates: dict[str, float] = {}
+        for engram in engrams:
+            for meta_id in engram['meta_ids'] or []:
+                meta_dates[meta_id] = max(meta_dates.get(meta_id, 0.0), engram['created_date'] or 0.0)
+
+        stale = self._stale_metas(metas, document_ids, meta_dates)
+        report = MaintenanceReport()
+        report.engram_ids = [
+            engram['id'] for engram in engrams if engram['meta_ids'] and stale.issuperset(engram['meta_ids'])
+        ]
+        report.meta_ids = [meta['id'] for meta in metas if meta['id'] in stale or meta['id'] not in meta_dates]
+
+        live_engrams = {engram['id'] for engram in engrams}.difference(report.engram_ids)
+        live_metas = {meta['id'] for meta in metas}.difference(report.meta_ids)
+        report.embedding_ids = [
+            row['id']
+            for row in self._iter_table(DB.DBTables.EMBEDDING, ['id', 'owner_id'])
+            if row['owner_id'] is not None and row['owner_id'] not in live_engrams and row['owner_id'] not in live_metas
+        ]
+
+        live = {DB.DBTables.ENGRAM: live_engrams, DB.DBTables.META: live_metas}
+        for collection, plugin in self.vector_plugins.items():
+            if not has_impl(plugin['func'], 'list_obj_ids'):
+                logging.debug('Vector plugin for %s cannot list its vectors; skipping it.', collection)
+                continue
+            obj_ids = plugin['func'].list_obj_ids(collection_name=collection, args=plugin['args'])[0]
+            table = StorageMaintenance.COLLECTION_TABLES[collection]
+            report.vector_obj_ids[collection] = [obj_id for obj_id in obj_ids if obj_id not in live[table]]
+
+        return report
+
+    def _stale_metas(
+        self, metas: list[dict[str, Any]], document_ids: set[str], meta_dates: dict[str, float]
+    ) -> set[str]:
+        by_document: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for meta in metas:
+            if meta['type'] == Meta.SourceType.DOCUMENT.value and meta['parent_id'] is not None:
+                by_document[meta['parent_id']].append(meta)
+
+        stale: set[str] = set()
+        for document_id, document_metas in by_document.items():
+            # Only repository files are stored as documents, so a missing one was deleted.
+            deleted = document_id not in document_ids
+            newest = max((meta_dates.get(meta['id'], 0.0) for meta in document_metas), default=0.0)
+            for meta in document_metas:
+                if (deleted and meta['repo_ids']) or meta_dates.get(meta['id'], 0.0) < newest:
+                    stale.add(meta['id'])
+        return stale
+
+    def delete_orphans(self, report: MaintenanceReport) -> None:
+        for collection, obj_ids in report.vector_obj_ids.items():
+            plugin = self.vector_plugins[collection]
+            if obj_ids and has_impl(plugin['func'], 'delete'):
+                plugin['func'].delete(collection_name=collection, obj_ids=obj_ids, args=plugin['args'])
+
+        if report.engram_ids:
+            self.engram_repository.delete_engrams(report.engram_ids)
+        if report.meta_ids:
+            self.meta_repository.delete_batch(report.meta_ids)
+        self.embedding_repository.delete(report.embedding_ids)
+        report.deleted = True
+
+    def vacuum(self, max_pages: int | None = None, *, full: bool = False) -> dict[str, int]:
+        if not has_impl(self.db_plugin['func'], 'vacuum'):
+            return {'freed_bytes': 0, 'free_bytes': 0}
+
+        args: dict[str, Any] = {'full': full}
+        if max_pages is not None:
+            args['max_pages'] = max_pages
+        ret: dict[str, int] = self.db_plugin['func'].vacuum(args=args)[0]
+        return ret
+
+    def _iter_table(self, table: DB.DBTables, fields: list[str]) -> Iterator[dict[str, Any]]:
+        pages: Iterator[list[dict[str, Any]]] = self.db_plugin['func'].fetch_iter(
+            table=table, fields=fields, page_size=StorageMaintenance.PAGE_SIZE, after_id=None, args=None
+        )[0]
+        for page in pages:
+            yield from page
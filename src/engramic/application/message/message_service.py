@@ -43,7 +43,9 @@ class MessageService(BaseMessageService):
         end_profiler(data: dict[Any, Any]) -> None:
             Stops the profiler and dumps results to a profile file.
         on_acknowledge(message_in: str) -> None:
-            Sends a metric snapshot and service status in response to ACKNOWLEDGE messages.
+            Sends a metric snapshot and service status in response to ACKNOWLEDGE messages, followed by the
+            LLM governor's per-model queue time, retry and hedge counts, and the shared repository cache's
+            hit, miss and eviction counts.
     """
 
     def __init__(self, host: Host) -> None:
@@ -88,3 +90,23 @@ class MessageService(BaseMessageService):
             Service.Topic.STATUS,
             {'id': self.id, 'name': self.__class__.__name__, 'timestamp': time.time(), 'metrics': metrics_packet},
         )
+
+        governor_packet: MetricPacket = self.host.plugin_manager.governor.get_and_reset_packet()
+
+        if governor_packet['metrics']:
+            self.send_message_async(
+                Service.Topic.STATUS,
+                {'id': f'{self.id}-governor', 'name': 'Governor', 'timestamp': time.time(), 'metrics': governor_packet},
+            )
+
+        cache_packet: MetricPacket = self.host.repository_cache.get_and_reset_packet()
+
+        self.send_message_async(
+            Service.Topic.STATUS,
+            {
+                'id': f'{self.id}-repository-cache',
+                'name': 'RepositoryCache',
+                'timestamp': time.time(),
+                'metrics': cache_packet,
+            },
+        )
@@ -6,6 +6,7 @@
 Provides services for generating educational content and lessons from documents.
 """
 
+import asyncio
 import logging
 import uuid
 from dataclasses import asdict
@@ -27,6 +28,7 @@ class ProcessService(Service):
         db_plugin = host.plugin_manager.get_plugin('db', 'document')
         self.process_repository: ProcessRepository = ProcessRepository(db_plugin)
         self.active_processes: dict[str, Process] = {}
+        self.save_lock = asyncio.Lock()
 
         self.files_and_folders_by_repo: dict[str, list[Any]] = {}
         self.file_folder_trees: dict[str, Any] = {}
@@ -44,9 +46,8 @@ class ProcessService(Service):
         self.subscribe(Service.Topic.REPO_FILE_FOLDER_TREE_UPDATED, self._on_repos_file_folder_tree_updated)
 
         # update external systems
-        ret_val = self.process_repository.load_most_recent(10)
-
         async def send_message() -> None:
+            ret_val = await self.process_repository.load_most_recent_async(10)
             self.send_message_async(
                 Service.Topic.PROCESS_RECENT_PROGRESS_UPDATED, {'recent_progress_list': ret_val['process']}
             )
@@ -64,6 +65,7 @@ class ProcessService(Service):
         client_id = msg.get('client_id')
         thinking_level = msg.get('thinking_level')
         target_single_file = msg.get('target_single_file')
+        search_profile = msg.get('search_profile')
 
         input_prompt_obj = Prompt(
             prompt_str=input_prompt,
@@ -73,10 +75,11 @@ class ProcessService(Service):
             conversation_id=conversation_id,
             thinking_level=thinking_level,
             target_single_file=target_single_file,
+            search_profile=search_profile,
         )
 
         process = self.build_process(process_type, input_prompt_obj, client_id)
-        self.process_repository.save(process)
+        self._save_process(process)
         process.start_process(self)
 
     def _on_repo_file_found(self, msg: dict[str, Any]) -> None:
@@ -89,7 +92,7 @@ class ProcessService(Service):
             raise RuntimeError(error)
 
         self.active_processes[process.current_tracking_id] = process
-        self.process_repository.save(process)
+        self._save_process(process)
         process.start_process(self)
 
     def _on_run_process(self, msg: dict[str, Any]) -> None:
@@ -98,9 +101,19 @@ class ProcessService(Service):
         process = self.build_process(process_type, input_prompt)
         process.current_tracking_id = str(uuid.uuid4())
         self.active_processes[process.current_tracking_id] = process
-        self.process_repository.save(process)
+        self._save_process(process)
         process.start_process(self)
 
+    def _save_process(self, process: Process) -> None:
+        write = self.process_repository.save_async(process)
+
+        async def save() -> None:
+            # Tasks start in the order they were created, so the lock keeps saves of a process in order.
+            async with self.save_lock:
+                await write
+
+        self.run_task(save())
+
     def build_process(
         self, process_name: str | None, input_prompt: Prompt | None, client_id: str | None = None
     ) -> Process:
@@ -173,7 +186,7 @@ class ProcessService(Service):
                 if len(process.pass_array) == process.current_pass:
                     process.status = Process.Status.DONE.value
                     process.percent_complete = 1
-                    self.process_repository.save(process)
+                    self._save_process(process)
                 else:
                     process.percent_complete = process.current_pass / len(process.pass_array)
                     del self.active_processes[tracking_id]
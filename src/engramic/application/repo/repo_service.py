@@ -10,6 +10,7 @@ for projects managed by Engramic.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
@@ -50,9 +51,12 @@ class RepoService(Service):
         document_repository (DocumentRepository): Repository for document storage and retrieval.
         engram_repository (EngramRepository): Repository for engram storage and retrieval.
         observation_repository (ObservationRepository): Repository for observation storage and retrieval.
+        vector_db_engram_plugin (dict): Vector database plugin holding engram vectors.
+        vector_db_meta_plugin (dict): Vector database plugin holding meta vectors.
         repos (dict[str, Repo]): Mapping of repository IDs to Repo objects.
         file_node_index (dict[str, Any]): Index of all files by document ID.
         submitted_documents (set[str]): Set of document IDs that have been submitted for processing.
+        unsynced_documents (list[FileNode]): PDF nodes found by the last scan and not yet checked against storage.
 
     Methods:
         start() -> None:
@@ -78,11 +82,16 @@ class RepoService(Service):
         self.plugin_manager: PluginManager = host.plugin_manager
         self.db_document_plugin = self.plugin_manager.get_plugin('db', 'document')
         self.document_repository: DocumentRepository = DocumentRepository(self.db_document_plugin)
-        self.engram_repository: EngramRepository = EngramRepository(self.db_document_plugin)
-        self.observation_repository: ObservationRepository = ObservationRepository(self.db_document_plugin)
+        self.engram_repository: EngramRepository = EngramRepository(self.db_document_plugin, host.repository_cache)
+        self.observation_repository: ObservationRepository = ObservationRepository(
+            self.db_document_plugin, repository_cache=host.repository_cache
+        )
+        self.vector_db_engram_plugin = self.plugin_manager.get_plugin('vector_db', 'engram')
+        self.vector_db_meta_plugin = self.plugin_manager.get_plugin('vector_db', 'meta')
         self.repos: dict[str, Repo] = {}  # memory copy of all folders
         self.file_node_index: dict[str, Any] = {}  # memory copy of all files and folders across the system
         self.submitted_documents: set[str] = set()
+        self.unsynced_documents: list[FileNode] = []
 
     def start(self) -> None:
         """
@@ -123,7 +132,8 @@ class RepoService(Service):
             else:
                 # Delete file
                 file_path.unlink()  # replace this with a call to S3 or similar.
-                self.document_repository.delete(file_node.id)
+                self.run_task(self.document_repository.delete_async(file_node.id))
+                self.run_task(self._delete_document_vectors(file_node.id))
 
         if file_node.repo_id is None:
             error = 'Filenode.repo_id is None but not expected to be.'
@@ -138,9 +148,9 @@ class RepoService(Service):
         file_dirs = msg['file_dirs']
 
         file_node = FileNode(FileNode.Root.DATA.value, file_name, FileNode.Type.FILE.value, file_dirs)
-        self.document_repository.save(file_node)
 
         async def send_message() -> None:
+            await self.document_repository.save_batch_async([file_node])
             self.send_message_async(Service.Topic.REPO_UPDATE_REPOS, {'repo_id': repo_id})
 
         self.run_task(send_message())
@@ -172,14 +182,43 @@ class RepoService(Service):
             if sub_id in self.file_node_index:
                 document = self.file_node_index[sub_id]
 
-                self.send_message_async(
-                    Service.Topic.DOCUMENT_SCAN_DOCUMENT, {'document': asdict(document), 'overwrite': overwrite}
-                )
+                if overwrite:
+                    self.run_task(self._rescan_document(document))
+                else:
+                    self.send_message_async(
+                        Service.Topic.DOCUMENT_SCAN_DOCUMENT, {'document': asdict(document), 'overwrite': overwrite}
+                    )
                 self.submitted_documents.add(document.id)
             else:
                 error = f'Scan ID called on id {sub_id} but document is not found.'
                 logging.error(error)
 
+    async def _rescan_document(self, document: FileNode) -> None:
+        # The earlier scan's vectors are looked up before the new scan can store observations of its own.
+        await self._delete_document_vectors(document.id)
+        self.send_message_async(Service.Topic.DOCUMENT_SCAN_DOCUMENT, {'document': asdict(document), 'overwrite': True})
+
+    async def _delete_document_vectors(self, document_id: str) -> None:
+        """
+        Deletes the vectors of every engram and meta scanned from a document.
+
+        The engram and meta documents are left in place; the maintenance service removes them once
+        their document is gone or has been scanned again.
+
+        Args:
+            document_id (str): ID of the document whose vectors to delete.
+        """
+        engram_ids, meta_ids = await asyncio.to_thread(self.observation_repository.load_derived_ids, document_id)
+        for collection_name, plugin, obj_ids in (
+            ('main', self.vector_db_engram_plugin, engram_ids),
+            ('meta', self.vector_db_meta_plugin, meta_ids),
+        ):
+            if obj_ids:
+                await asyncio.to_thread(
+                    plugin['func'].delete, collection_name=collection_name, obj_ids=obj_ids, args=plugin['args']
+                )
+        logging.debug('Deleted vectors of %s engrams of document %s.', len(engram_ids), document_id)
+
     def _load_repository(self, folder_path: Path) -> tuple[str, bool]:
         """
         Loads the repository ID from a .repo file.
@@ -337,6 +376,8 @@ id = "{repo_id}"
             repo_files_and_folders (dict[str, Any], optional): Pre-computed files and folders dict.
         """
 
+        await self._sync_documents()
+
         # If repo_files_and_folders is not provided, traverse the tree to collect it
         repo_files_and_folders = self._traverse_file_folder_tree(file_folder_tree)
 
@@ -540,24 +581,34 @@ id = "{repo_id}"
             repo_id=repo_id,
         )
 
-        # Check to see if the document has been loaded before.
-        fetched_doc: dict[str, Any] = self.document_repository.load(doc.id)
+        # Checked against storage in one query once the scan is done, see _sync_documents.
+        self.unsynced_documents.append(doc)
+
+        return doc
+
+    async def _sync_documents(self) -> None:
+        """Swaps scanned PDF nodes for their stored versions, and saves and announces the new ones."""
+        documents, self.unsynced_documents = self.unsynced_documents, []
+        stored = {
+            stored_doc['id']: FileNode(**stored_doc)
+            for stored_doc in await self.document_repository.load_batch_async([doc.id for doc in documents])
+        }
 
         # If it has been found before, then use that version.
-        if len(fetched_doc['document']) != 0:
-            doc = FileNode(**fetched_doc['document'][0])
-        else:
-            self.document_repository.save(doc)
-
-            # TODO: Need to make this run once.
-            async def send_message() -> None:
-                self.send_message_async(
-                    Service.Topic.REPO_FILE_FOUND, {'document_id': doc.id, 'tracking_id': doc.tracking_id}
-                )
+        new_documents = []
+        for doc in documents:
+            if doc.id in stored:
+                self.file_node_index[doc.id] = stored[doc.id]
+            else:
+                new_documents.append(doc)
 
-            self.run_task(send_message())
+        await self.document_repository.save_batch_async(new_documents)
 
-        return doc
+        # TODO: Need to make this run once.
+        for doc in new_documents:
+            self.send_message_async(
+                Service.Topic.REPO_FILE_FOUND, {'document_id': doc.id, 'tracking_id': doc.tracking_id}
+            )
 
     def _load_engram_file(self, system_repo_root: str, file_list: list[str], file_name: str) -> None:
         """
@@ -571,29 +622,28 @@ id = "{repo_id}"
                 engram_data = tomli.load(f)
 
             engram_id = engram_data['engram'][0]['id']
-            engram = self.engram_repository.fetch_engram(engram_id)
+            engram_data.update({'parent_id': None})
+            engram_data.update({'tracking_id': ''})
 
-            if engram is None:
-                logging.info('Loaded .engram file: %s', file_path)
-                logging.debug('Engram data: %s', engram_data)
-                engram_data.update({'parent_id': None})
-                engram_data.update({'tracking_id': ''})
+            engram_data['engram'][0]['context'] = json.loads(engram_data['engram'][0]['context'])
 
-                engram_data['engram'][0]['context'] = json.loads(engram_data['engram'][0]['context'])
+            observation = self.observation_repository.load_toml_dict(engram_data)
 
-                observation = self.observation_repository.load_toml_dict(engram_data)
+            async def send_message() -> Observation | None:
+                # Files whose engram is already stored were loaded by an earlier scan.
+                if await self.engram_repository.fetch_engram_async(engram_id) is not None:
+                    return None
 
-                async def send_message() -> Observation:
-                    self.send_message_async(
-                        Service.Topic.OBSERVATION_CREATED, {'id': observation.id, 'parent_id': None}
-                    )
+                logging.info('Loaded .engram file: %s', file_path)
+                logging.debug('Engram data: %s', engram_data)
+                self.send_message_async(Service.Topic.OBSERVATION_CREATED, {'id': observation.id, 'parent_id': None})
 
-                    return observation
+                return observation
 
-                task = self.run_task(send_message())
-                task.add_done_callback(self._on_observation_created_complete)
+            task = self.run_task(send_message())
+            task.add_done_callback(self._on_observation_created_complete)
 
-                # TODO: Process the loaded TOML data according to .engram file schema
+            # TODO: Process the loaded TOML data according to .engram file schema
 
         except (FileNotFoundError, PermissionError):
             logging.warning("Could not read .engram file '%s'", file_path)
@@ -604,7 +654,8 @@ id = "{repo_id}"
 
     def _on_observation_created_complete(self, ret: Future[Any]) -> None:
         observation = ret.result()
-        self.send_message_async(Service.Topic.OBSERVATION_COMPLETE, asdict(observation))
+        if observation is not None:
+            self.send_message_async(Service.Topic.OBSERVATION_COMPLETE, asdict(observation))
 
     def _on_update_repo_files_complete(self, ret: Future[Any]) -> None:
         """
@@ -6,7 +6,6 @@ import logging
 from datetime import datetime, timezone
 
 from mako.exceptions import text_error_template
-from mako.template import Template
 
 from engramic.core.prompt import Prompt
 
@@ -15,7 +14,7 @@ class PromptMainPrompt(Prompt):
     def render_prompt(self) -> str:
         render_string = ''  # Initialize with default value
         try:
-            render_string = Template("""
+            render_string = self.get_template("""
 Your name is Engramic.
 
 Date is ${timestamp}
@@ -13,12 +13,14 @@ from typing import TYPE_CHECKING, Any
 from engramic.application.response.prompt_main_prompt import PromptMainPrompt
 from engramic.core import Engram, PromptAnalysis
 from engramic.core.host import Host
-from engramic.core.interface.db import DB
 from engramic.core.metrics_tracker import MetricPacket, MetricsTracker
 from engramic.core.prompt import Prompt
 from engramic.core.response import Response
 from engramic.core.retrieve_result import RetrieveResult
 from engramic.infrastructure.repository.engram_repository import EngramRepository
+from engramic.infrastructure.repository.history_repository import HistoryRepository
+from engramic.infrastructure.system import db_calls
+from engramic.infrastructure.system.llm_calls import stream_llm, submit_llm
 from engramic.infrastructure.system.service import Service
 from engramic.infrastructure.system.websocket_manager import WebsocketManager
 
@@ -78,7 +80,8 @@ class ResponseService(Service):
         self.plugin_manager: PluginManager = host.plugin_manager
         self.web_socket_manager: WebsocketManager = WebsocketManager(host)
         self.db_document_plugin = self.plugin_manager.get_plugin('db', 'document')
-        self.engram_repository: EngramRepository = EngramRepository(self.db_document_plugin)
+        self.engram_repository: EngramRepository = EngramRepository(self.db_document_plugin, host.repository_cache)
+        self.history_repository: HistoryRepository = HistoryRepository(self.db_document_plugin, host.history_cache)
         self.llm_main = self.plugin_manager.get_plugin('llm', 'response_main')
         self.metrics_tracker: MetricsTracker[ResponseMetric] = MetricsTracker[ResponseMetric]()
         self.repos: dict[str, Any] = {}
@@ -98,9 +101,11 @@ class ResponseService(Service):
         await self.web_socket_manager.shutdown()
 
     def init_async(self) -> None:
-        self.db_document_plugin['func'].connect(args=None)
         return super().init_async()
 
+    async def connect_plugins_async(self) -> None:
+        await db_calls.connect_db(self.db_document_plugin, args=self.db_document_plugin['args'])
+
     def _on_repo_directory_scanned(self, msg: dict[str, Any]) -> None:
         self.repos = msg['repos']
 
@@ -134,14 +139,9 @@ class ResponseService(Service):
     """
 
     async def _fetch_history(self, prompt: Prompt) -> dict[str, Any]:
-        plugin = self.db_document_plugin
-        args = plugin['args']
-        args['history_limit'] = 3
-        args['repo_ids_filters'] = prompt.repo_ids_filters
-        args['conversation_id'] = prompt.conversation_id
-
-        ret_val = await asyncio.to_thread(plugin['func'].fetch, table=DB.DBTables.HISTORY, ids=[], args=args)
-        history: dict[str, Any] = ret_val[0]
+        history: dict[str, Any] = await asyncio.to_thread(
+            self.history_repository.fetch_history, prompt.conversation_id, prompt.repo_ids_filters, 3
+        )
         return history
 
     async def _fetch_retrieval(
@@ -227,19 +227,30 @@ class ResponseService(Service):
         if prompt_in.thinking_level:
             args['thinking_budget'] = prompt_in.thinking_level
 
+        route_hints = {
+            'response_length': (retrieve_result.analysis or {}).get('response_length'),
+            'user_prompt_type': (retrieve_result.analysis or {}).get('user_prompt_type'),
+            'thinking_level': prompt_in.thinking_level or 0,
+        }
+
         if prompt_in.is_lesson:
-            response = await asyncio.to_thread(
-                plugin['func'].submit, prompt=prompt, args=args, images=None, structured_schema=None
+            response = await submit_llm(
+                plugin, prompt=prompt, args=args, images=None, structured_schema=None, route_hints=route_hints
             )
         else:
             args.update({'response_id': response_id})
             args.update({'repo_ids_filters': prompt_in.repo_ids_filters})
-            response = await asyncio.to_thread(
-                plugin['func'].submit_streaming,
-                prompt=prompt,
-                websocket_manager=self.web_socket_manager,
-                args=args,
-            )
+            self.web_socket_manager.register_stream(response_id, prompt_in.conversation_id, prompt_in.client_id)
+            try:
+                response = await stream_llm(
+                    plugin,
+                    prompt=prompt,
+                    websocket_manager=self.web_socket_manager,
+                    args=args,
+                    route_hints=route_hints,
+                )
+            finally:
+                self.web_socket_manager.end_stream(response_id)
 
         if __debug__:
             main_prompt = prompt.render_prompt()
@@ -249,9 +260,7 @@ class ResponseService(Service):
 
         self.host.update_mock_data(self.llm_main, response)
 
-        model = ''
-        if plugin['args'].get('model'):
-            model = plugin['args']['model']
+        model = response[0].get('model') or plugin['args'].get('model') or ''
 
         response = response[0]['llm_response'].replace('$', 'USD ').replace('<context>', '').replace('</context>', '')
 
@@ -263,10 +272,12 @@ class ResponseService(Service):
         result = fut.result()
         self.metrics_tracker.increment(ResponseMetric.MAIN_PROMPTS_RUN)
 
-        self.send_message_async(Service.Topic.MAIN_PROMPT_COMPLETE, asdict(result))
+        response_dict = asdict(result)
+        self.host.history_cache.add(response_dict)
+        self.send_message_async(Service.Topic.MAIN_PROMPT_COMPLETE, response_dict)
 
         if __debug__:
-            self.host.update_mock_data_output(self, asdict(result))
+            self.host.update_mock_data_output(self, response_dict)
 
     def _on_submit_response(self, msg: dict[str, Any]) -> None:
         user_response = msg['user_response']
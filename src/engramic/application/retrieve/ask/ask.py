@@ -16,8 +16,8 @@ from engramic.application.retrieve.ask.prompt_gen_conversation import PromptGenC
 from engramic.application.retrieve.ask.prompt_gen_indices import PromptGenIndices
 from engramic.application.retrieve.ask.prompt_gen_query import PromptGenQuery
 from engramic.core import Meta, Prompt, PromptAnalysis, Retrieval
-from engramic.core.interface.db import DB
 from engramic.core.retrieve_result import RetrieveResult
+from engramic.infrastructure.system.llm_calls import gen_embeddings, submit_llm
 from engramic.infrastructure.system.plugin_manager import PluginManager  # noqa: TCH001
 from engramic.infrastructure.system.service import Service
 
@@ -49,7 +49,7 @@ class Ask(Retrieval):
     Methods:
         get_sources() -> None:
             Initiates the async pipeline for directional memory retrieval.
-        _fetch_history() -> list[dict[str, Any]]:
+        _fetch_history() -> dict[str, Any]:
             Retrieves prior conversation history from the document database.
         on_fetch_history_complete(fut: Future[Any]) -> None:
             Processes history results and initiates conversation direction analysis.
@@ -79,7 +79,9 @@ class Ask(Retrieval):
             Converts generated index phrases into vector embeddings.
         on_indices_embeddings_generated(fut: Future[Any]) -> None:
             Processes index embeddings and initiates final vector database query.
-        _query_index_db(embeddings: list[list[float]]) -> set[str]:
+        _search_args(args: dict[str, Any]) -> dict[str, Any]:
+            Applies the prompt's search profile overrides to a vector database plugin's args.
+        _query_index_db(embeddings: list[list[float]]) -> dict[str, Any]:
             Searches main vector database to identify related engram IDs.
         on_query_index_db(fut: Future[Any]) -> None:
             Finalizes retrieval results and sends completion message.
@@ -129,15 +131,13 @@ class Ask(Retrieval):
     Fetches related domain knowledge based on the prompt intent.
     """
 
-    async def _fetch_history(self) -> list[dict[str, Any]]:
-        plugin = self.prompt_db_document_plugin
-        args = plugin['args']
-        args['history_limit'] = 1
-        args['repo_ids_filters'] = self.prompt.repo_ids_filters
-        args['conversation_id'] = self.prompt.conversation_id
-
-        ret_val = await asyncio.to_thread(plugin['func'].fetch, table=DB.DBTables.HISTORY, ids=[], args=args)
-        history_dict: list[dict[str, Any]] = ret_val[0]
+    async def _fetch_history(self) -> dict[str, Any]:
+        history_dict: dict[str, Any] = await asyncio.to_thread(
+            self.service.history_repository.fetch_history,
+            self.prompt.conversation_id,
+            self.prompt.repo_ids_filters,
+            1,
+        )
         return history_dict
 
     async def _gen_query(self) -> None:
@@ -164,8 +164,8 @@ class Ask(Retrieval):
             'location': list[str],
         }
 
-        ret = await asyncio.to_thread(
-            plugin['func'].submit,
+        ret = await submit_llm(
+            plugin,
             prompt=query_gen,
             structured_schema=structured_schema,
             args=self.service.host.mock_update_args(plugin),
@@ -226,8 +226,8 @@ class Ask(Retrieval):
             'working_memory_step_4': str,
         }
 
-        ret = await asyncio.to_thread(
-            plugin['func'].submit,
+        ret = await submit_llm(
+            plugin,
             prompt=prompt_gen,
             structured_schema=structured_schema,
             args=self.service.host.mock_update_args(plugin),
@@ -261,8 +261,8 @@ class Ask(Retrieval):
     async def _embed_gen_direction(self) -> list[float]:
         plugin = self.embeddings_gen_embed
 
-        ret = await asyncio.to_thread(
-            plugin['func'].gen_embed,
+        ret = await gen_embeddings(
+            plugin,
             strings=[self.conversation_direction['current_user_intent']],
             args=self.service.host.mock_update_args(plugin),
         )
@@ -294,7 +294,7 @@ class Ask(Retrieval):
             repo_filters=self.prompt.repo_ids_filters,
             type_filters=self.type_filters,
             location_filters=self.locations,
-            args=self.service.host.mock_update_args(plugin),
+            args=self._search_args(self.service.host.mock_update_args(plugin)),
         )
 
         self.service.host.update_mock_data(plugin, ret)
@@ -309,7 +309,7 @@ class Ask(Retrieval):
         meta_fetch_step.add_done_callback(self.on_fetch_direction_meta_complete)
 
     async def _fetch_direction_meta(self, meta_id: list[str]) -> list[Meta]:
-        meta_list = self.service.meta_repository.load_batch(meta_id)
+        meta_list = await asyncio.to_thread(self.service.meta_repository.load_batch, meta_id)
 
         if __debug__:
             dict_meta = [meta.summary_full.text if meta.summary_full is not None else '' for meta in meta_list]
@@ -347,8 +347,8 @@ class Ask(Retrieval):
             'thinking_steps': str,
             'remember_request': bool,
         }
-        ret = await asyncio.to_thread(
-            plugin['func'].submit,
+        ret = await submit_llm(
+            plugin,
             prompt=prompt,
             structured_schema=structured_response,
             args=self.service.host.mock_update_args(plugin),
@@ -383,8 +383,8 @@ class Ask(Retrieval):
             prompt_str=self.prompt.prompt_str, input_data=input_data, repo_ids_filters=self.prompt.repo_ids_filters
         )
         structured_output = {'indices': list[str]}
-        ret = await asyncio.to_thread(
-            plugin['func'].submit,
+        ret = await submit_llm(
+            plugin,
             prompt=prompt,
             structured_schema=structured_output,
             args=self.service.host.mock_update_args(plugin),
@@ -454,9 +454,7 @@ class Ask(Retrieval):
         if not indices:
             return []
 
-        ret = await asyncio.to_thread(
-            plugin['func'].gen_embed, strings=indices, args=self.service.host.mock_update_args(plugin)
-        )
+        ret = await gen_embeddings(plugin, strings=indices, args=self.service.host.mock_update_args(plugin))
 
         self.service.host.update_mock_data(plugin, ret)
         embeddings_list: list[list[float]] = ret[0]['embeddings_list']
@@ -468,17 +466,24 @@ class Ask(Retrieval):
     Use the indices to fetch related Engram IDs
     """
 
-    async def _query_index_db(self, embeddings: list[list[float]]) -> set[str]:
-        plugin = self.prompt_vector_db_engram_plugin
+    def _search_args(self, args: dict[str, Any]) -> dict[str, Any]:
+        """
+        Overrides the plugin's settings with the search profile the prompt selects, if the plugin defines it.
 
-        if not embeddings:
-            return set()
+        A prompt selects search_profile by name, and a target_single_file prompt without one selects
+        "target_single_file". Profiles are tables in the plugin's search_profiles setting.
+        """
+        name = self.prompt.search_profile or ('target_single_file' if self.prompt.target_single_file else None)
+        overrides = (args.get('search_profiles') or {}).get(name) if name else None
+        if not overrides:
+            return args
+        return {**args, **overrides}
 
-        # if self.prompt.target_single_file:
-        # Was setting a different threshold and n_results here but remove it.
-        # Will implement a more reliable approach.
+    async def _query_index_db(self, embeddings: list[list[float]]) -> dict[str, Any]:
+        plugin = self.prompt_vector_db_engram_plugin
 
-        ids = set()
+        if not embeddings:
+            return {'query_set': [], 'scored_set': []}
 
         ret = await asyncio.to_thread(
             plugin['func'].query,
@@ -487,18 +492,18 @@ class Ask(Retrieval):
             repo_filters=self.prompt.repo_ids_filters,
             type_filters=self.type_filters,
             location_filters=self.locations,
-            args=self.service.host.mock_update_args(plugin),
+            args=self._search_args(self.service.host.mock_update_args(plugin)),
         )
 
         self.service.host.update_mock_data(plugin, ret)
-        ids.update(ret[0]['query_set'])
+        query_result: dict[str, Any] = ret[0]
 
-        num_queries = len(ids)
+        num_queries = len(query_result['query_set'])
         self.metrics_tracker.increment(
             engramic.application.retrieve.retrieve_service.RetrieveMetric.VECTOR_DB_QUERIES, num_queries
         )
 
-        return ids
+        return query_result
 
     def on_query_index_db(self, fut: Future[Any]) -> None:
         ret = fut.result()
@@ -508,12 +513,15 @@ class Ask(Retrieval):
             error = 'on_query_index_db failed: prompt_analysis is None and likely failed during an earlier process.'
             raise RuntimeError
 
+        # Ranked best first; results recorded before scoring have no scored_set.
+        scored_set = ret.get('scored_set')
         retrieve_result = RetrieveResult(
             self.id,
             self.prompt.prompt_id,
-            engram_id_array=list(ret),
+            engram_id_array=list(dict.fromkeys(ret['query_set'])),
             conversation_direction=self.conversation_direction,
             analysis=asdict(self.prompt_analysis)['prompt_analysis'],
+            engram_scores=[tuple(score) for score in scored_set] if scored_set is not None else None,
         )
 
         if self.prompt_analysis.prompt_analysis['remember_request']:
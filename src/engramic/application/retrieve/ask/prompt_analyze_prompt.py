@@ -2,14 +2,12 @@
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
 
-from mako.template import Template
-
 from engramic.core.prompt import Prompt
 
 
 class PromptAnalyzePrompt(Prompt):
     def render_prompt(self) -> str:
-        return_str = Template("""
+        return_str = self.get_template("""
 Analyze the users prompt. Your name is Engramic and you act like an individual in a conversation.
 
 <current_user_prompt>
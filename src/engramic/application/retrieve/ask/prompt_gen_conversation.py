@@ -5,7 +5,6 @@
 import logging
 
 from mako.exceptions import text_error_template
-from mako.template import Template
 
 from engramic.core.prompt import Prompt
 
@@ -13,7 +12,7 @@ from engramic.core.prompt import Prompt
 class PromptGenConversation(Prompt):
     def render_prompt(self) -> str:
         try:
-            return_str = Template("""
+            return_str = self.get_template("""
     Your name is Engramic and you are in a conversation with the user. "you" = Engramic. Review the current_user_input and previous_exchange and provide the current user intent and a description of your working memory.
 
     <previous_exchange>
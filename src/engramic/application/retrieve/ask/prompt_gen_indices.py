@@ -5,7 +5,6 @@
 import logging
 
 from mako.exceptions import text_error_template
-from mako.template import Template
 
 from engramic.core.prompt import Prompt
 
@@ -13,7 +12,7 @@ from engramic.core.prompt import Prompt
 class PromptGenIndices(Prompt):
     def render_prompt(self) -> str:
         try:
-            rendered_template = Template("""Write a set of 5 to 10 lookup indices, each with phrases of 5 to 8 words, that will be used to query a vector database. An index is a query is important to know in order to satisfy the current_user_intent. If domain_knolwedge does not relate, then do not make an index for it.
+            rendered_template = self.get_template("""Write a set of 5 to 10 lookup indices, each with phrases of 5 to 8 words, that will be used to query a vector database. An index is a query is important to know in order to satisfy the current_user_intent. If domain_knolwedge does not relate, then do not make an index for it.
 
         Do not create duplicate indexes.
 
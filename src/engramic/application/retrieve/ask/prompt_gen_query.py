@@ -5,7 +5,6 @@
 import logging
 
 from mako.exceptions import text_error_template
-from mako.template import Template
 
 from engramic.core.prompt import Prompt
 
@@ -13,7 +12,7 @@ from engramic.core.prompt import Prompt
 class PromptGenQuery(Prompt):
     def render_prompt(self) -> str:
         try:
-            rendered_template = Template("""
+            rendered_template = self.get_template("""
         From the user prompt, determine the location as interpreted from the users_prompt.
 
         Your options include:
@@ -10,11 +10,15 @@ from enum import Enum
 from typing import TYPE_CHECKING, Any
 
 from engramic.application.retrieve.ask.ask import Ask
-from engramic.core import Index, Meta, Prompt
+from engramic.core import Index, Prompt
 from engramic.core.host import Host
 from engramic.core.metrics_tracker import MetricPacket, MetricsTracker
+from engramic.infrastructure.repository.history_repository import HistoryRepository
 from engramic.infrastructure.repository.meta_repository import MetaRepository
+from engramic.infrastructure.system import db_calls
+from engramic.infrastructure.system.plugin_manager import has_impl
 from engramic.infrastructure.system.service import Service
+from engramic.infrastructure.system.write_behind_buffer import WriteBehindBuffer
 
 if TYPE_CHECKING:
     from engramic.infrastructure.system.plugin_manager import PluginManager
@@ -28,6 +32,7 @@ class RetrieveMetric(Enum):
     PROMPTS_ANALYZED = 'prompts_analyzed'
     DYNAMIC_INDICES_GENERATED = 'dynamic_indices_generated'
     VECTOR_DB_QUERIES = 'vector_db_queries'
+    VECTOR_BATCHES_FAILED = 'vector_batches_failed'
 
 
 class RetrieveService(Service):
@@ -39,34 +44,50 @@ class RetrieveService(Service):
     vector similarity, and handling the indexing and metadata enrichment process. It interfaces with
     plugin-managed databases and provides observability through metrics tracking.
 
+    Vectors are buffered per collection in a WriteBehindBuffer and upserted in batches of up to
+    VECTOR_BATCH_SIZE objects, at most VECTOR_FLUSH_DELAY seconds after they arrive, with one
+    upsert_batch call when the plugin implements it. INDICES_INSERTED is sent for each engram only after
+    its batch is written. A batch that fails is retried VECTOR_RETRIES times with exponential backoff;
+    if it still fails, INDICES_INSERT_FAILED is sent for each of its objects instead. Buffered vectors are
+    flushed when the service stops.
+
     Attributes:
         plugin_manager (PluginManager): Access point for system plugins, including vector and document DBs.
         vector_db_plugin (dict): Plugin used for vector database operations (e.g., semantic search).
         db_plugin (dict): Plugin for interacting with the document database.
         metrics_tracker (MetricsTracker[RetrieveMetric]): Collects and resets retrieval-related metrics for monitoring.
         meta_repository (MetaRepository): Handles Meta object persistence and transformation.
+        history_repository (HistoryRepository): Reads conversation history through the host's history cache.
         repo_folders (dict[str, Any]): Dictionary containing repository folder information.
         default_repos (dict[str, Any]): Dictionary of default repositories that are always included in prompts.
+        vector_buffer (WriteBehindBuffer[str]): Buffers vectors per collection until they are upserted.
 
     Methods:
         init_async(): Initializes database connections and plugin setup asynchronously.
+        connect_plugins_async(): Connects the document database and opens the vector collections.
         start(): Subscribes to system topics for prompt processing and indexing lifecycle.
-        stop(): Cleans up the service and halts processing.
+        stop(): Flushes buffered vectors, then cleans up the service and halts processing.
 
         submit(prompt: Prompt): Begins the retrieval process, handles default repos, and logs submission metrics.
         on_submit_prompt(msg: dict[Any, Any]): Processes a prompt message from monitor service and submits for processing.
         _on_repo_folders(msg: dict[str, Any]): Updates repository folder information and identifies default repositories.
 
-        on_indices_complete(index_message: dict): Converts index payload into Index objects and queues for insertion.
-        _insert_engram_vector(index_list: list[Index], engram_id: str, repo_ids: str, tracking_id: str, engram_type: str):
-            Asynchronously inserts semantic indices into vector DB with repository and type filters.
-
-        on_meta_complete(meta_dict: dict): Loads and inserts metadata summary into the vector DB.
-        insert_meta_vector(meta: Meta): Runs metadata vector insertion in a background thread using asyncio.to_thread.
+        on_indices_complete(index_message: dict): Converts index payload into Index objects and buffers them.
+        on_meta_complete(meta_dict: dict): Loads a meta and buffers its summary vector.
+        write_vector_batch(collection_name: str, items: list[dict]): Upserts one batch in a background thread,
+            then acknowledges each engram with INDICES_INSERTED.
+        on_vector_batch_failed(collection_name: str, items: list[dict], error: Exception): Sends
+            INDICES_INSERT_FAILED for each object of a batch whose retries are exhausted.
 
+        on_main_prompt_complete(response_dict: dict): Adds the finished response to the history cache.
         on_acknowledge(message_in: str): Emits service metrics to the status channel and resets the tracker.
     """
 
+    VECTOR_BATCH_SIZE = 200
+    VECTOR_FLUSH_DELAY = 0.05
+    VECTOR_RETRIES = 3
+    VECTOR_RETRY_DELAY = 0.2
+
     def __init__(self, host: Host) -> None:
         super().__init__(host)
 
@@ -75,15 +96,30 @@ class RetrieveService(Service):
         self.vector_db_engram_plugin = host.plugin_manager.get_plugin('vector_db', 'engram')
         self.db_plugin = host.plugin_manager.get_plugin('db', 'document')
         self.metrics_tracker: MetricsTracker[RetrieveMetric] = MetricsTracker[RetrieveMetric]()
-        self.meta_repository: MetaRepository = MetaRepository(self.db_plugin)
+        self.meta_repository: MetaRepository = MetaRepository(self.db_plugin, host.repository_cache)
+        self.history_repository: HistoryRepository = HistoryRepository(self.db_plugin, host.history_cache)
         self.repo_folders: dict[str, Any] = {}
         self.files_and_folders_by_repo: dict[str, Any] = {}
         self.default_repos: dict[str, Any] = {}  # default repos are always included in a prompt.
+        self.vector_buffer: WriteBehindBuffer[str] = WriteBehindBuffer(
+            self.write_vector_batch,
+            max_batch=RetrieveService.VECTOR_BATCH_SIZE,
+            flush_delay=RetrieveService.VECTOR_FLUSH_DELAY,
+            retries=RetrieveService.VECTOR_RETRIES,
+            retry_delay=RetrieveService.VECTOR_RETRY_DELAY,
+            on_failure=self.on_vector_batch_failed,
+        )
 
     def init_async(self) -> None:
-        self.db_plugin['func'].connect(args=None)
         return super().init_async()
 
+    async def connect_plugins_async(self) -> None:
+        await db_calls.connect_db(self.db_plugin, args=self.db_plugin['args'])
+        # Collections are opened with their usage's own settings, before any prompt's search profile reaches them.
+        for collection_name, plugin in (('main', self.vector_db_engram_plugin), ('meta', self.vector_db_meta_plugin)):
+            if has_impl(plugin['func'], 'connect'):
+                await asyncio.to_thread(plugin['func'].connect, collection_name=collection_name, args=plugin['args'])
+
     def start(self) -> None:
         self.subscribe(Service.Topic.ACKNOWLEDGE, self.on_acknowledge)
         self.subscribe(Service.Topic.SUBMIT_PROMPT, self.on_submit_prompt)
@@ -91,9 +127,11 @@ class RetrieveService(Service):
         self.subscribe(Service.Topic.META_COMPLETE, self.on_meta_complete)
         self.subscribe(Service.Topic.REPO_DIRECTORY_SCANNED, self._on_repo_directory_scanned)
         self.subscribe(Service.Topic.REPO_FILE_FOLDER_TREE_UPDATED, self._on_repo_file_folder_tree_updated)
+        self.subscribe(Service.Topic.MAIN_PROMPT_COMPLETE, self.on_main_prompt_complete)
         super().start()
 
     async def stop(self) -> None:
+        await self.vector_buffer.flush()
         await super().stop()
 
     def _on_repo_directory_scanned(self, msg: dict[str, Any]) -> None:
@@ -109,6 +147,9 @@ class RetrieveService(Service):
         file_and_folder_list = msg['files_and_folders']
         self.files_and_folders_by_repo[repo['repo_id']] = file_and_folder_list
 
+    def on_main_prompt_complete(self, response_dict: dict[str, Any]) -> None:
+        self.host.history_cache.add(response_dict)
+
     # when called from events
     def on_submit_prompt(self, msg: dict[Any, Any]) -> None:
         self.submit(Prompt(**msg))
@@ -144,57 +185,82 @@ class RetrieveService(Service):
         engram_type: str = index_message['engram_type']
         location_type: str = index_message['location_type']
         index_list: list[Index] = [Index(**item) for item in raw_index]
-        self.run_task(
-            self._insert_engram_vector(index_list, engram_id, repo_ids, tracking_id, engram_type, location_type)
-        )
-
-    async def _insert_engram_vector(
-        self,
-        index_list: list[Index],
-        engram_id: str,
-        repo_ids: str,
-        tracking_id: str,
-        engram_type: str,
-        location_type: str,
-    ) -> None:
-        plugin = self.vector_db_engram_plugin
-        plugin['func'].insert(
-            collection_name='main',
-            index_list=index_list,
-            obj_id=engram_id,
-            args=plugin['args'],
-            filters=repo_ids,
-            type_filter=engram_type,
-            location_filter=location_type,
+        self.vector_buffer.add(
+            'main',
+            {
+                'index_list': index_list,
+                'obj_id': engram_id,
+                'filters': repo_ids,
+                'type_filter': engram_type,
+                'location_filter': location_type,
+                'tracking_id': tracking_id,
+            },
         )
 
-        index_id_array = [index.id for index in index_list]
-
-        self.send_message_async(
-            Service.Topic.INDICES_INSERTED,
-            {'parent_id': engram_id, 'index_id_array': index_id_array, 'tracking_id': tracking_id},
-        )
-
-        self.metrics_tracker.increment(RetrieveMetric.EMBEDDINGS_ADDED_TO_VECTOR)
-
     def on_meta_complete(self, meta_dict: dict[str, Any]) -> None:
         meta = self.meta_repository.load(meta_dict)
-        self.run_task(self.insert_meta_vector(meta))
-        self.metrics_tracker.increment(RetrieveMetric.META_ADDED_TO_VECTOR)
-
-    async def insert_meta_vector(self, meta: Meta) -> None:
-        plugin = self.vector_db_meta_plugin
-        await asyncio.to_thread(
-            plugin['func'].insert,
-            collection_name='meta',
-            index_list=[meta.summary_full],
-            obj_id=meta.id,
-            filters=meta.repo_ids,
-            type_filter=meta.type,
-            location_filter=None,
-            args=plugin['args'],
+        self.vector_buffer.add(
+            'meta',
+            {
+                'index_list': [meta.summary_full],
+                'obj_id': meta.id,
+                'filters': meta.repo_ids,
+                'type_filter': meta.type,
+                'location_filter': None,
+            },
         )
 
+    async def write_vector_batch(self, collection_name: str, items: list[dict[str, Any]]) -> None:
+        plugin = self.vector_db_engram_plugin if collection_name == 'main' else self.vector_db_meta_plugin
+
+        await asyncio.to_thread(self._upsert_vectors, plugin, collection_name, items)
+
+        if collection_name != 'main':
+            self.metrics_tracker.increment(RetrieveMetric.META_ADDED_TO_VECTOR, len(items))
+            return
+
+        for item in items:
+            self.send_message_async(
+                Service.Topic.INDICES_INSERTED,
+                {
+                    'parent_id': item['obj_id'],
+                    'index_id_array': [index.id for index in item['index_list']],
+                    'tracking_id': item['tracking_id'],
+                },
+            )
+        self.metrics_tracker.increment(RetrieveMetric.EMBEDDINGS_ADDED_TO_VECTOR, len(items))
+
+    def on_vector_batch_failed(self, collection_name: str, items: list[dict[str, Any]], error: Exception) -> None:
+        self.metrics_tracker.increment(RetrieveMetric.VECTOR_BATCHES_FAILED)
+        for item in items:
+            self.send_message_async(
+                Service.Topic.INDICES_INSERT_FAILED,
+                {
+                    'collection_name': collection_name,
+                    'parent_id': item['obj_id'],
+                    'index_id_array': [index.id for index in item['index_list'] if index is not None],
+                    'tracking_id': item.get('tracking_id'),
+                    'error': str(error),
+                },
+            )
+
+    @staticmethod
+    def _upsert_vectors(plugin: dict[str, Any], collection_name: str, items: list[dict[str, Any]]) -> None:
+        if has_impl(plugin['func'], 'upsert_batch'):
+            plugin['func'].upsert_batch(collection_name=collection_name, items=items, args=plugin['args'])
+            return
+
+        for item in items:
+            plugin['func'].upsert(
+                collection_name=collection_name,
+                index_list=item['index_list'],
+                obj_id=item['obj_id'],
+                args=plugin['args'],
+                filters=item['filters'],
+                type_filter=item['type_filter'],
+                location_filter=item['location_filter'],
+            )
+
     def on_acknowledge(self, message_in: str) -> None:
         del message_in
 
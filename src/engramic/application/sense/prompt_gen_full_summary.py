@@ -2,14 +2,12 @@
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
 
-from mako.template import Template
-
 from engramic.core.prompt import Prompt
 
 
 class PromptGenFullSummary(Prompt):
     def render_prompt(self) -> str:
-        rendered_template = Template("""
+        rendered_template = self.get_template("""
     Perform the actions listed below. You are going to generate a keyword phrase and an outline.
 
     This is meta data we already have:
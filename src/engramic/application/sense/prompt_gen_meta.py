@@ -2,14 +2,12 @@
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
 
-from mako.template import Template
-
 from engramic.core.prompt import Prompt
 
 
 class PromptGenMeta(Prompt):
     def render_prompt(self) -> str:
-        rendered_template = Template("""
+        rendered_template = self.get_template("""
 
 
 
@@ -2,14 +2,12 @@
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
 
-from mako.template import Template
-
 from engramic.core.prompt import Prompt
 
 
 class PromptScanPage(Prompt):
     def render_prompt(self) -> str:
-        rendered_template = Template("""
+        rendered_template = self.get_template("""
     Read and label items on the page using the following tags. Use no other tags.
 
     If an item with a given tag doesn't exist skip that tag.
@@ -4,7 +4,6 @@
 
 from __future__ import annotations
 
-import asyncio
 import base64
 import copy
 import json
@@ -30,6 +29,7 @@ from engramic.core.index import Index
 from engramic.core.interface.media import Media
 from engramic.core.meta import Meta
 from engramic.core.observation import Observation
+from engramic.infrastructure.system.llm_calls import submit_llm
 from engramic.infrastructure.system.service import Service
 
 if TYPE_CHECKING:
@@ -229,7 +229,8 @@ class Scan(Media):
             'version': str,
         }
 
-        ret = self.sense_initial_summary['func'].submit(
+        ret = await submit_llm(
+            self.sense_initial_summary,
             prompt=prompt,
             images=summary_images,
             structured_schema=structured_response,
@@ -263,8 +264,8 @@ class Scan(Media):
 
         image = self.page_images[page_num]
 
-        ret = await asyncio.to_thread(
-            self.sense_initial_summary['func'].submit,
+        ret = await submit_llm(
+            self.sense_initial_summary,
             prompt=prompt_scan,
             images=[image],
             structured_schema=None,
@@ -357,8 +358,12 @@ class Scan(Media):
 
         structure = {'summary_full': str, 'keywords': str}
 
-        ret = self.service.sense_full_summary['func'].submit(
-            prompt=prompt, images=None, structured_schema=structure, args=self.service.host.mock_update_args(plugin)
+        ret = await submit_llm(
+            self.service.sense_full_summary,
+            prompt=prompt,
+            images=None,
+            structured_schema=structure,
+            args=self.service.host.mock_update_args(plugin),
         )
 
         self.service.host.update_mock_data(plugin, ret)
@@ -7,21 +7,28 @@ import logging
 import time
 from dataclasses import asdict
 from enum import Enum
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, ClassVar
 
-from engramic.core import Engram, Meta, Response
+from engramic.core import Meta, Response
 from engramic.core.host import Host
+from engramic.core.interface.db import DB
 from engramic.core.metrics_tracker import MetricPacket, MetricsTracker
 from engramic.core.observation import Observation
 from engramic.core.prompt import Prompt
 from engramic.infrastructure.repository.engram_repository import EngramRepository
 from engramic.infrastructure.repository.history_repository import HistoryRepository
 from engramic.infrastructure.repository.meta_repository import MetaRepository
-from engramic.infrastructure.repository.observation_repository import ObservationRepository
+from engramic.infrastructure.repository.observation_repository import (
+    ObservationRepository,
+)
+from engramic.infrastructure.system import db_calls
 from engramic.infrastructure.system.plugin_manager import PluginManager
 from engramic.infrastructure.system.service import Service
+from engramic.infrastructure.system.write_behind_buffer import WriteBehindBuffer
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from engramic.infrastructure.system.plugin_manager import PluginManager
 
 
@@ -30,6 +37,8 @@ class StorageMetric(Enum):
     ENGRAM_SAVED = 'engram_saved'
     META_SAVED = 'meta_saved'
     HISTORY_SAVED = 'history_saved'
+    BATCHES_WRITTEN = 'batches_written'
+    BATCHES_FAILED = 'batches_failed'
 
 
 class StorageService(Service):
@@ -40,6 +49,13 @@ class StorageService(Service):
     engrams, metadata, and prompt histories—via plugin-based repositories. It also tracks metrics for each
     type of saved entity to facilitate performance monitoring and operational insights.
 
+    Writes are buffered per table in a WriteBehindBuffer and saved in batches of up to WRITE_BATCH_SIZE
+    documents, at most WRITE_FLUSH_DELAY seconds after they arrive. After each batch is committed the
+    service publishes STORAGE_COMMITTED with the table name and document ids, so steps that need a
+    document to be durable can wait for it. A batch that fails is retried WRITE_RETRIES times with
+    exponential backoff; if it still fails the service publishes STORAGE_FAILED with the table name,
+    document ids and error instead. Buffered writes are flushed when the service stops.
+
     Attributes:
         plugin_manager (PluginManager): Provides access to system plugins, including database integrations.
         db_document_plugin: Plugin used by repositories for data persistence.
@@ -48,12 +64,15 @@ class StorageService(Service):
         engram_repository (EngramRepository): Handles saving of Engram entities.
         meta_repository (MetaRepository): Handles saving of Meta configuration entities.
         metrics_tracker (MetricsTracker): Tracks counts of saved items for metric reporting.
+        write_buffer (WriteBehindBuffer): Buffers documents per table until they are written.
 
     Methods:
         start() -> None:
             Registers the service to relevant message topics and begins operation.
         init_async() -> None:
             Connects to the database plugin asynchronously before full service startup.
+        stop() -> None:
+            Flushes buffered writes before the service stops.
         on_engram_request(msg) -> None:
             Handles requests for fetching engrams by ID and sends results.
         on_engram_complete(engram_dict) -> None:
@@ -64,27 +83,44 @@ class StorageService(Service):
             Callback for storing completed prompt/response history (excludes lessons).
         on_meta_complete(meta_dict) -> None:
             Callback for storing finalized meta configuration.
-        save_observation(response) -> None:
-            Coroutine to persist observations and update metrics.
-        save_history(response) -> None:
-            Coroutine to persist prompt/response history and update metrics.
-        save_engram(engram) -> None:
-            Coroutine to persist engram data and update metrics.
-        save_meta(meta) -> None:
-            Coroutine to persist metadata and update metrics.
+        write_batch(table, items) -> None:
+            Coroutine to persist one batch, update metrics and publish STORAGE_COMMITTED.
+        on_write_failed(table, items, error) -> None:
+            Counts a batch whose retries are exhausted and publishes STORAGE_FAILED.
         on_acknowledge(message_in) -> None:
             Collects current metrics and publishes service status.
     """
 
+    WRITE_BATCH_SIZE = 200
+    WRITE_FLUSH_DELAY = 0.05
+    WRITE_RETRIES = 3
+    WRITE_RETRY_DELAY = 0.2
+    SAVED_METRICS: ClassVar[dict[DB.DBTables, StorageMetric]] = {
+        DB.DBTables.ENGRAM: StorageMetric.ENGRAM_SAVED,
+        DB.DBTables.META: StorageMetric.META_SAVED,
+        DB.DBTables.HISTORY: StorageMetric.HISTORY_SAVED,
+        DB.DBTables.OBSERVATION: StorageMetric.OBSERVATION_SAVED,
+    }
+
     def __init__(self, host: Host) -> None:
         super().__init__(host)
         self.plugin_manager: PluginManager = host.plugin_manager
         self.db_document_plugin = self.plugin_manager.get_plugin('db', 'document')
         self.history_repository: HistoryRepository = HistoryRepository(self.db_document_plugin)
-        self.observation_repository: ObservationRepository = ObservationRepository(self.db_document_plugin)
-        self.engram_repository: EngramRepository = EngramRepository(self.db_document_plugin)
-        self.meta_repository: MetaRepository = MetaRepository(self.db_document_plugin)
+        self.observation_repository: ObservationRepository = ObservationRepository(
+            self.db_document_plugin, repository_cache=host.repository_cache
+        )
+        self.engram_repository: EngramRepository = EngramRepository(self.db_document_plugin, host.repository_cache)
+        self.meta_repository: MetaRepository = MetaRepository(self.db_document_plugin, host.repository_cache)
         self.metrics_tracker: MetricsTracker[StorageMetric] = MetricsTracker[StorageMetric]()
+        self.write_buffer = WriteBehindBuffer(
+            self.write_batch,
+            max_batch=StorageService.WRITE_BATCH_SIZE,
+            flush_delay=StorageService.WRITE_FLUSH_DELAY,
+            retries=StorageService.WRITE_RETRIES,
+            retry_delay=StorageService.WRITE_RETRY_DELAY,
+            on_failure=self.on_write_failed,
+        )
 
     def start(self) -> None:
         self.subscribe(Service.Topic.ACKNOWLEDGE, self.on_acknowledge)
@@ -96,64 +132,74 @@ class StorageService(Service):
         super().start()
 
     def init_async(self) -> None:
-        self.db_document_plugin['func'].connect(args=None)
         return super().init_async()
 
+    async def connect_plugins_async(self) -> None:
+        await db_calls.connect_db(self.db_document_plugin, args=self.db_document_plugin['args'])
+
+    async def stop(self) -> None:
+        await self.write_buffer.flush()
+        await super().stop()
+
     def on_engram_request(self, msg: dict[str, Any]) -> None:
-        engram = self.engram_repository.fetch_engram(msg['engram_id'])
+        async def send_engram() -> None:
+            engram = await self.engram_repository.fetch_engram_async(msg['engram_id'])
 
-        if engram:
-            self.send_message_async(Service.Topic.ENGRAM_RESULT, asdict(engram))
-        else:
-            self.send_message_async(Service.Topic.ENGRAM_RESULT, None)
+            if engram:
+                self.send_message_async(Service.Topic.ENGRAM_RESULT, asdict(engram))
+            else:
+                self.send_message_async(Service.Topic.ENGRAM_RESULT, None)
+
+        self.run_task(send_engram())
 
     def on_engram_complete(self, engram_dict: dict[str, Any]) -> None:
         engram_batch = self.engram_repository.load_batch_dict(engram_dict['engram_array'])
+
+        # Cached before the buffered write so readers do not go to the database for them meanwhile.
+        self.engram_repository.cache_engrams(engram_batch)
         for engram in engram_batch:
-            self.run_task(self.save_engram(engram))
+            self.write_buffer.add(DB.DBTables.ENGRAM, engram)
 
     def on_observation_complete(self, response: Observation) -> None:
-        self.run_task(self.save_observation(response))
+        self.write_buffer.add(DB.DBTables.OBSERVATION, response)
 
     def on_prompt_complete(self, response_dict: dict[Any, Any]) -> None:
         response_dict['prompt'] = Prompt(**response_dict['prompt'])
         response = Response(**response_dict)
 
         if not response.prompt.is_lesson and response.prompt.save_in_history:
-            self.run_task(self.save_history(response))
+            self.write_buffer.add(DB.DBTables.HISTORY, response)
 
     def on_meta_complete(self, meta_dict: dict[str, str]) -> None:
         meta: Meta = self.meta_repository.load(meta_dict)
-        self.run_task(self.save_meta(meta))
-
-    async def save_observation(self, response: Observation) -> None:
-        """
-        Persists an observation to the database and updates the observation metrics.
-
-        Args:
-            response (Observation): The observation object to be saved.
-
-        Returns:
-            None
-        """
-        self.observation_repository.save(response)
-        self.metrics_tracker.increment(StorageMetric.OBSERVATION_SAVED)
-        logging.debug('Storage service saving observation.')
-
-    async def save_history(self, response: Response) -> None:
-        await asyncio.to_thread(self.history_repository.save_history, response)
-        self.metrics_tracker.increment(StorageMetric.HISTORY_SAVED)
-        logging.debug('Storage service saving history.')
-
-    async def save_engram(self, engram: Engram) -> None:
-        await asyncio.to_thread(self.engram_repository.save_engram, engram)
-        self.metrics_tracker.increment(StorageMetric.ENGRAM_SAVED)
-        logging.debug('Storage service saving engram.')
-
-    async def save_meta(self, meta: Meta) -> None:
-        logging.debug('Storage service saving meta.')
-        await asyncio.to_thread(self.meta_repository.save, meta)
-        self.metrics_tracker.increment(StorageMetric.META_SAVED)
+        self.meta_repository.cache_metas([meta])
+        self.write_buffer.add(DB.DBTables.META, meta)
+
+    async def write_batch(self, table: DB.DBTables, items: list[Any]) -> None:
+        saves: dict[DB.DBTables, Callable[[list[Any]], None]] = {
+            DB.DBTables.ENGRAM: self.engram_repository.save_engrams,
+            DB.DBTables.META: self.meta_repository.save_batch,
+            DB.DBTables.HISTORY: self.history_repository.save_history_batch,
+            DB.DBTables.OBSERVATION: self.observation_repository.save_batch,
+        }
+
+        await asyncio.to_thread(saves[table], items)
+
+        self.metrics_tracker.increment(StorageService.SAVED_METRICS[table], len(items))
+        self.metrics_tracker.increment(StorageMetric.BATCHES_WRITTEN)
+        logging.debug('Storage service saved %s %s documents.', len(items), table.value)
+
+        self.send_message_async(Service.Topic.STORAGE_COMMITTED, {'table': table.value, 'ids': self._ids(items)})
+
+    def on_write_failed(self, table: DB.DBTables, items: list[Any], error: Exception) -> None:
+        self.metrics_tracker.increment(StorageMetric.BATCHES_FAILED)
+        self.send_message_async(
+            Service.Topic.STORAGE_FAILED, {'table': table.value, 'ids': self._ids(items), 'error': str(error)}
+        )
+
+    @staticmethod
+    def _ids(items: list[Any]) -> list[str]:
+        return [item['id'] if isinstance(item, dict) else item.id for item in items]
 
     def on_acknowledge(self, message_in: str) -> None:
         del message_in
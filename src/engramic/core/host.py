@@ -19,6 +19,8 @@ from typing import TYPE_CHECKING, Any
 
 # import psutil
 from engramic.core.index import Index
+from engramic.infrastructure.repository.history_cache import HistoryCache
+from engramic.infrastructure.repository.repository_cache import RepositoryCache
 from engramic.infrastructure.system.plugin_manager import PluginManager
 
 if TYPE_CHECKING:
@@ -77,6 +79,8 @@ class Host:
             self.read_mock_data()
 
         self.plugin_manager: PluginManager = PluginManager(self, selected_profile)
+        self.history_cache: HistoryCache = HistoryCache()
+        self.repository_cache: RepositoryCache = RepositoryCache()
 
         self.services: dict[str, Service] = {}
         for index, ctr in enumerate(services):
@@ -135,6 +139,8 @@ class Host:
                 continue
             self.services[name].init_async()
 
+        await asyncio.gather(*(service.connect_plugins_async() for service in self.services.values()))
+
         await asyncio.sleep(0.1)  # make sure handshake occured.
 
     def run_task(self, coro: Awaitable[None]) -> Future[Any]:
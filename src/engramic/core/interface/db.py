@@ -3,6 +3,7 @@
 # See the LICENSE file in the project root for more details.
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from enum import Enum
 from typing import Any
 
@@ -19,6 +20,7 @@ class DB(ABC):
         HISTORY = 'history'
         DOCUMENT = 'document'
         PROCESS = 'process'
+        EMBEDDING = 'embedding'
 
     @abstractmethod
     def connect(self, args: dict[str, Any]) -> None:
@@ -35,12 +37,24 @@ class DB(ABC):
         """Execute a query without additional data."""
         # or `return None`
 
+    @abstractmethod
+    def fetch_iter(
+        self,
+        table: DBTables,
+        fields: list[str] | None,
+        page_size: int,
+        after_id: str | None,
+        args: dict[str, Any] | None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Yield pages of at most page_size documents in id order, starting after after_id."""
+        # or `return iter(())`
+
     @abstractmethod
     def insert_documents(self, table: DBTables, docs: list[dict[str, Any]], args: dict[str, Any]) -> None:
         """Insert a document."""
         # or `return None`
 
     @abstractmethod
-    def delete_documents(self, table: DBTables, docs: list[dict[str, Any]], args: dict[str, Any]) -> None:
-        """Delete a document"""
+    def delete_documents(self, table: DBTables, ids: list[str], args: dict[str, Any]) -> None:
+        """Delete the documents with the given ids."""
         # or `return None`
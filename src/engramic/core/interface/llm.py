@@ -20,6 +20,8 @@ class LLM(ABC):
         packet: str
         finish: bool
         finish_reason: str
+        response_id: str | None = None
+        control: bool = False
 
         def to_json(self) -> str:
             data: dict[str, Any] = asdict(self)
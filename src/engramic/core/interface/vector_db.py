@@ -3,6 +3,8 @@
 # See the LICENSE file in the project root for more details.
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from enum import Enum
 from typing import Any
 
 from engramic.core import Index
@@ -10,9 +12,55 @@ from engramic.core import Index
 
 class VectorDB(ABC):
     """
-    An abstract base class that defines an interface for any Large Language Model.
+    An abstract base class that defines an interface for any vector database.
+
+    A query returns {'query_set': obj_ids, 'scored_set': [(obj_id, best_distance, matched_index_id), ...]},
+    both ranked best first, with one entry per object. Plugins build it from their raw matches with
+    rank_matches, which ranks objects by the `aggregate` arg (see Aggregate).
     """
 
+    class Aggregate(Enum):
+        """How the matches of one object, over all query embeddings, combine into its rank."""
+
+        MAX = 'max'  # Its nearest match (max-sim).
+        SUM = 'sum'  # The sum of the similarities (1 - distance) of its matches (sum-sim).
+
+    @staticmethod
+    def rank_matches(
+        matches: Iterable[tuple[str, float, str | None]], threshold: float, aggregate: str | None = None
+    ) -> dict[str, Any]:
+        """
+        Aggregates (obj_id, distance, index_id) matches nearer than threshold into a ranked query result.
+
+        Args:
+            matches (Iterable[tuple[str, float, str | None]]): Every match of every query embedding.
+            threshold (float): Matches at this distance or beyond are dropped.
+            aggregate (str | None): An Aggregate value; defaults to 'max'.
+
+        Returns:
+            dict[str, Any]: {'query_set': obj_ids, 'scored_set': [(obj_id, best_distance, matched_index_id)]}.
+        """
+        mode = VectorDB.Aggregate(aggregate or VectorDB.Aggregate.MAX.value)
+        best: dict[str, tuple[float, str | None]] = {}
+        similarity: dict[str, float] = {}
+        for obj_id, raw_distance, index_id in matches:
+            if raw_distance >= threshold:
+                continue
+            distance = float(raw_distance)
+            if obj_id not in best or distance < best[obj_id][0]:
+                best[obj_id] = (distance, index_id)
+            similarity[obj_id] = similarity.get(obj_id, 0.0) + 1.0 - distance
+
+        if mode is VectorDB.Aggregate.SUM:
+            ranked = sorted(best, key=lambda obj_id: (-similarity[obj_id], best[obj_id][0]))
+        else:
+            ranked = sorted(best, key=lambda obj_id: best[obj_id][0])
+
+        return {
+            'query_set': ranked,
+            'scored_set': [(obj_id, best[obj_id][0], best[obj_id][1]) for obj_id in ranked],
+        }
+
     @abstractmethod
     def query(
         self,
@@ -24,15 +72,18 @@ class VectorDB(ABC):
         location_filters: list[str],
     ) -> dict[str, Any]:
         """
-        Submits a prompt to the LLM and returns the model-generated text.
+        Finds the objects whose vectors are nearest to the embeddings, within the filters.
 
         Args:
-            prompt (str): The prompt or input text for the LLM.
-            **kwargs (Any): Optional keyword arguments for provider-specific settings,
-                such as model name, temperature, max tokens, etc.
+            collection_name (str): 'main' for engrams or 'meta' for metas.
+            embeddings (list[float]): One query embedding, or a list of them.
+            repo_filters (list[str]): Repos to search; rows stored without a repo when empty.
+            args (dict[str, Any]): Plugin settings, such as threshold, n_results and aggregate.
+            type_filters (list[str]): Types to keep, or all when empty.
+            location_filters (list[str]): Locations to keep, or all when empty.
 
         Returns:
-            str: The model-generated response.
+            dict[str, Any]: The ranked result described in the class docstring.
         """
 
     @abstractmethod
@@ -47,3 +98,20 @@ class VectorDB(ABC):
         location_filter: str,
     ) -> None:
         pass
+
+    @abstractmethod
+    def upsert(
+        self,
+        collection_name: str,
+        index_list: list[Index],
+        obj_id: str,
+        args: dict[str, Any],
+        filters: list[str],
+        type_filter: str,
+        location_filter: str,
+    ) -> None:
+        """Replaces the vectors of obj_id with the embeddings of index_list, keyed by Index.id."""
+
+    @abstractmethod
+    def delete(self, collection_name: str, obj_ids: list[str], args: dict[str, Any]) -> None:
+        """Deletes every vector inserted for the given obj_ids."""
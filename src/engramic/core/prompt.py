@@ -6,7 +6,12 @@ from __future__ import annotations
 import uuid
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+from engramic.core.template_registry import TemplateRegistry
+
+if TYPE_CHECKING:
+    from mako.template import Template
 
 
 @dataclass
@@ -33,6 +38,8 @@ class Prompt:
     tracking_id: str | None = None
     thinking_level: float | None = None
     target_single_file: bool | None = None
+    search_profile: str | None = None
+    client_id: str | None = None  # JWT sub of the websocket client that receives the streamed response.
 
     def __post_init__(self) -> None:
         if not self.prompt_id:
@@ -58,3 +65,7 @@ class Prompt:
 
     def render_prompt(self) -> str:
         return self.prompt_str or ''
+
+    def get_template(self, source: str) -> Template:
+        """Returns the compiled Mako template for source, compiling it only on first use in this process."""
+        return TemplateRegistry.get(self.__class__.__name__, source)
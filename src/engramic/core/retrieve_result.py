@@ -7,8 +7,23 @@ from dataclasses import dataclass
 
 @dataclass
 class RetrieveResult:
+    """
+    The engrams retrieved for a prompt.
+
+    Attributes:
+        ask_id (str): ID of the Ask that retrieved them.
+        source_id (str): ID of the prompt.
+        engram_id_array (list[str]): Engram ids, best ranked first.
+        conversation_direction (dict[str, str] | None): The conversation direction used for retrieval.
+        analysis (dict[str, str] | None): The prompt analysis used for retrieval.
+        engram_scores (list[tuple[str, float, str | None]] | None): Per engram, in the same order,
+            (engram_id, best_distance, matched_index_id) from the vector query; None when the vector
+            database did not score its results.
+    """
+
     ask_id: str
     source_id: str
     engram_id_array: list[str]
     conversation_direction: dict[str, str] | None = None
     analysis: dict[str, str] | None = None
+    engram_scores: list[tuple[str, float, str | None]] | None = None
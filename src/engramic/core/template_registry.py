@@ -0,0 +1,121 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Process-wide cache of compiled Mako templates used by the Prompt subclasses.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import ClassVar
+
+import mako
+from mako.template import ModuleTemplate, Template
+
+
+class TemplateRegistry:
+    """
+    Compiles each prompt template once per process and hands out the compiled result.
+
+    Prompt subclasses pass their template source on every render. The first call compiles the
+    source into a Mako module; later calls are a dictionary lookup. When the TEMPLATE_MODULE_ROOT
+    environment variable is set, the generated Python module is also written to that directory so
+    a cold process can import it instead of running the Mako lexer and code generator again.
+
+    Attributes:
+        MODULE_ROOT_ENV (str): Environment variable naming the on-disk module directory.
+
+    Methods:
+        get(name, source) -> Template:
+            Returns the compiled template for source, compiling it on first use.
+        clear() -> None:
+            Drops every compiled template. Mostly useful for tests and benchmarks.
+        size() -> int:
+            Returns the number of compiled templates currently held.
+    """
+
+    MODULE_ROOT_ENV = 'TEMPLATE_MODULE_ROOT'
+
+    _templates: ClassVar[dict[str, Template]] = {}
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def get(cls, name: str, source: str) -> Template:
+        """
+        Returns the compiled template for the given source.
+
+        Templates are keyed by their source text, so a prompt that edits its template string picks
+        up a fresh compile automatically.
+
+        Args:
+            name (str): Human readable name, typically the Prompt subclass name. Used for module file names.
+            source (str): The Mako template source.
+
+        Returns:
+            Template: A compiled template ready to render.
+        """
+        template = cls._templates.get(source)
+        if template is not None:
+            return template
+
+        with cls._lock:
+            template = cls._templates.get(source)
+            if template is None:
+                template = cls._compile(name, source)
+                cls._templates[source] = template
+
+        return template
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._templates.clear()
+
+    @classmethod
+    def size(cls) -> int:
+        return len(cls._templates)
+
+    @classmethod
+    def _compile(cls, name: str, source: str) -> Template:
+        module_root = os.getenv(cls.MODULE_ROOT_ENV)
+        if not module_root:
+            return Template(source)
+
+        digest = hashlib.sha1(f'{mako.__version__}:{source}'.encode()).hexdigest()[:16]  # nosec
+        module_name = f'{name}_{digest}'
+        module_path = Path(module_root).expanduser() / f'{module_name}.py'
+
+        if module_path.is_file():
+            try:
+                return cls._load_module_template(module_name, module_path, source)
+            except Exception:
+                logging.exception('Failed to load cached template module %s, recompiling.', module_path)
+
+        template = Template(source)
+
+        try:
+            module_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = module_path.with_suffix(f'.{os.getpid()}.tmp')
+            temp_path.write_text(template.code, encoding='utf-8')
+            os.replace(temp_path, module_path)
+        except OSError:
+            logging.warning('Unable to write template module %s.', module_path)
+
+        return template
+
+    @classmethod
+    def _load_module_template(cls, module_name: str, module_path: Path, source: str) -> Template:
+        spec = importlib.util.spec_from_file_location(f'engramic_templates.{module_name}', module_path)
+        if spec is None or spec.loader is None:
+            error = f'Could not build an import spec for {module_path}.'
+            raise ImportError(error)
+
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return ModuleTemplate(module, template_source=source)
@@ -8,6 +8,7 @@ from typing import Any
 
 from engramic.core.file_node import FileNode
 from engramic.core.interface.db import DB
+from engramic.infrastructure.system import db_calls
 
 
 class DocumentRepository:
@@ -31,3 +32,21 @@ class DocumentRepository:
 
     def delete(self, document_id: str) -> None:
         self.db_plugin['func'].delete_documents(table=DB.DBTables.DOCUMENT, ids=[document_id], args=None)
+
+    async def save_batch_async(self, documents: list[FileNode]) -> None:
+        if not documents:
+            return
+
+        docs = [asdict(document) for document in documents]
+        await db_calls.insert_documents(self.db_plugin, table=DB.DBTables.DOCUMENT, docs=docs, args=None)
+
+    async def load_batch_async(self, document_ids: list[str]) -> list[dict[str, Any]]:
+        if not document_ids:
+            return []
+
+        ret = await db_calls.fetch(self.db_plugin, table=DB.DBTables.DOCUMENT, ids=document_ids, args=None)
+        documents: list[dict[str, Any]] = ret[0]['document']
+        return documents
+
+    async def delete_async(self, document_id: str) -> None:
+        await db_calls.delete_documents(self.db_plugin, table=DB.DBTables.DOCUMENT, ids=[document_id], args=None)
@@ -0,0 +1,72 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from engramic.core.interface.db import DB
+from engramic.infrastructure.system import db_calls
+
+if TYPE_CHECKING:
+    from engramic.core.index import Index
+
+
+class EmbeddingRepository:
+    """
+    Keeps index embeddings in the EMBEDDING table instead of inside engram and meta documents.
+
+    Documents are saved with each index's text and id and a null embedding. The vectors are stored by
+    index id, and the sqlite plugin keeps them as float32 blobs. Loading a document does not read them;
+    callers that need vectors call load() on the indices they hold. Deleting a document deletes its rows.
+
+    Methods:
+        detach(owner_id, indices, index_dicts) -> list[dict[str, Any]]:
+            Clears embeddings in the serialized indices and returns the rows to store.
+        save(rows) -> None:
+            Stores embedding rows returned by detach().
+        load(indices) -> None:
+            Fills in missing embeddings on the given indices.
+        load_async(indices) -> None:
+            Like load(), for code running on the event loop.
+        delete(index_ids) -> None:
+            Removes the embedding rows of the given index ids.
+    """
+
+    def __init__(self, plugin: dict[str, Any]) -> None:
+        self.db_plugin = plugin
+
+    def detach(self, owner_id: str, indices: list[Index], index_dicts: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        rows = []
+        for index, index_dict in zip(indices, index_dicts, strict=True):
+            if index.embedding is not None:
+                rows.append({'id': index.id, 'owner_id': owner_id, 'embedding': index.embedding})
+            index_dict['embedding'] = None
+        return rows
+
+    def save(self, rows: list[dict[str, Any]]) -> None:
+        if rows:
+            self.db_plugin['func'].insert_documents(table=DB.DBTables.EMBEDDING, docs=rows, args=None)
+
+    def load(self, indices: list[Index]) -> None:
+        missing = {index.id: index for index in indices if index.embedding is None}
+        if not missing:
+            return
+
+        ret = self.db_plugin['func'].fetch(table=DB.DBTables.EMBEDDING, ids=list(missing), args=None)
+        for row in ret[0].get('embedding', []):
+            missing[row['id']].embedding = row['embedding']
+
+    async def load_async(self, indices: list[Index]) -> None:
+        missing = {index.id: index for index in indices if index.embedding is None}
+        if not missing:
+            return
+
+        ret = await db_calls.fetch(self.db_plugin, table=DB.DBTables.EMBEDDING, ids=list(missing), args=None)
+        for row in ret[0].get('embedding', []):
+            missing[row['id']].embedding = row['embedding']
+
+    def delete(self, index_ids: list[str]) -> None:
+        if index_ids:
+            self.db_plugin['func'].delete_documents(table=DB.DBTables.EMBEDDING, ids=index_ids, args=None)
@@ -3,38 +3,112 @@
 # See the LICENSE file in the project root for more details.
 
 
-from dataclasses import asdict
+from collections.abc import Iterator
+from dataclasses import asdict, replace
 from typing import Any
 
-from cachetools import LRUCache
-
 from engramic.core.engram import Engram
 from engramic.core.index import Index
 from engramic.core.interface.db import DB
 from engramic.core.retrieve_result import RetrieveResult
+from engramic.infrastructure.repository.embedding_repository import EmbeddingRepository
+from engramic.infrastructure.repository.repository_cache import RepositoryCache
+from engramic.infrastructure.system import db_calls
 
 
 class EngramRepository:
-    def __init__(self, plugin: dict[str, Any], cache_size: int = 1000) -> None:
+    PAGE_SIZE = 500
+
+    def __init__(self, plugin: dict[str, Any], cache: RepositoryCache | None = None) -> None:
         self.db_plugin = plugin
+        self.embedding_repository = EmbeddingRepository(plugin)
 
-        # LRU Cache to store Engram objects
-        self.cache: LRUCache[str, Engram] = LRUCache(maxsize=cache_size)
+        # Shared with the host's other repositories; private when used standalone.
+        self.cache: RepositoryCache = cache if cache is not None else RepositoryCache()
 
     def save_engram(self, engram: Engram) -> None:
-        self.db_plugin['func'].insert_documents(table=DB.DBTables.ENGRAM, docs=[asdict(engram)], args=None)
+        self.save_engrams([engram])
+
+    def save_engrams(self, engrams: list[Engram]) -> None:
+        engram_dicts = []
+        embedding_rows = []
+        for engram in engrams:
+            engram_dict = asdict(engram)
+            if engram.indices:
+                embedding_rows.extend(
+                    self.embedding_repository.detach(engram.id, engram.indices, engram_dict['indices'])
+                )
+            engram_dicts.append(engram_dict)
+
+        # Vectors are stored first so a saved engram never points at missing embeddings.
+        self.embedding_repository.save(embedding_rows)
+        self.db_plugin['func'].insert_documents(table=DB.DBTables.ENGRAM, docs=engram_dicts, args=None)
+        self.cache_engrams(engrams)
+
+    def cache_engrams(self, engrams: list[Engram]) -> None:
+        for engram in engrams:
+            self.cache.put(DB.DBTables.ENGRAM, engram.id, engram)
+
+    def delete_engrams(self, engram_ids: list[str]) -> None:
+        """Deletes engrams and the embedding rows of their indices."""
+        self.cache.invalidate(DB.DBTables.ENGRAM, engram_ids)
+        ret = self.db_plugin['func'].fetch(table=DB.DBTables.ENGRAM, ids=engram_ids, args=None)
+        index_ids = [
+            index['id'] for engram_dict in ret[0].get('engram', []) for index in engram_dict.get('indices') or []
+        ]
+
+        # Documents go first so a stored engram never points at missing embeddings.
+        self.db_plugin['func'].delete_documents(table=DB.DBTables.ENGRAM, ids=engram_ids, args=None)
+        self.embedding_repository.delete(index_ids)
+
+    def load_embeddings(self, engrams: list[Engram]) -> None:
+        """Loads the index embeddings of engrams read from the database, which are loaded without them."""
+        self.embedding_repository.load([index for engram in engrams for index in engram.indices or []])
+
+    @staticmethod
+    def _copy_for_embeddings(engram: Engram) -> Engram:
+        # Embeddings go into copies of the indices, so the cached engram keeps the size it was cached at.
+        indices = [replace(index) for index in engram.indices] if engram.indices else engram.indices
+        return replace(engram, indices=indices)
 
     def fetch_engram(self, engram_id: str) -> Engram | None:
-        engram_ret = self.db_plugin['func'].fetch(table=DB.DBTables.ENGRAM, ids=[engram_id], args=None)
+        """Returns a copy of one engram with its index embeddings, which batch loads leave out."""
+        engram: Engram | None = self.cache.get(DB.DBTables.ENGRAM, engram_id)
+        if engram is None:
+            engram_ret = self.db_plugin['func'].fetch(table=DB.DBTables.ENGRAM, ids=[engram_id], args=None)
+
+            # Check if the result is empty
+            if not engram_ret or not engram_ret[0]['engram']:
+                return None
+
+            engram = self.load_dict(engram_ret[0]['engram'][0])
+            self.cache.put(DB.DBTables.ENGRAM, engram.id, engram)
+
+        engram = self._copy_for_embeddings(engram)
+        self.load_embeddings([engram])
+        return engram
+
+    async def fetch_engram_async(self, engram_id: str) -> Engram | None:
+        """Like fetch_engram, for code running on the event loop."""
+        engram: Engram | None = self.cache.get(DB.DBTables.ENGRAM, engram_id)
+        if engram is None:
+            engram_ret = await db_calls.fetch(self.db_plugin, table=DB.DBTables.ENGRAM, ids=[engram_id], args=None)
 
-        # Check if the result is empty
-        if not engram_ret or not engram_ret[0]['engram']:
-            return None
+            if not engram_ret or not engram_ret[0]['engram']:
+                return None
 
-        engram = engram_ret[0]['engram'][0]
-        return Engram(**engram)
+            engram = self.load_dict(engram_ret[0]['engram'][0])
+            self.cache.put(DB.DBTables.ENGRAM, engram.id, engram)
+
+        engram = self._copy_for_embeddings(engram)
+        await self.embedding_repository.load_async(engram.indices or [])
+        return engram
 
     def load_dict(self, engram_dict: dict[str, Any]) -> Engram:
+        if engram_dict.get('indices'):
+            engram_dict['indices'] = [
+                Index(**index) if isinstance(index, dict) else index for index in engram_dict['indices']
+            ]
         engram = Engram(**engram_dict)
 
         return engram
@@ -48,12 +122,13 @@ class EngramRepository:
 
         # Check which IDs exist in the cache
         for engram_id in retrieve_result.engram_id_array:
-            if engram_id in self.cache:
-                cached_engrams.append(self.cache[engram_id])
+            cached = self.cache.get(DB.DBTables.ENGRAM, engram_id)
+            if cached is not None:
+                cached_engrams.append(cached)
             else:
                 missing_ids.append(engram_id)
 
-        # If all are cached, return immediately
+        # If all are cached, return immediately (in rank order, as engram_id_array lists them)
         if not missing_ids:
             return cached_engrams
 
@@ -65,13 +140,27 @@ class EngramRepository:
         # Convert database results to Engram objects
         new_engrams = []
         for engram_data in engram_data_array:
-            indices = engram_data['indices']
-            engram_data['indices'] = [Index(**d) for d in indices]
-            engram = Engram(**engram_data)
+            engram = self.load_dict(engram_data)
             new_engrams.append(engram)
 
             # Store the new Engram in the cache
-            self.cache[engram_data['id']] = engram
-
-        # Return both cached and newly loaded Engrams
-        return cached_engrams + new_engrams
+            self.cache.put(DB.DBTables.ENGRAM, engram.id, engram)
+
+        # Return both cached and newly loaded Engrams, in the rank order of engram_id_array
+        rank = {engram_id: position for position, engram_id in enumerate(retrieve_result.engram_id_array)}
+        return sorted(cached_engrams + new_engrams, key=lambda engram: rank.get(engram.id, len(rank)))
+
+    def iter_engram_pages(
+        self, fields: list[str] | None = None, page_size: int = PAGE_SIZE, args: dict[str, Any] | None = None
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Yields stored engrams as pages of dicts in id order, limited to fields when given."""
+        pages: Iterator[list[dict[str, Any]]] = self.db_plugin['func'].fetch_iter(
+            table=DB.DBTables.ENGRAM, fields=fields, page_size=page_size, after_id=None, args=args
+        )[0]
+        yield from pages
+
+    def iter_engrams(self, page_size: int = PAGE_SIZE, args: dict[str, Any] | None = None) -> Iterator[Engram]:
+        """Yields every stored engram without embeddings. Bypasses the cache so a full scan does not flush it."""
+        for page in self.iter_engram_pages(page_size=page_size, args=args):
+            for engram_dict in page:
+                yield self.load_dict(engram_dict)
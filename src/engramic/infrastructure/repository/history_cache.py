@@ -0,0 +1,160 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from cachetools import LRUCache
+
+HistoryKey = tuple[str, frozenset[str] | None]
+
+
+class HistoryCache:
+    """
+    Write-through cache of recent responses per conversation, shared by every service on a Host.
+
+    Services add each response as MAIN_PROMPT_COMPLETE arrives, and history lookups are answered
+    from memory when the cache knows enough of the conversation. Each (conversation_id,
+    repo_ids_filters) pair keeps a ring buffer of its newest responses. Pairs are evicted least
+    recently used once max_conversations is reached.
+
+    An entry knows the newest `known` responses for certain, or all of them when `complete` is set.
+    A lookup for more rows than that is a miss; the caller reads the database and passes the rows
+    back through store(). Rows are JSON round-tripped on the way in and out, so callers get the same
+    shapes the database returns and cannot mutate the cached copy.
+
+    Attributes:
+        max_conversations (int): Number of (conversation, repo filter) entries kept.
+        max_responses (int): Responses kept per entry.
+
+    Methods:
+        add(response) -> None:
+            Adds a completed response to every entry it belongs to.
+        get(conversation_id, repo_ids_filters, limit) -> list[dict[str, Any]] | None:
+            Returns the newest limit responses, or None when the cache cannot answer.
+        store(conversation_id, repo_ids_filters, limit, rows) -> None:
+            Merges rows read from the database for the same lookup.
+        get_response(response_id, repo_ids_filters) -> dict[str, Any] | None:
+            Returns a cached response by id.
+    """
+
+    DEFAULT_MAX_CONVERSATIONS = 1000
+    DEFAULT_MAX_RESPONSES = 16
+
+    @dataclass
+    class Entry:
+        responses: list[dict[str, Any]]  # newest first
+        known: int
+        complete: bool
+
+    def __init__(
+        self, max_conversations: int = DEFAULT_MAX_CONVERSATIONS, max_responses: int = DEFAULT_MAX_RESPONSES
+    ) -> None:
+        self.max_conversations = max_conversations
+        self.max_responses = max_responses
+        self._entries: LRUCache[HistoryKey, HistoryCache.Entry] = LRUCache(maxsize=max_conversations)
+        self._responses: LRUCache[str, str] = LRUCache(maxsize=max_conversations * max_responses)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _repo_key(repo_ids_filters: list[str] | None) -> frozenset[str] | None:
+        return frozenset(repo_ids_filters) if repo_ids_filters is not None else None
+
+    @staticmethod
+    def _sort_key(response: dict[str, Any]) -> float:
+        return float(response.get('response_time') or 0.0)
+
+    def add(self, response: dict[str, Any]) -> None:
+        prompt = response.get('prompt') or {}
+        if prompt.get('is_lesson') or not prompt.get('save_in_history', True):
+            return
+
+        encoded = json.dumps(response)
+        row = json.loads(encoded)
+        conversation_id = prompt.get('conversation_id')
+        row_repos = self._repo_key(prompt.get('repo_ids_filters'))
+
+        with self._lock:
+            self._responses[row['id']] = encoded
+
+            if conversation_id is None:
+                return
+
+            keys: list[HistoryKey] = [(conversation_id, None)]
+            if row_repos is not None:
+                keys.append((conversation_id, row_repos))
+
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._entries[key] = HistoryCache.Entry([row], known=1, complete=False)
+                    continue
+
+                if any(cached['id'] == row['id'] for cached in entry.responses):
+                    continue
+
+                entry.responses.insert(0, row)
+                entry.responses.sort(key=self._sort_key, reverse=True)
+                entry.known += 1
+                self._trim(entry)
+
+    def get(
+        self, conversation_id: str | None, repo_ids_filters: list[str] | None, limit: int
+    ) -> list[dict[str, Any]] | None:
+        if conversation_id is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get((conversation_id, self._repo_key(repo_ids_filters)))
+            if entry is None or (not entry.complete and entry.known < limit):
+                return None
+            rows = entry.responses[:limit]
+            return json.loads(json.dumps(rows))  # type: ignore[no-any-return]
+
+    def store(
+        self, conversation_id: str | None, repo_ids_filters: list[str] | None, limit: int, rows: list[dict[str, Any]]
+    ) -> None:
+        if conversation_id is None:
+            return
+
+        key = (conversation_id, self._repo_key(repo_ids_filters))
+        rows = json.loads(json.dumps(rows))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            cached = entry.responses if entry is not None else []
+            db_ids = {row['id'] for row in rows}
+            newer = [row for row in cached if row['id'] not in db_ids]
+
+            merged = sorted([*newer, *rows], key=self._sort_key, reverse=True)
+            complete = len(rows) < limit
+            known = len(merged) if complete else min(len(merged), len(newer) + limit)
+
+            entry = HistoryCache.Entry(merged, known=known, complete=complete)
+            self._trim(entry)
+            self._entries[key] = entry
+
+    def get_response(self, response_id: str, repo_ids_filters: list[str] | None) -> dict[str, Any] | None:
+        with self._lock:
+            encoded = self._responses.get(response_id)
+
+        if encoded is None:
+            return None
+
+        row: dict[str, Any] = json.loads(encoded)
+        if repo_ids_filters is not None:
+            row_repos = row.get('prompt', {}).get('repo_ids_filters')
+            if row_repos is None or set(row_repos) != set(repo_ids_filters):
+                return None
+        return row
+
+    def _trim(self, entry: Entry) -> None:
+        if len(entry.responses) > self.max_responses:
+            del entry.responses[self.max_responses :]
+            entry.complete = False
+        entry.known = min(entry.known, len(entry.responses))
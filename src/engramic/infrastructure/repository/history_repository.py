@@ -2,16 +2,71 @@
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
 
+from collections.abc import Iterator
 from dataclasses import asdict
 from typing import Any
 
 from engramic.core.interface.db import DB
 from engramic.core.response import Response
+from engramic.infrastructure.repository.history_cache import HistoryCache
 
 
 class HistoryRepository:
-    def __init__(self, plugin: dict[str, Any]) -> None:
+    PAGE_SIZE = 500
+
+    def __init__(self, plugin: dict[str, Any], cache: HistoryCache | None = None) -> None:
         self.db_plugin = plugin
+        self.cache = cache
 
     def save_history(self, response: Response) -> None:
-        self.db_plugin['func'].insert_documents(table=DB.DBTables.HISTORY, docs=[asdict(response)], args=None)
+        self.save_history_batch([response])
+
+    def save_history_batch(self, responses: list[Response]) -> None:
+        docs = [asdict(response) for response in responses]
+        self.db_plugin['func'].insert_documents(table=DB.DBTables.HISTORY, docs=docs, args=None)
+
+    def fetch_history(
+        self, conversation_id: str | None, repo_ids_filters: list[str] | None, limit: int
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Returns the newest responses of a conversation, from the cache when it can answer."""
+        if self.cache is not None:
+            cached = self.cache.get(conversation_id, repo_ids_filters, limit)
+            if cached is not None:
+                return {'history': cached}
+
+        args = dict(self.db_plugin['args'])
+        args['history_limit'] = limit
+        args['repo_ids_filters'] = repo_ids_filters
+        args['conversation_id'] = conversation_id
+
+        ret: dict[str, list[dict[str, Any]]] = self.db_plugin['func'].fetch(
+            table=DB.DBTables.HISTORY, ids=[], args=args
+        )[0]
+
+        if self.cache is not None:
+            self.cache.store(conversation_id, repo_ids_filters, limit, ret['history'])
+        return ret
+
+    def fetch_response(self, response_id: str, repo_ids_filters: list[str] | None) -> dict[str, list[dict[str, Any]]]:
+        if self.cache is not None:
+            cached = self.cache.get_response(response_id, repo_ids_filters)
+            if cached is not None:
+                return {'history': [cached]}
+
+        args = dict(self.db_plugin['args'])
+        args['repo_ids_filters'] = repo_ids_filters
+        args['history_limit'] = 1
+
+        ret: dict[str, list[dict[str, Any]]] = self.db_plugin['func'].fetch(
+            table=DB.DBTables.HISTORY, ids=[response_id], args=args
+        )[0]
+        return ret
+
+    def iter_history_pages(
+        self, fields: list[str] | None = None, page_size: int = PAGE_SIZE, args: dict[str, Any] | None = None
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Yields stored responses as pages of dicts in id order, limited to fields when given."""
+        pages: Iterator[list[dict[str, Any]]] = self.db_plugin['func'].fetch_iter(
+            table=DB.DBTables.HISTORY, fields=fields, page_size=page_size, after_id=None, args=args
+        )[0]
+        yield from pages
@@ -3,32 +3,65 @@
 # See the LICENSE file in the project root for more details.
 
 
+from collections.abc import Iterator
 from dataclasses import asdict
 from typing import Any
 
-from cachetools import LRUCache
-
 from engramic.core import Index, Meta
 from engramic.core.interface.db import DB
+from engramic.infrastructure.repository.embedding_repository import EmbeddingRepository
+from engramic.infrastructure.repository.repository_cache import RepositoryCache
 
 
 class MetaRepository:
-    def __init__(self, plugin: dict[str, Any], cache_size: int = 1000) -> None:
+    PAGE_SIZE = 500
+
+    def __init__(self, plugin: dict[str, Any], cache: RepositoryCache | None = None) -> None:
         self.db_plugin = plugin
+        self.embedding_repository = EmbeddingRepository(plugin)
 
-        # LRU Cache to store Engram objects
-        self.cache: LRUCache[str, Meta] = LRUCache(maxsize=cache_size)
+        # Shared with the host's other repositories; private when used standalone.
+        self.cache: RepositoryCache = cache if cache is not None else RepositoryCache()
 
     def save(self, meta: Meta) -> None:
-        self.db_plugin['func'].insert_documents(table=DB.DBTables.META, docs=[asdict(meta)], args=None)
+        self.save_batch([meta])
+
+    def save_batch(self, metas: list[Meta]) -> None:
+        meta_dicts = []
+        embedding_rows = []
+        for meta in metas:
+            meta_dict = asdict(meta)
+            if meta.summary_full is not None:
+                embedding_rows.extend(
+                    self.embedding_repository.detach(meta.id, [meta.summary_full], [meta_dict['summary_full']])
+                )
+            meta_dicts.append(meta_dict)
+
+        self.embedding_repository.save(embedding_rows)
+        self.db_plugin['func'].insert_documents(table=DB.DBTables.META, docs=meta_dicts, args=None)
+        self.cache_metas(metas)
+
+    def cache_metas(self, metas: list[Meta]) -> None:
+        for meta in metas:
+            self.cache.put(DB.DBTables.META, meta.id, meta)
+
+    def delete_batch(self, meta_ids: list[str]) -> None:
+        """Deletes metas and the embedding rows of their summaries."""
+        self.cache.invalidate(DB.DBTables.META, meta_ids)
+        ret = self.db_plugin['func'].fetch(table=DB.DBTables.META, ids=meta_ids, args=None)
+        index_ids = [
+            meta_dict['summary_full']['id'] for meta_dict in ret[0].get('meta', []) if meta_dict.get('summary_full')
+        ]
+
+        self.db_plugin['func'].delete_documents(table=DB.DBTables.META, ids=meta_ids, args=None)
+        self.embedding_repository.delete(index_ids)
 
     def load(self, meta_dict: dict[str, Any]) -> Meta:
         if meta_dict is None:
             return None
 
         if isinstance(meta_dict.get('summary_full'), dict):
-            summary = meta_dict['summary_full']
-            meta_dict['summary_full'] = Index(summary['text'], summary['embedding'])
+            meta_dict['summary_full'] = Index(**meta_dict['summary_full'])
 
         meta = Meta(**meta_dict)
         return meta
@@ -39,8 +72,9 @@ class MetaRepository:
 
         # Check which IDs exist in the cache
         for meta_id in meta_array:
-            if meta_id in self.cache:
-                cached_metas.append(self.cache[meta_id])
+            cached = self.cache.get(DB.DBTables.META, meta_id)
+            if cached is not None:
+                cached_metas.append(cached)
             else:
                 missing_ids.append(meta_id)
 
@@ -72,7 +106,22 @@ class MetaRepository:
             new_metas.append(meta)
 
             # Store the new Engram in the cache
-            self.cache[meta_data['id']] = meta
+            self.cache.put(DB.DBTables.META, meta.id, meta)
 
         # Return both cached and newly loaded Engrams
         return cached_metas + new_metas
+
+    def iter_meta_pages(
+        self, fields: list[str] | None = None, page_size: int = PAGE_SIZE, args: dict[str, Any] | None = None
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Yields stored metas as pages of dicts in id order, limited to fields when given."""
+        pages: Iterator[list[dict[str, Any]]] = self.db_plugin['func'].fetch_iter(
+            table=DB.DBTables.META, fields=fields, page_size=page_size, after_id=None, args=args
+        )[0]
+        yield from pages
+
+    def iter_metas(self, page_size: int = PAGE_SIZE, args: dict[str, Any] | None = None) -> Iterator[Meta]:
+        """Yields every stored meta without embeddings. Bypasses the cache so a full scan does not flush it."""
+        for page in self.iter_meta_pages(page_size=page_size, args=args):
+            for meta_dict in page:
+                yield self.load(meta_dict)
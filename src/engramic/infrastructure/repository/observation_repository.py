@@ -6,6 +6,7 @@ import json
 import re
 import time
 import uuid
+from collections.abc import Iterator
 from typing import Any
 
 from cachetools import LRUCache
@@ -18,16 +19,21 @@ from engramic.core.observation import Observation
 from engramic.core.response import Response
 from engramic.infrastructure.repository.engram_repository import EngramRepository
 from engramic.infrastructure.repository.meta_repository import MetaRepository
+from engramic.infrastructure.repository.repository_cache import RepositoryCache
 from engramic.infrastructure.system.observation_system import ObservationSystem
 
 
 class ObservationRepository:
-    def __init__(self, plugin: dict[str, Any] | None, cache_size: int = 1000) -> None:
+    PAGE_SIZE = 500
+
+    def __init__(
+        self, plugin: dict[str, Any] | None, cache_size: int = 1000, repository_cache: RepositoryCache | None = None
+    ) -> None:
         self.db_plugin = plugin
 
         if plugin:
-            self.meta_repository = MetaRepository(plugin)
-            self.engram_repository = EngramRepository(plugin)
+            self.meta_repository = MetaRepository(plugin, repository_cache)
+            self.engram_repository = EngramRepository(plugin, repository_cache)
 
         # LRU Cache to store Engram objects
         self.cache: LRUCache[str, Observation] = LRUCache(maxsize=cache_size)
@@ -132,3 +138,31 @@ class ObservationRepository:
             )
             return ret
         return False
+
+    def save_batch(self, observations: list[dict[str, Any]]) -> None:
+        if self.db_plugin:
+            self.db_plugin['func'].insert_documents(table=DB.DBTables.OBSERVATION, docs=observations, args=None)
+
+    def load_derived_ids(self, parent_id: str) -> tuple[list[str], list[str]]:
+        """Returns the engram ids and meta ids of every stored observation of parent_id (a document or response)."""
+        engram_ids: list[str] = []
+        meta_ids: list[str] = []
+        if not self.db_plugin:
+            return engram_ids, meta_ids
+
+        pages: Iterator[list[dict[str, Any]]] = self.db_plugin['func'].fetch_iter(
+            table=DB.DBTables.OBSERVATION,
+            fields=['parent_id', 'meta', 'engram_list'],
+            page_size=self.PAGE_SIZE,
+            after_id=None,
+            args={'parent_id': parent_id},
+        )[0]
+        for page in pages:
+            for observation in page:
+                # The ids are deleted from the vector store, so a plugin that ignored the filter must not widen them.
+                if observation.get('parent_id') != parent_id:
+                    continue
+                engram_ids.extend(engram['id'] for engram in observation.get('engram_list') or [])
+                if observation.get('meta'):
+                    meta_ids.append(observation['meta']['id'])
+        return engram_ids, meta_ids
@@ -3,11 +3,13 @@
 # See the LICENSE file in the project root for more details.
 
 import logging
+from collections.abc import Coroutine
 from dataclasses import asdict
 from typing import Any
 
 from engramic.application.process.process import Process
 from engramic.core.interface.db import DB
+from engramic.infrastructure.system import db_calls
 
 
 class ProcessRepository:
@@ -24,6 +26,11 @@ class ProcessRepository:
         process_dict = asdict(process)
         self.db_plugin['func'].insert_documents(table=DB.DBTables.PROCESS, docs=[process_dict], args=None)
 
+    def save_async(self, process: Process) -> Coroutine[Any, Any, list[None]]:
+        """Serializes the process now and returns the write to await, so later changes are not saved with it."""
+        process_dict = asdict(process)
+        return db_calls.insert_documents(self.db_plugin, table=DB.DBTables.PROCESS, docs=[process_dict], args=None)
+
     def load(self, process_id: str) -> dict[str, Any]:
         ret: list[dict[str, Any]] = self.db_plugin['func'].fetch(table=DB.DBTables.PROCESS, ids=[process_id], args=None)
         return ret[0]
@@ -33,3 +40,7 @@ class ProcessRepository:
             table=DB.DBTables.PROCESS, ids=None, args={'history_limit': count}
         )
         return ret[0]
+
+    async def load_most_recent_async(self, count: int) -> dict[str, Any]:
+        ret = await db_calls.fetch(self.db_plugin, table=DB.DBTables.PROCESS, ids=None, args={'history_limit': count})
+        return ret[0]
@@ -0,0 +1,107 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+from __future__ import annotations
+
+import sys
+import threading
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from typing import Any
+
+from cachetools import LRUCache
+
+from engramic.core.metrics_tracker import MetricPacket, MetricsTracker
+
+
+class RepositoryCacheMetric(Enum):
+    HITS = 'hits'
+    MISSES = 'misses'
+    EVICTIONS = 'evictions'
+    BYTES = 'bytes'
+
+
+class RepositoryCache:
+    """
+    Least recently used cache of loaded engrams and metas, shared by every repository on a Host.
+
+    Entries are keyed by (table, id) and bounded by an estimate of their size in bytes rather than
+    by count, so a few engrams with large contexts cannot crowd the cache the same way a thousand
+    small ones would. Repositories put objects as they save or load them and invalidate them when
+    they are deleted. An object too large for the cache on its own is not cached.
+
+    Attributes:
+        max_bytes (int): Upper bound on the estimated size of all cached objects.
+
+    Methods:
+        get(table, object_id) -> Any | None:
+            Returns a cached object and counts a hit or miss.
+        put(table, object_id, value) -> None:
+            Caches or replaces an object.
+        invalidate(table, object_ids) -> None:
+            Drops objects from the cache.
+        get_and_reset_packet() -> MetricPacket:
+            Returns hit, miss and eviction counts, plus the current size in BYTES, and resets the counts.
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    class _LRUCache(LRUCache[tuple[Enum, str], Any]):
+        def __init__(self, max_bytes: int, metrics_tracker: MetricsTracker[RepositoryCacheMetric]) -> None:
+            super().__init__(maxsize=max_bytes, getsizeof=RepositoryCache.estimate_size)
+            self.metrics_tracker = metrics_tracker
+
+        def popitem(self) -> tuple[tuple[Enum, str], Any]:
+            self.metrics_tracker.increment(RepositoryCacheMetric.EVICTIONS)
+            return super().popitem()
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.metrics_tracker: MetricsTracker[RepositoryCacheMetric] = MetricsTracker[RepositoryCacheMetric]()
+        self._cache = RepositoryCache._LRUCache(max_bytes, self.metrics_tracker)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        """Approximates the memory held by value, counting floats in embeddings at their boxed size."""
+        if isinstance(value, str):
+            return sys.getsizeof(value)
+        if isinstance(value, list | tuple | set):
+            return sys.getsizeof(value) + sum(RepositoryCache.estimate_size(item) for item in value)
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(
+                RepositoryCache.estimate_size(key) + RepositoryCache.estimate_size(item) for key, item in value.items()
+            )
+        if is_dataclass(value) and not isinstance(value, type):
+            return sys.getsizeof(value) + sum(
+                RepositoryCache.estimate_size(getattr(value, field.name)) for field in fields(value)
+            )
+        return sys.getsizeof(value)
+
+    def get(self, table: Enum, object_id: str) -> Any | None:
+        with self._lock:
+            value = self._cache.get((table, object_id))
+
+        metric = RepositoryCacheMetric.MISSES if value is None else RepositoryCacheMetric.HITS
+        self.metrics_tracker.increment(metric)
+        return value
+
+    def put(self, table: Enum, object_id: str, value: Any) -> None:
+        with self._lock:
+            try:
+                self._cache[(table, object_id)] = value
+            except ValueError:
+                # Larger than the whole cache; make sure a stale copy is not served instead.
+                self._cache.pop((table, object_id), None)
+
+    def invalidate(self, table: Enum, object_ids: list[str]) -> None:
+        with self._lock:
+            for object_id in object_ids:
+                self._cache.pop((table, object_id), None)
+
+    def get_and_reset_packet(self) -> MetricPacket:
+        packet = self.metrics_tracker.get_and_reset_packet()
+        with self._lock:
+            packet['metrics'][RepositoryCacheMetric.BYTES.name] = int(self._cache.currsize)
+        return packet
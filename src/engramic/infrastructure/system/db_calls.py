@@ -0,0 +1,61 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Helpers that call document database plugins from the event loop.
+
+Plugins may implement the optional `connect_async`, `close_async`, `fetch_async`, `insert_documents_async`
+and `delete_documents_async` hooks. When they do, these helpers await them directly. Plugins that only
+implement the synchronous hooks are called through `asyncio.to_thread`, so the event loop never blocks on
+the database either way. All helpers return the usual pluggy list of results so call sites keep using
+`ret[0]`.
+
+Repositories keep their synchronous methods for code already running in a worker thread, and offer
+`_async` variants built on these helpers for code running on the loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+from engramic.infrastructure.system.plugin_manager import has_impl
+
+if TYPE_CHECKING:
+    from engramic.core.interface.db import DB
+
+
+async def _call(plugin: dict[str, Any], name: str, **kwargs: Any) -> list[Any]:
+    hook = plugin['func']
+    if has_impl(hook, f'{name}_async'):
+        coroutines = getattr(hook, f'{name}_async')(**kwargs)
+        return [await coroutine for coroutine in coroutines]
+
+    ret: list[Any] = await asyncio.to_thread(getattr(hook, name), **kwargs)
+    return ret
+
+
+async def connect_db(plugin: dict[str, Any], *, args: dict[str, Any] | None) -> list[None]:
+    return await _call(plugin, 'connect', args=args)
+
+
+async def close_db(plugin: dict[str, Any], *, args: dict[str, Any] | None) -> list[None]:
+    return await _call(plugin, 'close', args=args)
+
+
+async def fetch(
+    plugin: dict[str, Any], *, table: DB.DBTables, ids: list[str] | None, args: dict[str, Any] | None
+) -> list[dict[str, list[dict[str, Any]]]]:
+    return await _call(plugin, 'fetch', table=table, ids=ids, args=args)
+
+
+async def insert_documents(
+    plugin: dict[str, Any], *, table: DB.DBTables, docs: list[dict[str, Any]], args: dict[str, Any] | None
+) -> list[None]:
+    return await _call(plugin, 'insert_documents', table=table, docs=docs, args=args)
+
+
+async def delete_documents(
+    plugin: dict[str, Any], *, table: DB.DBTables, ids: list[str], args: dict[str, Any] | None
+) -> list[None]:
+    return await _call(plugin, 'delete_documents', table=table, ids=ids, args=args)
@@ -0,0 +1,252 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, fields
+from enum import Enum
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from engramic.core.metrics_tracker import MetricPacket, MetricsTracker
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+T = TypeVar('T')
+
+
+class GovernorMetric(Enum):
+    CALLS = 'calls'
+    QUEUE_TIME_MS = 'queue_time_ms'
+    RETRIES = 'retries'
+    FAILURES = 'failures'
+    HEDGES = 'hedges'
+    HEDGE_WINS = 'hedge_wins'
+
+
+class TokenBucket:
+    """
+    Refills at per_minute / 60 units per second up to a one minute burst.
+
+    Only used from the host event loop, so it needs no lock.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    async def acquire(self, amount: float) -> None:
+        amount = min(amount, self.capacity)
+        while True:
+            now = time.monotonic()
+            self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.available >= amount:
+                self.available -= amount
+                return
+
+            await asyncio.sleep((amount - self.available) / self.rate)
+
+
+class Governor:
+    """
+    Shares provider capacity between every service calling the same (category, model).
+
+    Limits come from the `governor` table of the active profile, keyed by plugin category and then
+    model name, with `default` as the fallback for a category:
+
+        governor.llm."gemini-2.5-pro" = {max_in_flight=16, rpm=150, tpm=2000000}
+
+    Each lane applies its request and token buckets, then waits on its in-flight semaphore before
+    running the call. Retryable errors (HTTP 408, 429 and 5xx status codes, timeouts and connection
+    errors) are retried with full-jitter exponential backoff. When a hedge delay is given and the
+    first attempt has not finished in time, a duplicate request is raced against it and the loser is
+    cancelled.
+
+    Attributes:
+        config (dict[str, dict[str, dict[str, Any]]]): The profile's governor table.
+        lanes (dict[tuple[str, str], Governor.Lane]): Lanes created so far, keyed by (category, model).
+
+    Methods:
+        run(category, model, call, tokens, hedge_delay, can_retry) -> T:
+            Runs call under the lane's limits with retries and optional hedging.
+        is_saturated(category, model, latency_slo) -> bool:
+            Returns True when a lane is full or slower than latency_slo. Used by ModelRouter fallbacks.
+        is_retryable(err) -> bool:
+            Returns True for errors worth retrying.
+        get_and_reset_packet() -> MetricPacket:
+            Returns per-lane metrics, named METRIC[category/model], and resets them.
+    """
+
+    RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+    DEFAULT_LANE = 'default'
+    LATENCY_SMOOTHING = 0.2
+
+    @dataclass
+    class Limits:
+        max_in_flight: int | None = None
+        rpm: float | None = None
+        tpm: float | None = None
+        max_retries: int = 3
+        backoff_base: float = 0.5
+        backoff_max: float = 30.0
+
+    class Lane:
+        def __init__(self, limits: Governor.Limits):
+            self.limits = limits
+            self.semaphore = asyncio.Semaphore(limits.max_in_flight) if limits.max_in_flight else None
+            self.requests = TokenBucket(limits.rpm) if limits.rpm else None
+            self.tokens = TokenBucket(limits.tpm) if limits.tpm else None
+            self.metrics_tracker: MetricsTracker[GovernorMetric] = MetricsTracker[GovernorMetric]()
+            self.latency: float | None = None
+
+        def record_latency(self, seconds: float) -> None:
+            if self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency += Governor.LATENCY_SMOOTHING * (seconds - self.latency)
+
+    def __init__(self, config: dict[str, dict[str, dict[str, Any]]] | None = None):
+        self.config = config or {}
+        self.lanes: dict[tuple[str, str], Governor.Lane] = {}
+
+    def lane(self, category: str, model: str | None) -> Lane:
+        key = (category, model or Governor.DEFAULT_LANE)
+        lane = self.lanes.get(key)
+        if lane is None:
+            category_config = self.config.get(category, {})
+            lane_config = category_config.get(key[1], category_config.get(Governor.DEFAULT_LANE, {}))
+            known = {field.name for field in fields(Governor.Limits)}
+            unknown = set(lane_config) - known
+            if unknown:
+                error = f'Unknown governor settings for {category}/{key[1]}: {sorted(unknown)}'
+                raise ValueError(error)
+            lane = Governor.Lane(Governor.Limits(**lane_config))
+            self.lanes[key] = lane
+        return lane
+
+    async def run(
+        self,
+        category: str,
+        model: str | None,
+        call: Callable[[], Awaitable[T]],
+        *,
+        tokens: Callable[[], int] | None = None,
+        hedge_delay: float | None = None,
+        can_retry: Callable[[], bool] | None = None,
+    ) -> T:
+        """
+        Runs call, a factory returning a fresh awaitable per attempt, under the (category, model) lane.
+
+        tokens estimates the request size and is only evaluated when the lane has a TPM limit.
+        can_retry is checked before each retry, for calls that cannot be repeated once they have
+        produced output.
+        """
+        lane = self.lane(category, model)
+        lane.metrics_tracker.increment(GovernorMetric.CALLS)
+        token_count = tokens() if tokens is not None and lane.tokens is not None else 0
+
+        if hedge_delay is None:
+            return await self._call_with_retries(lane, call, token_count, can_retry)
+
+        return await self._call_hedged(lane, call, token_count, hedge_delay)
+
+    async def _attempt(self, lane: Lane, call: Callable[[], Awaitable[T]], token_count: int) -> T:
+        start = time.monotonic()
+
+        if lane.requests is not None:
+            await lane.requests.acquire(1)
+        if lane.tokens is not None and token_count:
+            await lane.tokens.acquire(token_count)
+
+        if lane.semaphore is None:
+            return await self._timed_call(lane, call, start)
+
+        async with lane.semaphore:
+            return await self._timed_call(lane, call, start)
+
+    async def _timed_call(self, lane: Lane, call: Callable[[], Awaitable[T]], queued_at: float) -> T:
+        start = time.monotonic()
+        lane.metrics_tracker.increment(GovernorMetric.QUEUE_TIME_MS, int((start - queued_at) * 1000))
+        result = await call()
+        lane.record_latency(time.monotonic() - start)
+        return result
+
+    async def _call_with_retries(
+        self,
+        lane: Lane,
+        call: Callable[[], Awaitable[T]],
+        token_count: int,
+        can_retry: Callable[[], bool] | None = None,
+    ) -> T:
+        limits = lane.limits
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(lane, call, token_count)
+            except Exception as err:
+                retry = attempt < limits.max_retries and self.is_retryable(err)
+                if not retry or (can_retry is not None and not can_retry()):
+                    lane.metrics_tracker.increment(GovernorMetric.FAILURES)
+                    raise
+
+                ceiling = min(limits.backoff_max, limits.backoff_base * 2**attempt)
+                delay = random.uniform(0, ceiling)  # noqa: S311 - backoff jitter, not a security use
+                logging.warning('Retrying after %s (attempt %s), waiting %.2fs.', err, attempt + 1, delay)
+                lane.metrics_tracker.increment(GovernorMetric.RETRIES)
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _call_hedged(self, lane: Lane, call: Callable[[], Awaitable[T]], token_count: int, delay: float) -> T:
+        primary: asyncio.Future[T] = asyncio.ensure_future(self._call_with_retries(lane, call, token_count))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        lane.metrics_tracker.increment(GovernorMetric.HEDGES)
+        hedge: asyncio.Future[T] = asyncio.ensure_future(self._call_with_retries(lane, call, token_count))
+        pending: set[asyncio.Future[T]] = {primary, hedge}
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            lane.metrics_tracker.increment(GovernorMetric.HEDGE_WINS)
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def is_saturated(self, category: str, model: str | None, latency_slo: float | None = None) -> bool:
+        """Returns True when the lane has no free in-flight slot or its recent latency exceeds latency_slo."""
+        lane = self.lane(category, model)
+        if lane.semaphore is not None and lane.semaphore.locked():
+            return True
+        return latency_slo is not None and lane.latency is not None and lane.latency > latency_slo
+
+    def is_retryable(self, err: BaseException) -> bool:
+        status = getattr(err, 'code', None)
+        if not isinstance(status, int):
+            status = getattr(err, 'status_code', None)
+        if isinstance(status, int):
+            return status in Governor.RETRYABLE_STATUS
+        return isinstance(err, TimeoutError | ConnectionError)
+
+    def get_and_reset_packet(self) -> MetricPacket:
+        metrics: dict[str, int] = {}
+        for (category, model), lane in list(self.lanes.items()):
+            packet = lane.metrics_tracker.get_and_reset_packet()
+            for name, count in packet['metrics'].items():
+                metrics[f'{name}[{category}/{model}]'] = count
+        return {'timestamp': time.time(), 'metrics': metrics}
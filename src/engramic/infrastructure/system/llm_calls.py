@@ -0,0 +1,172 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Helpers that call LLM and embedding plugins from the event loop.
+
+Plugins may implement the optional `submit_async` and `stream_async` hooks. When they do, these helpers
+await them directly, so an in-flight generation holds no executor thread. Plugins that only implement
+the synchronous hooks are called through `asyncio.to_thread` exactly as before. All helpers return the
+usual pluggy list of results so call sites keep using `ret[0]`.
+
+Every call goes through the plugin manager's Governor, which applies the per (category, model) limits,
+retries and hedging configured in the profile. LLM calls are first routed by the ModelRouter, which may
+swap the model in args according to the profile's routing rules and the caller's route_hints.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from engramic.infrastructure.system.plugin_manager import has_impl
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from engramic.core.prompt import Prompt
+    from engramic.infrastructure.system.governor import Governor
+    from engramic.infrastructure.system.model_router import ModelRouter
+    from engramic.infrastructure.system.websocket_manager import WebsocketManager
+
+T = TypeVar('T')
+
+CHARS_PER_TOKEN = 4
+TOKENS_PER_IMAGE = 258
+
+
+async def _governed(
+    plugin: dict[str, Any],
+    args: dict[str, Any],
+    call: Callable[[], Awaitable[T]],
+    *,
+    tokens: Callable[[], int] | None = None,
+    hedge: bool = False,
+    can_retry: Callable[[], bool] | None = None,
+) -> T:
+    governor: Governor | None = plugin.get('governor')
+    if governor is None:
+        return await call()
+
+    hedge_delay = args.get('hedge_delay') if hedge else None
+    return await governor.run(
+        plugin['category'],
+        args.get('model'),
+        call,
+        tokens=tokens,
+        hedge_delay=float(hedge_delay) if hedge_delay is not None else None,
+        can_retry=can_retry,
+    )
+
+
+def _route(
+    plugin: dict[str, Any], args: dict[str, Any], prompt: Prompt, route_hints: dict[str, Any] | None
+) -> dict[str, Any]:
+    router: ModelRouter | None = plugin.get('router')
+    if router is None or not router.has_rules(plugin['category'], plugin['usage']):
+        return args
+
+    hints = {**(route_hints or {}), 'prompt_chars': len(prompt.render_prompt())}
+    model = router.route(plugin['category'], plugin['usage'], args.get('model'), hints)
+    if model == args.get('model'):
+        return args
+    return {**args, 'model': model}
+
+
+def _with_model(ret: list[dict[str, Any]], args: dict[str, Any]) -> list[dict[str, Any]]:
+    # Routing may change the model, so report the one that actually answered.
+    if 'model' not in args:
+        return ret
+    return [{**item, 'model': args['model']} for item in ret]
+
+
+def _estimate_tokens(prompt: Prompt, images: list[str] | None = None) -> int:
+    return len(prompt.render_prompt()) // CHARS_PER_TOKEN + TOKENS_PER_IMAGE * len(images or [])
+
+
+async def submit_llm(
+    plugin: dict[str, Any],
+    *,
+    prompt: Prompt,
+    images: list[str] | None,
+    structured_schema: dict[str, Any] | None,
+    args: dict[str, Any],
+    route_hints: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    """Submits a prompt, preferring the plugin's `submit_async` hook. Hedged when the usage sets hedge_delay."""
+    hook = plugin['func']
+    args = _route(plugin, args, prompt, route_hints)
+
+    async def call() -> list[dict[str, Any]]:
+        if has_impl(hook, 'submit_async'):
+            coroutines = hook.submit_async(prompt=prompt, images=images, structured_schema=structured_schema, args=args)
+            return [await coroutine for coroutine in coroutines]
+
+        ret: list[dict[str, Any]] = await asyncio.to_thread(
+            hook.submit, prompt=prompt, images=images, structured_schema=structured_schema, args=args
+        )
+        return ret
+
+    ret = await _governed(plugin, args, call, tokens=lambda: _estimate_tokens(prompt, images), hedge=True)
+    return _with_model(ret, args)
+
+
+async def stream_llm(
+    plugin: dict[str, Any],
+    *,
+    prompt: Prompt,
+    args: dict[str, Any],
+    websocket_manager: WebsocketManager,
+    route_hints: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Streams a prompt to the websocket, preferring the plugin's `stream_async` hook.
+
+    Every packet from the stream is forwarded to the websocket except the final result packet, a
+    control packet with finish set whose text is the plugin's complete response. Streams are never
+    hedged, and are only retried if the failure happened before anything was sent.
+    """
+    hook = plugin['func']
+    args = _route(plugin, args, prompt, route_hints)
+    forwarded = False
+
+    def send(packet: Any) -> None:
+        nonlocal forwarded
+        forwarded = True
+        websocket_manager.send_message(packet)
+
+    async def call() -> list[dict[str, Any]]:
+        nonlocal forwarded
+        if not has_impl(hook, 'stream_async'):
+            # The plugin writes to the websocket itself, so there is no way to tell whether output was sent.
+            forwarded = True
+            ret: list[dict[str, Any]] = await asyncio.to_thread(
+                hook.submit_streaming, prompt=prompt, args=args, websocket_manager=websocket_manager
+            )
+            return ret
+
+        responses: list[dict[str, Any]] = []
+        for stream in hook.stream_async(prompt=prompt, args=args):
+            llm_response = ''
+            async for packet in stream:
+                if packet.control and packet.finish:
+                    llm_response = packet.packet
+                else:
+                    send(packet)
+            responses.append({'llm_response': llm_response})
+
+        return responses
+
+    ret = await _governed(plugin, args, call, tokens=lambda: _estimate_tokens(prompt), can_retry=lambda: not forwarded)
+    return _with_model(ret, args)
+
+
+async def gen_embeddings(plugin: dict[str, Any], *, strings: list[str], args: dict[str, Any]) -> list[dict[str, Any]]:
+    """Generates embeddings in a worker thread under the embedding model's governor lane."""
+    hook = plugin['func']
+
+    async def call() -> list[dict[str, Any]]:
+        ret: list[dict[str, Any]] = await asyncio.to_thread(hook.gen_embed, strings=strings, args=args)
+        return ret
+
+    return await _governed(plugin, args, call, tokens=lambda: sum(len(text) for text in strings) // CHARS_PER_TOKEN)
@@ -0,0 +1,96 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from engramic.infrastructure.system.governor import Governor
+
+
+class ModelRouter:
+    """
+    Picks the model for each LLM call from ordered rules in the profile's `routing` table.
+
+    Rules are keyed by category and usage. The first rule whose conditions all hold wins; a rule with
+    no conditions always matches. When the rule's model is saturated (its governor lane has no free
+    slot, or its recent latency is above the rule's latency_slo) the first unsaturated fallback is used
+    instead. Usages without rules keep the model from their plugin args.
+
+        routing.llm.response_main = [
+            {model="gemini-2.5-flash", max_prompt_chars=12000, response_length=["short"]},
+            {model="gemini-2.5-pro", fallback=["gemini-2.5-flash"], latency_slo=45.0},
+        ]
+
+    Conditions compare against routing hints supplied by the caller. A condition on a hint the caller
+    did not supply never matches. prompt_chars is always supplied.
+
+    Attributes:
+        rules (dict[str, dict[str, list[dict[str, Any]]]]): Routing rules by category and usage.
+        governor (Governor): Source of saturation and latency for each (category, model).
+
+    Methods:
+        has_rules(category, usage) -> bool:
+            Returns True when the usage is routed.
+        route(category, usage, default_model, hints) -> str | None:
+            Returns the model to use for one call.
+    """
+
+    CONDITIONS = frozenset({
+        'min_prompt_chars',
+        'max_prompt_chars',
+        'response_length',
+        'user_prompt_type',
+        'min_thinking_level',
+        'max_thinking_level',
+    })
+    RULE_KEYS = CONDITIONS | {'model', 'fallback', 'latency_slo'}
+
+    def __init__(self, rules: dict[str, dict[str, list[dict[str, Any]]]] | None, governor: Governor):
+        self.rules = rules or {}
+        self.governor = governor
+
+        for category, usages in self.rules.items():
+            for usage, usage_rules in usages.items():
+                for rule in usage_rules:
+                    unknown = set(rule) - ModelRouter.RULE_KEYS
+                    if unknown or 'model' not in rule:
+                        error = f'Invalid routing rule for {category}.{usage}: {rule}'
+                        raise ValueError(error)
+
+    def has_rules(self, category: str, usage: str) -> bool:
+        return bool(self.rules.get(category, {}).get(usage))
+
+    def route(self, category: str, usage: str, default_model: str | None, hints: dict[str, Any]) -> str | None:
+        for rule in self.rules.get(category, {}).get(usage, []):
+            if not self._matches(rule, hints):
+                continue
+
+            candidates: list[str] = [rule['model'], *rule.get('fallback', [])]
+            for model in candidates:
+                if not self.governor.is_saturated(category, model, rule.get('latency_slo')):
+                    return model
+            return candidates[0]
+
+        return default_model
+
+    def _matches(self, rule: dict[str, Any], hints: dict[str, Any]) -> bool:
+        for condition in ModelRouter.CONDITIONS & set(rule):
+            expected = rule[condition]
+            hint_name = condition.removeprefix('min_').removeprefix('max_')
+            value = hints.get(hint_name)
+
+            if value is None:
+                return False
+            if condition.startswith('min_') and value < expected:
+                return False
+            if condition.startswith('max_') and value > expected:
+                return False
+            if not condition.startswith(('min_', 'max_')):
+                allowed = expected if isinstance(expected, list) else [expected]
+                if value not in allowed:
+                    return False
+
+        return True
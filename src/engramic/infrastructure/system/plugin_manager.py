@@ -22,6 +22,8 @@ import pluggy
 import tomli
 
 from engramic.infrastructure.system.engram_profiles import EngramProfiles
+from engramic.infrastructure.system.governor import Governor
+from engramic.infrastructure.system.model_router import ModelRouter
 
 if TYPE_CHECKING:
     from importlib.abc import Traversable
@@ -29,6 +31,12 @@ if TYPE_CHECKING:
     from engramic.core.host import Host
 
 
+def has_impl(hook: Any, name: str) -> bool:
+    """Returns whether any registered plugin implements the optional hook name."""
+    caller = getattr(hook, name, None)
+    return caller is not None and bool(caller.get_hookimpls())
+
+
 class ResponseType(Enum):
     SUCCESS = 1
     FAILURE = 0
@@ -36,6 +44,7 @@ class ResponseType(Enum):
 
 class PluginManager:
     PLUGIN_DEFAULT_ROOT = 'engramic.resources.plugins'
+    NON_PLUGIN_KEYS = frozenset({'type', 'name', 'governor', 'routing'})
 
     @dataclass
     class PluginManagerResponse:
@@ -49,6 +58,8 @@ class PluginManager:
         self.custom_plugin_paths: list[str] = []
         self.plugin_managers: dict[str, Any] = {}
         self.modules: dict[str, Any] = {}
+        self.governor: Governor = Governor()
+        self.router: ModelRouter = ModelRouter(None, self.governor)
 
         # custom_plugin_paths = os.getenv('CUSTOM_PLUGIN_PATHS')
 
@@ -107,7 +118,7 @@ class PluginManager:
 
         if current_profile:
             for row_key, row_value in current_profile.items():
-                if row_key in {'type', 'name'}:
+                if row_key in PluginManager.NON_PLUGIN_KEYS:
                     continue
 
                 for usage in row_value:
@@ -126,6 +137,9 @@ class PluginManager:
 
     def set_profile(self, profile_name: str) -> None:
         self.profiles.set_current_profile(profile_name)
+        profile = self.profiles.get_currently_set_profile()
+        self.governor = Governor(profile.get('governor'))
+        self.router = ModelRouter(profile.get('routing'), self.governor)
 
     def import_plugins(self) -> None:
         current_profile = self.profiles.get_currently_set_profile()
@@ -189,13 +203,28 @@ class PluginManager:
                 if plugin_class not in pm.get_plugins():
                     pm.register(plugin_class)
 
-                return {'func': pm.hook, 'args': args, 'usage': usage}
+                return {
+                    'func': pm.hook,
+                    'args': args,
+                    'usage': usage,
+                    'category': category,
+                    'governor': self.governor,
+                    'router': self.router,
+                }
 
         logging.error('Plugin %s.%s failed to load.', category, usage)
         error = 'Plugin failed to load'
         raise RuntimeError(error)
 
     def shutdown_plugins(self) -> None:
+        # Vector plugins may run worker processes or threads, which are stopped before they are unregistered.
+        vector_pm = self.plugin_managers.get('vector_db')
+        if vector_pm is not None and has_impl(vector_pm.hook, 'close'):
+            try:
+                vector_pm.hook.close(args={})
+            except Exception:
+                logging.exception('Closing the vector database plugins failed.')
+
         for category in self.plugin_managers:
             pm = self.plugin_managers[category]
             for plugin in list(pm.get_plugins()):
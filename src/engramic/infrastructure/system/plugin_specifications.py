@@ -3,6 +3,7 @@
 # See the LICENSE file in the project root for more details.
 
 
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
 import pluggy
@@ -27,6 +28,27 @@ class LLMSpec(LLM):
         error_message = 'Subclasses must implement `submit`'
         raise NotImplementedError(error_message)
 
+    @llm_spec
+    async def submit_async(
+        self, prompt: Prompt, images: list[str], structured_schema: dict[str, Any], args: dict[str, Any]
+    ) -> dict[str, str]:
+        """Optional coroutine version of `submit`. Callers fall back to `submit` in a thread when absent."""
+        del prompt, structured_schema, args, images
+        error_message = 'Subclasses must implement `submit_async`'
+        raise NotImplementedError(error_message)
+
+    @llm_spec
+    def stream_async(self, prompt: Prompt, args: dict[str, Any]) -> AsyncIterator[LLM.StreamPacket]:
+        """
+        Optional async generator version of `submit_streaming`.
+
+        Yields the packets to send to the websocket, then a final control packet with finish set whose
+        text is the complete response returned to the caller.
+        """
+        del prompt, args
+        error_message = 'Subclasses must implement `stream_async`'
+        raise NotImplementedError(error_message)
+
 
 llm_manager = pluggy.PluginManager('llm')
 llm_manager.add_hookspecs(LLMSpec)
@@ -37,6 +59,18 @@ vector_db_spec = pluggy.HookspecMarker('vector_db')
 
 
 class VectorDBspec(VectorDB):
+    @vector_db_spec
+    def connect(self, collection_name: str, args: dict[str, Any]) -> None:
+        """
+        Optional. Opens a collection with the settings of the plugin entry, before it is queried or written.
+
+        args are the profile's args for the usage that owns the collection, without any per-query overrides.
+        Callers skip it when a plugin does not implement it.
+        """
+        del collection_name, args
+        error_message = 'Subclasses must implement `connect`'
+        raise NotImplementedError(error_message)
+
     @vector_db_spec
     def query(
         self,
@@ -66,6 +100,65 @@ class VectorDBspec(VectorDB):
         error_message = 'Subclasses must implement `index`'
         raise NotImplementedError(error_message)
 
+    @vector_db_spec
+    def list_obj_ids(self, collection_name: str, args: dict[str, Any]) -> list[str]:
+        """Optional. Returns the distinct obj_ids that have vectors in a collection, for maintenance."""
+        del collection_name, args
+        error_message = 'Subclasses must implement `list_obj_ids`'
+        raise NotImplementedError(error_message)
+
+    @vector_db_spec
+    def upsert(
+        self,
+        collection_name: str,
+        index_list: list[Index],
+        obj_id: str,
+        args: dict[str, Any],
+        filters: list[str],
+        type_filter: str,
+        location_filter: str,
+    ) -> None:
+        """
+        Replaces the vectors of obj_id with the embeddings of index_list.
+
+        Vector ids are the Index ids, so upserting the same indices again leaves one vector each, and
+        vectors of obj_id that are not in index_list are removed.
+        """
+        del index_list, collection_name, obj_id, args, filters, type_filter, location_filter
+        error_message = 'Subclasses must implement `upsert`'
+        raise NotImplementedError(error_message)
+
+    @vector_db_spec
+    def upsert_batch(self, collection_name: str, items: list[dict[str, Any]], args: dict[str, Any]) -> None:
+        """
+        Optional. Upserts many objects in one write.
+
+        Each item holds the upsert arguments of one object: index_list, obj_id, filters, type_filter and
+        location_filter. Callers fall back to one upsert per item when a plugin does not implement it.
+        """
+        del collection_name, items, args
+        error_message = 'Subclasses must implement `upsert_batch`'
+        raise NotImplementedError(error_message)
+
+    @vector_db_spec
+    def delete(self, collection_name: str, obj_ids: list[str], args: dict[str, Any]) -> None:
+        """Deletes every vector inserted for the given obj_ids."""
+        del collection_name, obj_ids, args
+        error_message = 'Subclasses must implement `delete`'
+        raise NotImplementedError(error_message)
+
+    @vector_db_spec
+    def close(self, args: dict[str, Any]) -> None:
+        """
+        Optional. Releases the processes and threads a plugin started, when the host shuts down.
+
+        Called once per plugin instance, after every service has stopped. Callers skip it when a plugin
+        does not implement it.
+        """
+        del args
+        error_message = 'Subclasses must implement `close`'
+        raise NotImplementedError(error_message)
+
 
 vector_manager = pluggy.PluginManager('vector_db')
 vector_manager.add_hookspecs(VectorDBspec)
@@ -94,6 +187,26 @@ class DBspec(DB):
         error_message = 'Subclasses must implement `fetch`'
         raise NotImplementedError(error_message)
 
+    @db_spec
+    def fetch_iter(
+        self,
+        table: DB.DBTables,
+        fields: list[str] | None,
+        page_size: int,
+        after_id: str | None,
+        args: dict[str, Any] | None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Yields a table's documents in pages ordered by id, so a full read needs memory for one page only.
+
+        fields limits each document to the given top-level fields. after_id resumes after a document id
+        from an earlier page. args filters the rows by equality on top-level fields, such as
+        {'parent_id': ...}; plugins with indexed columns filter on those and may ignore other fields.
+        """
+        del table, fields, page_size, after_id, args
+        error_message = 'Subclasses must implement `fetch_iter`'
+        raise NotImplementedError(error_message)
+
     @db_spec
     def insert_documents(self, table: DB.DBTables, docs: list[dict[str, Any]], args: dict[str, Any]) -> None:
         del table, docs, args
@@ -101,11 +214,62 @@ class DBspec(DB):
         raise NotImplementedError(error_message)
 
     @db_spec
-    def delete_documents(self, table: DB.DBTables, docs: list[dict[str, Any]], args: dict[str, Any]) -> None:
-        del table, docs, args
+    def delete_documents(self, table: DB.DBTables, ids: list[str], args: dict[str, Any]) -> None:
+        del table, ids, args
         error_message = 'Subclasses must implement `delete_documents`'
         raise NotImplementedError(error_message)
 
+    @db_spec
+    async def connect_async(self, args: dict[str, Any]) -> None:
+        """Optional coroutine version of `connect`. Callers fall back to `connect` in a thread when absent."""
+        del args
+        error_message = 'Subclasses must implement `connect_async`'
+        raise NotImplementedError(error_message)
+
+    @db_spec
+    async def close_async(self, args: dict[str, Any]) -> None:
+        """Optional coroutine version of `close`. Callers fall back to `close` in a thread when absent."""
+        del args
+        error_message = 'Subclasses must implement `close_async`'
+        raise NotImplementedError(error_message)
+
+    @db_spec
+    async def fetch_async(
+        self, table: DB.DBTables, ids: list[str], args: dict[str, Any]
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Optional coroutine version of `fetch`. Callers fall back to `fetch` in a thread when absent."""
+        del table, ids, args
+        error_message = 'Subclasses must implement `fetch_async`'
+        raise NotImplementedError(error_message)
+
+    @db_spec
+    async def insert_documents_async(
+        self, table: DB.DBTables, docs: list[dict[str, Any]], args: dict[str, Any]
+    ) -> None:
+        """Optional coroutine version of `insert_documents`. Callers fall back to it in a thread when absent."""
+        del table, docs, args
+        error_message = 'Subclasses must implement `insert_documents_async`'
+        raise NotImplementedError(error_message)
+
+    @db_spec
+    async def delete_documents_async(self, table: DB.DBTables, ids: list[str], args: dict[str, Any]) -> None:
+        """Optional coroutine version of `delete_documents`. Callers fall back to it in a thread when absent."""
+        del table, ids, args
+        error_message = 'Subclasses must implement `delete_documents_async`'
+        raise NotImplementedError(error_message)
+
+    @db_spec
+    def vacuum(self, args: dict[str, Any]) -> dict[str, int]:
+        """
+        Optional. Returns space freed by deleted and replaced documents to the file system.
+
+        Returns freed_bytes, the bytes reclaimed by this call, and free_bytes, the bytes still free in the
+        database. Plugins without the hook are skipped by maintenance.
+        """
+        del args
+        error_message = 'Subclasses must implement `vacuum`'
+        raise NotImplementedError(error_message)
+
 
 db_manager = pluggy.PluginManager('db')
 db_manager.add_hookspecs(DBspec)
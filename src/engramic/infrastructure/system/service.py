@@ -67,9 +67,12 @@ class Service(ABC):
         ENGRAMS_CREATED = 'engrams_created'
         ENGRAM_COMPLETE = 'engram_complete'
         META_COMPLETE = 'meta_complete'
+        STORAGE_COMMITTED = 'storage_committed'
+        STORAGE_FAILED = 'storage_failed'
         INDICES_CREATED = 'indices_created'
         INDICES_COMPLETE = 'index_complete'
         INDICES_INSERTED = 'indices_inserted'
+        INDICES_INSERT_FAILED = 'indices_insert_failed'
 
         ACKNOWLEDGE = 'acknowledge'
         STATUS = 'status'
@@ -138,6 +141,10 @@ class Service(ABC):
 
         self.init_async_complete = True
 
+    async def connect_plugins_async(self) -> None:
+        """Opens plugin connections. Awaited by the host after every init_async, before start."""
+        return
+
     def on_uvicorn_end(self, fut: Future[Any]) -> None:
         """Handle Uvicorn server completion"""
         try:
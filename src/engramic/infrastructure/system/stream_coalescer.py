@@ -0,0 +1,117 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from engramic.core.interface.llm import LLM
+
+
+class StreamCoalescer:
+    """
+    Merges small streamed LLM chunks into fewer, larger packets before they reach the websocket.
+
+    The first text chunk of a stream is delivered immediately so the user sees output right away.
+    Later chunks are buffered per response id until the buffer holds max_bytes or max_delay seconds
+    pass, whichever comes first. Control packets (headers and footers) and finishing packets flush
+    the buffer first so ordering is preserved, and control packets are never merged with text.
+
+    All methods must be called on the event loop that was passed in.
+
+    Attributes:
+        loop (asyncio.AbstractEventLoop): Loop used to schedule delayed flushes.
+        deliver (Callable[[LLM.StreamPacket], None]): Receives coalesced packets.
+        max_bytes (int): Buffered size, in UTF-8 bytes, that triggers a flush.
+        max_delay (float): Longest time in seconds a chunk waits in the buffer.
+
+    Methods:
+        push(message) -> None:
+            Buffers or delivers a stream packet.
+        end(response_id) -> None:
+            Flushes and forgets the buffer for a stream.
+    """
+
+    DEFAULT_MAX_BYTES = 32
+    DEFAULT_MAX_DELAY = 0.02
+
+    @dataclass
+    class Buffer:
+        first: LLM.StreamPacket
+        parts: list[str] = field(default_factory=list)
+        size: int = 0
+        timer: asyncio.TimerHandle | None = None
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        deliver: Callable[[LLM.StreamPacket], None],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ):
+        self.loop = loop
+        self.deliver = deliver
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.buffers: dict[str | None, StreamCoalescer.Buffer] = {}
+
+    def push(self, message: LLM.StreamPacket) -> None:
+        response_id = message.response_id
+        buffer = self.buffers.get(response_id)
+
+        if message.control:
+            if buffer is not None:
+                self._flush(response_id)
+            self.deliver(message)
+            return
+
+        if message.finish:
+            if buffer is not None and buffer.parts:
+                message = replace(message, packet=''.join(buffer.parts) + message.packet)
+            self._discard(response_id)
+            self.deliver(message)
+            return
+
+        if buffer is None:
+            self.buffers[response_id] = StreamCoalescer.Buffer(message)
+            self.deliver(message)
+            return
+
+        buffer.parts.append(message.packet)
+        buffer.size += len(message.packet.encode())
+
+        if buffer.size >= self.max_bytes:
+            self._flush(response_id)
+        elif buffer.timer is None:
+            buffer.timer = self.loop.call_later(self.max_delay, self._flush, response_id)
+
+    def end(self, response_id: str | None) -> None:
+        if response_id in self.buffers:
+            self._flush(response_id)
+            self._discard(response_id)
+
+    def _flush(self, response_id: str | None) -> None:
+        buffer = self.buffers.get(response_id)
+        if buffer is None:
+            return
+
+        if buffer.timer is not None:
+            buffer.timer.cancel()
+            buffer.timer = None
+
+        if buffer.parts:
+            packet = ''.join(buffer.parts)
+            buffer.parts.clear()
+            buffer.size = 0
+            self.deliver(replace(buffer.first, packet=packet))
+
+    def _discard(self, response_id: str | None) -> None:
+        buffer = self.buffers.pop(response_id, None)
+        if buffer is not None and buffer.timer is not None:
+            buffer.timer.cancel()
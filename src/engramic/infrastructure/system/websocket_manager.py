@@ -4,13 +4,20 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 import os
+import uuid
+from enum import Enum
 from typing import TYPE_CHECKING
 from urllib.parse import parse_qs, urlparse
 
 import jwt
 from websockets.asyncio.server import Server, ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+from engramic.infrastructure.system.stream_coalescer import StreamCoalescer
 
 if TYPE_CHECKING:
     from engramic.core.host import Host
@@ -18,16 +25,94 @@ if TYPE_CHECKING:
 
 
 class WebsocketManager:
-    def __init__(self, host: Host):
-        self.active_connection: ServerConnection | None = None
+    """
+    Streams LLM output to any number of authenticated websocket clients.
+
+    Each connection is keyed by a client id, the JWT `sub` claim or a generated id when the token has none.
+    A `client_id` query parameter is only accepted when it matches the token's `sub`, so a token can only
+    replace the connection of its own client. A connection may be bound to one or more conversations,
+    either with `conversation_id` query parameters or by sending
+    `{"action": "subscribe", "conversation_id": "..."}`. Streams are registered per response id with their
+    conversation and owner (the prompt's client_id), and packets go only to the owner's connection and the
+    connections watching that conversation; a stream with neither is sent to nobody. The one exception is
+    legacy packets without a registered stream, which go to the only connection when there is exactly one.
+
+    Every connection owns a bounded send queue drained by its own writer task. Producers running on
+    executor threads hand packets to the event loop with a single `call_soon_threadsafe` per packet.
+    A client that cannot keep up is handled by `slow_client_policy`: DISCONNECT closes it with code 1013,
+    DROP discards packets for that client and counts them.
+
+    Text chunks pass through a StreamCoalescer before routing, so a stream produces one frame per
+    coalesce_bytes or coalesce_delay rather than one per provider token. Per-message deflate is
+    negotiated when compression is 'deflate' and disabled when it is None.
+
+    Attributes:
+        host (Host): The host that owns the event loop.
+        server (Server | None): The running websocket server.
+        connections (dict[str, WebsocketManager.Connection]): Live connections keyed by client id.
+        streams (dict[str, tuple[str | None, str | None]]): Active response ids mapped to their conversation id
+            and owning client id.
+        queue_size (int): Maximum number of packets buffered per connection.
+        slow_client_policy (WebsocketManager.SlowClientPolicy): What to do when a send queue is full.
+        compression (str | None): Websocket compression extension, 'deflate' or None.
+        coalescer (StreamCoalescer | None): Buffers text chunks per stream. Created on the event loop.
+
+    Methods:
+        init_async() -> None:
+            Starts the websocket server in the background.
+        register_stream(response_id, conversation_id, client_id) -> None:
+            Routes future packets for response_id to client_id and the watchers of conversation_id.
+        end_stream(response_id) -> None:
+            Forgets a finished stream.
+        send_message(message) -> None:
+            Thread-safe entry point used by LLM plugins to stream a packet.
+        shutdown() -> None:
+            Closes every connection and the server.
+    """
+
+    DEFAULT_QUEUE_SIZE = 256
+    SLOW_CLIENT_CLOSE_CODE = 1013
+    CLIENT_MISMATCH_CLOSE_CODE = 4004
+
+    class SlowClientPolicy(Enum):
+        DISCONNECT = 'disconnect'
+        DROP = 'drop'
+
+    class Connection:
+        def __init__(self, websocket: ServerConnection, client_id: str, conversation_ids: set[str], queue_size: int):
+            self.websocket = websocket
+            self.client_id = client_id
+            self.conversation_ids = conversation_ids
+            self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+            self.writer: asyncio.Task[None] | None = None
+            self.dropped_packets = 0
+
+    def __init__(
+        self,
+        host: Host,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        slow_client_policy: SlowClientPolicy = SlowClientPolicy.DISCONNECT,
+        compression: str | None = 'deflate',
+        coalesce_bytes: int = StreamCoalescer.DEFAULT_MAX_BYTES,
+        coalesce_delay: float = StreamCoalescer.DEFAULT_MAX_DELAY,
+    ):
         self.host = host
         self.server: Server | None = None
+        self.connections: dict[str, WebsocketManager.Connection] = {}
+        self.watchers: dict[str, set[str]] = {}  # conversation_id -> client_ids
+        self.streams: dict[str, tuple[str | None, str | None]] = {}
+        self.queue_size = queue_size
+        self.slow_client_policy = slow_client_policy
+        self.compression = compression
+        self.coalesce_bytes = coalesce_bytes
+        self.coalesce_delay = coalesce_delay
+        self.coalescer: StreamCoalescer | None = None
 
     def init_async(self) -> None:
         self.future = self.host.run_background(self.run_server())
 
     async def run_server(self) -> None:
-        self.server = await serve(self.handler, 'localhost', 8765)
+        self.server = await serve(self.handler, 'localhost', 8765, compression=self.compression)
         await self.server.serve_forever()
 
     async def handler(self, websocket: ServerConnection) -> None:
@@ -37,8 +122,8 @@ class WebsocketManager:
             error = 'websocket.request is None but not expected to be.'
             raise RuntimeError(error)
 
-        query = urlparse(websocket.request.path).query
-        access_token = parse_qs(query).get('access_token', [None])[0]
+        query = parse_qs(urlparse(websocket.request.path).query)
+        access_token = query.get('access_token', [None])[0]
 
         if access_token is None:
             error = 'Websocket did not contain token.'
@@ -53,28 +138,165 @@ class WebsocketManager:
         # 2. Validate token
         try:
             payload = jwt.decode(access_token, os.getenv('JWT_SECRET_KEY'), algorithms=['HS256'])
-            del payload
         except jwt.InvalidTokenError:
             await websocket.close(code=4002, reason='Invalid token')
             return
 
-        self.active_connection = websocket
+        # 3. Register the connection under the token's identity and start its writer.
+        subject = payload.get('sub')
+        requested_id = query.get('client_id', [None])[0]
+        if requested_id is not None and requested_id != subject:
+            await websocket.close(
+                code=WebsocketManager.CLIENT_MISMATCH_CLOSE_CODE, reason='client_id does not match token'
+            )
+            return
+
+        client_id = subject or str(uuid.uuid4())
+        connection = WebsocketManager.Connection(
+            websocket, str(client_id), set(query.get('conversation_id', [])), self.queue_size
+        )
+        self._add_connection(connection)
+
+        try:
+            async for raw_message in websocket:
+                self._on_client_message(connection, raw_message)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._remove_connection(connection)
+
+        logging.info('Websocket closed: %s', connection.client_id)
+
+    def _add_connection(self, connection: Connection) -> None:
+        previous = self.connections.get(connection.client_id)
+        if previous is not None:
+            self._remove_connection(previous)
+            self.host.run_background(previous.websocket.close(code=4003, reason='Replaced by a new connection'))
+
+        self.connections[connection.client_id] = connection
+        for conversation_id in connection.conversation_ids:
+            self.watchers.setdefault(conversation_id, set()).add(connection.client_id)
+
+        connection.writer = asyncio.create_task(self._writer(connection))
+
+    def _remove_connection(self, connection: Connection) -> None:
+        if connection.writer is not None and not connection.writer.done():
+            connection.writer.cancel()
+
+        # A connection replaced by a newer one for the same client id no longer owns that id's watchers.
+        if self.connections.get(connection.client_id) is not connection:
+            return
+
+        del self.connections[connection.client_id]
+        for conversation_id in connection.conversation_ids:
+            self._unwatch(conversation_id, connection.client_id)
+
+    def _unwatch(self, conversation_id: str, client_id: str) -> None:
+        client_ids = self.watchers.get(conversation_id)
+        if client_ids is not None:
+            client_ids.discard(client_id)
+            if not client_ids:
+                del self.watchers[conversation_id]
+
+    def _on_client_message(self, connection: Connection, raw_message: str | bytes) -> None:
+        try:
+            message = json.loads(raw_message)
+            action = message['action']
+            conversation_id = str(message['conversation_id'])
+        except (json.JSONDecodeError, KeyError, TypeError):
+            logging.warning('Ignoring malformed websocket message from %s.', connection.client_id)
+            return
+
+        if action == 'subscribe':
+            connection.conversation_ids.add(conversation_id)
+            self.watchers.setdefault(conversation_id, set()).add(connection.client_id)
+        elif action == 'unsubscribe':
+            connection.conversation_ids.discard(conversation_id)
+            self._unwatch(conversation_id, connection.client_id)
+
+    async def _writer(self, connection: Connection) -> None:
+        try:
+            while True:
+                packet = await connection.queue.get()
+                await connection.websocket.send(packet)
+        except ConnectionClosed:
+            self._remove_connection(connection)
+
+    def register_stream(self, response_id: str, conversation_id: str | None, client_id: str | None = None) -> None:
+        """Routes packets tagged with response_id to client_id's connection and those watching conversation_id."""
+        self.streams[response_id] = (conversation_id, client_id)
+
+    def end_stream(self, response_id: str) -> None:
+        """Flushes anything still buffered for response_id and forgets the stream. Call on the event loop."""
+        if self.coalescer is not None:
+            self.coalescer.end(response_id)
+        self.streams.pop(response_id, None)
+
+    def _route(self, message: LLM.StreamPacket) -> list[Connection]:
+        stream = self.streams.get(message.response_id) if message.response_id else None
+        if stream is None:
+            # Legacy single-client setup: packets that name no registered stream go to the one connection.
+            # With more than one connection their owner is unknown, so they are not sent at all.
+            return list(self.connections.values()) if len(self.connections) == 1 else []
 
-        await websocket.wait_closed()
+        conversation_id, owner = stream
+        client_ids = set(self.watchers.get(conversation_id, ())) if conversation_id is not None else set()
+        if owner is not None:
+            client_ids.add(owner)
+        return [self.connections[client_id] for client_id in client_ids if client_id in self.connections]
 
-        info = 'Websocket closed'
-        logging.info(info)
+    def _dispatch(self, message: LLM.StreamPacket) -> None:
+        if self.coalescer is None:
+            self.coalescer = StreamCoalescer(
+                self.host.loop, self._deliver, max_bytes=self.coalesce_bytes, max_delay=self.coalesce_delay
+            )
+        self.coalescer.push(message)
 
-    async def message_task(self, message: LLM.StreamPacket) -> None:
-        if self.active_connection:
-            await self.active_connection.send(str(message.packet))
+    def _deliver(self, message: LLM.StreamPacket) -> None:
+        packet = str(message.packet)
+
+        for connection in self._route(message):
+            try:
+                connection.queue.put_nowait(packet)
+            except asyncio.QueueFull:
+                self._on_slow_client(connection)
+
+    def _on_slow_client(self, connection: Connection) -> None:
+        if self.slow_client_policy == WebsocketManager.SlowClientPolicy.DROP:
+            connection.dropped_packets += 1
+            return
+
+        logging.warning('Websocket client %s is too slow, disconnecting.', connection.client_id)
+        self._remove_connection(connection)
+        self.host.run_background(
+            connection.websocket.close(code=WebsocketManager.SLOW_CLIENT_CLOSE_CODE, reason='Client too slow')
+        )
 
     def send_message(self, message: LLM.StreamPacket) -> None:
-        if self.active_connection:
-            self.host.run_task(self.message_task(message))
+        """
+        Queues a stream packet for every connection it routes to.
+
+        Safe to call from executor threads; the packet is handed to the event loop without creating a
+        coroutine or future per packet.
+        """
+        if not self.connections:
+            return
+
+        try:
+            running_loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.host.loop:
+            self._dispatch(message)
+        else:
+            self.host.loop.call_soon_threadsafe(self._dispatch, message)
 
     async def shutdown(self) -> None:
         """Gracefully shut down the websocket server."""
+        for connection in list(self.connections.values()):
+            self._remove_connection(connection)
+
         if self.server:
             self.server.close()
             await self.server.wait_closed()
@@ -0,0 +1,126 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Hashable
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+KeyT = TypeVar('KeyT', bound=Hashable)
+
+
+class WriteBehindBuffer(Generic[KeyT]):
+    """
+    Groups documents per table and hands each group to one write call.
+
+    A table's buffer is written when it reaches max_batch documents, or flush_delay seconds after the
+    first document arrived, whichever comes first. A table has at most one write in flight; batches
+    that fill up meanwhile queue behind it and are written in order, so a retried batch can never land
+    after a newer write of the same document. flush() writes everything still buffered and waits for
+    every queued write, and is used on shutdown. All methods must be called from the host
+    event loop. Tables are DB.DBTables for the document database, and collection names for vectors.
+
+    A write that raises is retried up to retries times, retry_delay seconds after the first failure and
+    twice as long after each following one, so write must be safe to repeat. When the last attempt
+    fails too, the batch is handed to on_failure with the error and dropped.
+
+    Attributes:
+        write (Callable[[KeyT, list[Any]], Awaitable[None]]): Persists one batch for a table.
+        max_batch (int): Documents that trigger an immediate write.
+        flush_delay (float): Seconds a document may wait for others before it is written.
+        retries (int): Further attempts after a write fails.
+        retry_delay (float): Seconds before the first retry.
+        on_failure (Callable[[KeyT, list[Any], Exception], None] | None): Called with a batch whose retries are exhausted.
+
+    Methods:
+        add(table, item) -> None:
+            Buffers a document for table.
+        flush() -> None:
+            Writes all buffered documents and waits for outstanding writes.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[KeyT, list[Any]], Awaitable[None]],
+        *,
+        max_batch: int = 200,
+        flush_delay: float = 0.05,
+        retries: int = 0,
+        retry_delay: float = 0.1,
+        on_failure: Callable[[KeyT, list[Any], Exception], None] | None = None,
+    ) -> None:
+        self.write = write
+        self.max_batch = max_batch
+        self.flush_delay = flush_delay
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.on_failure = on_failure
+        self._pending: dict[KeyT, list[Any]] = {}
+        self._timers: dict[KeyT, asyncio.TimerHandle] = {}
+        self._queued: dict[KeyT, deque[list[Any]]] = {}
+        self._writers: dict[KeyT, asyncio.Task[None]] = {}
+
+    def add(self, table: KeyT, item: Any) -> None:
+        batch = self._pending.setdefault(table, [])
+        batch.append(item)
+
+        if len(batch) >= self.max_batch:
+            self._flush_table(table)
+        elif table not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[table] = loop.call_later(self.flush_delay, self._flush_table, table)
+
+    async def flush(self) -> None:
+        for table in list(self._pending):
+            self._flush_table(table)
+
+        while self._writers:
+            await asyncio.gather(*self._writers.values(), return_exceptions=True)
+
+    def _flush_table(self, table: KeyT) -> None:
+        timer = self._timers.pop(table, None)
+        if timer is not None:
+            timer.cancel()
+
+        items = self._pending.pop(table, [])
+        if not items:
+            return
+
+        self._queued.setdefault(table, deque()).append(items)
+        if table not in self._writers:
+            self._writers[table] = asyncio.get_running_loop().create_task(self._drain(table))
+
+    async def _drain(self, table: KeyT) -> None:
+        queue = self._queued[table]
+        try:
+            while queue:
+                await self._write(table, queue.popleft())
+        finally:
+            del self._writers[table]
+            if not queue:
+                del self._queued[table]
+
+    async def _write(self, table: KeyT, items: list[Any]) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                await self.write(table, items)
+            except Exception as err:
+                if attempt < self.retries:
+                    delay = self.retry_delay * 2**attempt
+                    logging.warning(
+                        'Write of %s items to %s failed, retrying in %.2fs: %s', len(items), table, delay, err
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+
+                logging.exception('Write of %s items to %s failed after %s attempts.', len(items), table, attempt + 1)
+                if self.on_failure is not None:
+                    self.on_failure(table, items, err)
+            return
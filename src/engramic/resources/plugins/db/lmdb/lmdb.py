@@ -0,0 +1,443 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+import json
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Callable, Iterator
+from typing import Any, Final
+
+import lmdb
+
+from engramic.core.interface.db import DB
+from engramic.infrastructure.system.plugin_specifications import db_impl
+
+
+class Lmdb(DB):
+    """
+    Document database backed by LMDB, an embedded memory-mapped B+tree.
+
+    Every DB.DBTables value is its own named keyspace keyed by document id, so keys are kept in id order
+    and fetch_iter is a cursor walk. Reads run in lock-free read transactions straight against the memory
+    map: there is no SQL to parse and no connection pool, and index keys are compared in place. Values are
+    only copied out of the map to decode them. LMDB allows one write transaction at a time; each
+    insert_documents or delete_documents call is one transaction, so callers see their writes on return.
+
+    Secondary indexes are keyspaces of their own, holding the document id as the value of each entry
+    and maintained in the same write transaction as the documents they point at:
+
+        <table>.created_date    created date, id                        (engram, observation, history, process)
+        history.conversation    conversation_id, repo_key, created date, id
+
+    They serve the same queries as the Sqlite plugin's indexes: the newest rows of a table for history_limit,
+    and a conversation's newest history rows with the exact-set repo filter. Tables without a created date
+    (meta, document) order history_limit by id instead of insertion order.
+
+    Documents are stored as UTF-8 JSON. The EMBEDDING table is not a JSON document table; rows are
+    {'id', 'owner_id', 'embedding'} and are stored as the owner id followed by little-endian float32s.
+
+    The file never grows past map_size, which is reserved as address space up front but only takes the
+    disk space in use. Settings can be given in the plugin entry of the profile:
+
+        db.document = {name="Lmdb", map_size=17179869184, sync=false}
+
+    Attributes:
+        db_path (str): Directory holding the LMDB data and lock files.
+        settings (dict[str, Any]): Environment settings, DEFAULT_SETTINGS overridden by connect args.
+
+    Methods:
+        connect(args) -> None:
+            Opens the environment on first use.
+        close(args) -> None:
+            Closes the environment when the last user closes it.
+        fetch(table, ids, args) -> dict[str, list[dict[str, Any]]]:
+            Reads documents by id, conversation and repo filters.
+        fetch_iter(table, fields, page_size, after_id, args) -> Iterator[list[dict[str, Any]]]:
+            Reads a whole table in id order, one page at a time.
+        insert_documents(table, docs, args) -> None:
+            Inserts or replaces documents and their index entries.
+        delete_documents(table, ids, args) -> None:
+            Deletes documents and their index entries.
+    """
+
+    DEFAULT_SETTINGS: Final[dict[str, Any]] = {
+        'map_size': 10 * 1024 * 1024 * 1024,
+        'max_readers': 126,
+        'sync': True,
+        'readahead': False,  # Random reads on a map larger than memory do better without readahead.
+    }
+
+    @staticmethod
+    def repo_key(repo_ids: list[str] | None) -> str | None:
+        return json.dumps(sorted(set(repo_ids))) if repo_ids is not None else None
+
+    # Fields fetch_iter can filter on and the indexes are built from: name -> extractor from the stored document.
+    FIELDS: Final[dict[str, dict[str, Callable[[dict[str, Any]], Any]]]] = {
+        'engram': {
+            'engram_type': lambda doc: doc.get('engram_type'),
+            'created_date': lambda doc: doc.get('created_date'),
+        },
+        'meta': {
+            'parent_id': lambda doc: doc.get('parent_id'),
+        },
+        'observation': {
+            'parent_id': lambda doc: doc.get('parent_id'),
+            'created_date': lambda doc: doc.get('created_date'),
+        },
+        'history': {
+            'conversation_id': lambda doc: (doc.get('prompt') or {}).get('conversation_id'),
+            'repo_key': lambda doc: Lmdb.repo_key((doc.get('prompt') or {}).get('repo_ids_filters')),
+            'created_date': lambda doc: doc.get('response_time'),
+        },
+        'document': {
+            'repo_id': lambda doc: doc.get('repo_id'),
+        },
+        'process': {
+            'document_id': lambda doc: doc.get('document_id'),
+            'created_date': lambda doc: doc.get('start_time'),
+        },
+    }
+    CONVERSATION_INDEX: Final[str] = 'history.conversation'
+    NO_OWNER: Final[int] = 0xFFFF
+    JSON_DECODER: Final[json.JSONDecoder] = json.JSONDecoder()
+
+    def __init__(self) -> None:
+        self._table_name_map = {table: table.value for table in DB.DBTables}
+        self._lock = threading.Lock()
+        self._connections = 0
+        self.settings: dict[str, Any] = dict(Lmdb.DEFAULT_SETTINGS)
+
+    @db_impl
+    def connect(self, args: dict[str, Any]) -> None:
+        with self._lock:
+            self._connections += 1
+            if self._connections > 1:
+                return
+
+            if args:
+                self.settings.update({key: args[key] for key in Lmdb.DEFAULT_SETTINGS if key in args})
+
+            self.db_path = os.path.join('local_storage', 'lmdb')
+            local_storage_root_path = os.getenv('LOCAL_STORAGE_ROOT_PATH')
+            if local_storage_root_path is not None:
+                self.db_path = os.path.join(local_storage_root_path, 'lmdb')
+
+            os.makedirs(self.db_path, exist_ok=True)
+
+            created_date_indexes = [
+                f'{name}.created_date' for name, fields in Lmdb.FIELDS.items() if 'created_date' in fields
+            ]
+            keyspaces = [*self._table_name_map.values(), *created_date_indexes, Lmdb.CONVERSATION_INDEX]
+            self._env = lmdb.open(
+                self.db_path,
+                map_size=int(self.settings['map_size']),
+                max_readers=int(self.settings['max_readers']),
+                max_dbs=len(keyspaces),
+                sync=bool(self.settings['sync']),
+                readahead=bool(self.settings['readahead']),
+            )
+            self._dbs = {name: self._env.open_db(name.encode()) for name in keyspaces}
+
+    @db_impl
+    def close(self, args: dict[str, Any]) -> None:
+        del args
+
+        with self._lock:
+            if self._connections == 0:
+                return
+            self._connections -= 1
+            if self._connections > 0:
+                return
+
+            self._env.close()
+
+    @staticmethod
+    def encode_vector(vector: list[float]) -> bytes:
+        packed = array('f', vector)
+        if sys.byteorder == 'big':
+            packed.byteswap()
+        return packed.tobytes()
+
+    @staticmethod
+    def decode_vector(blob: bytes | memoryview) -> list[float]:
+        packed = array('f')
+        packed.frombytes(blob)
+        if sys.byteorder == 'big':
+            packed.byteswap()
+        return packed.tolist()
+
+    @staticmethod
+    def sortable_date(value: float | None) -> bytes:
+        """Packs a date so its bytes sort like the number; missing dates sort before every real one."""
+        if value is None:
+            return bytes(8)
+        (bits,) = struct.unpack('>Q', struct.pack('>d', float(value)))
+        bits = bits ^ 0xFFFFFFFFFFFFFFFF if bits >> 63 else bits | 1 << 63
+        return struct.pack('>Q', bits)
+
+    @staticmethod
+    def conversation_prefix(
+        conversation_id: str | None, repo_key: str | None = None, *, with_repo: bool = True
+    ) -> bytes:
+        # None and '' must not share a key, so present values are marked with a leading byte.
+        def part(value: str | None) -> bytes:
+            return b'' if value is None else b'\x01' + value.encode()
+
+        prefix = part(conversation_id) + b'\x00'
+        return prefix + part(repo_key) + b'\x00' if with_repo else prefix
+
+    def _index_keys(self, table_name: str, key: bytes, doc: dict[str, Any]) -> list[tuple[str, bytes]]:
+        fields = Lmdb.FIELDS[table_name]
+        if 'created_date' not in fields:
+            return []
+
+        created_date = Lmdb.sortable_date(fields['created_date'](doc))
+        index_keys = [(f'{table_name}.created_date', created_date + key)]
+        if table_name == 'history':
+            prefix = Lmdb.conversation_prefix(fields['conversation_id'](doc), fields['repo_key'](doc))
+            index_keys.append((Lmdb.CONVERSATION_INDEX, prefix + created_date + key))
+        return index_keys
+
+    def _encode(self, table: DB.DBTables, doc: dict[str, Any]) -> bytes:
+        if table == DB.DBTables.EMBEDDING:
+            owner_id = doc.get('owner_id')
+            owner = b'' if owner_id is None else owner_id.encode()
+            length = Lmdb.NO_OWNER if owner_id is None else len(owner)
+            return struct.pack('<H', length) + owner + self.encode_vector(doc['embedding'])
+        return json.dumps(doc).encode()
+
+    def _decode(self, table: DB.DBTables, key: bytes | memoryview, value: bytes | memoryview) -> dict[str, Any]:
+        if table == DB.DBTables.EMBEDDING:
+            (length,) = struct.unpack_from('<H', value)
+            owner_end = 2 if length == Lmdb.NO_OWNER else 2 + length
+            owner_id = None if length == Lmdb.NO_OWNER else bytes(value[2:owner_end]).decode()
+            return {'id': bytes(key).decode(), 'owner_id': owner_id, 'embedding': self.decode_vector(value[owner_end:])}
+
+        # str() decodes straight from the mapped buffer, without copying it to bytes first.
+        doc: dict[str, Any] = Lmdb.JSON_DECODER.decode(str(value, 'utf-8'))
+        return doc
+
+    @staticmethod
+    def _iter_reverse(cursor: Any, prefix: bytes = b'', *, values: bool = False) -> Iterator[bytes]:
+        """Yields the keys (or values) of entries starting with prefix, from the last one back."""
+        if prefix:
+            upper = prefix[:-1] + bytes([prefix[-1] + 1])
+            found = cursor.prev() if cursor.set_range(upper) else cursor.last()
+        else:
+            found = cursor.last()
+
+        while found:
+            key = cursor.key()
+            if key[: len(prefix)] != prefix:
+                return
+            yield bytes(cursor.value() if values else key)
+            found = cursor.prev()
+
+    @db_impl
+    def fetch(self, table: DB.DBTables, ids: list[str], args: dict[str, Any]) -> dict[str, list[dict[str, Any]]]:
+        if table not in self._table_name_map:
+            error = 'Invalid table enum value'
+            raise TypeError(error)
+
+        table_name: Final[str] = self._table_name_map[table]
+        documents = self._dbs[table_name]
+
+        filters = Lmdb.history_filters(table_name, args)
+        limit = int(args['history_limit']) if args and 'history_limit' in args else None
+
+        with self._env.begin(buffers=True) as txn:
+            if table == DB.DBTables.EMBEDDING:
+                return {table_name: self._fetch_embeddings(txn, ids)}
+
+            keys, ordered = self._candidate_keys(txn, table_name, ids, filters, limit)
+            # Keys read from the conversation index already match every history filter.
+            checks = {} if not ids and 'conversation_id' in filters else filters
+
+            docs: list[dict[str, Any]] = []
+            for key in keys:
+                value = txn.get(key, db=documents)
+                if value is None:
+                    continue
+                doc = self._decode(table, key, value)
+                if all(Lmdb.FIELDS[table_name][name](doc) == wanted for name, wanted in checks.items()):
+                    docs.append(doc)
+                    if ordered and limit is not None and len(docs) >= limit:
+                        break
+
+        if limit is not None and not ordered:
+            docs.sort(key=self._order_key(table_name), reverse=True)
+            docs = docs[:limit]
+
+        return {table_name: docs}
+
+    @staticmethod
+    def history_filters(table_name: str, args: dict[str, Any] | None) -> dict[str, Any]:
+        """Returns the FIELDS values a fetch from table_name must match."""
+        filters: dict[str, Any] = {}
+        if table_name == 'history' and args:
+            if args.get('conversation_id') is not None:
+                filters['conversation_id'] = args['conversation_id']
+
+            # History rows match when their repo_ids_filters hold exactly the requested repos.
+            if args.get('repo_ids_filters') is not None:
+                filters['repo_key'] = Lmdb.repo_key(args['repo_ids_filters'])
+        return filters
+
+    def _candidate_keys(
+        self, txn: Any, table_name: str, ids: list[str], filters: dict[str, Any], limit: int | None
+    ) -> tuple[Iterator[bytes], bool]:
+        """Returns the document keys a fetch has to look at, and whether they come newest first."""
+        documents = self._dbs[table_name]
+        if ids:
+            return (doc_id.encode() for doc_id in ids), False
+
+        if 'conversation_id' in filters:
+            # Index keys end with the created date, so the scan is newest first within each repo_key.
+            with_repo = 'repo_key' in filters
+            prefix = Lmdb.conversation_prefix(filters['conversation_id'], filters.get('repo_key'), with_repo=with_repo)
+            conversations = txn.cursor(self._dbs[Lmdb.CONVERSATION_INDEX])
+            return self._iter_reverse(conversations, prefix, values=True), with_repo
+
+        if limit is None:
+            return (bytes(key) for key in txn.cursor(documents).iternext(keys=True, values=False)), False
+        if 'created_date' in Lmdb.FIELDS[table_name]:
+            return self._iter_reverse(txn.cursor(self._dbs[f'{table_name}.created_date']), values=True), True
+        return self._iter_reverse(txn.cursor(documents)), True
+
+    @staticmethod
+    def _order_key(table_name: str) -> Callable[[dict[str, Any]], Any]:
+        fields = Lmdb.FIELDS[table_name]
+        if 'created_date' in fields:
+            created_date = fields['created_date']
+            return lambda doc: Lmdb.sortable_date(created_date(doc))
+        return lambda doc: str(doc['id']).encode()
+
+    def _fetch_embeddings(self, txn: Any, ids: list[str]) -> list[dict[str, Any]]:
+        documents = self._dbs[self._table_name_map[DB.DBTables.EMBEDDING]]
+        rows = []
+        for doc_id in ids or []:
+            key = doc_id.encode()
+            value = txn.get(key, db=documents)
+            if value is not None:
+                rows.append(self._decode(DB.DBTables.EMBEDDING, key, value))
+        return rows
+
+    @db_impl
+    def fetch_iter(
+        self,
+        table: DB.DBTables,
+        fields: list[str] | None,
+        page_size: int,
+        after_id: str | None,
+        args: dict[str, Any] | None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Yields pages of documents ordered by id, for reads too large to hold in memory.
+
+        Each page is read in its own short read transaction, continuing from the last id of the
+        previous one, so a long scan never pins old pages of the map while the caller works. With
+        fields, only those fields are returned (missing ones are None). args may filter on the
+        table's FIELDS, or on owner_id for embeddings, by equality.
+        """
+        if table not in self._table_name_map:
+            error = 'Invalid table enum value'
+            raise TypeError(error)
+        if page_size < 1:
+            error = f'page_size must be positive, got {page_size}'
+            raise ValueError(error)
+
+        table_name: Final[str] = self._table_name_map[table]
+
+        if table == DB.DBTables.EMBEDDING:
+            extractors: dict[str, Callable[[dict[str, Any]], Any]] = {'owner_id': lambda doc: doc.get('owner_id')}
+        else:
+            extractors = Lmdb.FIELDS[table_name]
+        filters = {name: value for name, value in (args or {}).items() if name in extractors}
+
+        def matches(doc: dict[str, Any]) -> bool:
+            return all(extractors[name](doc) == wanted for name, wanted in filters.items())
+
+        last_key = after_id.encode() if after_id is not None else None
+        while True:
+            page, last_key, more = self._read_page(table, last_key, page_size, matches)
+            if page:
+                yield page if fields is None else [{name: doc.get(name) for name in fields} for doc in page]
+            if not more:
+                return
+
+    def _read_page(
+        self, table: DB.DBTables, after_key: bytes | None, page_size: int, matches: Callable[[dict[str, Any]], bool]
+    ) -> tuple[list[dict[str, Any]], bytes | None, bool]:
+        """Reads up to page_size matching documents after after_key; returns them, their last key and if more follow."""
+        page: list[dict[str, Any]] = []
+        with self._env.begin(buffers=True) as txn:
+            cursor = txn.cursor(self._dbs[self._table_name_map[table]])
+            if after_key is None:
+                found = cursor.first()
+            else:
+                found = cursor.set_range(after_key)
+                if found and cursor.key() == after_key:
+                    found = cursor.next()
+
+            if not found:
+                return page, after_key, False
+
+            for key, value in cursor.iternext():
+                doc = self._decode(table, key, value)
+                if matches(doc):
+                    page.append(doc)
+                    if len(page) == page_size:
+                        return page, bytes(key), True
+
+        return page, after_key, False
+
+    @db_impl
+    def insert_documents(self, table: DB.DBTables, docs: list[dict[str, Any]], args: dict[str, Any]) -> None:
+        del args
+
+        if table not in self._table_name_map:
+            type_error = 'Invalid table enum value'
+            raise TypeError(type_error)
+
+        table_name: Final[str] = self._table_name_map[table]
+        documents = self._dbs[table_name]
+        values = [(str(doc['id']).encode(), self._encode(table, doc), doc) for doc in docs]
+
+        with self._env.begin(write=True) as txn:
+            for key, value, doc in values:
+                if table != DB.DBTables.EMBEDDING:
+                    self._unindex(txn, table, table_name, key)
+                    for index, index_key in self._index_keys(table_name, key, doc):
+                        txn.put(index_key, key, db=self._dbs[index])
+                txn.put(key, value, db=documents)
+
+    @db_impl
+    def delete_documents(self, table: DB.DBTables, ids: list[str], args: dict[str, Any]) -> None:
+        del args
+
+        if table not in self._table_name_map:
+            type_error = 'Invalid table enum value'
+            raise TypeError(type_error)
+
+        if not ids:
+            return  # Nothing to delete
+
+        table_name: Final[str] = self._table_name_map[table]
+        with self._env.begin(write=True) as txn:
+            for doc_id in ids:
+                key = str(doc_id).encode()
+                if table != DB.DBTables.EMBEDDING:
+                    self._unindex(txn, table, table_name, key)
+                txn.delete(key, db=self._dbs[table_name])
+
+    def _unindex(self, txn: Any, table: DB.DBTables, table_name: str, key: bytes) -> None:
+        """Removes the index entries of the stored version of a document, if there is one."""
+        stored = txn.get(key, db=self._dbs[table_name])
+        if stored is None:
+            return
+        for index, index_key in self._index_keys(table_name, key, self._decode(table, key, stored)):
+            txn.delete(index_key, db=self._dbs[index])
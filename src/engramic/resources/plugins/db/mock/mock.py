@@ -2,6 +2,7 @@
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
 
+from collections.abc import Iterator
 from typing import Any
 
 from engramic.core.interface.db import DB
@@ -15,6 +16,7 @@ class Mock(DB):
         self.history: dict[str, Any] = {}
         self.engrams: dict[str, Any] = {}
         self.metas: dict[str, Any] = {}
+        self.embeddings: dict[str, Any] = {}
 
     @db_impl
     def connect(self, args: dict[str, Any]) -> None:
@@ -36,37 +38,55 @@ class Mock(DB):
             return {'return_engram': [self.engrams[id_] for id_ in ids]}
         if table.value == 'meta':
             return {'return_meta': [self.metas[id_] for id_ in ids]}
+        if table.value == 'embedding':
+            return {'embedding': [self.embeddings[id_] for id_ in ids if id_ in self.embeddings]}
 
         return {}
 
+    @db_impl
+    def fetch_iter(
+        self,
+        table: DB.DBTables,
+        fields: list[str] | None,
+        page_size: int,
+        after_id: str | None,
+        args: dict[str, Any] | None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        filters = args or {}
+        documents = self._documents(table) or {}
+        ids = sorted(
+            id_
+            for id_, doc in documents.items()
+            if (after_id is None or id_ > after_id) and all(doc.get(field) == value for field, value in filters.items())
+        )
+        for start in range(0, len(ids), page_size):
+            page = [documents[id_] for id_ in ids[start : start + page_size]]
+            if fields is not None:
+                page = [{field: doc.get(field) for field in fields} for doc in page]
+            yield page
+
     @db_impl
     def insert_documents(self, table: DB.DBTables, docs: list[dict[str, Any]], args: dict[str, Any]) -> None:
         del args
-        if table.value == 'history':
-            for doc in docs:
-                self.history[doc['id']] = doc
-        elif table.value == 'observation':
-            for doc in docs:
-                self.observations[doc['id']] = doc
-        elif table.value == 'engram':
-            for doc in docs:
-                self.engrams[doc['id']] = doc
-        elif table.value == 'meta':
+        documents = self._documents(table)
+        if documents is not None:
             for doc in docs:
-                self.metas[doc['id']] = doc
+                documents[doc['id']] = doc
 
     @db_impl
-    def delete_documents(self, table: DB.DBTables, docs: list[dict[str, Any]], args: dict[str, Any]) -> None:
+    def delete_documents(self, table: DB.DBTables, ids: list[str], args: dict[str, Any]) -> None:
         del args
-        if table.value == 'history':
-            for doc in docs:
-                del self.history[doc['id']]
-        elif table.value == 'observation':
-            for doc in docs:
-                del self.observations[doc['id']]
-        elif table.value == 'engram':
-            for doc in docs:
-                del self.engrams[doc['id']]
-        elif table.value == 'meta':
-            for doc in docs:
-                del self.metas[doc['id']]
+        documents = self._documents(table)
+        if documents is not None:
+            for doc_id in ids:
+                documents.pop(doc_id, None)
+
+    def _documents(self, table: DB.DBTables) -> dict[str, Any] | None:
+        tables = {
+            'history': self.history,
+            'observation': self.observations,
+            'engram': self.engrams,
+            'meta': self.metas,
+            'embedding': self.embeddings,
+        }
+        return tables.get(table.value)
@@ -2,101 +2,565 @@
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
 
+import asyncio
+import importlib
 import json
+import logging
 import os
+import queue
 import sqlite3
-from multiprocessing import Lock
+import sys
+import threading
+import zlib
+from array import array
+from collections.abc import Callable, Generator, Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from typing import Any, Final
 
 from engramic.core.interface.db import DB
 from engramic.infrastructure.system.plugin_specifications import db_impl
 
 
+class DocumentCodec:
+    """
+    Encodes stored documents for one table and decodes rows written in any supported format.
+
+    Every row records the codec it was written with, so a table can hold plain, zlib and zstd rows at
+    once while its configured codec changes. NONE rows keep plain JSON text, which SQLite's JSON
+    functions can read; the other codecs store compressed UTF-8 JSON bytes. zstd rows are written with
+    the table's trained dictionary when there is one and the codec name records its id ('zstd:3').
+    zstd needs the optional zstandard package; without it tables configured for zstd use zlib.
+
+    Attributes:
+        codec (str): Codec new rows are written with.
+        level (int | None): Compression level, or None for the codec's default.
+        min_bytes (int): Documents shorter than this are stored uncompressed.
+        dictionary_id (int | None): Id of the zstd dictionary used for new rows.
+
+    Methods:
+        encode(doc) -> tuple[str | bytes, str | None]:
+            Returns the stored value and codec name for a document.
+        decode(value, codec) -> dict[str, Any]:
+            Returns the document from a stored value and its codec name.
+        add_dictionary(dictionary_id, data, use_for_writes) -> None:
+            Registers a zstd dictionary that rows may reference, optionally for new rows too.
+    """
+
+    NONE: Final[str] = 'none'
+    ZLIB: Final[str] = 'zlib'
+    ZSTD: Final[str] = 'zstd'
+    CODECS: Final[frozenset[str]] = frozenset({NONE, ZLIB, ZSTD})
+
+    def __init__(self, codec: str, level: int | None = None, min_bytes: int = 0) -> None:
+        if codec not in DocumentCodec.CODECS:
+            error = f'Unknown document codec: {codec}. Expected one of {sorted(DocumentCodec.CODECS)}.'
+            raise ValueError(error)
+
+        self.zstandard = DocumentCodec.load_zstandard()
+        if codec == DocumentCodec.ZSTD and self.zstandard is None:
+            logging.warning('zstandard is not installed, compressing documents with zlib instead of zstd.')
+            codec = DocumentCodec.ZLIB
+
+        self.codec = codec
+        self.level = level
+        self.min_bytes = min_bytes
+        self.dictionary_id: int | None = None
+        self._dictionaries: dict[int, Any] = {}
+        self._local = threading.local()
+
+    @staticmethod
+    def load_zstandard() -> Any | None:
+        try:
+            return importlib.import_module('zstandard')
+        except ModuleNotFoundError:
+            return None
+
+    def add_dictionary(self, dictionary_id: int, data: bytes, *, use_for_writes: bool = False) -> None:
+        if self.zstandard is None:
+            return
+        self._dictionaries[dictionary_id] = self.zstandard.ZstdCompressionDict(data)
+        if use_for_writes:
+            self.dictionary_id = dictionary_id
+
+    def encode(self, doc: dict[str, Any]) -> tuple[str | bytes, str | None]:
+        text = json.dumps(doc)
+        if self.codec == DocumentCodec.NONE or len(text) < self.min_bytes:
+            return text, None
+
+        raw = text.encode('utf-8')
+        if self.codec == DocumentCodec.ZLIB:
+            return zlib.compress(raw, -1 if self.level is None else self.level), DocumentCodec.ZLIB
+
+        codec = DocumentCodec.ZSTD if self.dictionary_id is None else f'{DocumentCodec.ZSTD}:{self.dictionary_id}'
+        return self._zstd(self.dictionary_id)[0].compress(raw), codec
+
+    def decode(self, value: str | bytes, codec: str | None) -> dict[str, Any]:
+        if codec is None or isinstance(value, str):
+            loaded: dict[str, Any] = json.loads(value)
+            return loaded
+
+        if codec == DocumentCodec.ZLIB:
+            raw = zlib.decompress(value)
+        elif codec.startswith(DocumentCodec.ZSTD):
+            dictionary_id = int(codec.partition(':')[2]) if ':' in codec else None
+            raw = self._zstd(dictionary_id)[1].decompress(value)
+        else:
+            error = f'Row was written with unknown codec {codec}.'
+            raise ValueError(error)
+
+        loaded = json.loads(raw)
+        return loaded
+
+    def _zstd(self, dictionary_id: int | None) -> tuple[Any, Any]:
+        """Returns this thread's zstd compressor and decompressor for a dictionary; they are not thread safe."""
+        if self.zstandard is None:
+            error = 'Reading zstd compressed rows requires the zstandard package.'
+            raise RuntimeError(error)
+
+        contexts: dict[int | None, tuple[Any, Any]] = self._local.__dict__.setdefault('contexts', {})
+        if dictionary_id not in contexts:
+            dictionary = self._dictionaries.get(dictionary_id) if dictionary_id is not None else None
+            if dictionary_id is not None and dictionary is None:
+                error = f'zstd dictionary {dictionary_id} is not loaded.'
+                raise ValueError(error)
+
+            level = 3 if self.level is None else self.level
+            contexts[dictionary_id] = (
+                self.zstandard.ZstdCompressor(level=level, dict_data=dictionary),
+                self.zstandard.ZstdDecompressor(dict_data=dictionary),
+            )
+        return contexts[dictionary_id]
+
+
 class Sqlite(DB):
+    """
+    Document database backed by a single SQLite file in WAL mode.
+
+    The plugin instance is shared by every service on a host, so connect() and close() are reference
+    counted and only the first connect opens the database. Reads borrow a connection from a pool of up
+    to reader_pool_size read-only connections and run concurrently. Writes are queued to one writer
+    thread, which commits every write waiting in the queue as one transaction (group commit); each
+    write runs in its own savepoint so a failing write does not fail the others, and no failure ends the
+    writer thread. Writes submitted after the last close() fail with RuntimeError. Callers block until
+    their write is committed, so a fetch issued after insert_documents returns sees the new rows. The
+    async write hooks queue the same jobs and await the commit without holding a thread.
+
+    Each table stores the document as JSON in `data`, plus the fields queries filter and sort on as
+    indexed columns (see COLUMNS). The schema version is kept in `PRAGMA user_version` and connect()
+    applies any MIGRATIONS the file has not seen, backfilling new columns from the stored JSON.
+    History rows carry a canonical repo_key (the sorted repo_ids_filters as JSON) so the exact-set
+    repo filter and the conversation lookup are served by one composite index.
+
+    Documents can be compressed per table (see DocumentCodec). Each row records its codec, so
+    changing a table's compression only affects rows written afterwards and old rows stay readable.
+    For zstd tables a dictionary is trained from the newest zstd_training_rows documents on the first
+    connect that finds that many, and stored in the codec_dictionary table. Compression trades CPU on
+    every read for a smaller file and page cache, and is most useful on history and engram rows.
+
+    New database files use incremental auto-vacuum, so vacuum() can hand pages freed by deletes and
+    replaced rows back to the file system a few at a time, through the writer, between live writes.
+    Files created before that need one full vacuum (vacuum({'full': True})) to switch modes; it
+    rebuilds the whole file and holds the database lock while it runs.
+
+    The EMBEDDING table is not a JSON document table. Rows are {'id', 'owner_id', 'embedding'} and the
+    embedding is stored as a little-endian float32 blob.
+
+    Connection settings can be given in the plugin entry of the profile:
+
+        db.document = {name="Sqlite", synchronous="NORMAL", mmap_size=268435456, cache_size=-65536}
+        db.document = {name="Sqlite", compression={history="zstd", engram="zlib"}, compression_level=6}
+
+    Attributes:
+        db_path (str): Location of the database file.
+        settings (dict[str, Any]): Connection settings, DEFAULT_SETTINGS overridden by connect args.
+
+    Methods:
+        connect(args) -> None:
+            Opens the database on first use.
+        close(args) -> None:
+            Closes the database when the last user closes it.
+        fetch(table, ids, args) -> dict[str, list[dict[str, Any]]]:
+            Reads documents by id, conversation and repo filters.
+        fetch_iter(table, fields, page_size, after_id, args) -> Iterator[list[dict[str, Any]]]:
+            Reads a whole table in id order, one page at a time.
+        insert_documents(table, docs, args) -> None:
+            Inserts or replaces documents through the writer.
+        delete_documents(table, ids, args) -> None:
+            Deletes documents through the writer.
+        insert_documents_async(table, docs, args) -> None:
+            Awaits insert_documents' write on the event loop.
+        delete_documents_async(table, ids, args) -> None:
+            Awaits delete_documents' write on the event loop.
+        vacuum(args) -> dict[str, int]:
+            Returns free pages to the file system and reports the bytes reclaimed.
+    """
+
+    DEFAULT_SETTINGS: Final[dict[str, Any]] = {
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # negative values are KiB
+        'busy_timeout': 5000,
+        'reader_pool_size': 8,
+        'max_group_commit': 256,
+        'compression': {},  # table name -> 'none', 'zlib' or 'zstd'
+        'compression_level': None,
+        'compression_min_bytes': 512,
+        'zstd_dictionary_size': 112640,
+        'zstd_training_rows': 1000,
+        'vacuum_step_pages': 256,
+    }
+    SYNCHRONOUS_MODES: Final[frozenset[str]] = frozenset({'OFF', 'NORMAL', 'FULL', 'EXTRA'})
+    AUTO_VACUUM_INCREMENTAL: Final[int] = 2
+    # json_extract gives booleans as 0 and 1, so json_type is read alongside it.
+    JSON_CONSTANTS: Final[dict[str, Any]] = {'true': True, 'false': False, 'null': None}
+
+    @staticmethod
+    def repo_key(repo_ids: list[str] | None) -> str | None:
+        return json.dumps(sorted(set(repo_ids))) if repo_ids is not None else None
+
+    # Indexed columns per table: name -> (SQL type, extractor from the stored document).
+    COLUMNS: Final[dict[str, dict[str, tuple[str, Callable[[dict[str, Any]], Any]]]]] = {
+        'engram': {
+            'engram_type': ('TEXT', lambda doc: doc.get('engram_type')),
+            'created_date': ('REAL', lambda doc: doc.get('created_date')),
+        },
+        'meta': {
+            'parent_id': ('TEXT', lambda doc: doc.get('parent_id')),
+        },
+        'observation': {
+            'parent_id': ('TEXT', lambda doc: doc.get('parent_id')),
+            'created_date': ('REAL', lambda doc: doc.get('created_date')),
+        },
+        'history': {
+            'conversation_id': ('TEXT', lambda doc: (doc.get('prompt') or {}).get('conversation_id')),
+            'repo_key': ('TEXT', lambda doc: Sqlite.repo_key((doc.get('prompt') or {}).get('repo_ids_filters'))),
+            'created_date': ('REAL', lambda doc: doc.get('response_time')),
+        },
+        'document': {
+            'repo_id': ('TEXT', lambda doc: doc.get('repo_id')),
+        },
+        'process': {
+            'document_id': ('TEXT', lambda doc: doc.get('document_id')),
+            'created_date': ('REAL', lambda doc: doc.get('start_time')),
+        },
+    }
+    INDEXES: Final[list[str]] = [
+        'CREATE INDEX IF NOT EXISTS idx_history_conversation ON history(conversation_id, repo_key, created_date)',
+        'CREATE INDEX IF NOT EXISTS idx_history_created_date ON history(created_date)',
+        'CREATE INDEX IF NOT EXISTS idx_engram_type ON engram(engram_type)',
+        'CREATE INDEX IF NOT EXISTS idx_meta_parent_id ON meta(parent_id)',
+        'CREATE INDEX IF NOT EXISTS idx_observation_parent_id ON observation(parent_id)',
+        'CREATE INDEX IF NOT EXISTS idx_document_repo_id ON document(repo_id)',
+        'CREATE INDEX IF NOT EXISTS idx_process_document_id ON process(document_id)',
+        'CREATE INDEX IF NOT EXISTS idx_process_created_date ON process(created_date)',
+    ]
+
+    @dataclass
+    class WriteJob:
+        statement: str
+        rows: list[tuple[Any, ...]]
+        future: Future[None] = field(default_factory=Future)
+
     def __init__(self) -> None:
         self._table_name_map = {table: table.value for table in DB.DBTables}
-        self.multi_process_lock = Lock()
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._closed = True
+        self._connections = 0
+        self.settings: dict[str, Any] = dict(Sqlite.DEFAULT_SETTINGS)
 
     @db_impl
     def connect(self, args: dict[str, Any]) -> None:
-        del args
-
-        self.db_path = os.path.join('local_storage', 'sqlite', 'docs.db')
-        local_storage_root_path = os.getenv('LOCAL_STORAGE_ROOT_PATH')
-        if local_storage_root_path is not None:
-            self.db_path = os.path.join(local_storage_root_path, 'sqlite', 'docs.db')
-
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-
-        with self.multi_process_lock:
-            self.db: sqlite3.Connection = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.cursor: sqlite3.Cursor = self.db.cursor()
-
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS engram (
-                    id TEXT PRIMARY KEY,
-                    data TEXT
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS history (
-                    id TEXT PRIMARY KEY,
-                    data TEXT
-                )
-            """)
-            self.cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_created_date ON history(json_extract(data, '$.created_date'))"
-            )
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS meta (
-                    id TEXT PRIMARY KEY,
-                    data TEXT
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS observation (
-                    id TEXT PRIMARY KEY,
-                    data TEXT
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS document (
-                    id TEXT PRIMARY KEY,
-                    data TEXT
-                )
-            """)
-
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS process (
-                    id TEXT PRIMARY KEY,
-                    data TEXT
-                )
-            """)
-            self.cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_created_date ON process(json_extract(data, '$.created_date'))"
-            )
-            self.db.commit()
+        with self._lock:
+            self._connections += 1
+            if self._connections > 1:
+                return
+
+            if args:
+                self.settings.update({key: args[key] for key in Sqlite.DEFAULT_SETTINGS if key in args})
+            if str(self.settings['synchronous']).upper() not in Sqlite.SYNCHRONOUS_MODES:
+                error = f'Invalid sqlite synchronous mode: {self.settings["synchronous"]}'
+                raise ValueError(error)
+
+            self.db_path = os.path.join('local_storage', 'sqlite', 'docs.db')
+            local_storage_root_path = os.getenv('LOCAL_STORAGE_ROOT_PATH')
+            if local_storage_root_path is not None:
+                self.db_path = os.path.join(local_storage_root_path, 'sqlite', 'docs.db')
+
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+            self._writer = self._open()
+            if self._writer.execute('PRAGMA user_version').fetchone()[0] == 0:
+                # Only takes effect before the first table is created.
+                self._writer.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            self._writer.execute('PRAGMA journal_mode=WAL')
+            self._migrate()
+            self._codecs = self._load_codecs()
+
+            self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+            self._reader_count = 0
+            self._write_queue: queue.Queue[Sqlite.WriteJob | None] = queue.Queue()
+            self._write_thread = threading.Thread(target=self._write_loop, daemon=True, name='Sqlite Writer')
+            self._write_thread.start()
+            self._closed = False
 
     @db_impl
     def close(self, args: dict[str, Any]) -> None:
         del args
 
-    def make_repo_filter_sql(self, repo_ids: list[str]) -> tuple[str, list[str | int]]:
-        """
-        Generates SQL and parameters for filtering history rows with exactly the provided repo_ids.
-
-        Args:
-            repo_ids: List of repo_id strings to filter for.
+        with self._lock:
+            if self._connections == 0:
+                return
+            self._connections -= 1
+            if self._connections > 0:
+                return
+
+            # Writes submitted from here on are rejected, so the sentinel is the last job the writer sees.
+            with self._submit_lock:
+                self._closed = True
+                self._write_queue.put(None)
+            self._write_thread.join()
+            self._writer.close()
+
+            while not self._readers.empty():
+                self._readers.get_nowait().close()
+            self._reader_count = 0
+
+    def _open(self, *, read_only: bool = False) -> sqlite3.Connection:
+        # isolation_level=None leaves transactions to the writer loop.
+        connection = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        connection.execute(f'PRAGMA busy_timeout={int(self.settings["busy_timeout"])}')
+        connection.execute(f'PRAGMA synchronous={str(self.settings["synchronous"]).upper()}')
+        connection.execute(f'PRAGMA mmap_size={int(self.settings["mmap_size"])}')
+        connection.execute(f'PRAGMA cache_size={int(self.settings["cache_size"])}')
+        if read_only:
+            connection.execute('PRAGMA query_only=ON')
+        return connection
+
+    def _migrate(self) -> None:
+        """Brings the schema up to len(MIGRATIONS), one transaction per version."""
+        migrations = [
+            self._migrate_create_tables,
+            self._migrate_typed_columns,
+            self._migrate_embeddings,
+            self._migrate_codecs,
+        ]
+        for version, migration in enumerate(migrations, start=1):
+            self._writer.execute('BEGIN IMMEDIATE')
+            try:
+                # Re-read inside the transaction in case another process migrated first.
+                current = self._writer.execute('PRAGMA user_version').fetchone()[0]
+                if current < version:
+                    migration()
+                    self._writer.execute(f'PRAGMA user_version={version}')
+                self._writer.execute('COMMIT')
+            except sqlite3.Error:
+                self._writer.execute('ROLLBACK')
+                raise
+
+    def _migrate_create_tables(self) -> None:
+        for table_name in Sqlite.COLUMNS:
+            self._writer.execute(f'CREATE TABLE IF NOT EXISTS {table_name} (id TEXT PRIMARY KEY, data TEXT)')
+
+    def _migrate_typed_columns(self) -> None:
+        for table_name, columns in Sqlite.COLUMNS.items():
+            existing = {row[1] for row in self._writer.execute(f'PRAGMA table_info({table_name})')}
+            for column, (sql_type, _) in columns.items():
+                if column not in existing:
+                    self._writer.execute(f'ALTER TABLE {table_name} ADD COLUMN {column} {sql_type}')
+
+            rows = self._writer.execute(f'SELECT id, data FROM {table_name}').fetchall()
+            assignments = ', '.join(f'{column} = ?' for column in columns)
+            self._writer.executemany(
+                f'UPDATE {table_name} SET {assignments} WHERE id = ?',
+                [(*self._column_values(table_name, json.loads(data)), doc_id) for doc_id, data in rows],
+            )
 
-        Returns:
-            Tuple of (SQL string, parameters list)
-        """
-        n = len(repo_ids)
-        placeholders = ', '.join('?' for _ in repo_ids)
-        sql = f"""json_array_length(json_extract(data, '$.prompt.repo_ids_filters')) = ? AND (SELECT COUNT(DISTINCT value) FROM json_each(json_extract(data, '$.prompt.repo_ids_filters')) WHERE value IN ({placeholders})) = ?"""
-        # Parameter order: length, *repo_ids, length again (for count comparison)
-        params: list[str | int] = [n, *repo_ids, n]
-        return sql, params
+        # The json_extract indexes sorted on a field no row had.
+        self._writer.execute('DROP INDEX IF EXISTS idx_created_date')
+        self._writer.execute('DROP INDEX IF EXISTS idx_process_created_date')
+        for index in Sqlite.INDEXES:
+            self._writer.execute(index)
+
+    def _migrate_embeddings(self) -> None:
+        self._writer.execute('CREATE TABLE IF NOT EXISTS embedding (id TEXT PRIMARY KEY, owner_id TEXT, vector BLOB)')
+        self._writer.execute('CREATE INDEX IF NOT EXISTS idx_embedding_owner_id ON embedding(owner_id)')
+
+    def _migrate_codecs(self) -> None:
+        for table_name in Sqlite.COLUMNS:
+            self._writer.execute(f'ALTER TABLE {table_name} ADD COLUMN codec TEXT')
+        self._writer.execute(
+            'CREATE TABLE IF NOT EXISTS codec_dictionary (id INTEGER PRIMARY KEY, table_name TEXT NOT NULL, data BLOB)'
+        )
+
+    def _load_codecs(self) -> dict[str, DocumentCodec]:
+        compression = dict(self.settings['compression'] or {})
+        unknown = sorted(set(compression) - set(Sqlite.COLUMNS))
+        if unknown:
+            error = f'Compression configured for unknown tables: {unknown}'
+            raise ValueError(error)
+
+        level = self.settings['compression_level']
+        codecs = {
+            table_name: DocumentCodec(
+                str(compression.get(table_name, DocumentCodec.NONE)).lower(),
+                None if level is None else int(level),
+                int(self.settings['compression_min_bytes']),
+            )
+            for table_name in Sqlite.COLUMNS
+        }
+
+        for dictionary_id, table_name, data in self._writer.execute(
+            'SELECT id, table_name, data FROM codec_dictionary ORDER BY id'
+        ):
+            codec = codecs[table_name]
+            codec.add_dictionary(dictionary_id, data, use_for_writes=codec.codec == DocumentCodec.ZSTD)
+
+        for table_name, codec in codecs.items():
+            if codec.codec == DocumentCodec.ZSTD and codec.dictionary_id is None:
+                self._train_dictionary(table_name, codec)
+        return codecs
+
+    def _train_dictionary(self, table_name: str, codec: DocumentCodec) -> None:
+        zstandard = codec.zstandard
+        if zstandard is None:
+            return
+
+        training_rows = int(self.settings['zstd_training_rows'])
+        rows = self._writer.execute(
+            f'SELECT data, codec FROM {table_name} ORDER BY rowid DESC LIMIT ?', [training_rows]
+        ).fetchall()
+        if len(rows) < training_rows:
+            return  # Rows are compressed without a dictionary until a later connect finds enough of them.
+
+        samples = [json.dumps(codec.decode(data, row_codec)).encode('utf-8') for data, row_codec in rows]
+        try:
+            trained = zstandard.train_dictionary(int(self.settings['zstd_dictionary_size']), samples)
+        except zstandard.ZstdError:
+            logging.warning('Could not train a zstd dictionary for %s, compressing without one.', table_name)
+            return
+
+        data = trained.as_bytes()
+        cursor = self._writer.execute(
+            'INSERT INTO codec_dictionary (table_name, data) VALUES (?, ?)', [table_name, data]
+        )
+        if cursor.lastrowid is not None:
+            codec.add_dictionary(cursor.lastrowid, data, use_for_writes=True)
+
+    @staticmethod
+    def encode_vector(vector: list[float]) -> bytes:
+        packed = array('f', vector)
+        if sys.byteorder == 'big':
+            packed.byteswap()
+        return packed.tobytes()
+
+    @staticmethod
+    def decode_vector(blob: bytes) -> list[float]:
+        packed = array('f')
+        packed.frombytes(blob)
+        if sys.byteorder == 'big':
+            packed.byteswap()
+        return packed.tolist()
+
+    def _column_values(self, table_name: str, doc: dict[str, Any]) -> tuple[Any, ...]:
+        return tuple(extract(doc) for _, extract in Sqlite.COLUMNS[table_name].values())
+
+    @contextmanager
+    def _reader(self) -> Generator[sqlite3.Connection, None, None]:
+        try:
+            connection = self._readers.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._reader_count < int(self.settings['reader_pool_size'])
+                if create:
+                    self._reader_count += 1
+            connection = self._open(read_only=True) if create else self._readers.get()
+
+        try:
+            yield connection
+        finally:
+            self._readers.put(connection)
+
+    def _submit(self, write: tuple[str, list[tuple[Any, ...]]] | None) -> Future[None]:
+        if write is None:
+            done: Future[None] = Future()
+            done.set_result(None)
+            return done
+
+        job = Sqlite.WriteJob(*write)
+        with self._submit_lock:
+            if self._closed:
+                error = f'{self.__class__.__name__} is closed; the write was not queued.'
+                job.future.set_exception(RuntimeError(error))
+            else:
+                self._write_queue.put(job)
+        return job.future
+
+    def _write_loop(self) -> None:
+        max_group_commit = int(self.settings['max_group_commit'])
+        running = True
+        while running:
+            job = self._write_queue.get()
+            if job is None:
+                break
+
+            batch = [job]
+            while len(batch) < max_group_commit:
+                try:
+                    next_job = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_job is None:
+                    running = False
+                    break
+                batch.append(next_job)
+
+            try:
+                self._commit(batch)
+            except Exception as err:
+                # Only the batch fails; the loop keeps serving the queue.
+                logging.exception('Sqlite writer failed on a batch of %s writes.', len(batch))
+                for failed in batch:
+                    if not failed.future.done():
+                        failed.future.set_exception(err)
+
+    def _commit(self, batch: list[WriteJob]) -> None:
+        written: list[Sqlite.WriteJob] = []
+        try:
+            self._writer.execute('BEGIN IMMEDIATE')
+            for job in batch:
+                self._writer.execute('SAVEPOINT job')
+                try:
+                    self._execute(job)
+                except Exception as err:  # noqa: BLE001 - e.g. OverflowError for a row value sqlite cannot bind
+                    self._writer.execute('ROLLBACK TO job')
+                    job.future.set_exception(err)
+                else:
+                    written.append(job)
+                finally:
+                    self._writer.execute('RELEASE job')
+            self._writer.execute('COMMIT')
+        except Exception as err:
+            logging.exception('Sqlite group commit of %s writes failed.', len(batch))
+            if self._writer.in_transaction:
+                self._writer.execute('ROLLBACK')
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(err)
+            return
+
+        for job in written:
+            job.future.set_result(None)
+
+    def _execute(self, job: WriteJob) -> None:
+        if job.statement.startswith('PRAGMA'):
+            # Pragmas cannot go through executemany, and incremental_vacuum frees one page per execute.
+            for row in job.rows:
+                self._writer.execute(job.statement, row)
+        else:
+            self._writer.executemany(job.statement, job.rows)
 
     @db_impl
     def fetch(self, table: DB.DBTables, ids: list[str], args: dict[str, Any]) -> dict[str, list[dict[str, Any]]]:
@@ -104,90 +568,278 @@ class Sqlite(DB):
             error = 'Invalid table enum value'
             raise TypeError(error)
 
-        with self.multi_process_lock:
-            table_name: Final[str] = self._table_name_map[table]
+        table_name: Final[str] = self._table_name_map[table]
+
+        if table == DB.DBTables.EMBEDDING:
+            return {table_name: self._fetch_embeddings(ids)}
 
-            query_select = f'SELECT id, data FROM {table_name}'
-            where_clauses: list[str] = []
-            query_params: list[Any] = []
+        query_select = f'SELECT id, data, codec FROM {table_name}'
+        where_clauses: list[str] = []
+        query_params: list[Any] = []
 
-            # Filter by ids
-            if ids:
-                placeholders = ','.join('?' for _ in ids)
-                where_clauses.append(f'id IN ({placeholders})')
-                query_params.extend(ids)
+        # Filter by ids
+        if ids:
+            placeholders = ','.join('?' for _ in ids)
+            where_clauses.append(f'id IN ({placeholders})')
+            query_params.extend(ids)
 
-            if args and 'conversation_id' in args and args['conversation_id'] is not None:
-                where_clauses.append("json_extract(data, '$.prompt.conversation_id') = ?")
+        if table_name == 'history' and args:
+            if args.get('conversation_id') is not None:
+                where_clauses.append('conversation_id = ?')
                 query_params.append(args['conversation_id'])
 
-            # Filter by repo_ids_filters (assumes self.make_repo_filter_sql returns ("SQL", params))
-            if args and 'repo_ids_filters' in args and args['repo_ids_filters'] is not None:
-                repo_ids = args['repo_ids_filters']
-                sql_str, params = self.make_repo_filter_sql(repo_ids)
-                where_clauses.append(sql_str)
-                query_params.extend(params)
-
-            # Build WHERE
-            where = ''
-            if where_clauses:
-                where = 'WHERE ' + ' AND '.join(where_clauses)
-
-            # Ordering and limits
-            query_order = ''
-            query_limit = ''
-            if args and 'history_limit' in args:
-                query_order = "ORDER BY json_extract(data, '$.created_date') DESC"
-                query_limit = f"LIMIT {args['history_limit']}"
-
-            # Assemble final query
-            assembled_query = f'{query_select} {where} {query_order} {query_limit}'
-
-            if query_params:
-                self.cursor.execute(assembled_query, query_params)
-            else:
-                self.cursor.execute(assembled_query)
+            # History rows match when their repo_ids_filters hold exactly the requested repos.
+            if args.get('repo_ids_filters') is not None:
+                where_clauses.append('repo_key = ?')
+                query_params.append(Sqlite.repo_key(args['repo_ids_filters']))
+
+        # Build WHERE
+        where = ''
+        if where_clauses:
+            where = 'WHERE ' + ' AND '.join(where_clauses)
+
+        # Ordering and limits
+        query_order = ''
+        query_limit = ''
+        if args and 'history_limit' in args:
+            order_column = 'created_date' if 'created_date' in Sqlite.COLUMNS[table_name] else 'rowid'
+            query_order = f'ORDER BY {order_column} DESC'
+            query_limit = 'LIMIT ?'
+            query_params.append(int(args['history_limit']))
+
+        # Assemble final query
+        assembled_query = f'{query_select} {where} {query_order} {query_limit}'
+
+        with self._reader() as connection:
+            rows = connection.execute(assembled_query, query_params).fetchall()
+
+        codec = self._codecs[table_name]
+        ret = {table_name: [codec.decode(data, row_codec) for _, data, row_codec in rows]}
+        return ret
 
-            rows = self.cursor.fetchall()
+    def _fetch_embeddings(self, ids: list[str]) -> list[dict[str, Any]]:
+        if not ids:
+            return []
 
-        ret = {table_name: [json.loads(data[1]) for data in rows]}
-        return ret
+        placeholders = ','.join('?' for _ in ids)
+        with self._reader() as connection:
+            rows = connection.execute(
+                f'SELECT id, owner_id, vector FROM embedding WHERE id IN ({placeholders})', ids
+            ).fetchall()
+
+        return [
+            {'id': doc_id, 'owner_id': owner_id, 'embedding': self.decode_vector(vector)}
+            for doc_id, owner_id, vector in rows
+        ]
+
+    @db_impl
+    def fetch_iter(
+        self,
+        table: DB.DBTables,
+        fields: list[str] | None,
+        page_size: int,
+        after_id: str | None,
+        args: dict[str, Any] | None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Yields pages of documents ordered by id, for reads too large to hold in memory.
+
+        Pages use keyset pagination (id > last id of the previous page), so each page is one indexed
+        range query and a reader connection is only borrowed while a page is read. With fields, only
+        those fields are extracted from the stored JSON (missing ones are None) and the rest of the
+        document is never decoded. args may filter on the table's indexed columns by equality.
+        """
+        if table not in self._table_name_map:
+            error = 'Invalid table enum value'
+            raise TypeError(error)
+        if page_size < 1:
+            error = f'page_size must be positive, got {page_size}'
+            raise ValueError(error)
+
+        table_name: Final[str] = self._table_name_map[table]
+        select, select_params, decode = self._projection(table, fields)
+
+        filterable = {'owner_id'} if table == DB.DBTables.EMBEDDING else set(Sqlite.COLUMNS[table_name])
+        filters = {column: value for column, value in (args or {}).items() if column in filterable}
+
+        last_id = after_id
+        while True:
+            where_clauses = [f'{column} = ?' for column in filters]
+            query_params: list[Any] = [*select_params, *filters.values()]
+            if last_id is not None:
+                where_clauses.append('id > ?')
+                query_params.append(last_id)
+            where = 'WHERE ' + ' AND '.join(where_clauses) if where_clauses else ''
+            query_params.append(page_size)
+
+            with self._reader() as connection:
+                rows = connection.execute(
+                    f'SELECT id, {select} FROM {table_name} {where} ORDER BY id LIMIT ?', query_params
+                ).fetchall()
+
+            if not rows:
+                return
+
+            yield [decode(row) for row in rows]
+
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+
+    def _projection(
+        self, table: DB.DBTables, fields: list[str] | None
+    ) -> tuple[str, list[str], Callable[[tuple[Any, ...]], dict[str, Any]]]:
+        """Returns the select list that follows id, its parameters, and how to turn a row into a document."""
+        if table == DB.DBTables.EMBEDDING:
+            columns = {'owner_id': 'owner_id', 'embedding': 'vector'}
+            selected = [name for name in fields if name in columns] if fields is not None else list(columns)
+
+            def decode_embedding(row: tuple[Any, ...]) -> dict[str, Any]:
+                doc: dict[str, Any] = {'id': row[0]} if fields is None or 'id' in fields else {}
+                for position, name in enumerate(selected, start=1):
+                    doc[name] = self.decode_vector(row[position]) if name == 'embedding' else row[position]
+                return doc
+
+            return ', '.join(columns[name] for name in selected) or 'NULL', [], decode_embedding
+
+        codec = self._codecs[self._table_name_map[table]]
+        if fields is None:
+            return 'data, codec', [], lambda row: codec.decode(row[1], row[2])
+
+        # Fields are extracted in SQL from plain rows; compressed rows are returned whole and decoded here.
+        paths = [Sqlite.json_path(name) for name in fields]
+        extracts = (
+            'CASE WHEN codec IS NULL THEN json_extract(data, ?) END, CASE WHEN codec IS NULL THEN json_type(data, ?) END'
+            for _ in fields
+        )
+        select = ', '.join([*extracts, 'CASE WHEN codec IS NULL THEN NULL ELSE data END', 'codec'])
+        select_params = [param for path in paths for param in (path, path)]
+
+        def decode_fields(row: tuple[Any, ...]) -> dict[str, Any]:
+            if row[-1] is not None:
+                compressed = codec.decode(row[-2], row[-1])
+                return {name: compressed.get(name) for name in fields}
+
+            doc: dict[str, Any] = {}
+            for position, name in enumerate(fields):
+                value, value_type = row[1 + 2 * position], row[2 + 2 * position]
+                if value_type in {'object', 'array'}:
+                    value = json.loads(value)
+                elif value_type in Sqlite.JSON_CONSTANTS:
+                    value = Sqlite.JSON_CONSTANTS[value_type]
+                doc[name] = value
+            return doc
+
+        return select, select_params, decode_fields
+
+    @staticmethod
+    def json_path(field: str) -> str:
+        return '$.' + json.dumps(field)
 
     @db_impl
     def insert_documents(self, table: DB.DBTables, docs: list[dict[str, Any]], args: dict[str, Any]) -> None:
         del args
+        self._submit(self._insert_write(table, docs)).result()
 
-        with self.multi_process_lock:
-            if table not in self._table_name_map:
-                type_error = 'Invalid table enum value'
-                raise TypeError(type_error)
-
-            values = []
-            for doc in docs:
-                doc_id = doc['id']
-                json_data = json.dumps(doc)
-                values.append((doc_id, json_data))
+    @db_impl
+    async def insert_documents_async(
+        self, table: DB.DBTables, docs: list[dict[str, Any]], args: dict[str, Any]
+    ) -> None:
+        del args
+        # Encoding and compression run in a thread; only the commit is awaited without one.
+        write = await asyncio.to_thread(self._insert_write, table, docs)
+        await asyncio.wrap_future(self._submit(write))
 
-            table_name: Final[str] = self._table_name_map[table]
-            query = f'INSERT OR REPLACE INTO {table_name} (id, data) VALUES (?, ?)'
-            self.cursor.executemany(query, values)
-            self.db.commit()
+    @db_impl
+    def delete_documents(self, table: DB.DBTables, ids: list[str], args: dict[str, Any]) -> None:
+        del args
+        self._submit(self._delete_write(table, ids)).result()
 
     @db_impl
-    def delete_documents(self, table: DB.DBTables, ids: list[dict[str, Any]], args: dict[str, Any]) -> None:
+    async def delete_documents_async(self, table: DB.DBTables, ids: list[str], args: dict[str, Any]) -> None:
         del args
+        await asyncio.wrap_future(self._submit(self._delete_write(table, ids)))
+
+    @db_impl
+    def vacuum(self, args: dict[str, Any]) -> dict[str, int]:
+        """
+        Shrinks the file by the pages on its free list and returns the bytes freed and still free.
 
-        with self.multi_process_lock:
-            if table not in self._table_name_map:
-                type_error = 'Invalid table enum value'
-                raise TypeError(type_error)
+        Pages are freed vacuum_step_pages at a time, each step one job for the writer, so writes
+        queued meanwhile are committed between steps. args may set max_pages to bound the pages
+        freed by one call. With full, the file is rebuilt with VACUUM on its own connection and
+        switched to incremental auto-vacuum; writers wait for it, so run it while the host is stopped.
+        """
+        args = args or {}
+        page_size, page_count, free_pages, auto_vacuum = self._page_stats()
+
+        if args.get('full'):
+            connection = self._open()
+            try:
+                connection.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                connection.execute('VACUUM')
+            finally:
+                connection.close()
+        elif auto_vacuum == Sqlite.AUTO_VACUUM_INCREMENTAL:
+            remaining = min(free_pages, int(args.get('max_pages', free_pages)))
+            step = int(self.settings['vacuum_step_pages'])
+            while remaining > 0:
+                pages = min(step, remaining)
+                self._submit(('PRAGMA incremental_vacuum(1)', [()] * pages)).result()
+                remaining -= pages
+        else:
+            logging.info('%s does not use incremental auto-vacuum; a full vacuum is needed once.', self.db_path)
+
+        _, page_count_after, free_pages_after, _ = self._page_stats()
+        return {
+            'freed_bytes': (page_count - page_count_after) * page_size,
+            'free_bytes': free_pages_after * page_size,
+            'file_bytes': page_count_after * page_size,
+        }
+
+    def _page_stats(self) -> tuple[int, int, int, int]:
+        """Returns the page size, page count, free page count and auto_vacuum mode."""
+        with self._reader() as connection:
+            return (
+                connection.execute('PRAGMA page_size').fetchone()[0],
+                connection.execute('PRAGMA page_count').fetchone()[0],
+                connection.execute('PRAGMA freelist_count').fetchone()[0],
+                connection.execute('PRAGMA auto_vacuum').fetchone()[0],
+            )
+
+    def _insert_write(self, table: DB.DBTables, docs: list[dict[str, Any]]) -> tuple[str, list[tuple[Any, ...]]]:
+        if table not in self._table_name_map:
+            type_error = 'Invalid table enum value'
+            raise TypeError(type_error)
 
-            if not ids:
-                return  # Nothing to delete
+        if table == DB.DBTables.EMBEDDING:
+            return (
+                'INSERT OR REPLACE INTO embedding (id, owner_id, vector) VALUES (?, ?, ?)',
+                [(doc['id'], doc.get('owner_id'), self.encode_vector(doc['embedding'])) for doc in docs],
+            )
 
-            table_name: Final[str] = self._table_name_map[table]
-            placeholders = ','.join('?' for _ in ids)
-            query = f'DELETE FROM {table_name} WHERE id IN ({placeholders})'
+        table_name: Final[str] = self._table_name_map[table]
+        columns = Sqlite.COLUMNS[table_name]
+
+        codec = self._codecs[table_name]
+
+        values = []
+        for doc in docs:
+            doc_id = doc['id']
+            data, row_codec = codec.encode(doc)
+            values.append((doc_id, data, row_codec, *self._column_values(table_name, doc)))
+
+        column_names = ', '.join(['id', 'data', 'codec', *columns])
+        placeholders = ', '.join('?' for _ in range(len(columns) + 3))
+        return f'INSERT OR REPLACE INTO {table_name} ({column_names}) VALUES ({placeholders})', values
+
+    def _delete_write(self, table: DB.DBTables, ids: list[Any]) -> tuple[str, list[tuple[Any, ...]]] | None:
+        if table not in self._table_name_map:
+            type_error = 'Invalid table enum value'
+            raise TypeError(type_error)
+
+        if not ids:
+            return None  # Nothing to delete
 
-            self.cursor.execute(query, ids)
-            self.db.commit()
+        table_name: Final[str] = self._table_name_map[table]
+        return f'DELETE FROM {table_name} WHERE id = ?', [(doc_id,) for doc_id in ids]
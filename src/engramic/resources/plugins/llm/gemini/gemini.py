@@ -7,6 +7,7 @@ import json
 import logging
 import os
 import re
+from collections.abc import AsyncIterator
 from typing import Any, cast, no_type_check
 
 from google import genai
@@ -42,10 +43,9 @@ class Gemini(LLM):
 
         return ret_string.strip()
 
-    @llm_impl
-    def submit(
+    def _build_request(
         self, prompt: Prompt, images: list[str], structured_schema: dict[str, Any], args: dict[str, Any]
-    ) -> dict[str, Any]:
+    ) -> tuple[str, list[types.Content], types.GenerateContentConfig]:
         model = args['model']
 
         parts = [types.Part.from_text(text=prompt.render_prompt())]
@@ -105,10 +105,9 @@ class Gemini(LLM):
             response_schema=config_kwargs['response_schema'],
         )
 
-        response = self._api_client.models.generate_content(
-            model=model, contents=contents, config=generate_content_config
-        )
+        return model, contents, generate_content_config
 
+    def _parse_response(self, response: types.GenerateContentResponse) -> dict[str, Any]:
         # finish_reason = response.candidates[0].finish_reason
 
         if response.text is None:
@@ -122,10 +121,9 @@ class Gemini(LLM):
 
         return {'llm_response': self.extract_toml_block(ret_string)}
 
-    @llm_impl
-    def submit_streaming(
-        self, prompt: Prompt, args: dict[str, Any], websocket_manager: WebsocketManager
-    ) -> dict[str, str]:
+    def _build_streaming_request(
+        self, prompt: Prompt, args: dict[str, Any]
+    ) -> tuple[str, list[types.Content], types.GenerateContentConfig]:
         model = args['model']
         contents = [
             types.Content(
@@ -161,35 +159,100 @@ class Gemini(LLM):
             thinking_config=thinking_config,
         )
 
-        response = self._api_client.models.generate_content_stream(
-            model=model,
-            contents=contents,
-            config=generate_content_config,
-        )
+        return model, contents, generate_content_config
 
+    def _header_packet(self, args: dict[str, Any]) -> LLM.StreamPacket:
         response_id = args['response_id']
         repo_ids_filters = args['repo_ids_filters']
-        packet = LLM.StreamPacket(
+        return LLM.StreamPacket(
             f'{{"response_type":"header","response_id":"{response_id}","repo_ids_filters":{json.dumps(repo_ids_filters)}}}',
             False,
             '',
+            response_id,
+            control=True,
+        )
+
+    def _chunk_text(self, chunk: types.GenerateContentResponse) -> str:
+        if chunk.text is None:
+            finish_reason = 'Not Given.'
+            if hasattr(chunk, 'candidates') and chunk.candidates and len(chunk.candidates) > 0:
+                finish_reason = str(chunk.candidates[0].finish_reason)
+            error = f'Error in Gemini submit. Response.text is None. Finish Reason: {finish_reason}'
+            logging.warning(error)
+            return ''
+        return str(chunk.text)
+
+    @llm_impl
+    def submit(
+        self, prompt: Prompt, images: list[str], structured_schema: dict[str, Any], args: dict[str, Any]
+    ) -> dict[str, Any]:
+        model, contents, generate_content_config = self._build_request(prompt, images, structured_schema, args)
+
+        response = self._api_client.models.generate_content(
+            model=model, contents=contents, config=generate_content_config
+        )
+
+        return self._parse_response(response)
+
+    @llm_impl
+    async def submit_async(
+        self, prompt: Prompt, images: list[str], structured_schema: dict[str, Any], args: dict[str, Any]
+    ) -> dict[str, Any]:
+        model, contents, generate_content_config = self._build_request(prompt, images, structured_schema, args)
+
+        response = await self._api_client.aio.models.generate_content(
+            model=model, contents=contents, config=generate_content_config
+        )
+
+        return self._parse_response(response)
+
+    @llm_impl
+    def submit_streaming(
+        self, prompt: Prompt, args: dict[str, Any], websocket_manager: WebsocketManager
+    ) -> dict[str, str]:
+        model, contents, generate_content_config = self._build_streaming_request(prompt, args)
+
+        response = self._api_client.models.generate_content_stream(
+            model=model,
+            contents=contents,
+            config=generate_content_config,
         )
-        websocket_manager.send_message(packet)
+
+        response_id = args['response_id']
+        websocket_manager.send_message(self._header_packet(args))
 
         full_response = ''
         for chunk in response:
-            if chunk.text is None:
-                finish_reason = 'Not Given.'
-                if hasattr(chunk, 'candidates') and chunk.candidates and len(chunk.candidates) > 0:
-                    finish_reason = str(chunk.candidates[0].finish_reason)
-                error = f'Error in Gemini submit. Response.text is None. Finish Reason: {finish_reason}'
-                logging.warning(error)
-            if chunk.text:
-                websocket_manager.send_message(LLM.StreamPacket(chunk.text, False, ''))
+            text = self._chunk_text(chunk)
+            if text:
+                websocket_manager.send_message(LLM.StreamPacket(text, False, '', response_id))
+                full_response += text
 
-            if chunk.text:
-                full_response += chunk.text
-
-        websocket_manager.send_message(LLM.StreamPacket('{"response_type":"footer"}', False, ''))
+        websocket_manager.send_message(
+            LLM.StreamPacket('{"response_type":"footer"}', False, '', response_id, control=True)
+        )
 
         return {'llm_response': self.extract_toml_block(full_response)}
+
+    @llm_impl
+    async def stream_async(self, prompt: Prompt, args: dict[str, Any]) -> AsyncIterator[LLM.StreamPacket]:
+        model, contents, generate_content_config = self._build_streaming_request(prompt, args)
+
+        response = await self._api_client.aio.models.generate_content_stream(
+            model=model,
+            contents=contents,
+            config=generate_content_config,
+        )
+
+        response_id = args['response_id']
+        yield self._header_packet(args)
+
+        full_response = ''
+        async for chunk in response:
+            text = self._chunk_text(chunk)
+            if text:
+                yield LLM.StreamPacket(text, False, '', response_id)
+                full_response += text
+
+        yield LLM.StreamPacket('{"response_type":"footer"}', False, '', response_id, control=True)
+        yield LLM.StreamPacket(self.extract_toml_block(full_response), True, 'Result', response_id, control=True)
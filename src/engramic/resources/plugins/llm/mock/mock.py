@@ -3,6 +3,7 @@
 # See the LICENSE file in the project root for more details.
 
 import re
+from collections.abc import AsyncIterator
 from typing import Any
 
 from engramic.core.interface.llm import LLM
@@ -30,12 +31,33 @@ class Mock(LLM):
     ) -> dict[str, str]:
         del prompt
         full_string = self.mock_data[args['mock_lookup']]
+        response_id = args.get('response_id')
 
         response_str = re.split(r'(\s+)', full_string['llm_response'])
         for llm_token in response_str:
             if llm_token != '.':
-                websocket_manager.send_message(LLM.StreamPacket(llm_token, False, ''))
+                websocket_manager.send_message(LLM.StreamPacket(llm_token, False, '', response_id))
             else:
-                websocket_manager.send_message(LLM.StreamPacket(llm_token, True, 'End'))
+                websocket_manager.send_message(LLM.StreamPacket(llm_token, True, 'End', response_id))
 
         return full_string
+
+    @llm_impl
+    async def submit_async(
+        self, prompt: Prompt, images: list[str], structured_schema: dict[str, Any], args: dict[str, Any]
+    ) -> dict[str, Any]:
+        return self.submit(prompt=prompt, images=images, structured_schema=structured_schema, args=args)
+
+    @llm_impl
+    async def stream_async(self, prompt: Prompt, args: dict[str, Any]) -> AsyncIterator[LLM.StreamPacket]:
+        del prompt
+        full_string = self.mock_data[args['mock_lookup']]
+        response_id = args.get('response_id')
+
+        for llm_token in re.split(r'(\s+)', full_string['llm_response']):
+            if llm_token != '.':
+                yield LLM.StreamPacket(llm_token, False, '', response_id)
+            else:
+                yield LLM.StreamPacket(llm_token, True, 'End', response_id)
+
+        yield LLM.StreamPacket(full_string['llm_response'], True, 'Result', response_id, control=True)
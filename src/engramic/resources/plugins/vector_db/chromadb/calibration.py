@@ -0,0 +1,192 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+"""
+Sweeps ChromaDB's HNSW settings against a labeled query set, for `engramic calibrate-hnsw`.
+
+Every (construction_ef, M) pair is built once, in an in-memory Chroma client, from a copy of a stored
+collection's vectors. Each search_ef is then measured the way ChromaDB applies it per query: the index
+searches max(search_ef, n_results) candidates and the nearest n_results are kept. recall is the share
+of each query's relevant obj_ids found among those n_results.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, cast
+
+import chromadb
+import numpy as np
+from chromadb.api.collection_configuration import CreateCollectionConfiguration
+from chromadb.config import Settings
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from chromadb.api import ClientAPI
+
+
+@dataclass(slots=True)
+class LabeledQuery:
+    """
+    One query embedding and the obj_ids a search for it should return.
+
+    Attributes:
+        embedding (list[float]): The query embedding.
+        relevant (set[str]): The obj_ids of the engrams (or metas) that answer it.
+    """
+
+    embedding: list[float]
+    relevant: set[str]
+
+
+@dataclass(slots=True)
+class CalibrationPoint:
+    """
+    Recall and latency of one HNSW configuration.
+
+    Attributes:
+        construction_ef (int): ef_construction the index was built with.
+        m (int): max_neighbors (M) the index was built with.
+        search_ef (int): Candidates searched per query.
+        recall (float): Mean share of each query's relevant obj_ids returned.
+        latency_ms (float): Mean milliseconds per query.
+        build_seconds (float): Seconds taken to build the index.
+    """
+
+    construction_ef: int
+    m: int
+    search_ef: int
+    recall: float
+    latency_ms: float
+    build_seconds: float
+
+
+def load_vectors(
+    client: ClientAPI, collection_name: str, limit: int | None = None, page_size: int = 5000
+) -> tuple[list[str], list[str], np.ndarray[Any, Any]]:
+    """Returns the vector ids, obj_ids and embeddings of a collection and its partitions, up to limit vectors."""
+    seen: dict[str, int] = {}
+    obj_ids: list[str] = []
+    embeddings: list[Any] = []
+    for listed in client.list_collections():
+        name = listed if isinstance(listed, str) else listed.name
+        if name != collection_name and not name.startswith(f'{collection_name}.'):
+            continue
+        collection = client.get_collection(name)
+        offset = 0
+        while limit is None or len(seen) < limit:
+            page = collection.get(include=['documents', 'embeddings'], limit=page_size, offset=offset)
+            ids = page.get('ids') or []
+            page_embeddings = page.get('embeddings')
+            for vector_id, document, embedding in zip(
+                ids, page.get('documents') or [], page_embeddings if page_embeddings is not None else [], strict=False
+            ):
+                # An object in several repos has the same vector in each of their partitions.
+                if vector_id not in seen and (limit is None or len(seen) < limit):
+                    seen[vector_id] = len(seen)
+                    obj_ids.append(document)
+                    embeddings.append(embedding)
+            if len(ids) < page_size:
+                break
+            offset += len(ids)
+
+    return list(seen), obj_ids, np.asarray(embeddings, dtype=np.float32).reshape(len(seen), -1)
+
+
+def load_queries(path: str) -> list[LabeledQuery]:
+    """Reads a JSON lines file of {"embedding": [...], "relevant": [obj_id, ...]} queries."""
+    queries = []
+    with open(path, encoding='utf-8') as query_file:
+        for line_number, line in enumerate(query_file, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'embedding' not in record or not record.get('relevant'):
+                error = f'{path}:{line_number} needs an "embedding" and a non-empty "relevant" list.'
+                raise ValueError(error)
+            queries.append(LabeledQuery(list(record['embedding']), set(record['relevant'])))
+    return queries
+
+
+def sample_queries(
+    obj_ids: list[str], embeddings: np.ndarray[Any, Any], count: int, n_results: int, seed: int = 0
+) -> list[LabeledQuery]:
+    """Labels stored vectors with the obj_ids of their exact n_results nearest vectors, for use without labels."""
+    normalized = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    rows = np.random.default_rng(seed).choice(len(embeddings), min(count, len(embeddings)), replace=False)
+    queries = []
+    for row in rows:
+        nearest = np.argsort(-(normalized @ normalized[row]), kind='stable')[:n_results]
+        queries.append(LabeledQuery(embeddings[row].tolist(), {obj_ids[index] for index in nearest}))
+    return queries
+
+
+def sweep(
+    vector_ids: list[str],
+    obj_ids: list[str],
+    embeddings: np.ndarray[Any, Any],
+    queries: list[LabeledQuery],
+    *,
+    construction_efs: Sequence[int],
+    ms: Sequence[int],
+    search_efs: Sequence[int],
+    n_results: int,
+    page_size: int = 5000,
+) -> list[CalibrationPoint]:
+    """Measures every combination of the settings; see the module docstring."""
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    search_efs = sorted(set(search_efs))
+    points = []
+    for construction_ef in construction_efs:
+        for m in ms:
+            name = f'calibrate-{construction_ef}-{m}'
+            configuration = {
+                'hnsw': {
+                    'space': 'cosine',
+                    'ef_construction': construction_ef,
+                    'max_neighbors': m,
+                    'ef_search': search_efs[0],
+                }
+            }
+            start = time.perf_counter()
+            collection = client.create_collection(
+                name=name, configuration=cast(CreateCollectionConfiguration, configuration)
+            )
+            for offset in range(0, len(vector_ids), page_size):
+                end = offset + page_size
+                collection.add(
+                    ids=vector_ids[offset:end], embeddings=embeddings[offset:end], documents=obj_ids[offset:end]
+                )
+            build_seconds = time.perf_counter() - start
+
+            for search_ef in search_efs:
+                found = 0.0
+                start = time.perf_counter()
+                for query in queries:
+                    results = collection.query(
+                        query_embeddings=query.embedding,
+                        n_results=max(n_results, search_ef),
+                        include=['documents'],
+                    )
+                    returned = set(((results.get('documents') or [[]])[0] or [])[:n_results])
+                    found += len(returned & query.relevant) / len(query.relevant)
+                latency_ms = (time.perf_counter() - start) / max(len(queries), 1) * 1e3
+                points.append(
+                    CalibrationPoint(
+                        construction_ef, m, search_ef, found / max(len(queries), 1), latency_ms, build_seconds
+                    )
+                )
+            client.delete_collection(name)
+    return points
+
+
+def frontier(points: list[CalibrationPoint]) -> list[CalibrationPoint]:
+    """Returns the points no other point beats on both recall and latency, fastest first."""
+    best: list[CalibrationPoint] = []
+    for point in sorted(points, key=lambda point: (point.latency_ms, -point.recall)):
+        if not best or point.recall > best[-1].recall:
+            best.append(point)
+    return best
@@ -1,22 +1,96 @@
 # Copyright (c) 2025 Preisz Consulting, LLC.
 # This file is part of Engramic, licensed under the Engramic Community License.
 # See the LICENSE file in the project root for more details.
+import hashlib
+import json
+import logging
 import os
-import uuid
-from collections.abc import Mapping, Sequence
-from typing import Any, cast
+import threading
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from typing import Any, ClassVar, cast
 
 import chromadb
+from chromadb.api.collection_configuration import CreateCollectionConfiguration
+from chromadb.api.models.Collection import Collection
+from chromadb.api.types import Metadata, Where
 from chromadb.config import Settings
 
 from engramic.core.index import Index
 from engramic.core.interface.vector_db import VectorDB
 from engramic.infrastructure.system.plugin_specifications import vector_db_impl
 
+# The ids, embeddings, documents and metadatas of one object's vectors, as Chroma takes them.
+Rows = tuple[list[str], list[Sequence[float]], list[str], list[Metadata]]
+
 
 class ChromaDB(VectorDB):
+    """
+    A vector database on an embedded Chroma client, with the `main` and `meta` collections under local_storage.
+
+    By default each collection is one Chroma collection, and a query filters it by repo, type and
+    location metadata. Only the first repo id of an object is stored, so an engram in several repos is
+    found through the first one only.
+
+    With `partition` set in the plugin entry of the profile, each collection is split into one Chroma
+    collection per repo ("repo") or per repo and type ("repo_type"):
+
+        vector_db.engram = {name="ChromaDB", threshold=0.4, n_results=2, partition="repo"}
+
+    An object is stored in the partition of every repo it belongs to. A query searches only the
+    partitions of the repos (and types) it filters on, each with n_results, and merges their nearest
+    vectors into the top n_results per query embedding. Partitions are created as objects are stored,
+    so changing the mode only applies to vectors stored afterwards; rescan documents with overwrite to
+    move older ones. Deletes and listings cover the unpartitioned collection and every partition.
+
+    The HNSW index of each collection can be tuned with construction_ef, M and search_ef (Chroma's
+    ef_construction, max_neighbors and ef_search; defaults 100, 16 and 100):
+
+        vector_db.engram = {name="ChromaDB", threshold=0.4, n_results=2, construction_ef=200, M=32, search_ef=20}
+
+    connect() opens a collection, and its partitions, with these settings from the plugin entry before
+    any query, so per-query args (such as a prompt's search profile) never change them. construction_ef
+    and M only apply to collections (and partitions) created afterwards, while search_ef is also applied
+    to existing ones. Collections used without connect() are opened with Chroma's defaults. Chroma has
+    no per-query ef, so a query whose args carry a search_ef above the collection's asks for that many
+    results and keeps the nearest n_results, which searches search_ef candidates as HNSW does. A
+    search_ef below the collection's has no effect per query.
+
+    Attributes:
+        client (chromadb.PersistentClient): Client on the local Chroma database.
+        collection (dict[str, Collection]): Unpartitioned collections by name, opened on first use.
+        hnsw (dict[str, dict[str, int]]): The Chroma HNSW settings given to connect() for each collection.
+        search_ef (dict[str, int]): The ef_search each opened collection and partition searches with.
+        partitions (dict[str, dict[tuple[str, str | None], Collection]]): Partitions of each collection by
+            (repo_id, type), with type None in "repo" mode.
+
+    Methods:
+        connect(collection_name, args) -> None:
+            Opens a collection and its partitions with the HNSW settings in args.
+        query(collection_name, embeddings, repo_filters, args, type_filters, location_filters) -> dict[str, Any]:
+            Returns the objects of the nearest matching vectors, ranked (see VectorDB).
+        insert(collection_name, index_list, obj_id, args, filters, type_filter, location_filter) -> None:
+            Stores the embeddings of index_list for obj_id.
+        upsert(collection_name, index_list, obj_id, args, filters, type_filter, location_filter) -> None:
+            Replaces the vectors of obj_id with the embeddings of index_list.
+        upsert_batch(collection_name, items, args) -> None:
+            Upserts many objects with one write per collection or partition.
+        list_obj_ids(collection_name, args) -> list[str]:
+            Returns the obj_ids that have vectors in a collection.
+        delete(collection_name, obj_ids, args) -> None:
+            Deletes every vector of the given obj_ids.
+    """
+
     DEFAULT_THRESHOLD = 0.4
     DEFAULT_N_RESULTS = 2
+    PAGE_SIZE = 5000
+    PARTITION_MODES: ClassVar[tuple[str, ...]] = ('repo', 'repo_type')
+    HNSW_CONFIG: ClassVar[dict[str, str]] = {'hnsw:space': 'cosine'}
+    HNSW_SETTINGS: ClassVar[dict[str, str]] = {
+        'construction_ef': 'ef_construction',
+        'M': 'max_neighbors',
+        'search_ef': 'ef_search',
+    }
+    DEFAULT_SEARCH_EF = 100
 
     def __init__(self) -> None:
         db_path = os.path.join('local_storage', 'chroma_db')
@@ -30,13 +104,67 @@ class ChromaDB(VectorDB):
             path=db_path,  # Use the computed db_path
             settings=Settings(anonymized_telemetry=False),
         )
-        self.collection = {}
+        self.collection: dict[str, Collection] = {}
+        self.hnsw: dict[str, dict[str, int]] = {}
+        self.search_ef: dict[str, int] = {}
+        self.partitions: dict[str, dict[tuple[str, str | None], Collection]] = {}
+        self.legacy_checked: set[str] = set()
+        self._partition_lock = threading.Lock()
 
-        # Configure HNSW parameters
-        hnsw_config = {'hnsw:space': 'cosine'}
+    @vector_db_impl
+    def connect(self, collection_name: str, args: dict[str, Any]) -> None:
+        settings = {
+            chroma_name: int(args[name])
+            for name, chroma_name in self.HNSW_SETTINGS.items()
+            if args and args.get(name) is not None
+        }
+        with self._partition_lock:
+            self.hnsw[collection_name] = settings
+            self.collection[collection_name] = self._open(collection_name, {}, collection_name)
+            self.partitions.pop(collection_name, None)
+        self._partitions(collection_name)
+
+    def _collection(self, collection_name: str) -> Collection:
+        """Returns the unpartitioned collection, opening it with the settings given to connect() on first use."""
+        collection = self.collection.get(collection_name)
+        if collection is None:
+            with self._partition_lock:
+                collection = self.collection.get(collection_name)
+                if collection is None:
+                    collection = self._open(collection_name, {}, collection_name)
+                    self.collection[collection_name] = collection
+        return collection
+
+    def _open(self, name: str, metadata: dict[str, str], collection_name: str) -> Collection:
+        """Opens a collection or one of collection_name's partitions with collection_name's HNSW settings."""
+        settings = self.hnsw.get(collection_name, {})
+        configuration = cast(CreateCollectionConfiguration, {'hnsw': {'space': 'cosine', **settings}})
+        collection = self.client.get_or_create_collection(
+            name=name, metadata={**self.HNSW_CONFIG, **metadata}, configuration=configuration if settings else None
+        )
 
-        self.collection['main'] = self.client.get_or_create_collection(name='main', metadata=hnsw_config)
-        self.collection['meta'] = self.client.get_or_create_collection(name='meta', metadata=hnsw_config)
+        # An existing collection keeps the configuration it was created with. Its ef_search can be changed,
+        # and applies from when this process first loads the index, which is after this.
+        stored = dict((collection.configuration_json or {}).get('hnsw') or {})
+        if 'ef_search' in settings and stored.get('ef_search') != settings['ef_search']:
+            collection.modify(configuration={'hnsw': {'ef_search': settings['ef_search']}})
+            stored['ef_search'] = settings['ef_search']
+        built = {key: stored.get(key) for key, value in settings.items() if stored.get(key) != value}
+        if built:
+            logging.warning(
+                'Chroma collection %s was built with %s; construction_ef and M only apply to new collections.',
+                name,
+                built,
+            )
+        self.search_ef[name] = int(stored.get('ef_search') or self.DEFAULT_SEARCH_EF)
+        return collection
+
+    def _fetch_size(self, collection: Collection, n_results: int, args: dict[str, Any]) -> int:
+        """Returns how many results to ask for, so that HNSW searches max(search_ef, n_results) candidates."""
+        search_ef = args.get('search_ef')
+        if search_ef is None or int(search_ef) <= self.search_ef.get(collection.name, self.DEFAULT_SEARCH_EF):
+            return n_results
+        return max(n_results, int(search_ef))
 
     @vector_db_impl
     def query(
@@ -52,17 +180,29 @@ class ChromaDB(VectorDB):
         n_results = args.get('n_results', self.DEFAULT_N_RESULTS)
         threshold: float = args.get('threshold', self.DEFAULT_THRESHOLD)
 
+        mode = self._partition_mode(args)
+        if mode is not None:
+            results = self._query_partitions(
+                collection_name, embeddings_typed, n_results, mode, repo_filters, type_filters, location_filters, args
+            )
+            return self.rank_matches(self._iter_matches(results), threshold, args.get('aggregate'))
+
         where = self._build_where_clause(repo_filters, type_filters, location_filters)
 
+        collection = self._collection(collection_name)
+        fetch = self._fetch_size(collection, n_results, args)
         results = cast(
             dict[str, Any],
-            self.collection[collection_name].query(query_embeddings=embeddings_typed, n_results=n_results, where=where),
+            collection.query(query_embeddings=embeddings_typed, n_results=fetch, where=where),
         )
+        if fetch > n_results:
+            # Chroma returns each query's results nearest first.
+            results = {
+                key: [group[:n_results] for group in results.get(key) or []]
+                for key in ('ids', 'distances', 'documents')
+            }
 
-        # test = self.collection[collection_name].get()
-
-        ret_ids = self._extract_results_below_threshold(results, threshold)
-        return {'query_set': ret_ids}
+        return self.rank_matches(self._iter_matches(results), threshold, args.get('aggregate'))
 
     def _build_repo_filter(self, repo_filters: list[str]) -> dict[str, Any] | None:
         """Build repository filter clause."""
@@ -105,7 +245,11 @@ class ChromaDB(VectorDB):
         type_where = self._build_type_filter(type_filters)
         location_where = self._build_location_filter(location_filters)
 
-        filters = [f for f in [repo_where, type_where, location_where] if f is not None]
+        return self._combine_clauses([repo_where, type_where, location_where])
+
+    def _combine_clauses(self, clauses: list[dict[str, Any] | None]) -> dict[str, Any] | None:
+        """Combine the given filter clauses with $and, skipping empty ones."""
+        filters = [f for f in clauses if f is not None]
 
         if len(filters) == 0:
             return None
@@ -113,21 +257,179 @@ class ChromaDB(VectorDB):
             return filters[0]
         return {'$and': filters}
 
-    def _extract_results_below_threshold(self, results: dict[str, Any], threshold: float) -> list[str]:
-        """Extract document IDs from results that are below the distance threshold."""
-        ret_ids: list[str] = []
-        distances_groups = results.get('distances') or []
-        documents_groups = results.get('documents') or []
+    def _query_partitions(
+        self,
+        collection_name: str,
+        embeddings: Sequence[float],
+        n_results: int,
+        mode: str,
+        repo_filters: list[str],
+        type_filters: list[str],
+        location_filters: list[str],
+        args: dict[str, Any],
+    ) -> dict[str, Any]:
+        """
+        Queries the partitions selected by the repo and type filters and merges their results.
+
+        Returns results shaped like a Chroma query, holding the n_results nearest vectors over all
+        selected partitions for each query embedding.
+        """
+        repo_ids = set(repo_filters or ['null'])
+        selected = [
+            partition
+            for (repo_id, type_value), partition in list(self._partitions(collection_name).items())
+            if repo_id in repo_ids
+            and (type_value is None if mode == 'repo' else not type_filters or type_value in type_filters)
+        ]
+
+        # The repo (and in repo_type mode the type) is the partition, so only the rest is filtered by metadata.
+        type_where = self._build_type_filter(type_filters) if mode == 'repo' else None
+        where = self._combine_clauses([type_where, self._build_location_filter(location_filters)])
+
+        merged: list[dict[str, tuple[float, str, str]]] = []
+        for partition in selected:
+            results = partition.query(
+                query_embeddings=embeddings,
+                n_results=self._fetch_size(partition, n_results, args),
+                where=cast(Where | None, where),
+            )
+            groups = zip(
+                results.get('ids') or [],
+                results.get('distances') or [],
+                results.get('documents') or [],
+                strict=False,
+            )
+            for query_number, (ids, distances, documents) in enumerate(groups):
+                if query_number == len(merged):
+                    merged.append({})
+                nearest = merged[query_number]
+                # An object in several repos has the same vector, under the same id, in each of their partitions.
+                for vector_id, distance, document in zip(ids, distances, documents, strict=False):
+                    if vector_id not in nearest or distance < nearest[vector_id][0]:
+                        nearest[vector_id] = (distance, document, vector_id)
+
+        ids_groups = []
+        distances_groups = []
+        documents_groups = []
+        for nearest in merged:
+            top = sorted(nearest.values())[:n_results]
+            ids_groups.append([vector_id for _, _, vector_id in top])
+            distances_groups.append([distance for distance, _, _ in top])
+            documents_groups.append([document for _, document, _ in top])
+        return {'ids': ids_groups, 'distances': distances_groups, 'documents': documents_groups}
+
+    def _partition_mode(self, args: dict[str, Any] | None) -> str | None:
+        mode = (args or {}).get('partition')
+        if mode is not None and mode not in self.PARTITION_MODES:
+            error = f"Unknown partition mode '{mode}', expected one of: {', '.join(self.PARTITION_MODES)}."
+            raise ValueError(error)
+        return cast(str | None, mode)
+
+    def _partitions(self, collection_name: str) -> dict[tuple[str, str | None], Collection]:
+        """Returns the partitions of a collection by (repo_id, type), listing them from the client once."""
+        partitions = self.partitions.get(collection_name)
+        if partitions is None:
+            with self._partition_lock:
+                partitions = self.partitions.get(collection_name)
+                if partitions is None:
+                    partitions = {}
+                    for listed in self.client.list_collections():
+                        name = listed if isinstance(listed, str) else listed.name
+                        if name.startswith(f'{collection_name}.'):
+                            metadata = (listed.metadata if not isinstance(listed, str) else None) or {}
+                            partition = self._open(
+                                name, {key: str(value) for key, value in metadata.items()}, collection_name
+                            )
+                            type_value = metadata.get('type')
+                            key = (str(metadata['repo_id']), None if type_value is None else str(type_value))
+                            partitions[key] = partition
+                    self.partitions[collection_name] = partitions
+        return partitions
+
+    def _partition(self, collection_name: str, repo_id: str, type_value: str | None) -> Collection:
+        """Returns the partition for a repo (and type), creating it on first use."""
+        partitions = self._partitions(collection_name)
+        key = (repo_id, type_value)
+        partition = partitions.get(key)
+        if partition is None:
+            with self._partition_lock:
+                partition = partitions.get(key)
+                if partition is None:
+                    # Repo ids and types are free text, so the partition is named by a digest of them and
+                    # they are kept in its metadata.
+                    digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()[:32]
+                    metadata: dict[str, str] = {'repo_id': repo_id}
+                    if type_value is not None:
+                        metadata['type'] = type_value
+                    partition = self._open(f'{collection_name}.{digest}', metadata, collection_name)
+                    partitions[key] = partition
+        return partition
+
+    def _partition_targets(
+        self,
+        collection_name: str,
+        mode: str,
+        filters: list[str] | None,
+        type_filter: str | None,
+    ) -> list[Collection]:
+        """Returns the partitions an object is stored in: one per repo, of its type in repo_type mode."""
+        type_value = (type_filter if type_filter is not None else 'null') if mode == 'repo_type' else None
+        return [self._partition(collection_name, repo_id, type_value) for repo_id in dict.fromkeys(filters or ['null'])]
+
+    def _write_rows(
+        self,
+        write: Callable[..., None],
+        rows: list[Rows],
+    ) -> None:
+        """Writes the rows of many objects with as few calls as Chroma's batch limit allows."""
+        ids = [vector_id for row in rows for vector_id in row[0]]
+        embeddings = [embedding for row in rows for embedding in row[1]]
+        documents = [document for row in rows for document in row[2]]
+        metadatas = [metadata for row in rows for metadata in row[3]]
+        for offset in range(0, len(ids), self.PAGE_SIZE):
+            end = offset + self.PAGE_SIZE
+            write(
+                ids=ids[offset:end],
+                embeddings=embeddings[offset:end],
+                documents=documents[offset:end],
+                metadatas=metadatas[offset:end],
+            )
+
+    def _delete_objects(self, collection: Collection, obj_ids: list[str]) -> None:
+        for offset in range(0, len(obj_ids), self.PAGE_SIZE):
+            collection.delete(where=cast(Where, {'obj_id': {'$in': obj_ids[offset : offset + self.PAGE_SIZE]}}))
+
+    def _iter_matches(self, results: dict[str, Any]) -> Iterator[tuple[str, float, str | None]]:
+        """Yields (obj_id, distance, vector id) for every vector in query results."""
+        groups = zip(
+            results.get('ids') or [], results.get('distances') or [], results.get('documents') or [], strict=False
+        )
+        for ids, distances, documents in groups:
+            for vector_id, distance, document in zip(ids, distances, documents, strict=False):
+                yield document, distance, vector_id
 
-        for distances, documents in zip(distances_groups, documents_groups, strict=False):
-            for distance, document in zip(distances, documents, strict=False):
-                if distance < threshold and document not in ret_ids:
-                    ret_ids.append(document)
+    @vector_db_impl
+    def insert(
+        self,
+        collection_name: str,
+        index_list: list[Index],
+        obj_id: str,
+        args: dict[str, Any],
+        filters: list[str],
+        type_filter: str,
+        location_filter: str,
+    ) -> None:
+        rows = self._build_rows(index_list, obj_id, filters, type_filter, location_filter)
+        mode = self._partition_mode(args)
+        if mode is None:
+            self._write_rows(self._collection(collection_name).add, [rows])
+            return
 
-        return ret_ids
+        for partition in self._partition_targets(collection_name, mode, filters, type_filter):
+            self._write_rows(partition.add, [rows])
 
     @vector_db_impl
-    def insert(
+    def upsert(
         self,
         collection_name: str,
         index_list: list[Index],
@@ -137,27 +439,85 @@ class ChromaDB(VectorDB):
         type_filter: str,
         location_filter: str,
     ) -> None:
-        # start = time.perf_counter()
-        del args
-        documents = []
-        embeddings = []
+        item = {
+            'index_list': index_list,
+            'obj_id': obj_id,
+            'filters': filters,
+            'type_filter': type_filter,
+            'location_filter': location_filter,
+        }
+        self.upsert_batch(collection_name=collection_name, items=[item], args=args)
+
+    @vector_db_impl
+    def upsert_batch(self, collection_name: str, items: list[dict[str, Any]], args: dict[str, Any]) -> None:
+        # The last item of an object wins, as if the items had been upserted one by one.
+        latest = {item['obj_id']: item for item in items}
+        if not latest:
+            return
+
+        obj_ids = list(latest)
+        items = list(latest.values())
+        rows = [
+            self._build_rows(
+                item['index_list'],
+                item['obj_id'],
+                item.get('filters'),
+                item.get('type_filter'),
+                item.get('location_filter'),
+            )
+            for item in items
+        ]
+
+        mode = self._partition_mode(args)
+        if mode is not None:
+            # An object may have moved between repos or types, so every partition is cleared of the objects.
+            for partition in list(self._partitions(collection_name).values()):
+                self._delete_objects(partition, obj_ids)
+
+            grouped: dict[str, tuple[Collection, list[Rows]]] = {}
+            for item, row in zip(items, rows, strict=True):
+                for partition in self._partition_targets(
+                    collection_name, mode, item.get('filters'), item.get('type_filter')
+                ):
+                    grouped.setdefault(partition.name, (partition, []))[1].append(row)
+            for partition, partition_rows in grouped.values():
+                self._write_rows(partition.upsert, partition_rows)
+            return
+
+        # Vectors of these objects that the new index lists no longer hold are removed; the rest are replaced.
+        collection = self._collection(collection_name)
+        existing: list[str] = []
+        for offset in range(0, len(obj_ids), self.PAGE_SIZE):
+            where = cast(Where, {'obj_id': {'$in': obj_ids[offset : offset + self.PAGE_SIZE]}})
+            existing.extend(collection.get(where=where, include=[]).get('ids') or [])
+        stale = sorted(set(existing) - {vector_id for row in rows for vector_id in row[0]})
+        for offset in range(0, len(stale), self.PAGE_SIZE):
+            collection.delete(ids=stale[offset : offset + self.PAGE_SIZE])
+        self._write_rows(collection.upsert, rows)
+
+    def _build_rows(
+        self,
+        index_list: list[Index],
+        obj_id: str,
+        filters: list[str] | None,
+        type_filter: str | None,
+        location_filter: Sequence[str] | None,
+    ) -> Rows:
+        """Builds the ids, embeddings, documents and metadatas of an object's vectors, one per index."""
         ids = []
-        metadatas_container: list[dict[str, str | int | float | bool | None]] = []
-
-        for embedding in index_list:
-            documents.append(obj_id)
-            embeddings.append(cast(Sequence[float], embedding.embedding))
-            ids.append(str(uuid.uuid4()))
-            metadatas: dict[str, str | int | float | bool | None] = {}
-
-            if filters is not None:
-                # Store the first filter as repo_id value
-                if filters:
-                    metadatas.update({'repo_id': filters[0]})
-                else:
-                    metadatas.update({'repo_id': 'null'})
-            else:
-                metadatas.update({'repo_id': 'null'})
+        embeddings = []
+        metadatas_container: list[Metadata] = []
+
+        for index in index_list:
+            # The index id is the vector id, so storing an index again replaces its vector.
+            ids.append(index.id)
+            embeddings.append(cast(Sequence[float], index.embedding))
+
+            # Store the first filter as repo_id value
+            metadatas: dict[str, str | int | float | bool | None] = {
+                'obj_id': obj_id,
+                'repo_id': filters[0] if filters else 'null',
+            }
 
             if type_filter is not None:
                 metadatas.update({'type': type_filter})
@@ -167,15 +527,49 @@ class ChromaDB(VectorDB):
 
             metadatas_container.append(metadatas)
 
-        meta_datas = cast(list[Mapping[str, str | int | float | bool | None]], metadatas_container)
+        return ids, embeddings, [obj_id] * len(ids), metadatas_container
 
-        self.collection[collection_name].add(
-            documents=documents,
-            embeddings=embeddings,
-            ids=ids,
-            metadatas=meta_datas,
-        )
+    @vector_db_impl
+    def list_obj_ids(self, collection_name: str, args: dict[str, Any]) -> list[str]:
+        del args
+        collections = [self._collection(collection_name), *self._partitions(collection_name).values()]
+        return list({obj_id for collection in collections for _, obj_id, _ in self._iter_vectors(collection)})
 
-        # end = time.perf_counter()
+    @vector_db_impl
+    def delete(self, collection_name: str, obj_ids: list[str], args: dict[str, Any]) -> None:
+        if not obj_ids:
+            return
 
-        # print(f"Function took {end - start:.4f} seconds")
+        del args
+        collection = self._collection(collection_name)
+        for target in [collection, *self._partitions(collection_name).values()]:
+            self._delete_objects(target, obj_ids)
+
+        if collection_name in self.legacy_checked:
+            return
+
+        # Vectors stored before obj_id was kept in their metadata are found by the obj_id stored as their
+        # document, which takes a scan of the collection. Once a scan finds none, later deletes skip it.
+        targets = set(obj_ids)
+        legacy_ids = []
+        found_legacy = False
+        for vector_id, obj_id, metadata in self._iter_vectors(collection):
+            if metadata is None or 'obj_id' not in metadata:
+                found_legacy = True
+                if obj_id in targets:
+                    legacy_ids.append(vector_id)
+        for offset in range(0, len(legacy_ids), self.PAGE_SIZE):
+            collection.delete(ids=legacy_ids[offset : offset + self.PAGE_SIZE])
+        if not found_legacy:
+            self.legacy_checked.add(collection_name)
+
+    def _iter_vectors(self, collection: Collection) -> Iterator[tuple[str, str, Mapping[str, Any] | None]]:
+        """Yields (vector id, obj_id, metadata) for every vector in a collection, reading it a page at a time."""
+        offset = 0
+        while True:
+            page = collection.get(include=['documents', 'metadatas'], limit=self.PAGE_SIZE, offset=offset)
+            ids = page.get('ids') or []
+            yield from zip(ids, page.get('documents') or [], page.get('metadatas') or [], strict=False)
+            if len(ids) < self.PAGE_SIZE:
+                return
+            offset += len(ids)
@@ -42,3 +42,27 @@ class Mock(VectorDB):
     ) -> None:
         del obj_id, args, repo_filters, type_filter, location_filter
         logging.info('Add %s %s.', len(index_list), collection_name)
+
+    @vector_db_impl
+    def upsert(
+        self,
+        collection_name: str,
+        index_list: list[Index],
+        obj_id: str,
+        args: dict[str, Any],
+        filters: list[str],
+        type_filter: str,
+        location_filter: str,
+    ) -> None:
+        del obj_id, args, filters, type_filter, location_filter
+        logging.info('Upsert %s %s.', len(index_list), collection_name)
+
+    @vector_db_impl
+    def upsert_batch(self, collection_name: str, items: list[dict[str, Any]], args: dict[str, Any]) -> None:
+        del args
+        logging.info('Upsert batch of %s %s.', len(items), collection_name)
+
+    @vector_db_impl
+    def delete(self, collection_name: str, obj_ids: list[str], args: dict[str, Any]) -> None:
+        del args
+        logging.info('Delete %s %s.', len(obj_ids), collection_name)
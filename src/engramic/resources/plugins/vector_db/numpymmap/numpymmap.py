@@ -0,0 +1,681 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from typing import Any, Final
+
+import numpy as np
+
+from engramic.core.index import Index
+from engramic.core.interface.vector_db import VectorDB
+from engramic.infrastructure.system.plugin_specifications import vector_db_impl
+from engramic.resources.plugins.vector_db.numpymmap.quantization import ProductQuantizer, QuantizedCodes
+from engramic.resources.plugins.vector_db.numpymmap.sharding import ShardPool, nearest_first, top_rows
+
+NULL_CODE: Final[int] = -1
+
+
+class MmapCollection:
+    """
+    One collection's vectors, row metadata and value table, kept in files under its own directory.
+
+        vectors.f32     normalized float32 vectors, one row per inserted index
+        rows.bin        per row: obj_id, repo, type and location codes and a deleted flag (ROW_DTYPE)
+        index_ids.bin   per row: the id of the Index the vector embeds, as fixed width UTF-8 (INDEX_ID_DTYPE)
+        values.jsonl    append-only [field, value] lines; a value's code is its position among its field's lines
+        header.json     dim, the number of committed rows and the committed length of values.jsonl
+
+    vectors.f32, rows.bin and index_ids.bin are memory mapped and grown by doubling, so an insert writes its
+    rows in place and then replaces header.json. Rows and values past the header were not committed (the
+    process stopped mid insert) and are overwritten by the next insert, so reopening needs no recovery pass:
+    it maps the files and reads the value table. Collections written before index_ids.bin existed get an
+    empty one, and their older rows have no index id. The lock is reentrant so that a caller can hold it
+    across a delete and an append; mask() takes it too, so a query never sees the rows in between.
+
+    A collection can also keep a quantized copy of its vectors (see QuantizedCodes). search_quantized()
+    scans the codes for n_results * rerank candidates and re-scores only those from vectors.f32, so a
+    query pages in the codes and a few full rows rather than the whole matrix. The codes are trained and
+    encoded by a background thread that quantize() starts, never under the collection lock, and rows the
+    codes do not cover yet are searched exactly.
+
+    Both scans can be split into row ranges that the worker processes of a ShardPool search in parallel
+    (search_sharded, or search_quantized with a pool); the workers map the same files read-only.
+
+    Attributes:
+        path (str): Directory holding the collection's files.
+        dim (int): Vector dimension, fixed by the first insert; 0 while the collection is empty.
+        count (int): Committed rows.
+        vectors (np.memmap | None): The vector matrix, with capacity rows of which count are in use.
+        rows (np.memmap | None): Row metadata with the same capacity.
+        index_ids (np.memmap | None): Row index ids with the same capacity.
+        values (dict[str, list[str]]): Per field, the value of each code.
+        codes (dict[str, dict[str, int]]): Per field, the code of each value.
+        quantized (QuantizedCodes | None): The quantized copy of the vectors, once a query asked for one.
+        quantizing (threading.Thread | None): The thread bringing quantized up to date, while one runs.
+
+    Methods:
+        append(vectors, obj_id, repo_id, type_value, location, sync, index_ids) -> None:
+            Commits rows for one object.
+        mask(repo_ids, types, locations) -> np.ndarray:
+            Returns which committed, live rows match the filters.
+        search(queries, mask, n_results, score, block_rows) -> tuple[np.ndarray, np.ndarray]:
+            Returns the n_results nearest matching rows and their cosine distances for each query.
+        quantize(mode, subvectors, sync) -> QuantizedCodes | None:
+            Returns the quantized copy once it has codes, and starts bringing it up to date in the background.
+        wait_quantized(timeout) -> None:
+            Waits for the background thread started by quantize(), if one runs.
+        search_sharded(pool, shards, queries, mask, n_results) -> tuple[np.ndarray, np.ndarray]:
+            Like search, split across the worker processes of a ShardPool.
+        search_quantized(queries, mask, n_results, codes, rerank, pool, shards) -> tuple[np.ndarray, np.ndarray]:
+            Like search, but shortlists candidates on the quantized codes and re-scores them exactly.
+        delete(obj_ids) -> None:
+            Flags every row of the given objects as deleted.
+        obj_ids() -> list[str]:
+            Returns the distinct obj_ids with live rows.
+        index_id(row) -> str | None:
+            Returns the index id stored for a row.
+    """
+
+    FIELDS: Final[tuple[str, ...]] = ('obj', 'repo', 'type', 'location')
+    ROW_DTYPE: Final[np.dtype[Any]] = np.dtype([
+        ('obj', '<i4'),
+        ('repo', '<i4'),
+        ('type', '<i4'),
+        ('location', '<i4'),
+        ('deleted', 'u1'),
+    ])
+    INDEX_ID_DTYPE: Final[np.dtype[Any]] = np.dtype('S64')
+    INITIAL_CAPACITY: Final[int] = 1024
+    BLOCK_ROWS: Final[int] = 65536
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.RLock()
+        self.dim = 0
+        self.count = 0
+        self.values_bytes = 0
+        self.vectors: np.memmap[Any, Any] | None = None
+        self.rows: np.memmap[Any, Any] | None = None
+        self.index_ids: np.memmap[Any, Any] | None = None
+        self.values: dict[str, list[str]] = {field: [] for field in MmapCollection.FIELDS}
+        self.codes: dict[str, dict[str, int]] = {field: {} for field in MmapCollection.FIELDS}
+        self.quantized: QuantizedCodes | None = None
+        self.quantizing: threading.Thread | None = None
+
+        os.makedirs(path, exist_ok=True)
+        header_path = os.path.join(path, 'header.json')
+        if os.path.exists(header_path):
+            with open(header_path, encoding='utf-8') as header_file:
+                header = json.load(header_file)
+            self.dim, self.count, self.values_bytes = header['dim'], header['rows'], header['values_bytes']
+
+        self._load_values()
+        if self.dim:
+            if not os.path.exists(self._file('index_ids.bin')):
+                with open(self._file('index_ids.bin'), 'wb') as index_file:
+                    index_file.truncate(self._capacity(with_index_ids=False) * MmapCollection.INDEX_ID_DTYPE.itemsize)
+            self._map(self._capacity())
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load_values(self) -> None:
+        values_path = self._file('values.jsonl')
+        if not os.path.exists(values_path):
+            open(values_path, 'wb').close()
+
+        with open(values_path, 'r+b') as values_file:
+            data = values_file.read(self.values_bytes)
+            values_file.truncate(self.values_bytes)
+
+        for line in data.splitlines():
+            field, value = json.loads(line)
+            self.codes[field][value] = len(self.values[field])
+            self.values[field].append(value)
+
+    def _capacity(self, *, with_index_ids: bool = True) -> int:
+        vector_rows = os.path.getsize(self._file('vectors.f32')) // (self.dim * 4)
+        meta_rows = os.path.getsize(self._file('rows.bin')) // MmapCollection.ROW_DTYPE.itemsize
+        if not with_index_ids:
+            return min(vector_rows, meta_rows)
+        index_rows = os.path.getsize(self._file('index_ids.bin')) // MmapCollection.INDEX_ID_DTYPE.itemsize
+        return min(vector_rows, meta_rows, index_rows)
+
+    def _map(self, capacity: int) -> None:
+        # Maps held by searches in progress stay valid; the files only ever grow.
+        self.vectors = np.memmap(self._file('vectors.f32'), dtype='<f4', mode='r+', shape=(capacity, self.dim))
+        self.rows = np.memmap(self._file('rows.bin'), dtype=MmapCollection.ROW_DTYPE, mode='r+', shape=(capacity,))
+        self.index_ids = np.memmap(
+            self._file('index_ids.bin'), dtype=MmapCollection.INDEX_ID_DTYPE, mode='r+', shape=(capacity,)
+        )
+
+    def _reserve(self, total: int) -> tuple[np.memmap[Any, Any], np.memmap[Any, Any], np.memmap[Any, Any]]:
+        """Grows the files to hold total rows if needed, and returns the vector, row and index id maps."""
+        capacity = self._capacity() if self.vectors is not None else 0
+        if total > capacity:
+            capacity = max(total, capacity * 2, MmapCollection.INITIAL_CAPACITY)
+            for name, row_bytes in (
+                ('vectors.f32', self.dim * 4),
+                ('rows.bin', MmapCollection.ROW_DTYPE.itemsize),
+                ('index_ids.bin', MmapCollection.INDEX_ID_DTYPE.itemsize),
+            ):
+                with open(self._file(name), 'ab') as data_file:
+                    data_file.truncate(capacity * row_bytes)
+            self._map(capacity)
+
+        if self.vectors is None or self.rows is None or self.index_ids is None:
+            error = f'Vector files in {self.path} could not be mapped.'
+            raise RuntimeError(error)
+        return self.vectors, self.rows, self.index_ids
+
+    def _code(self, field: str, value: str | None, new_values: list[bytes]) -> int:
+        if value is None:
+            return NULL_CODE
+        code = self.codes[field].get(value)
+        if code is None:
+            code = len(self.values[field])
+            self.codes[field][value] = code
+            self.values[field].append(value)
+            new_values.append(json.dumps([field, value]).encode('utf-8') + b'\n')
+        return code
+
+    def append(
+        self,
+        vectors: np.ndarray[Any, Any],
+        obj_id: str,
+        repo_id: str | None,
+        type_value: str | None,
+        location: str | None,
+        *,
+        sync: bool,
+        index_ids: list[str] | None = None,
+    ) -> None:
+        encoded_ids = [index_id.encode('utf-8') for index_id in index_ids or []]
+        if any(len(index_id) > MmapCollection.INDEX_ID_DTYPE.itemsize for index_id in encoded_ids):
+            error = f'Index ids longer than {MmapCollection.INDEX_ID_DTYPE.itemsize} bytes cannot be stored.'
+            raise ValueError(error)
+
+        with self.lock:
+            if not self.dim:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                error = f'Vectors of dimension {vectors.shape[1]} inserted into a collection of dimension {self.dim}.'
+                raise ValueError(error)
+
+            new_values: list[bytes] = []
+            row = (
+                self._code('obj', obj_id, new_values),
+                self._code('repo', repo_id, new_values),
+                self._code('type', type_value, new_values),
+                self._code('location', location, new_values),
+                0,
+            )
+
+            with open(self._file('values.jsonl'), 'ab') as values_file:
+                for line in new_values:
+                    values_file.write(line)
+                    self.values_bytes += len(line)
+                if sync:
+                    values_file.flush()
+                    os.fsync(values_file.fileno())
+
+            start, stop = self.count, self.count + len(vectors)
+            vector_map, row_map, index_map = self._reserve(stop)
+            vector_map[start:stop] = vectors
+            row_map[start:stop] = row
+            index_map[start:stop] = encoded_ids or b''
+            if sync:
+                vector_map.flush()
+                row_map.flush()
+                index_map.flush()
+
+            self._write_header(stop, sync=sync)
+            self.count = stop
+
+    def _write_header(self, rows: int, *, sync: bool) -> None:
+        temporary_path = self._file('header.json.tmp')
+        with open(temporary_path, 'w', encoding='utf-8') as header_file:
+            json.dump({'dim': self.dim, 'rows': rows, 'values_bytes': self.values_bytes}, header_file)
+            if sync:
+                header_file.flush()
+                os.fsync(header_file.fileno())
+        os.replace(temporary_path, self._file('header.json'))
+
+    def _field_mask(self, rows: np.ndarray[Any, Any], field: str, values: list[str | None]) -> np.ndarray[Any, Any]:
+        wanted = [NULL_CODE if value is None else self.codes[field].get(value) for value in values]
+        return np.isin(rows[field], np.array([code for code in wanted if code is not None], dtype='<i4'))
+
+    def mask(
+        self, repo_ids: list[str | None], types: list[str] | None, locations: list[str] | None
+    ) -> np.ndarray[Any, Any]:
+        """Returns a boolean row bitmap. repo_ids always filters; types and locations only when given."""
+        with self.lock:
+            if self.rows is None:
+                return np.zeros(0, dtype=bool)
+
+            rows = self.rows[: self.count]
+            bitmap: np.ndarray[Any, Any] = (rows['deleted'] == 0) & self._field_mask(rows, 'repo', repo_ids)
+            if types:
+                bitmap &= self._field_mask(rows, 'type', list(types))
+            if locations:
+                bitmap &= self._field_mask(rows, 'location', list(locations))
+            return bitmap
+
+    def search(
+        self,
+        queries: np.ndarray[Any, Any],
+        mask: np.ndarray[Any, Any],
+        n_results: int,
+        score: Callable[[np.ndarray[Any, Any], Any], np.ndarray[Any, Any]] | None = None,
+        block_rows: int | None = None,
+    ) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        """
+        Returns (rows, distances), each shaped (queries, n) with n <= n_results, nearest first.
+
+        The matrix is read block_rows (default BLOCK_ROWS) rows at a time; each block is one matrix multiply against all the
+        queries, and argpartition keeps each query's best n_results before moving on (see top_rows). score
+        replaces the matrix multiply with another scorer of (queries, a row slice or row numbers).
+        """
+        vectors = self.vectors
+        if vectors is None or n_results < 1:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+
+        def exact(queries: np.ndarray[Any, Any], rows: Any) -> np.ndarray[Any, Any]:
+            block_scores: np.ndarray[Any, Any] = queries @ vectors[rows].T
+            return block_scores
+
+        rows, scores = top_rows(queries, mask, n_results, score or exact, block_rows or MmapCollection.BLOCK_ROWS)
+        return nearest_first(rows, scores, n_results)
+
+    def search_sharded(
+        self, pool: ShardPool, shards: int, queries: np.ndarray[Any, Any], mask: np.ndarray[Any, Any], n_results: int
+    ) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        """Like search, with the rows split into shards that pool's worker processes search in parallel."""
+        if self.vectors is None or n_results < 1:
+            return self.search(queries, mask, n_results)
+        return pool.search(
+            self.path, self.dim, queries, mask, n_results, shards=shards, block_rows=MmapCollection.BLOCK_ROWS
+        )
+
+    def quantize(self, mode: str, subvectors: int, *, sync: bool) -> QuantizedCodes | None:
+        """
+        Returns the quantized copy in mode, or None while it has no codes to search.
+
+        When rows are missing from the codes, a background thread is started to train the codebook if
+        needed and encode them; the call itself never encodes. A copy in another mode replaces the current
+        one only once no thread is writing it.
+        """
+        with self.lock:
+            if self.vectors is None:
+                return None
+            building = self.quantizing is not None and self.quantizing.is_alive()
+            subvectors = ProductQuantizer.subvectors_for(self.dim, subvectors) if mode == 'pq' else 0
+            if self.quantized is None or (self.quantized.mode, self.quantized.subvectors) != (mode, subvectors):
+                if building:
+                    return None
+                self.quantized = QuantizedCodes(self.path, mode, subvectors)
+
+            quantized = self.quantized
+            trainable = mode != 'pq' or quantized.quantizer is not None or self.count >= ProductQuantizer.CENTROIDS
+            if not building and trainable and quantized.rows < self.count:
+                self.quantizing = threading.Thread(
+                    target=self._catch_up,
+                    args=(quantized, self.vectors, self.count),
+                    kwargs={'sync': sync},
+                    name=f'quantize-{os.path.basename(self.path)}',
+                    daemon=True,
+                )
+                self.quantizing.start()
+            return quantized if quantized.rows else None
+
+    def _catch_up(self, quantized: QuantizedCodes, vectors: np.memmap[Any, Any], count: int, *, sync: bool) -> None:
+        try:
+            quantized.catch_up(vectors, count, sync=sync)
+        except Exception:
+            logging.exception('Quantizing %s failed; its queries stay exact.', self.path)
+
+    def wait_quantized(self, timeout: float | None = None) -> None:
+        quantizing = self.quantizing
+        if quantizing is not None:
+            quantizing.join(timeout)
+
+    def search_quantized(
+        self,
+        queries: np.ndarray[Any, Any],
+        mask: np.ndarray[Any, Any],
+        n_results: int,
+        codes: QuantizedCodes,
+        rerank: int,
+        pool: ShardPool | None = None,
+        shards: int = 1,
+    ) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        # Rows past the ones encoded when the query started are searched exactly and merged in.
+        encoded = codes.rows
+        if pool is not None:
+            candidates, _ = pool.search(
+                self.path,
+                self.dim,
+                queries,
+                mask[:encoded],
+                n_results * max(rerank, 1),
+                shards=shards,
+                block_rows=QuantizedCodes.SCORE_BLOCK_ROWS,
+                mode=codes.mode,
+                subvectors=codes.subvectors,
+            )
+        else:
+            candidates, _ = self.search(
+                queries,
+                mask[:encoded],
+                n_results * max(rerank, 1),
+                score=codes.score,
+                block_rows=QuantizedCodes.SCORE_BLOCK_ROWS,
+            )
+        if self.vectors is None:
+            return candidates, np.empty(candidates.shape, dtype=np.float32)
+
+        unique, inverse = np.unique(candidates.ravel(), return_inverse=True)
+        exact = queries @ self.vectors[unique].T
+        scores = np.take_along_axis(exact, inverse.reshape(candidates.shape), axis=1)
+
+        tail = mask.copy()
+        tail[:encoded] = False
+        if tail.any():
+            tail_rows, tail_distances = self.search(queries, tail, n_results)
+            candidates = np.concatenate([candidates, tail_rows], axis=1)
+            scores = np.concatenate([scores, 1.0 - tail_distances], axis=1)
+        return nearest_first(candidates, scores, n_results)
+
+    def delete(self, obj_ids: list[str]) -> None:
+        codes = [self.codes['obj'][obj_id] for obj_id in obj_ids if obj_id in self.codes['obj']]
+        with self.lock:
+            if self.rows is None or not codes:
+                return
+            rows = self.rows[: self.count]
+            rows['deleted'][np.isin(rows['obj'], np.array(codes, dtype='<i4'))] = 1
+            self.rows.flush()
+
+    def index_id(self, row: int) -> str | None:
+        if self.index_ids is None:
+            return None
+        index_id = bytes(self.index_ids[row])
+        return index_id.decode('utf-8') if index_id else None
+
+    def obj_ids(self) -> list[str]:
+        if self.rows is None:
+            return []
+        rows = self.rows[: self.count]
+        return [self.values['obj'][code] for code in np.unique(rows['obj'][rows['deleted'] == 0])]
+
+
+class NumpyMmap(VectorDB):
+    """
+    An in-process vector index on memory-mapped NumPy matrices, one per collection.
+
+    Queries and inserts behave like the ChromaDB plugin: vectors are compared by cosine distance, rows
+    are filtered to the first repo id they were inserted with (or to rows without one when no repo
+    filters are given), and to the given types and locations, and the objects of rows nearer than
+    threshold are returned once each and ranked (see VectorDB.rank_matches), from up to n_results rows
+    per query embedding.
+
+    There is no server or embedded SQL store: vectors are normalized once on insert, filters are boolean
+    bitmaps over integer-coded row metadata, and a query is a blocked matrix multiply with argpartition.
+    Each insert is persisted before it returns (see MmapCollection), and opening a collection only maps
+    its files, so a restart does not rebuild anything. Search is exact, so it suits collections up to a
+    few million vectors. Deleted vectors are flagged, not removed, and still take space in the files.
+
+    Settings can be given in the plugin entry of the profile:
+
+        vector_db.engram = {name="NumpyMmap", threshold=0.4, n_results=2, sync=false}
+
+    With sync false, inserts are written to the page cache but not fsynced, so the newest ones can be
+    lost if the machine (not just the process) stops.
+
+    With quantization="int8" or "pq", queries shortlist n_results * rerank rows on a quantized copy of
+    the vectors (see QuantizedCodes) and re-score the shortlist in full precision, so the float32
+    matrix stays on disk. The codes are built by a background thread when the collection is connected
+    and caught up after later inserts, and queries search exactly until there are codes to use. "pq"
+    needs at least 256 rows to train its codebook; pq_subvectors sets the bytes per row.
+
+        vector_db.engram = {name="NumpyMmap", quantization="pq", pq_subvectors=96, rerank=10}
+
+    With shards above 1, queries on collections of at least shard_min_rows rows are split into that many
+    row ranges and searched in parallel by as many worker processes (see ShardPool), and the ranges' top
+    results are merged; shards=0 uses one per CPU. Smaller collections are searched in process, where
+    starting a scatter costs more than it saves.
+
+        vector_db.engram = {name="NumpyMmap", shards=0, shard_min_rows=100000}
+
+    Attributes:
+        root_path (str): Directory holding one directory per collection.
+        collection (dict[str, MmapCollection]): Open collections by name.
+        shard_pools (dict[int, ShardPool]): Worker pools by number of workers, started by the first sharded query.
+
+    Methods:
+        connect(collection_name, args) -> None:
+            Opens a collection and, when args set quantization, starts building its codes.
+        query(collection_name, embeddings, repo_filters, args, type_filters, location_filters) -> dict[str, Any]:
+            Returns the objects of the nearest matching vectors, ranked (see VectorDB).
+        insert(collection_name, index_list, obj_id, args, filters, type_filter, location_filter) -> None:
+            Stores the embeddings of index_list for obj_id.
+        upsert(collection_name, index_list, obj_id, args, filters, type_filter, location_filter) -> None:
+            Replaces the vectors of obj_id with the embeddings of index_list.
+        upsert_batch(collection_name, items, args) -> None:
+            Upserts many objects, syncing the files once.
+        list_obj_ids(collection_name, args) -> list[str]:
+            Returns the obj_ids that have vectors in a collection.
+        delete(collection_name, obj_ids, args) -> None:
+            Removes every vector of the given obj_ids from searches.
+        close(args) -> None:
+            Stops the shard pools' worker processes and waits for background quantization.
+    """
+
+    DEFAULT_THRESHOLD = 0.4
+    DEFAULT_N_RESULTS = 2
+    DEFAULT_PQ_SUBVECTORS = 96
+    DEFAULT_RERANK = 10
+    DEFAULT_SHARDS = 1
+    MIN_SHARDS = 2  # Fewer shards than this search in process.
+    DEFAULT_SHARD_MIN_ROWS = 100000
+
+    def __init__(self) -> None:
+        self.root_path = os.path.join('local_storage', 'vector_mmap')
+        local_storage_root_path = os.getenv('LOCAL_STORAGE_ROOT_PATH')
+        if local_storage_root_path is not None:
+            self.root_path = os.path.join(local_storage_root_path, 'vector_mmap')
+
+        self._lock = threading.Lock()
+        self.collection: dict[str, MmapCollection] = {}
+        self.shard_pools: dict[int, ShardPool] = {}
+        for collection_name in ('main', 'meta'):
+            self._collection(collection_name)
+
+    def _collection(self, collection_name: str) -> MmapCollection:
+        collection = self.collection.get(collection_name)
+        if collection is None:
+            with self._lock:
+                collection = self.collection.get(collection_name)
+                if collection is None:
+                    collection = MmapCollection(os.path.join(self.root_path, collection_name))
+                    self.collection[collection_name] = collection
+        return collection
+
+    def _shard_pool(self, collection: MmapCollection, args: dict[str, Any]) -> tuple[ShardPool | None, int]:
+        """Returns the worker pool and shard count a query on collection should use, or (None, 1) in process."""
+        shards = int(args.get('shards', self.DEFAULT_SHARDS))
+        if shards == 0:
+            shards = os.cpu_count() or 1
+        if shards < self.MIN_SHARDS or collection.count < int(args.get('shard_min_rows', self.DEFAULT_SHARD_MIN_ROWS)):
+            return None, 1
+
+        pool = self.shard_pools.get(shards)
+        if pool is None:
+            with self._lock:
+                pool = self.shard_pools.setdefault(shards, ShardPool(shards))
+        return pool, shards
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        normalized: np.ndarray[Any, Any] = vectors / norms
+        return normalized
+
+    def _quantize(self, collection: MmapCollection, args: dict[str, Any]) -> QuantizedCodes | None:
+        if not args.get('quantization'):
+            return None
+        return collection.quantize(
+            str(args['quantization']),
+            int(args.get('pq_subvectors', self.DEFAULT_PQ_SUBVECTORS)),
+            sync=bool(args.get('sync', True)),
+        )
+
+    @vector_db_impl
+    def connect(self, collection_name: str, args: dict[str, Any]) -> None:
+        self._quantize(self._collection(collection_name), args or {})
+
+    @vector_db_impl
+    def query(
+        self,
+        collection_name: str,
+        embeddings: list[float],
+        repo_filters: list[str],
+        args: dict[str, Any],
+        type_filters: list[str],
+        location_filters: list[str],
+    ) -> dict[str, Any]:
+        n_results = int(args.get('n_results', self.DEFAULT_N_RESULTS))
+        threshold = float(args.get('threshold', self.DEFAULT_THRESHOLD))
+
+        collection = self._collection(collection_name)
+        if not collection.count or not len(embeddings):
+            return self.rank_matches([], threshold)
+
+        # A single embedding or a batch of them, as ChromaDB accepts.
+        queries = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if queries.shape[1] != collection.dim:
+            error = f'Query dimension {queries.shape[1]} does not match collection dimension {collection.dim}.'
+            raise ValueError(error)
+
+        repo_ids: list[str | None] = list(repo_filters) if repo_filters else [None]
+        mask = collection.mask(repo_ids, type_filters, location_filters)
+        queries = self._normalize(queries)
+        codes = self._quantize(collection, args)
+        pool, shards = self._shard_pool(collection, args)
+        if codes is not None:
+            rerank = int(args.get('rerank', self.DEFAULT_RERANK))
+            rows, distances = collection.search_quantized(queries, mask, n_results, codes, rerank, pool, shards)
+        elif pool is not None:
+            rows, distances = collection.search_sharded(pool, shards, queries, mask, n_results)
+        else:
+            rows, distances = collection.search(queries, mask, n_results)
+
+        obj_codes = collection.rows['obj'][rows] if collection.rows is not None else rows
+        matches = (
+            (collection.values['obj'][code], distance, collection.index_id(row))
+            for query_rows, query_codes, query_distances in zip(rows, obj_codes, distances, strict=True)
+            for row, code, distance in zip(query_rows, query_codes, query_distances, strict=True)
+        )
+        return self.rank_matches(matches, threshold, args.get('aggregate'))
+
+    @vector_db_impl
+    def insert(
+        self,
+        collection_name: str,
+        index_list: list[Index],
+        obj_id: str,
+        args: dict[str, Any],
+        filters: list[str],
+        type_filter: str,
+        location_filter: str,
+    ) -> None:
+        indices = [index for index in index_list if index.embedding is not None]
+        if not indices:
+            return
+
+        vectors = self._normalize(np.asarray([index.embedding for index in indices], dtype=np.float32))
+        self._collection(collection_name).append(
+            vectors,
+            obj_id,
+            filters[0] if filters else None,
+            type_filter,
+            location_filter[0] if location_filter else None,
+            sync=bool((args or {}).get('sync', True)),
+            index_ids=[index.id for index in indices],
+        )
+
+    @vector_db_impl
+    def upsert(
+        self,
+        collection_name: str,
+        index_list: list[Index],
+        obj_id: str,
+        args: dict[str, Any],
+        filters: list[str],
+        type_filter: str,
+        location_filter: str,
+    ) -> None:
+        # Rows are keyed by obj_id rather than by index id, so an upsert replaces all of the object's rows.
+        collection = self._collection(collection_name)
+        with collection.lock:
+            collection.delete([obj_id])
+            self.insert(
+                collection_name=collection_name,
+                index_list=index_list,
+                obj_id=obj_id,
+                args=args,
+                filters=filters,
+                type_filter=type_filter,
+                location_filter=location_filter,
+            )
+
+    @vector_db_impl
+    def upsert_batch(self, collection_name: str, items: list[dict[str, Any]], args: dict[str, Any]) -> None:
+        latest = {item['obj_id']: item for item in items}
+        if not latest:
+            return
+
+        collection = self._collection(collection_name)
+        sync = bool((args or {}).get('sync', True))
+        writable = [
+            item for item in latest.values() if any(index.embedding is not None for index in item['index_list'])
+        ]
+        with collection.lock:
+            collection.delete(list(latest))
+            for position, item in enumerate(writable):
+                # Only the last append syncs; its flush and fsync cover the rows written before it.
+                self.insert(
+                    collection_name=collection_name,
+                    index_list=item['index_list'],
+                    obj_id=item['obj_id'],
+                    args={**(args or {}), 'sync': sync and position == len(writable) - 1},
+                    filters=item['filters'],
+                    type_filter=item['type_filter'],
+                    location_filter=item['location_filter'],
+                )
+
+    @vector_db_impl
+    def list_obj_ids(self, collection_name: str, args: dict[str, Any]) -> list[str]:
+        del args
+        return self._collection(collection_name).obj_ids()
+
+    @vector_db_impl
+    def delete(self, collection_name: str, obj_ids: list[str], args: dict[str, Any]) -> None:
+        del args
+        self._collection(collection_name).delete(obj_ids)
+
+    @vector_db_impl
+    def close(self, args: dict[str, Any]) -> None:
+        del args
+        with self._lock:
+            pools = list(self.shard_pools.values())
+            collections = list(self.collection.values())
+        for pool in pools:
+            pool.close()
+        for collection in collections:
+            collection.wait_quantized()
@@ -0,0 +1,277 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+import json
+import os
+from typing import Any, Final
+
+import numpy as np
+
+
+class ScalarQuantizer:
+    """
+    int8 scalar quantization with one scale per row.
+
+    A row is stored as round(vector / scale) with scale = max(abs(vector)) / 127, a quarter of its float32
+    size plus four bytes. The approximate dot product of a query with a row is (query @ codes) * scale.
+
+    Methods:
+        encode(vectors) -> tuple[np.ndarray, np.ndarray]:
+            Returns the int8 codes and float32 scales of the rows.
+        score(queries, codes, scales) -> np.ndarray:
+            Returns the approximate dot products, shaped (queries, rows).
+    """
+
+    @staticmethod
+    def encode(vectors: np.ndarray[Any, Any]) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    @staticmethod
+    def score(
+        queries: np.ndarray[Any, Any], codes: np.ndarray[Any, Any], scales: np.ndarray[Any, Any]
+    ) -> np.ndarray[Any, Any]:
+        scores: np.ndarray[Any, Any] = (queries @ codes.T.astype(np.float32)) * scales
+        return scores
+
+
+class ProductQuantizer:
+    """
+    Product quantization with a codebook trained by k-means on a collection's own vectors.
+
+    Vectors are split into subvectors of equal width, and each subvector is stored as the one byte code
+    of its nearest of CENTROIDS centroids, so a 768 dimension row with 96 subvectors takes 96 bytes instead
+    of 3072. Scores use asymmetric distance: the query is kept in full precision, its dot product with
+    every centroid is computed once per query, and a row's score is the sum of the looked-up products.
+
+    Attributes:
+        codebook (np.ndarray): Centroids shaped (subvectors, CENTROIDS, width).
+
+    Methods:
+        train(vectors, subvectors, seed) -> ProductQuantizer:
+            Trains a codebook on sample vectors.
+        encode(vectors) -> np.ndarray:
+            Returns the uint8 codes of the rows, shaped (rows, subvectors).
+        score(queries, codes) -> np.ndarray:
+            Returns the approximate dot products, shaped (queries, rows).
+    """
+
+    CENTROIDS: Final[int] = 256
+    ITERATIONS: Final[int] = 15
+
+    def __init__(self, codebook: np.ndarray[Any, Any]) -> None:
+        self.codebook = codebook
+
+    @staticmethod
+    def subvectors_for(dim: int, requested: int) -> int:
+        """Returns the largest divisor of dim that is at most requested."""
+        return max(count for count in range(1, min(dim, max(requested, 1)) + 1) if dim % count == 0)
+
+    @classmethod
+    def train(cls, vectors: np.ndarray[Any, Any], subvectors: int, seed: int = 0) -> 'ProductQuantizer':
+        if len(vectors) < cls.CENTROIDS:
+            error = f'Product quantization needs at least {cls.CENTROIDS} vectors to train, got {len(vectors)}.'
+            raise ValueError(error)
+
+        rng = np.random.default_rng(seed)
+        width = vectors.shape[1] // subvectors
+        codebook = np.empty((subvectors, cls.CENTROIDS, width), dtype=np.float32)
+        for part in range(subvectors):
+            sample = np.ascontiguousarray(vectors[:, part * width : (part + 1) * width], dtype=np.float32)
+            centroids = sample[rng.choice(len(sample), cls.CENTROIDS, replace=False)].copy()
+            for _ in range(cls.ITERATIONS):
+                assigned = cls._nearest(sample, centroids)
+                counts = np.bincount(assigned, minlength=cls.CENTROIDS)
+                sums = np.stack(
+                    [np.bincount(assigned, weights=sample[:, dim], minlength=cls.CENTROIDS) for dim in range(width)],
+                    axis=1,
+                )
+                # A centroid that lost all its vectors keeps its place rather than collapsing to zero.
+                filled = counts > 0
+                centroids[filled] = sums[filled] / counts[filled, None]
+            codebook[part] = centroids
+        return cls(codebook)
+
+    @staticmethod
+    def _nearest(sample: np.ndarray[Any, Any], centroids: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        # |x - c|^2 less the |x|^2 every centroid shares, computed in place on one (rows, centroids) array.
+        distances = sample @ centroids.T
+        distances *= -2.0
+        distances += (centroids * centroids).sum(axis=1)
+        nearest: np.ndarray[Any, Any] = distances.argmin(axis=1)
+        return nearest
+
+    def encode(self, vectors: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        subvectors, _, width = self.codebook.shape
+        codes = np.empty((len(vectors), subvectors), dtype=np.uint8)
+        for part in range(subvectors):
+            codes[:, part] = self._nearest(vectors[:, part * width : (part + 1) * width], self.codebook[part])
+        return codes
+
+    def score(self, queries: np.ndarray[Any, Any], codes: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        subvectors, _, width = self.codebook.shape
+        # tables[q, part, c] is query q's dot product with centroid c of subvector part.
+        tables = np.einsum('qpw,pcw->qpc', queries.reshape(len(queries), subvectors, width), self.codebook)
+        scores = np.zeros((len(queries), len(codes)), dtype=np.float32)
+        for part in range(subvectors):
+            scores += tables[:, part, codes[:, part]]
+        return scores
+
+
+class QuantizedCodes:
+    """
+    The quantized copy of one collection's vectors, kept next to them in its directory.
+
+        int8.codes / int8.scales    ScalarQuantizer codes and scales, one row per vector row
+        pq.codes / pq.codebook.npy  ProductQuantizer codes and the codebook they were encoded with
+        quantized.json              mode, subvectors and the number of rows encoded
+
+    Codes are not written on insert. catch_up() encodes the rows added since the last call, so its first
+    call encodes (and for "pq" trains on) everything stored so far, and later calls only the rows
+    inserted in between. MmapCollection runs it in a background thread, away from queries. The code files grow by doubling like the vector files, and
+    quantized.json is replaced after the codes are written, so rows past it are encoded again after a
+    crash. Changing the mode or the number of subvectors starts over.
+
+    Attributes:
+        path (str): The collection directory.
+        mode (str): "int8" or "pq".
+        subvectors (int): Subvectors per row for "pq", 0 for "int8".
+        rows (int): Vector rows encoded so far.
+
+    Methods:
+        catch_up(vectors, count, sync) -> bool:
+            Encodes vector rows up to count; False when there are no rows or too few to train a codebook.
+        score(queries, rows) -> np.ndarray:
+            Returns approximate dot products of the queries with the given rows (a slice or row numbers).
+        nbytes() -> int:
+            Returns the bytes the codes of the encoded rows take.
+    """
+
+    FILES: Final[dict[str, tuple[str, ...]]] = {
+        'int8': ('int8.codes', 'int8.scales'),
+        'pq': ('pq.codes', 'pq.codebook.npy'),
+    }
+    INITIAL_CAPACITY: Final[int] = 1024
+    BLOCK_ROWS: Final[int] = 65536
+    SCORE_BLOCK_ROWS: Final[int] = 8192
+    PQ_TRAIN_SAMPLE: Final[int] = 16384
+
+    def __init__(self, path: str, mode: str, subvectors: int) -> None:
+        if mode not in QuantizedCodes.FILES:
+            error = f'Unknown quantization mode {mode!r}; expected one of {", ".join(QuantizedCodes.FILES)}.'
+            raise ValueError(error)
+
+        self.path = path
+        self.mode = mode
+        self.subvectors = subvectors if mode == 'pq' else 0
+        self.rows = 0
+        self.codes: np.memmap[Any, Any] | None = None
+        self.scales: np.memmap[Any, Any] | None = None
+        self.quantizer: ProductQuantizer | None = None
+
+        state_path = os.path.join(path, 'quantized.json')
+        if os.path.exists(state_path):
+            with open(state_path, encoding='utf-8') as state_file:
+                state = json.load(state_file)
+            if state['mode'] == self.mode and state['subvectors'] == self.subvectors:
+                self.rows = state['rows']
+            else:
+                # Codes of another mode or codebook are dropped rather than left to take space.
+                for name in QuantizedCodes.FILES[state['mode']]:
+                    if os.path.exists(self._file(name)):
+                        os.remove(self._file(name))
+        if self.mode == 'pq' and self.rows:
+            self.quantizer = ProductQuantizer(np.load(self._file('pq.codebook.npy')))
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _layouts(self, dim: int) -> list[tuple[str, np.dtype[Any], tuple[int, ...]]]:
+        if self.mode == 'int8':
+            return [('int8.codes', np.dtype(np.int8), (dim,)), ('int8.scales', np.dtype('<f4'), ())]
+        return [('pq.codes', np.dtype(np.uint8), (self.subvectors,))]
+
+    def _reserve(self, total: int, dim: int) -> None:
+        """Grows the code files to hold total rows if needed, and maps them."""
+        layouts = [
+            (name, dtype, dtype.itemsize * int(np.prod(shape)), shape) for name, dtype, shape in self._layouts(dim)
+        ]
+        sizes = [os.path.getsize(self._file(name)) if os.path.exists(self._file(name)) else 0 for name, *_ in layouts]
+        capacity = min(size // row_bytes for size, (_, _, row_bytes, _) in zip(sizes, layouts, strict=True))
+        if total <= capacity and self.codes is not None:
+            return
+
+        if total > capacity:
+            capacity = max(total, capacity * 2, QuantizedCodes.INITIAL_CAPACITY)
+            for name, _, row_bytes, _ in layouts:
+                with open(self._file(name), 'ab') as code_file:
+                    code_file.truncate(capacity * row_bytes)
+        maps = [
+            np.memmap(self._file(name), dtype=dtype, mode='r+', shape=(capacity, *shape))
+            for name, dtype, _, shape in layouts
+        ]
+        self.codes = maps[0]
+        self.scales = maps[1] if len(maps) > 1 else None
+
+    def catch_up(self, vectors: np.ndarray[Any, Any], count: int, *, sync: bool) -> bool:
+        if not count:
+            return False
+        if self.mode == 'pq' and self.quantizer is None and not self._train(vectors, count):
+            return False
+
+        self._reserve(count, vectors.shape[1])
+        if self.rows >= count:
+            return True
+        if self.codes is None:
+            error = f'Quantized codes in {self.path} could not be mapped.'
+            raise RuntimeError(error)
+
+        for start in range(self.rows, count, QuantizedCodes.BLOCK_ROWS):
+            stop = min(start + QuantizedCodes.BLOCK_ROWS, count)
+            block = np.asarray(vectors[start:stop], dtype=np.float32)
+            if self.quantizer is not None:
+                self.codes[start:stop] = self.quantizer.encode(block)
+            elif self.scales is not None:
+                self.codes[start:stop], self.scales[start:stop] = ScalarQuantizer.encode(block)
+        if sync:
+            self.codes.flush()
+            if self.scales is not None:
+                self.scales.flush()
+
+        self.rows = count
+        temporary_path = self._file('quantized.json.tmp')
+        with open(temporary_path, 'w', encoding='utf-8') as state_file:
+            json.dump({'mode': self.mode, 'subvectors': self.subvectors, 'rows': count}, state_file)
+        os.replace(temporary_path, self._file('quantized.json'))
+        return True
+
+    def _train(self, vectors: np.ndarray[Any, Any], count: int) -> bool:
+        """Trains the codebook on a sample of the first count rows, deleted ones included."""
+        if count < ProductQuantizer.CENTROIDS:
+            return False
+        sample_rows = np.random.default_rng(0).permutation(count)[: QuantizedCodes.PQ_TRAIN_SAMPLE]
+        self.quantizer = ProductQuantizer.train(vectors[np.sort(sample_rows)], self.subvectors)
+        np.save(self._file('pq.codebook.npy'), self.quantizer.codebook)
+        self.rows = 0
+        return True
+
+    def score(self, queries: np.ndarray[Any, Any], rows: slice | np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        if self.codes is None:
+            return np.empty((len(queries), 0), dtype=np.float32)
+        if self.quantizer is not None:
+            return self.quantizer.score(queries, self.codes[rows])
+        if self.scales is None:
+            error = f'Scalar quantization scales in {self.path} are not mapped.'
+            raise RuntimeError(error)
+        return ScalarQuantizer.score(queries, self.codes[rows], self.scales[rows])
+
+    def nbytes(self) -> int:
+        if self.codes is None:
+            return 0
+        row_bytes = int(self.codes.shape[1]) * self.codes.dtype.itemsize
+        if self.scales is not None:
+            row_bytes += self.scales.dtype.itemsize
+        return int(self.rows * row_bytes)
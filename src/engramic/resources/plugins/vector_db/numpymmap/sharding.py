@@ -0,0 +1,209 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+import itertools
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from engramic.resources.plugins.vector_db.numpymmap.quantization import ProductQuantizer, ScalarQuantizer
+
+Scorer = Callable[[np.ndarray[Any, Any], Any], np.ndarray[Any, Any]]
+
+
+def top_rows(
+    queries: np.ndarray[Any, Any],
+    mask: np.ndarray[Any, Any],
+    n_results: int,
+    score: Scorer,
+    block_rows: int,
+    offset: int = 0,
+) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+    """
+    Returns (rows, scores), each shaped (queries, n) with n <= n_results, in no particular order.
+
+    mask covers the rows from offset on, which are read block_rows at a time; each block is one call of
+    score(queries, a row slice or row numbers) for all the queries, and argpartition keeps each query's
+    best n_results before moving on.
+    """
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    if n_results < 1:
+        return best_rows, best_scores
+
+    for start in range(0, len(mask), block_rows):
+        block_mask = mask[start : start + block_rows]
+        if block_mask.all():
+            block = np.arange(offset + start, offset + start + len(block_mask))
+            scores = score(queries, slice(offset + start, offset + start + len(block_mask)))
+        else:
+            block = np.flatnonzero(block_mask) + offset + start
+            if not len(block):
+                continue
+            scores = score(queries, block)
+
+        candidate_rows = np.concatenate([best_rows, np.broadcast_to(block, scores.shape)], axis=1)
+        candidate_scores = np.concatenate([best_scores, scores], axis=1)
+        if candidate_scores.shape[1] > n_results:
+            top = np.argpartition(-candidate_scores, n_results - 1, axis=1)[:, :n_results]
+            candidate_rows = np.take_along_axis(candidate_rows, top, axis=1)
+            candidate_scores = np.take_along_axis(candidate_scores, top, axis=1)
+        best_rows, best_scores = candidate_rows, candidate_scores
+    return best_rows, best_scores
+
+
+def nearest_first(
+    rows: np.ndarray[Any, Any], scores: np.ndarray[Any, Any], n_results: int
+) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+    """Returns the n_results best rows per query and their cosine distances, nearest first."""
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :n_results]
+    return np.take_along_axis(rows, order, axis=1), 1.0 - np.take_along_axis(scores, order, axis=1)
+
+
+@dataclass(frozen=True, slots=True)
+class Shard:
+    """
+    A row range of one collection's files, as a worker process searches it.
+
+    Attributes:
+        path (str): The collection directory.
+        dim (int): Vector dimension.
+        mode (str): What to score: "exact" reads vectors.f32, "int8" and "pq" the QuantizedCodes files.
+        subvectors (int): Subvectors per row for "pq", 0 otherwise.
+        start (int): First row of the range.
+        stop (int): Row after the last one.
+    """
+
+    path: str
+    dim: int
+    mode: str
+    subvectors: int
+    start: int
+    stop: int
+
+
+# Per worker process: the maps of each file it has searched, and the pq codebooks it has loaded.
+_maps: dict[str, np.memmap[Any, Any]] = {}
+_codebooks: dict[str, tuple[float, ProductQuantizer]] = {}
+
+
+def _mapped(path: str, dtype: str, width: int, rows: int) -> np.memmap[Any, Any]:
+    """Returns a read-only map of a row file with at least rows rows, remapping it once the file has grown."""
+    mapped = _maps.get(path)
+    if mapped is None or len(mapped) < rows:
+        row_bytes = np.dtype(dtype).itemsize * max(width, 1)
+        shape = (os.path.getsize(path) // row_bytes, width) if width else (os.path.getsize(path) // row_bytes,)
+        mapped = np.memmap(path, dtype=dtype, mode='r', shape=shape)
+        _maps[path] = mapped
+    return mapped
+
+
+def _scorer(shard: Shard) -> Scorer:
+    def file(name: str) -> str:
+        return os.path.join(shard.path, name)
+
+    if shard.mode == 'exact':
+        vectors = _mapped(file('vectors.f32'), '<f4', shard.dim, shard.stop)
+        return lambda queries, rows: queries @ vectors[rows].T
+    if shard.mode == 'int8':
+        codes = _mapped(file('int8.codes'), 'i1', shard.dim, shard.stop)
+        scales = _mapped(file('int8.scales'), '<f4', 0, shard.stop)
+        return lambda queries, rows: ScalarQuantizer.score(queries, codes[rows], scales[rows])
+
+    # The codebook is only rewritten when the codes are started over, so its mtime tells a stale copy.
+    codebook_path = file('pq.codebook.npy')
+    modified = os.path.getmtime(codebook_path)
+    cached = _codebooks.get(codebook_path)
+    if cached is None or cached[0] != modified:
+        cached = (modified, ProductQuantizer(np.load(codebook_path)))
+        _codebooks[codebook_path] = cached
+    quantizer = cached[1]
+    pq_codes = _mapped(file('pq.codes'), 'u1', shard.subvectors, shard.stop)
+    return lambda queries, rows: quantizer.score(queries, pq_codes[rows])
+
+
+def search_shard(
+    shard: Shard, queries: np.ndarray[Any, Any], packed_mask: np.ndarray[Any, Any], n_results: int, block_rows: int
+) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+    """Runs in a worker process: top_rows over one shard, whose mask is sent as packed bits."""
+    mask = np.unpackbits(packed_mask, count=shard.stop - shard.start).view(bool)
+    return top_rows(queries, mask, n_results, _scorer(shard), block_rows, offset=shard.start)
+
+
+class ShardPool:
+    """
+    Worker processes that search a collection's memory-mapped files in parallel, one row range each.
+
+    A query's rows are split into shards of equal size; each is sent to a worker together with its slice
+    of the filter mask, packed to a bit per row, and the workers' top n_results lists are merged. Workers
+    open the collection files read-only and keep them mapped between queries, so the matrix is never
+    copied or pickled: every process reads the same pages of the OS page cache. The workers are spawned
+    on the first search, not forked, so they inherit none of the host's threads or locks.
+
+    Attributes:
+        workers (int): Number of worker processes.
+
+    Methods:
+        search(path, dim, queries, mask, n_results, shards, block_rows, mode, subvectors) -> tuple[np.ndarray, np.ndarray]:
+            Like MmapCollection.search, scattered across shards.
+        close() -> None:
+            Stops the worker processes.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def search(
+        self,
+        path: str,
+        dim: int,
+        queries: np.ndarray[Any, Any],
+        mask: np.ndarray[Any, Any],
+        n_results: int,
+        *,
+        shards: int,
+        block_rows: int,
+        mode: str = 'exact',
+        subvectors: int = 0,
+    ) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        """Returns (rows, distances), each shaped (queries, n) with n <= n_results, nearest first."""
+        bounds = np.linspace(0, len(mask), max(shards, 1) + 1).astype(int)
+        pool = self._pool()
+        futures: list[Future[tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]]] = []
+        for start, stop in itertools.pairwise(bounds):
+            shard_mask = mask[start:stop]
+            if not shard_mask.any():
+                continue
+            shard = Shard(path, dim, mode, subvectors, int(start), int(stop))
+            futures.append(pool.submit(search_shard, shard, queries, np.packbits(shard_mask), n_results, block_rows))
+
+        results = [future.result() for future in futures]
+        if not results:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        rows = np.concatenate([shard_rows for shard_rows, _ in results], axis=1)
+        scores = np.concatenate([shard_scores for _, shard_scores in results], axis=1)
+        return nearest_first(rows, scores, n_results)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -0,0 +1,193 @@
+# ruff: noqa: SLF001 - how many results a query asks Chroma for is only visible through _fetch_size
+import itertools
+from typing import Any
+
+import pytest
+
+from engramic.core.index import Index
+
+pytest.importorskip('chromadb')
+
+from engramic.resources.plugins.vector_db.chromadb.chromadb import ChromaDB
+
+
+def upsert(db: ChromaDB, obj_id: str, vector: list[float], repo_ids: list[str] | None, args: dict[str, Any]) -> None:
+    db.upsert(
+        collection_name='main',
+        index_list=[Index(f'text of {obj_id}', vector, id=f'index-{obj_id}')],
+        obj_id=obj_id,
+        args=args,
+        filters=repo_ids,
+        type_filter='native',
+        location_filter=None,
+    )
+
+
+def query(db: ChromaDB, embedding: list[float], repo_filters: list[str] | None, args: dict[str, Any]) -> list[str]:
+    return db.query(
+        collection_name='main',
+        embeddings=[embedding],
+        repo_filters=repo_filters,
+        args={**args, 'threshold': 0.1, 'n_results': 3},
+        type_filters=['native'],
+        location_filters=None,
+    )['query_set']
+
+
+def test_upsert_replaces_vectors_and_delete_removes_them(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = ChromaDB()
+
+    upsert(db, 'engram-a', [1.0, 0.0, 0.0], ['repo-1'], {})
+    upsert(db, 'engram-a', [0.0, 1.0, 0.0], ['repo-1'], {})
+    assert db.collection['main'].count() == 1
+    assert query(db, [0.0, 1.0, 0.0], ['repo-1'], {}) == ['engram-a']
+
+    db.delete(collection_name='main', obj_ids=['engram-a'], args={})
+    assert db.list_obj_ids(collection_name='main', args={}) == []
+
+
+def test_partitions_hold_every_repo_and_are_queried_selectively(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    args = {'partition': 'repo'}
+    db = ChromaDB()
+
+    upsert(db, 'engram-shared', [1.0, 0.0, 0.0], ['repo-1', 'repo-2'], args)
+    upsert(db, 'engram-one', [0.99, 0.05, 0.0], ['repo-1'], args)
+    upsert(db, 'engram-none', [1.0, 0.0, 0.0], None, args)
+
+    assert query(db, [1.0, 0.0, 0.0], ['repo-2'], args) == ['engram-shared']
+    assert query(db, [1.0, 0.0, 0.0], ['repo-1', 'repo-2'], args) == ['engram-shared', 'engram-one']
+    assert query(db, [1.0, 0.0, 0.0], None, args) == ['engram-none']
+    assert query(db, [1.0, 0.0, 0.0], ['repo-3'], args) == []
+
+    # Moving an engram to another repo removes it from its old partitions, also after reopening.
+    reopened = ChromaDB()
+    upsert(reopened, 'engram-shared', [1.0, 0.0, 0.0], ['repo-3'], args)
+    assert query(reopened, [1.0, 0.0, 0.0], ['repo-1', 'repo-2'], args) == ['engram-one']
+    assert query(reopened, [1.0, 0.0, 0.0], ['repo-3'], args) == ['engram-shared']
+
+    reopened.delete(collection_name='main', obj_ids=['engram-shared', 'engram-none'], args=args)
+    assert reopened.list_obj_ids(collection_name='main', args=args) == ['engram-one']
+    assert query(reopened, [1.0, 0.0, 0.0], ['repo-3'], args) == []
+
+    with pytest.raises(ValueError, match='Unknown partition mode'):
+        query(reopened, [1.0, 0.0, 0.0], ['repo-1'], {'partition': 'type'})
+
+
+@pytest.mark.parametrize('args', [{}, {'partition': 'repo'}])
+def test_upsert_batch_matches_upserting_one_by_one(tmp_path, monkeypatch: pytest.MonkeyPatch, args) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = ChromaDB()
+    upsert(db, 'engram-a', [0.0, 0.0, 1.0], ['repo-1'], args)
+
+    def item(obj_id: str, vector: list[float], repo_id: str) -> dict[str, Any]:
+        return {
+            'index_list': [Index(f'text of {obj_id}', vector, id=f'index-{obj_id}-{vector.index(1.0)}')],
+            'obj_id': obj_id,
+            'filters': [repo_id],
+            'type_filter': 'native',
+            'location_filter': None,
+        }
+
+    db.upsert_batch(
+        collection_name='main',
+        items=[
+            item('engram-a', [1.0, 0.0, 0.0], 'repo-1'),
+            item('engram-b', [0.0, 1.0, 0.0], 'repo-1'),
+            item('engram-b', [1.0, 0.0, 0.0], 'repo-2'),
+        ],
+        args=args,
+    )
+
+    # engram-a's earlier vector is replaced, and only the last item of engram-b is kept.
+    assert query(db, [0.0, 0.0, 1.0], ['repo-1'], args) == []
+    assert query(db, [1.0, 0.0, 0.0], ['repo-1'], args) == ['engram-a']
+    assert query(db, [1.0, 0.0, 0.0], ['repo-2'], args) == ['engram-b']
+    assert sorted(db.list_obj_ids(collection_name='main', args=args)) == ['engram-a', 'engram-b']
+
+
+def test_hnsw_settings_apply_to_new_collections_and_search_ef_per_query(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    args = {'construction_ef': 16, 'M': 4, 'search_ef': 10}
+    db = ChromaDB()
+    db.connect(collection_name='main', args=args)
+    for number in range(40):
+        upsert(db, f'engram-{number}', [1.0, number / 40, 0.0], ['repo-1'], args)
+
+    hnsw = db.collection['main'].configuration_json['hnsw']
+    assert (hnsw['ef_construction'], hnsw['max_neighbors'], hnsw['ef_search']) == (16, 4, 10)
+
+    # A larger search_ef asks for more candidates but still returns the nearest n_results.
+    assert query(db, [1.0, 0.0, 0.0], ['repo-1'], {**args, 'search_ef': 30}) == query(
+        db, [1.0, 0.0, 0.0], ['repo-1'], args
+    )
+    assert db._fetch_size(db.collection['main'], 3, {**args, 'search_ef': 30}) == 30
+    assert db._fetch_size(db.collection['main'], 3, {**args, 'search_ef': 5}) == 3
+
+    # Reopening keeps the build settings and applies a new search_ef.
+    reopened = ChromaDB()
+    reopened.connect(collection_name='main', args={'construction_ef': 64, 'search_ef': 40})
+    upsert(reopened, 'engram-new', [0.0, 0.0, 1.0], ['repo-1'], {'construction_ef': 64, 'search_ef': 40})
+    assert reopened.search_ef['main'] == 40
+    assert reopened.collection['main'].configuration_json['hnsw']['ef_construction'] == 16
+
+
+def test_search_profiles_do_not_change_collection_settings(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    base = {'search_ef': 50, 'partition': 'repo', 'search_profiles': {'fast': {'search_ef': 10, 'M': 4}}}
+    profiled = {**base, **base['search_profiles']['fast']}
+    db = ChromaDB()
+    db.connect(collection_name='main', args=base)
+
+    # The first call after startup is a query with the "fast" profile, on a store with no collections yet.
+    assert query(db, [1.0, 0.0, 0.0], ['repo-1'], profiled) == []
+    upsert(db, 'engram-1', [1.0, 0.0, 0.0], ['repo-1'], profiled)
+    assert query(db, [1.0, 0.0, 0.0], ['repo-1'], profiled) == ['engram-1']
+
+    partition = next(iter(db.partitions['main'].values()))
+    for collection in (db.collection['main'], partition):
+        hnsw = collection.configuration_json['hnsw']
+        assert (hnsw['ef_search'], hnsw['max_neighbors']) == (50, 16)
+        assert db.search_ef[collection.name] == 50
+
+
+def test_calibration_sweeps_settings_and_finds_the_frontier(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from engramic.resources.plugins.vector_db.chromadb import calibration
+
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    np = pytest.importorskip('numpy')
+    vectors = np.random.default_rng(1).standard_normal((300, 8)).astype(np.float32)
+    db = ChromaDB()
+    db.upsert_batch(
+        collection_name='main',
+        items=[
+            {
+                'index_list': [
+                    Index('text', vectors[row].tolist(), id=f'index-{row}') for row in range(first, first + 3)
+                ],
+                'obj_id': f'engram-{first // 3}',
+                'filters': None,
+                'type_filter': None,
+                'location_filter': None,
+            }
+            for first in range(0, 300, 3)
+        ],
+        args={},
+    )
+
+    vector_ids, obj_ids, embeddings = calibration.load_vectors(db.client, 'main')
+    assert sorted(vector_ids) == sorted(f'index-{row}' for row in range(300))
+    queries = calibration.sample_queries(obj_ids, embeddings, 20, 5)
+    points = calibration.sweep(
+        vector_ids, obj_ids, embeddings, queries, construction_efs=[32], ms=[8], search_efs=[5, 300], n_results=5
+    )
+
+    assert [(point.construction_ef, point.m, point.search_ef) for point in points] == [(32, 8, 5), (32, 8, 300)]
+    # Searching every vector is exact.
+    assert points[1].recall == pytest.approx(1.0)
+    best = calibration.frontier(points)
+    assert best[-1].recall == max(point.recall for point in points)
+    assert all(later.recall > earlier.recall for earlier, later in itertools.pairwise(best))
@@ -0,0 +1,80 @@
+# ruff: noqa: SLF001 - runs the services' delete paths directly instead of starting a host
+import asyncio
+from collections.abc import Iterator
+from typing import Any
+
+import pluggy
+import pytest
+
+from engramic.application.codify.codify_service import CodifyService
+from engramic.application.repo.repo_service import RepoService
+from engramic.core.interface.db import DB
+from engramic.infrastructure.repository.observation_repository import ObservationRepository
+from engramic.infrastructure.system.plugin_specifications import db_impl, vector_db_impl
+from engramic.resources.plugins.db.mock.mock import Mock
+
+
+class Vectors:
+    def __init__(self) -> None:
+        self.deleted: dict[str, list[str]] = {}
+
+    @vector_db_impl
+    def delete(self, collection_name: str, obj_ids: list[str], args: dict[str, Any]) -> None:
+        del args
+        self.deleted.setdefault(collection_name, []).extend(obj_ids)
+
+
+class UnfilteredMock(Mock):
+    """A plugin that pages through every row whatever args asks for."""
+
+    @db_impl
+    def fetch_iter(
+        self,
+        table: DB.DBTables,
+        fields: list[str] | None,
+        page_size: int,
+        after_id: str | None,
+        args: dict[str, Any] | None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        del args
+        yield from super().fetch_iter(table, fields, page_size, after_id, None)
+
+
+def observation(observation_id: str, parent_id: str) -> dict[str, Any]:
+    return {
+        'id': observation_id,
+        'parent_id': parent_id,
+        'meta': {'id': f'meta-{observation_id}'},
+        'engram_list': [{'id': f'engram-{observation_id}-{number}'} for number in range(2)],
+    }
+
+
+@pytest.mark.parametrize('db_class', [Mock, UnfilteredMock])
+@pytest.mark.parametrize('service_class', [RepoService, CodifyService])
+def test_only_the_parents_vectors_are_deleted(db_class: type[Mock], service_class: type[Any]) -> None:
+    db_manager = pluggy.PluginManager('db')
+    db = db_class({})
+    db_manager.register(db)
+    db.insert_documents(
+        table=DB.DBTables.OBSERVATION,
+        docs=[observation('a1', 'parent-a'), observation('a2', 'parent-a'), observation('b1', 'parent-b')],
+        args=None,
+    )
+
+    vectors = Vectors()
+    vector_manager = pluggy.PluginManager('vector_db')
+    vector_manager.register(vectors)
+    vector_plugin = {'func': vector_manager.hook, 'args': {}}
+
+    # Only the repositories and plugins the delete path reads are set up.
+    service = service_class.__new__(service_class)
+    service.observation_repository = ObservationRepository({'func': db_manager.hook, 'args': {}})
+    service.vector_db_engram_plugin = vector_plugin
+    service.vector_db_meta_plugin = vector_plugin
+    if service_class is RepoService:
+        asyncio.run(service._delete_document_vectors('parent-a'))
+    else:
+        asyncio.run(service._delete_response_vectors('parent-a'))
+
+    assert sorted(vectors.deleted['main']) == ['engram-a1-0', 'engram-a1-1', 'engram-a2-0', 'engram-a2-1']
+    assert sorted(vectors.deleted['meta']) == ['meta-a1', 'meta-a2']
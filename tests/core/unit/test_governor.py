@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from engramic.infrastructure.system.governor import Governor
+
+
+class RateLimitError(Exception):
+    code = 429
+
+
+def test_governor_limits_in_flight_and_retries_rate_limits() -> None:
+    governor = Governor({'llm': {'fast': {'max_in_flight': 2, 'backoff_base': 0.001}}})
+    in_flight = 0
+    peak = 0
+    failures = {'count': 0}
+
+    async def call() -> str:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if failures['count'] < 2:
+            failures['count'] += 1
+            raise RateLimitError
+        return 'ok'
+
+    async def scenario() -> list[str]:
+        return await asyncio.gather(*[governor.run('llm', 'fast', call) for _ in range(6)])
+
+    assert asyncio.run(scenario()) == ['ok'] * 6
+    assert peak == 2
+
+    metrics = governor.get_and_reset_packet()['metrics']
+    assert metrics['CALLS[llm/fast]'] == 6
+    assert metrics['RETRIES[llm/fast]'] == 2
+
+
+def test_governor_hedges_slow_requests() -> None:
+    governor = Governor()
+    delays = [1.0, 0.01]
+
+    async def call() -> float:
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert asyncio.run(governor.run('llm', None, call, hedge_delay=0.02)) == pytest.approx(0.01)
+
+    metrics = governor.get_and_reset_packet()['metrics']
+    assert metrics['HEDGE_WINS[llm/default]'] == 1
@@ -0,0 +1,60 @@
+from typing import Any
+
+from engramic.infrastructure.repository.history_cache import HistoryCache
+
+
+def make_response(response_id: str, response_time: float, repo_ids: list[str] | None = None) -> dict[str, Any]:
+    return {
+        'id': response_id,
+        'response': f'response {response_id}',
+        'response_time': response_time,
+        'prompt': {
+            'conversation_id': 'conv',
+            'repo_ids_filters': repo_ids,
+            'is_lesson': False,
+            'save_in_history': True,
+        },
+    }
+
+
+def test_history_cache_serves_known_history() -> None:
+    cache = HistoryCache(max_conversations=2, max_responses=3)
+
+    assert cache.get('conv', ['repo'], 1) is None
+
+    cache.store('conv', ['repo'], 3, [make_response('old', 1.0, ['repo'])])
+    cache.add(make_response('new', 2.0, ['repo']))
+    cache.add(make_response('new', 2.0, ['repo']))
+
+    rows = cache.get('conv', ['repo'], 3)
+    assert rows is not None
+    assert [row['id'] for row in rows] == ['new', 'old']
+
+    rows[0]['prompt']['training_mode'] = True
+    assert 'training_mode' not in cache.get_response('new', ['repo'])['prompt']  # type: ignore[index]
+    assert cache.get_response('new', ['other']) is None
+
+    # The unfiltered entry was created by add() and only knows the newest response.
+    assert cache.get('conv', None, 1) is not None
+    assert cache.get('conv', None, 2) is None
+
+
+def test_history_cache_evicts_and_skips_lessons() -> None:
+    cache = HistoryCache(max_conversations=1, max_responses=2)
+
+    lesson = make_response('lesson', 1.0)
+    lesson['prompt']['is_lesson'] = True
+    cache.add(lesson)
+    assert cache.get_response('lesson', None) is None
+
+    cache.store('conv', None, 5, [])
+    for index in range(3):
+        cache.add(make_response(str(index), float(index)))
+
+    rows = cache.get('conv', None, 2)
+    assert rows is not None
+    assert [row['id'] for row in rows] == ['2', '1']
+    assert cache.get('conv', None, 3) is None
+
+    cache.store('other', None, 5, [])
+    assert cache.get('conv', None, 1) is None
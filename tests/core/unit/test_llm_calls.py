@@ -0,0 +1,157 @@
+import asyncio
+import threading
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pluggy
+import pytest
+
+from engramic.core.interface.llm import LLM
+from engramic.core.prompt import Prompt
+from engramic.infrastructure.system import llm_calls
+from engramic.infrastructure.system.governor import Governor
+from engramic.infrastructure.system.plugin_specifications import LLMSpec, llm_impl
+from engramic.resources.plugins.llm.mock.mock import Mock
+
+MOCK_DATA = {'answer': {'llm_response': 'Hello there. Bye'}}
+
+
+class RateLimitError(Exception):
+    code = 429
+
+
+class FakeWebsocket:
+    def __init__(self) -> None:
+        self.sent: list[LLM.StreamPacket] = []
+
+    def send_message(self, packet: LLM.StreamPacket) -> None:
+        self.sent.append(packet)
+
+
+class SyncOnly:
+    """An LLM plugin without the async hooks, recording the thread each call runs on."""
+
+    def __init__(self) -> None:
+        self.threads: list[int] = []
+
+    @llm_impl
+    def submit(
+        self, prompt: Prompt, images: list[str], structured_schema: dict[str, Any], args: dict[str, Any]
+    ) -> dict[str, Any]:
+        del prompt, images, structured_schema, args
+        self.threads.append(threading.get_ident())
+        return {'llm_response': 'from a thread'}
+
+    @llm_impl
+    def submit_streaming(
+        self, prompt: Prompt, args: dict[str, Any], websocket_manager: FakeWebsocket
+    ) -> dict[str, str]:
+        del prompt
+        self.threads.append(threading.get_ident())
+        websocket_manager.send_message(LLM.StreamPacket('streamed', False, '', args.get('response_id')))
+        return {'llm_response': 'streamed'}
+
+
+class FlakyStream:
+    """Streams header, chunks and footer; the first attempt fails after sending fail_after packets."""
+
+    def __init__(self, fail_after: int) -> None:
+        self.fail_after = fail_after
+        self.attempts = 0
+
+    @llm_impl
+    async def stream_async(self, prompt: Prompt, args: dict[str, Any]) -> AsyncIterator[LLM.StreamPacket]:
+        del prompt
+        self.attempts += 1
+        response_id = args['response_id']
+        packets = [
+            LLM.StreamPacket('{"response_type":"header"}', False, '', response_id, control=True),
+            LLM.StreamPacket('Hello', False, '', response_id),
+            LLM.StreamPacket(' world', False, '', response_id),
+            LLM.StreamPacket('{"response_type":"footer"}', False, '', response_id, control=True),
+        ]
+        for position, packet in enumerate(packets):
+            if self.attempts == 1 and position == self.fail_after:
+                raise RateLimitError
+            yield packet
+        yield LLM.StreamPacket('Hello world', True, 'Result', response_id, control=True)
+
+
+def plugin_for(*plugins: object, governor: Governor | None = None) -> dict[str, Any]:
+    pm = pluggy.PluginManager('llm')
+    pm.add_hookspecs(LLMSpec)
+    for plugin in plugins:
+        pm.register(plugin)
+    return {'func': pm.hook, 'category': 'llm', 'usage': 'test', 'governor': governor}
+
+
+def test_the_async_hooks_are_awaited_on_the_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def no_threads(*args: Any, **kwargs: Any) -> None:
+        del args, kwargs
+        error = 'the async hooks must not need a thread'
+        raise AssertionError(error)
+
+    monkeypatch.setattr(asyncio, 'to_thread', no_threads)
+    plugin = plugin_for(Mock(MOCK_DATA))
+    websocket = FakeWebsocket()
+
+    async def scenario() -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        args = {'mock_lookup': 'answer', 'response_id': 'r1'}
+        submitted = await llm_calls.submit_llm(
+            plugin, prompt=Prompt('hi'), images=None, structured_schema=None, args=args
+        )
+        streamed = await llm_calls.stream_llm(plugin, prompt=Prompt('hi'), args=args, websocket_manager=websocket)
+        return submitted, streamed
+
+    submitted, streamed = asyncio.run(scenario())
+    assert submitted == [MOCK_DATA['answer']]
+    assert streamed == [{'llm_response': 'Hello there. Bye'}]
+    assert ''.join(packet.packet for packet in websocket.sent) == 'Hello there. Bye'
+    assert not any(packet.control for packet in websocket.sent)
+
+
+def test_plugins_without_async_hooks_run_in_a_thread() -> None:
+    sync_only = SyncOnly()
+    plugin = plugin_for(sync_only)
+    websocket = FakeWebsocket()
+
+    async def scenario() -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        args = {'response_id': 'r1'}
+        submitted = await llm_calls.submit_llm(
+            plugin, prompt=Prompt('hi'), images=None, structured_schema=None, args=args
+        )
+        streamed = await llm_calls.stream_llm(plugin, prompt=Prompt('hi'), args=args, websocket_manager=websocket)
+        return submitted, streamed
+
+    assert asyncio.run(scenario()) == ([{'llm_response': 'from a thread'}], [{'llm_response': 'streamed'}])
+    assert len(sync_only.threads) == 2
+    assert threading.get_ident() not in sync_only.threads
+    assert [packet.packet for packet in websocket.sent] == ['streamed']
+
+
+@pytest.mark.parametrize(('fail_after', 'attempts'), [(0, 2), (2, 1)])
+def test_streams_forward_header_chunks_and_footer_and_retry_only_before_sending(fail_after: int, attempts: int) -> None:
+    stream = FlakyStream(fail_after)
+    plugin = plugin_for(stream, governor=Governor({'llm': {'default': {'backoff_base': 0.001}}}))
+    websocket = FakeWebsocket()
+
+    async def scenario() -> list[dict[str, Any]]:
+        return await llm_calls.stream_llm(
+            plugin, prompt=Prompt('hi'), args={'response_id': 'r1'}, websocket_manager=websocket
+        )
+
+    if fail_after:
+        # Packets already reached the client, so a retry would send them twice.
+        with pytest.raises(RateLimitError):
+            asyncio.run(scenario())
+        assert [packet.packet for packet in websocket.sent] == ['{"response_type":"header"}', 'Hello']
+    else:
+        assert asyncio.run(scenario()) == [{'llm_response': 'Hello world'}]
+        assert [packet.packet for packet in websocket.sent] == [
+            '{"response_type":"header"}',
+            'Hello',
+            ' world',
+            '{"response_type":"footer"}',
+        ]
+    assert stream.attempts == attempts
+    assert not any(packet.finish for packet in websocket.sent)
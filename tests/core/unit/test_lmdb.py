@@ -0,0 +1,100 @@
+from typing import Any
+
+import pytest
+
+from engramic.core.interface.db import DB
+from engramic.resources.plugins.db.sqlite.sqlite import Sqlite
+
+pytest.importorskip('lmdb')
+
+from engramic.resources.plugins.db.lmdb.lmdb import Lmdb
+
+
+def make_history(index: int, conversation_id: str | None, repo_ids: list[str] | None) -> dict[str, Any]:
+    prompt = {'prompt_str': f'question {index}', 'conversation_id': conversation_id, 'repo_ids_filters': repo_ids}
+    return {'id': f'history-{index:02}', 'response_time': float(index % 7), 'prompt': prompt, 'response': 'answer'}
+
+
+def run_access_patterns(db: DB) -> list[Any]:
+    """Exercises the fetch, fetch_iter, insert and delete patterns the services use; returns what they read."""
+    history = [
+        make_history(index, ['conv-a', 'conv-b', None][index % 3], [['repo-1'], ['repo-2', 'repo-1'], None][index % 2])
+        for index in range(30)
+    ]
+    db.insert_documents(table=DB.DBTables.HISTORY, docs=history, args=None)
+    db.insert_documents(
+        table=DB.DBTables.PROCESS,
+        docs=[{'id': f'process-{index}', 'start_time': float(-index), 'document_id': 'doc'} for index in range(5)],
+        args=None,
+    )
+    db.insert_documents(
+        table=DB.DBTables.EMBEDDING,
+        docs=[{'id': 'e-1', 'owner_id': 'engram-1', 'embedding': [0.5, -1.25]}, {'id': 'e-2', 'embedding': [2.0]}],
+        args=None,
+    )
+
+    # Replacing a row moves its index entries, and deleting one removes them.
+    moved = make_history(0, 'conv-b', ['repo-1'])
+    moved['response_time'] = 100.0
+    db.insert_documents(table=DB.DBTables.HISTORY, docs=[moved], args=None)
+    db.delete_documents(table=DB.DBTables.HISTORY, ids=['history-04'], args=None)
+
+    def history_ids(args: dict[str, Any] | None, ids: list[str] | None = None) -> list[str]:
+        return [doc['id'] for doc in db.fetch(table=DB.DBTables.HISTORY, ids=ids or [], args=args)['history']]
+
+    conversation = {'conversation_id': 'conv-b', 'repo_ids_filters': ['repo-1'], 'history_limit': 3}
+    return [
+        history_ids(conversation),
+        sorted(history_ids({'conversation_id': 'conv-a'})),
+        sorted(history_ids({'repo_ids_filters': ['repo-1', 'repo-2']})),
+        history_ids({'history_limit': 4})[:1],
+        sorted(history_ids(None, ['history-01', 'history-04', 'missing'])),
+        history_ids({'conversation_id': 'conv-b', 'history_limit': 2}, ['history-01', 'history-10', 'history-13']),
+        [doc['id'] for doc in db.fetch(table=DB.DBTables.PROCESS, ids=None, args={'history_limit': 2})['process']],
+        sorted(
+            db.fetch(table=DB.DBTables.EMBEDDING, ids=['e-1', 'e-2', 'e-3'], args=None)['embedding'],
+            key=lambda row: row['id'],
+        ),
+        list(
+            db.fetch_iter(
+                table=DB.DBTables.HISTORY, fields=['id', 'response_time'], page_size=8, after_id=None, args=None
+            )
+        ),
+        list(
+            db.fetch_iter(
+                table=DB.DBTables.HISTORY,
+                fields=['id'],
+                page_size=4,
+                after_id='history-10',
+                args={'conversation_id': 'conv-a'},
+            )
+        ),
+        list(
+            db.fetch_iter(
+                table=DB.DBTables.EMBEDDING, fields=None, page_size=10, after_id=None, args={'owner_id': 'engram-1'}
+            )
+        ),
+    ]
+
+
+def test_lmdb_reads_match_sqlite(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+
+    results = []
+    for plugin in (Sqlite(), Lmdb()):
+        plugin.connect({'map_size': 16 * 1024 * 1024})
+        results.append(run_access_patterns(plugin))
+        plugin.close(None)
+
+    sqlite_results, lmdb_results = results
+    assert lmdb_results == sqlite_results
+    assert lmdb_results[0] == ['history-00', 'history-10', 'history-16']
+    assert lmdb_results[6] == ['process-0', 'process-1']
+
+    # Documents and indexes survive reopening the environment.
+    db = Lmdb()
+    db.connect(None)
+    assert [
+        doc['id'] for doc in db.fetch(table=DB.DBTables.HISTORY, ids=None, args={'history_limit': 1})['history']
+    ] == ['history-00']
+    db.close(None)
@@ -0,0 +1,33 @@
+import asyncio
+
+from engramic.infrastructure.system.governor import Governor
+from engramic.infrastructure.system.model_router import ModelRouter
+
+RULES = {
+    'llm': {
+        'response_main': [
+            {'model': 'fast', 'max_prompt_chars': 100, 'response_length': ['short']},
+            {'model': 'pro', 'fallback': ['fast']},
+        ]
+    }
+}
+
+
+def test_router_picks_fast_model_for_short_prompts() -> None:
+    router = ModelRouter(RULES, Governor())
+
+    assert router.route('llm', 'response_main', 'pro', {'prompt_chars': 50, 'response_length': 'short'}) == 'fast'
+    assert router.route('llm', 'response_main', 'pro', {'prompt_chars': 500, 'response_length': 'short'}) == 'pro'
+    assert router.route('llm', 'response_main', 'pro', {'prompt_chars': 50}) == 'pro'
+    assert router.route('llm', 'validate', 'flash', {'prompt_chars': 50}) == 'flash'
+
+
+def test_router_falls_back_when_model_is_saturated() -> None:
+    governor = Governor({'llm': {'pro': {'max_in_flight': 1}}})
+    router = ModelRouter(RULES, governor)
+
+    async def scenario() -> str | None:
+        async with governor.lane('llm', 'pro').semaphore:  # type: ignore[union-attr]
+            return router.route('llm', 'response_main', 'pro', {'prompt_chars': 500})
+
+    assert asyncio.run(scenario()) == 'fast'
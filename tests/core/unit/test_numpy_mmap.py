@@ -0,0 +1,325 @@
+# ruff: noqa: SLF001 - whether a ShardPool's worker processes run is only visible on its executor
+import threading
+from typing import Any
+
+import pluggy
+import pytest
+
+from engramic.core.index import Index
+
+pytest.importorskip('numpy')
+
+import numpy as np
+
+from engramic.infrastructure.system.plugin_manager import PluginManager
+from engramic.resources.plugins.vector_db.numpymmap.numpymmap import MmapCollection, NumpyMmap
+from engramic.resources.plugins.vector_db.numpymmap.sharding import ShardPool
+
+
+def insert(db: NumpyMmap, obj_id: str, vectors: list[list[float]], repo_ids: list[str] | None, **filters: Any) -> None:
+    db.insert(
+        collection_name='main',
+        index_list=[Index(f'text of {obj_id}', vector) for vector in vectors],
+        obj_id=obj_id,
+        args={'sync': False},
+        filters=repo_ids,
+        type_filter=filters.get('type_filter'),
+        location_filter=filters.get('location_filter'),
+    )
+
+
+def query(
+    db: NumpyMmap, embeddings: list[list[float]], repo_filters: list[str] | None = None, **args: object
+) -> list[str]:
+    return db.query(
+        collection_name='main',
+        embeddings=embeddings,
+        repo_filters=repo_filters,
+        args={'threshold': args.get('threshold', 0.5), 'n_results': args.get('n_results', 3)},
+        type_filters=args.get('type_filters'),
+        location_filters=args.get('location_filters'),
+    )['query_set']
+
+
+def test_queries_filter_rank_and_survive_reopening(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = NumpyMmap()
+
+    insert(
+        db,
+        'engram-x',
+        [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+        ['repo-1'],
+        type_filter='native',
+        location_filter=['file://a'],
+    )
+    insert(db, 'engram-y', [[0.9, 0.1, 0.0]], ['repo-1', 'repo-2'], type_filter='episodic')
+    insert(db, 'engram-z', [[1.0, 0.05, 0.0]], None, type_filter='native')
+
+    assert query(db, [[1.0, 0.0, 0.0]], ['repo-1']) == ['engram-x', 'engram-y']
+    assert query(db, [[1.0, 0.0, 0.0]], ['repo-2']) == []
+    assert query(db, [[1.0, 0.0, 0.0]]) == ['engram-z']
+    assert query(db, [[1.0, 0.0, 0.0]], ['repo-1'], type_filters=['episodic']) == ['engram-y']
+    assert query(db, [[1.0, 0.0, 0.0]], ['repo-1'], location_filters=['file://a']) == ['engram-x']
+    assert query(db, [[0.0, 0.0, 1.0], [0.0, 1.0, 0.0]], ['repo-1']) == ['engram-x']
+    assert query(db, [[1.0, 0.0, 0.0]], ['repo-1'], n_results=1) == ['engram-x']
+
+    # An insert cut short leaves values past the committed header; reopening ignores and overwrites them.
+    with open(tmp_path / 'vector_mmap' / 'main' / 'values.jsonl', 'ab') as values_file:
+        values_file.write(b'["obj", "half-writ')
+
+    reopened = NumpyMmap()
+    assert query(reopened, [[1.0, 0.0, 0.0]], ['repo-1']) == ['engram-x', 'engram-y']
+    insert(reopened, 'engram-w', [[0.0, 0.0, 1.0]], ['repo-1'])
+    assert query(reopened, [[0.0, 0.0, 1.0]], ['repo-1']) == ['engram-w']
+
+    reopened.delete(collection_name='main', obj_ids=['engram-x', 'missing'], args={})
+    assert sorted(reopened.list_obj_ids(collection_name='main', args={})) == ['engram-w', 'engram-y', 'engram-z']
+    assert query(NumpyMmap(), [[1.0, 0.0, 0.0]], ['repo-1']) == ['engram-y']
+
+    # An upsert replaces every earlier vector of the object rather than adding to them.
+    for _ in range(2):
+        reopened.upsert(
+            collection_name='main',
+            index_list=[Index('moved', [0.0, 1.0, 0.0])],
+            obj_id='engram-y',
+            args={'sync': False},
+            filters=['repo-1'],
+            type_filter=None,
+            location_filter=None,
+        )
+    assert query(reopened, [[1.0, 0.0, 0.0]], ['repo-1']) == []
+    assert query(reopened, [[0.0, 1.0, 0.0]], ['repo-1'], threshold=0.01) == ['engram-y']
+
+
+def test_concurrent_queries_never_miss_an_object_being_upserted(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = NumpyMmap()
+    insert(db, 'engram-a', [[1.0, 0.0, 0.0]], ['repo-1'])
+
+    def upsert_repeatedly() -> None:
+        for position in range(200):
+            db.upsert_batch(
+                collection_name='main',
+                items=[
+                    {
+                        'obj_id': 'engram-a',
+                        'index_list': [Index('moved', [1.0, position / 1000, 0.0])],
+                        'filters': ['repo-1'],
+                        'type_filter': None,
+                        'location_filter': None,
+                    }
+                ],
+                args={'sync': False},
+            )
+
+    writer = threading.Thread(target=upsert_repeatedly)
+    writer.start()
+    missed = 0
+    while writer.is_alive():
+        missed += query(db, [[1.0, 0.0, 0.0]], ['repo-1']) != ['engram-a']
+    writer.join()
+
+    assert missed == 0
+    assert len(db.collection['main'].mask(['repo-1'], None, None).nonzero()[0]) == 1
+
+
+def test_blocked_search_matches_brute_force(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(MmapCollection, 'BLOCK_ROWS', 64)
+    monkeypatch.setattr(MmapCollection, 'INITIAL_CAPACITY', 16)
+    collection = MmapCollection(str(tmp_path / 'collection'))
+
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((500, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    for offset in range(0, 500, 25):
+        repo_id = 'repo-a' if offset % 50 == 0 else 'repo-b'
+        collection.append(vectors[offset : offset + 25], f'obj-{offset}', repo_id, None, None, sync=False)
+
+    queries = vectors[[3, 260, 499]]
+    mask = collection.mask(['repo-a'], None, None)
+    rows, distances = collection.search(queries, mask, 10)
+
+    scores = queries @ vectors.T
+    scores[:, ~mask] = -np.inf
+    expected = np.argsort(-scores, axis=1, kind='stable')[:, :10]
+    assert rows.tolist() == expected.tolist()
+    assert np.allclose(distances, 1.0 - np.take_along_axis(scores, expected, axis=1), atol=1e-5)
+
+
+def test_scored_results_rank_by_aggregate(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = NumpyMmap()
+    db.insert(
+        collection_name='main',
+        index_list=[Index('near', [1.0, 0.0, 0.0], id='index-near')],
+        obj_id='engram-near',
+        args={'sync': False},
+        filters=None,
+        type_filter=None,
+        location_filter=None,
+    )
+    db.insert(
+        collection_name='main',
+        index_list=[Index('first', [0.9, 0.3, 0.0], id='index-first'), Index('second', [0.3, 0.9, 0.0])],
+        obj_id='engram-broad',
+        args={'sync': False},
+        filters=None,
+        type_filter=None,
+        location_filter=None,
+    )
+
+    def scored(aggregate: str) -> list[tuple[str, float, str | None]]:
+        return db.query(
+            collection_name='main',
+            embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+            repo_filters=None,
+            args={'threshold': 0.6, 'n_results': 3, 'aggregate': aggregate},
+            type_filters=None,
+            location_filters=None,
+        )['scored_set']
+
+    # The nearest single match ranks first with max-sim; matching both queries ranks first with sum-sim.
+    assert [(obj_id, index_id) for obj_id, _, index_id in scored('max')] == [
+        ('engram-near', 'index-near'),
+        ('engram-broad', 'index-first'),
+    ]
+    assert [obj_id for obj_id, _, _ in scored('sum')] == ['engram-broad', 'engram-near']
+    assert scored('max')[0][1] == pytest.approx(0.0, abs=1e-6)
+
+
+@pytest.mark.parametrize('mode', ['int8', 'pq'])
+def test_quantized_search_reranks_to_the_exact_results(tmp_path, monkeypatch: pytest.MonkeyPatch, mode: str) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    rng = np.random.default_rng(5)
+    vectors = rng.standard_normal((600, 16)).astype(np.float32)
+    db = NumpyMmap()
+    for offset in range(0, 500, 50):
+        db.insert(
+            collection_name='main',
+            index_list=[Index('text', vector.tolist()) for vector in vectors[offset : offset + 50]],
+            obj_id=f'engram-{offset}',
+            args={'sync': False},
+            filters=None,
+            type_filter=None,
+            location_filter=None,
+        )
+
+    def scored(queries: np.ndarray, **args: Any) -> list[list[tuple[str, float, str | None]]]:
+        return [
+            db.query(
+                collection_name='main',
+                embeddings=[embedding.tolist()],
+                repo_filters=None,
+                args={'threshold': 2.0, 'n_results': 5, 'sync': False, **args},
+                type_filters=None,
+                location_filters=None,
+            )['scored_set']
+            for embedding in queries
+        ]
+
+    def assert_same(
+        found: list[list[tuple[str, float, str | None]]], expected: list[list[tuple[str, float, str | None]]]
+    ) -> None:
+        assert [[(obj_id, index_id) for obj_id, _, index_id in ranked] for ranked in found] == [
+            [(obj_id, index_id) for obj_id, _, index_id in ranked] for ranked in expected
+        ]
+        assert [score for ranked in found for _, score, _ in ranked] == pytest.approx(
+            [score for ranked in expected for _, score, _ in ranked], abs=1e-5
+        )
+
+    args = {'quantization': mode, 'pq_subvectors': 4, 'rerank': 20}
+    collection = db.collection['main']
+    db.connect(collection_name='main', args=args)
+    collection.wait_quantized()
+    assert collection.quantized is not None
+    assert collection.quantized.rows == 500
+    assert (tmp_path / 'vector_mmap' / 'main' / f'{mode}.codes').exists()
+    assert_same(scored(vectors[:20], **args), scored(vectors[:20]))
+
+    # Rows inserted after the codes were written are searched exactly until the background thread encodes them.
+    db.insert(
+        collection_name='main',
+        index_list=[Index('text', vector.tolist()) for vector in vectors[500:]],
+        obj_id='engram-new',
+        args={'sync': False},
+        filters=None,
+        type_filter=None,
+        location_filter=None,
+    )
+    assert_same(scored(vectors[550:560], **args), scored(vectors[550:560]))
+    collection.wait_quantized()
+    assert collection.quantized.rows == 600
+    assert_same(scored(vectors[550:560], **args), scored(vectors[550:560]))
+
+
+def test_sharded_search_merges_to_the_in_process_results(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    rng = np.random.default_rng(9)
+    vectors = rng.standard_normal((1500, 16)).astype(np.float32)
+    db = NumpyMmap()
+
+    def add(first: int, last: int) -> None:
+        for offset in range(first, last, 50):
+            db.insert(
+                collection_name='main',
+                index_list=[Index('text', vector.tolist()) for vector in vectors[offset : offset + 50]],
+                obj_id=f'engram-{offset}',
+                args={'sync': False},
+                filters=['repo-a' if offset % 100 == 0 else 'repo-b'],
+                type_filter=None,
+                location_filter=None,
+            )
+
+    def scored(**args: Any) -> list[list[tuple[str, float, str | None]]]:
+        return [
+            db.query(
+                collection_name='main',
+                embeddings=[embedding.tolist()],
+                repo_filters=['repo-a'],
+                args={'threshold': 2.0, 'n_results': 8, 'sync': False, **args},
+                type_filters=None,
+                location_filters=None,
+            )['scored_set']
+            for embedding in vectors[::150]
+        ]
+
+    def assert_same(
+        found: list[list[tuple[str, float, str | None]]], expected: list[list[tuple[str, float, str | None]]]
+    ) -> None:
+        assert [[obj_id for obj_id, _, _ in ranked] for ranked in found] == [
+            [obj_id for obj_id, _, _ in ranked] for ranked in expected
+        ]
+        assert [score for ranked in found for _, score, _ in ranked] == pytest.approx(
+            [score for ranked in expected for _, score, _ in ranked], abs=1e-5
+        )
+
+    sharded = {'shards': 3, 'shard_min_rows': 0}
+    try:
+        add(0, 1000)
+        assert_same(scored(**sharded), scored())
+        assert_same(scored(quantization='int8', rerank=4, **sharded), scored(quantization='int8', rerank=4))
+
+        # The workers remap the files once inserts have grown them.
+        add(1000, 1500)
+        assert_same(scored(**sharded), scored())
+        assert list(db.shard_pools) == [3]
+    finally:
+        db.close(args={})
+    assert all(pool._executor is None for pool in db.shard_pools.values())
+
+
+def test_host_shutdown_closes_the_shard_pools(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = NumpyMmap()
+    pool = db.shard_pools.setdefault(2, ShardPool(2))
+    pool._pool()
+
+    vector_manager = pluggy.PluginManager('vector_db')
+    vector_manager.register(db)
+    plugin_manager = PluginManager.__new__(PluginManager)
+    plugin_manager.plugin_managers = {'vector_db': vector_manager}
+    plugin_manager.shutdown_plugins()
+
+    assert pool._executor is None
+    assert not vector_manager.get_plugins()
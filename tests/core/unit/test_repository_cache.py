@@ -0,0 +1,38 @@
+from engramic.core import Engram
+from engramic.core.engram import EngramType
+from engramic.core.interface.db import DB
+from engramic.infrastructure.repository.repository_cache import RepositoryCache
+
+
+def make_engram(engram_id: str, content: str) -> Engram:
+    return Engram(engram_id, ['file://a'], ['source'], content, EngramType.NATIVE)
+
+
+def test_repository_cache_is_bounded_by_bytes() -> None:
+    small = make_engram('small', 'x')
+    large = make_engram('large', 'x' * 4000)
+    cache = RepositoryCache(max_bytes=RepositoryCache.estimate_size(large) + RepositoryCache.estimate_size(small))
+
+    cache.put(DB.DBTables.ENGRAM, 'small', small)
+    cache.put(DB.DBTables.ENGRAM, 'large', large)
+    assert cache.get(DB.DBTables.ENGRAM, 'small') is small
+    assert cache.get(DB.DBTables.META, 'small') is None
+
+    # The second large engram only fits once the least recently used one is evicted.
+    cache.put(DB.DBTables.ENGRAM, 'bulky', make_engram('bulky', 'y' * 4000))
+    assert cache.get(DB.DBTables.ENGRAM, 'large') is None
+    assert cache.get(DB.DBTables.ENGRAM, 'small') is small
+
+    cache.invalidate(DB.DBTables.ENGRAM, ['small'])
+    assert cache.get(DB.DBTables.ENGRAM, 'small') is None
+
+    huge = make_engram('huge', 'z' * 100_000)
+    cache.put(DB.DBTables.ENGRAM, 'huge', huge)
+    assert cache.get(DB.DBTables.ENGRAM, 'huge') is None
+
+    metrics = cache.get_and_reset_packet()['metrics']
+    assert metrics['HITS'] == 2
+    assert metrics['MISSES'] == 4
+    assert metrics['EVICTIONS'] == 1
+    assert 0 < metrics['BYTES'] <= cache.max_bytes
+    assert 'HITS' not in cache.get_and_reset_packet()['metrics']
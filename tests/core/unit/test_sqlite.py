@@ -0,0 +1,290 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Any
+
+import pluggy
+import pytest
+
+from engramic.core import Engram, Index, Meta
+from engramic.core.engram import EngramType
+from engramic.core.interface.db import DB
+from engramic.core.retrieve_result import RetrieveResult
+from engramic.infrastructure.repository.engram_repository import EngramRepository
+from engramic.infrastructure.repository.meta_repository import MetaRepository
+from engramic.infrastructure.system import db_calls
+from engramic.infrastructure.system.plugin_specifications import db_impl
+from engramic.resources.plugins.db.sqlite.sqlite import Sqlite
+
+
+def query_file(db: Sqlite, sql: str, parameters: tuple[Any, ...] = ()) -> list[Any]:
+    """Runs sql on a connection of its own to the plugin's database file."""
+    with closing(sqlite3.connect(db.db_path)) as connection:
+        return connection.execute(sql, parameters).fetchall()
+
+
+def test_sqlite_group_commits_concurrent_writes(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = Sqlite()
+    db.connect({'name': 'Sqlite', 'reader_pool_size': 2})
+    db.connect(None)
+
+    def write(index: int) -> None:
+        docs = [{'id': f'{index}-{doc}', 'index': index} for doc in range(5)]
+        db.insert_documents(table=DB.DBTables.ENGRAM, docs=docs, args=None)
+
+    threads = [threading.Thread(target=write, args=(index,)) for index in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(db.fetch(table=DB.DBTables.ENGRAM, ids=[], args=None)['engram']) == 80
+
+    db.delete_documents(table=DB.DBTables.ENGRAM, ids=['0-0', '0-1'], args=None)
+    assert db.fetch(table=DB.DBTables.ENGRAM, ids=['0-0', '0-2'], args=None)['engram'] == [{'id': '0-2', 'index': 0}]
+
+    db.close(None)
+    assert db.fetch(table=DB.DBTables.ENGRAM, ids=['1-0'], args=None)['engram'] == [{'id': '1-0', 'index': 1}]
+    db.close(None)
+
+
+def test_sqlite_migrates_legacy_history_to_indexed_columns(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    (tmp_path / 'sqlite').mkdir()
+
+    def response(response_id: str, response_time: float, repo_ids: list[str] | None) -> dict[str, Any]:
+        prompt = {'conversation_id': 'conv', 'repo_ids_filters': repo_ids}
+        return {'id': response_id, 'response_time': response_time, 'prompt': prompt}
+
+    legacy = sqlite3.connect(tmp_path / 'sqlite' / 'docs.db')
+    legacy.execute('CREATE TABLE history (id TEXT PRIMARY KEY, data TEXT)')
+    legacy.executemany(
+        'INSERT INTO history (id, data) VALUES (?, ?)',
+        [('old', json.dumps(response('old', 1.0, ['b', 'a']))), ('other', json.dumps(response('other', 3.0, ['a'])))],
+    )
+    legacy.commit()
+    legacy.close()
+
+    db = Sqlite()
+    db.connect(None)
+    db.insert_documents(table=DB.DBTables.HISTORY, docs=[response('new', 2.0, ['a', 'b'])], args=None)
+
+    args = {'conversation_id': 'conv', 'repo_ids_filters': ['a', 'b'], 'history_limit': 5}
+    history = db.fetch(table=DB.DBTables.HISTORY, ids=[], args=args)['history']
+    assert [row['id'] for row in history] == ['new', 'old']
+
+    plan = query_file(
+        db,
+        'EXPLAIN QUERY PLAN SELECT id FROM history WHERE conversation_id = ? AND repo_key = ? '
+        'ORDER BY created_date DESC',
+        ('conv', '["a", "b"]'),
+    )
+    assert 'idx_history_conversation' in str(plan)
+    assert 'TEMP B-TREE' not in str(plan)
+    db.close(None)
+
+
+class HookAdapter:
+    """Calls a plugin directly but returns lists, like a pluggy hook."""
+
+    def __init__(self, plugin: Sqlite) -> None:
+        self.plugin = plugin
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self.plugin, name)
+        return lambda **kwargs: [method(**kwargs)]
+
+
+def test_engram_embeddings_are_stored_as_blobs_and_loaded_lazily(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = Sqlite()
+    db.connect(None)
+    repository = EngramRepository({'func': HookAdapter(db), 'args': {}})
+
+    vector = [0.5, -1.25, 2.0] * 256
+    engram = Engram('engram-1', ['file://a'], ['source'], 'content', EngramType.NATIVE, indices=[Index('text', vector)])
+    repository.save_engram(engram)
+
+    (data,) = query_file(db, "SELECT data FROM engram WHERE id = 'engram-1'")[0]
+    assert json.loads(data)['indices'][0]['embedding'] is None
+    (blob,) = query_file(db, 'SELECT vector FROM embedding')[0]
+    assert len(blob) == 4 * len(vector)
+
+    # A second repository has its own cache, so the engram is read back from the database.
+    repository = EngramRepository({'func': HookAdapter(db), 'args': {}})
+    loaded = repository.load_batch_retrieve_result(RetrieveResult('ask', 'source', ['engram-1']))
+    assert loaded[0].indices[0].embedding is None  # type: ignore[index]
+
+    # Fetching the engram by id returns a copy with embeddings and leaves the cached engram as it was.
+    cache_bytes = repository.cache.get_and_reset_packet()['metrics']['BYTES']
+    fetched = repository.fetch_engram('engram-1')
+    assert fetched is not None
+    assert fetched is not loaded[0]
+    assert fetched.indices[0].embedding == vector  # type: ignore[index]
+    assert loaded[0].indices[0].embedding is None  # type: ignore[index]
+    assert repository.cache.get(DB.DBTables.ENGRAM, 'engram-1') is loaded[0]
+    assert repository.cache.get_and_reset_packet()['metrics']['BYTES'] == cache_bytes
+
+    repository.delete_engrams(['engram-1'])
+    assert query_file(db, 'SELECT COUNT(*) FROM embedding')[0] == (0,)
+    db.close(None)
+
+
+def test_meta_summary_embeddings_are_deleted_with_the_meta(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = Sqlite()
+    db.connect(None)
+    repository = MetaRepository({'func': HookAdapter(db), 'args': {}})
+
+    summary = Index('summary', [0.25] * 8)
+    meta = Meta('meta-1', Meta.SourceType.DOCUMENT.value, ['file://a'], ['source'], ['keyword'], summary_full=summary)
+    repository.save_batch([meta])
+    assert query_file(db, 'SELECT COUNT(*) FROM embedding')[0] == (1,)
+
+    repository.delete_batch(['meta-1'])
+    assert query_file(db, 'SELECT COUNT(*) FROM embedding')[0] == (0,)
+    assert query_file(db, 'SELECT COUNT(*) FROM meta')[0] == (0,)
+    db.close(None)
+
+
+class ThreadRecordingSqlite(Sqlite):
+    """Records the threads its synchronous fetch hook runs on."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.fetch_threads: set[int] = set()
+
+    @db_impl
+    def fetch(self, table: DB.DBTables, ids: list[str], args: dict[str, Any]) -> dict[str, list[dict[str, Any]]]:
+        self.fetch_threads.add(threading.get_ident())
+        return super().fetch(table=table, ids=ids, args=args)
+
+
+def test_db_calls_await_native_hooks_and_offload_sync_ones(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    pm = pluggy.PluginManager('db')
+    db = ThreadRecordingSqlite()
+    pm.register(db)
+    plugin = {'func': pm.hook, 'args': {}}
+
+    async def run() -> list[dict[str, Any]]:
+        loop_thread = threading.get_ident()
+
+        await db_calls.connect_db(plugin, args=None)
+        docs = [{'id': 'a', 'repo_id': 'r'}, {'id': 'b', 'repo_id': 'r'}]
+        await db_calls.insert_documents(plugin, table=DB.DBTables.DOCUMENT, docs=docs, args=None)
+        await db_calls.delete_documents(plugin, table=DB.DBTables.DOCUMENT, ids=['a'], args=None)
+        ret = await db_calls.fetch(plugin, table=DB.DBTables.DOCUMENT, ids=['a', 'b'], args=None)
+        await db_calls.close_db(plugin, args=None)
+
+        assert db.fetch_threads
+        assert loop_thread not in db.fetch_threads
+        documents: list[dict[str, Any]] = ret[0]['document']
+        return documents
+
+    assert pm.hook.insert_documents_async.get_hookimpls()
+    assert asyncio.run(run()) == [{'id': 'b', 'repo_id': 'r'}]
+
+
+def test_fetch_iter_pages_by_id_and_projects_fields(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = Sqlite()
+    db.connect(None)
+    repository = EngramRepository({'func': HookAdapter(db), 'args': {}})
+
+    engrams = [
+        Engram(f'engram-{index:02}', ['file://a'], ['source'], 'x' * 1000, EngramType.NATIVE, context={'k': 'v'})
+        for index in range(25)
+    ]
+    repository.save_engrams(engrams)
+    db.insert_documents(table=DB.DBTables.ENGRAM, docs=[{'id': 'engram-99', 'accuracy': True}], args=None)
+
+    pages = list(repository.iter_engram_pages(['id', 'context', 'source_ids', 'accuracy', 'meta_ids'], page_size=10))
+    assert [len(page) for page in pages] == [10, 10, 6]
+    assert pages[0][0] == {
+        'id': 'engram-00',
+        'context': {'k': 'v'},
+        'source_ids': ['source'],
+        'accuracy': 0,
+        'meta_ids': None,
+    }
+    assert pages[2][-1] == {'id': 'engram-99', 'context': None, 'source_ids': None, 'accuracy': True, 'meta_ids': None}
+
+    native = list(repository.iter_engrams(page_size=7, args={'engram_type': EngramType.NATIVE.value}))
+    assert [engram.id for engram in native] == [engram.id for engram in engrams]
+
+    resumed = db.fetch_iter(table=DB.DBTables.ENGRAM, fields=['id'], page_size=100, after_id='engram-23', args=None)
+    assert list(resumed) == [[{'id': 'engram-24'}, {'id': 'engram-99'}]]
+    db.close(None)
+
+
+def make_history(response_id: str) -> dict[str, Any]:
+    prompt = {'conversation_id': 'conv', 'repo_ids_filters': None, 'prompt_str': 'what is a qubit? ' * 40}
+    return {'id': response_id, 'response_time': 1.0, 'prompt': prompt, 'response': 'A qubit is ' * 200}
+
+
+def test_compressed_rows_are_readable_alongside_plain_ones(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = Sqlite()
+    db.connect(None)
+    db.insert_documents(table=DB.DBTables.HISTORY, docs=[make_history('plain')], args=None)
+    db.close(None)
+
+    db = Sqlite()
+    db.connect({'compression': {'history': 'zlib'}, 'compression_min_bytes': 0})
+    db.insert_documents(table=DB.DBTables.HISTORY, docs=[make_history('packed')], args=None)
+
+    rows = dict(query_file(db, 'SELECT id, codec FROM history'))
+    assert rows == {'plain': None, 'packed': 'zlib'}
+    sizes = dict(query_file(db, 'SELECT id, length(data) FROM history'))
+    assert sizes['packed'] * 10 < sizes['plain']
+
+    history = db.fetch(table=DB.DBTables.HISTORY, ids=['packed', 'plain'], args=None)['history']
+    assert sorted(history, key=lambda row: row['id']) == [make_history('packed'), make_history('plain')]
+
+    pages = db.fetch_iter(table=DB.DBTables.HISTORY, fields=['id', 'prompt'], page_size=10, after_id=None, args=None)
+    assert list(pages) == [[{'id': doc_id, 'prompt': make_history(doc_id)['prompt']} for doc_id in ['packed', 'plain']]]
+    db.close(None)
+
+
+def test_zstd_tables_train_a_dictionary(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip('zstandard')
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    settings = {'compression': {'history': 'zstd'}, 'zstd_training_rows': 200, 'zstd_dictionary_size': 8192}
+
+    db = Sqlite()
+    db.connect(settings)
+    db.insert_documents(table=DB.DBTables.HISTORY, docs=[make_history(f'r{index}') for index in range(200)], args=None)
+    db.close(None)
+
+    db = Sqlite()
+    db.connect(settings)
+    db.insert_documents(table=DB.DBTables.HISTORY, docs=[make_history('with-dictionary')], args=None)
+
+    codecs = dict(query_file(db, 'SELECT id, codec FROM history'))
+    assert codecs['r0'] == 'zstd'
+    assert codecs['with-dictionary'].startswith('zstd:')
+    history = db.fetch(table=DB.DBTables.HISTORY, ids=['r0', 'with-dictionary'], args=None)['history']
+    assert [row['response'] for row in history] == [make_history('r0')['response']] * 2
+    db.close(None)
+
+
+def test_a_failing_write_does_not_stop_the_writer(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db = Sqlite()
+    db.connect(None)
+
+    # created_date is bound to an indexed column, and Python ints above 64 bits raise OverflowError there.
+    with pytest.raises(OverflowError):
+        db.insert_documents(table=DB.DBTables.ENGRAM, docs=[{'id': 'too-big', 'created_date': 2**70}], args=None)
+    db.insert_documents(table=DB.DBTables.ENGRAM, docs=[{'id': 'valid', 'created_date': 1.0}], args=None)
+    assert [doc['id'] for doc in db.fetch(table=DB.DBTables.ENGRAM, ids=['too-big', 'valid'], args=None)['engram']] == [
+        'valid'
+    ]
+
+    db.close(None)
+    with pytest.raises(RuntimeError):
+        db.insert_documents(table=DB.DBTables.ENGRAM, docs=[{'id': 'late'}], args=None)
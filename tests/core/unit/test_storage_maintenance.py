@@ -0,0 +1,116 @@
+from typing import Any
+
+import pluggy
+import pytest
+
+from engramic.application.maintenance.storage_maintenance import StorageMaintenance
+from engramic.core.interface.db import DB
+from engramic.infrastructure.system.plugin_specifications import vector_db_impl
+from engramic.resources.plugins.db.sqlite.sqlite import Sqlite
+
+
+class ListedVectors:
+    def __init__(self, collections: dict[str, list[str]]) -> None:
+        self.collections = collections
+
+    @vector_db_impl
+    def list_obj_ids(self, collection_name: str, args: dict[str, Any]) -> list[str]:
+        del args
+        return list(self.collections[collection_name])
+
+    @vector_db_impl
+    def delete(self, collection_name: str, obj_ids: list[str], args: dict[str, Any]) -> None:
+        del args
+        self.collections[collection_name] = [
+            obj_id for obj_id in self.collections[collection_name] if obj_id not in obj_ids
+        ]
+
+
+def make_meta(
+    meta_id: str, parent_id: str | None, repo_ids: list[str] | None, meta_type: str = 'document'
+) -> dict[str, Any]:
+    return {
+        'id': meta_id,
+        'type': meta_type,
+        'parent_id': parent_id,
+        'repo_ids': repo_ids,
+        'locations': [],
+        'source_ids': [],
+    }
+
+
+def make_engram(engram_id: str, meta_ids: list[str] | None, created_date: float) -> dict[str, Any]:
+    return {'id': engram_id, 'meta_ids': meta_ids, 'created_date': created_date, 'content': 'text ' * 400}
+
+
+def test_orphans_are_found_deleted_and_vacuumed(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('LOCAL_STORAGE_ROOT_PATH', str(tmp_path))
+    db_manager = pluggy.PluginManager('db')
+    db = Sqlite()
+    db_manager.register(db)
+    db.connect({'vacuum_step_pages': 4})
+
+    vectors = ListedVectors({'main': ['engram-a-new', 'engram-a-old', 'engram-gone'], 'meta': ['meta-a-new', 'meta-b']})
+    vector_manager = pluggy.PluginManager('vector_db')
+    vector_manager.register(vectors)
+    vector_plugin = {'func': vector_manager.hook, 'args': {}}
+    maintenance = StorageMaintenance(
+        {'func': db_manager.hook, 'args': {}}, {'main': vector_plugin, 'meta': vector_plugin}
+    )
+
+    # doc-a was scanned twice, doc-b was deleted from its repository, doc-c was submitted without one.
+    db.insert_documents(table=DB.DBTables.DOCUMENT, docs=[{'id': 'doc-a'}], args=None)
+    db.insert_documents(
+        table=DB.DBTables.META,
+        docs=[
+            make_meta('meta-a-old', 'doc-a', ['repo']),
+            make_meta('meta-a-new', 'doc-a', ['repo']),
+            make_meta('meta-b', 'doc-b', ['repo']),
+            make_meta('meta-c', 'doc-c', None),
+            make_meta('meta-unused', None, None, 'response'),
+        ],
+        args=None,
+    )
+    db.insert_documents(
+        table=DB.DBTables.ENGRAM,
+        docs=[
+            make_engram('engram-a-old', ['meta-a-old'], 1.0),
+            make_engram('engram-a-new', ['meta-a-new'], 5.0),
+            make_engram('engram-b', ['meta-b'], 2.0),
+            make_engram('engram-c', ['meta-c'], 3.0),
+            make_engram('engram-response', None, 4.0),
+        ]
+        + [make_engram(f'engram-old-{index}', ['meta-a-old'], 1.0) for index in range(40)],
+        args=None,
+    )
+    db.insert_documents(
+        table=DB.DBTables.EMBEDDING,
+        docs=[
+            {'id': 'index-1', 'owner_id': 'engram-a-old', 'embedding': [1.0]},
+            {'id': 'index-2', 'owner_id': 'engram-a-new', 'embedding': [1.0]},
+            {'id': 'index-3', 'owner_id': 'meta-b', 'embedding': [1.0]},
+            {'id': 'index-4', 'owner_id': 'engram-gone', 'embedding': [1.0]},
+        ],
+        args=None,
+    )
+
+    report = maintenance.find_orphans()
+    assert sorted(report.engram_ids) == sorted(
+        ['engram-a-old', 'engram-b'] + [f'engram-old-{index}' for index in range(40)]
+    )
+    assert report.meta_ids == ['meta-a-old', 'meta-b', 'meta-unused']
+    assert report.embedding_ids == ['index-1', 'index-3', 'index-4']
+    assert report.vector_obj_ids == {'main': ['engram-a-old', 'engram-gone'], 'meta': ['meta-b']}
+    assert report.confirmed_by(maintenance.find_orphans()).orphan_count == report.orphan_count
+
+    maintenance.delete_orphans(report)
+    assert maintenance.find_orphans().orphan_count == 0
+    assert vectors.collections == {'main': ['engram-a-new'], 'meta': ['meta-a-new']}
+    remaining = db.fetch(table=DB.DBTables.ENGRAM, ids=['engram-a-new', 'engram-c', 'engram-response'], args=None)
+    assert len(remaining['engram']) == 3
+
+    vacuumed = maintenance.vacuum(max_pages=6)
+    assert vacuumed['freed_bytes'] > 0
+    vacuumed = maintenance.vacuum()
+    assert vacuumed['free_bytes'] == 0
+    db.close(None)
@@ -0,0 +1,33 @@
+import asyncio
+
+from engramic.core.interface.llm import LLM
+from engramic.infrastructure.system.stream_coalescer import StreamCoalescer
+
+
+def test_coalescer_flushes_first_chunk_then_batches() -> None:
+    async def scenario() -> None:
+        delivered: list[LLM.StreamPacket] = []
+        coalescer = StreamCoalescer(asyncio.get_running_loop(), delivered.append, max_bytes=8, max_delay=0.01)
+
+        coalescer.push(LLM.StreamPacket('{"response_type":"header"}', False, '', 'r1', control=True))
+        coalescer.push(LLM.StreamPacket('Hi', False, '', 'r1'))
+        assert [packet.packet for packet in delivered] == ['{"response_type":"header"}', 'Hi']
+
+        for token in ('a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i'):
+            coalescer.push(LLM.StreamPacket(token, False, '', 'r1'))
+        assert delivered[-1].packet == 'abcdefgh'
+
+        await asyncio.sleep(0.03)
+        assert delivered[-1].packet == 'i'
+
+        coalescer.push(LLM.StreamPacket('j', False, '', 'r1'))
+        coalescer.push(LLM.StreamPacket('{"response_type":"footer"}', False, '', 'r1', control=True))
+        assert [packet.packet for packet in delivered[-2:]] == ['j', '{"response_type":"footer"}']
+
+        coalescer.push(LLM.StreamPacket('k', False, '', 'r1'))
+        coalescer.push(LLM.StreamPacket('.', True, 'End', 'r1'))
+        assert delivered[-1].packet == 'k.'
+        assert delivered[-1].finish
+        assert coalescer.buffers == {}
+
+    asyncio.run(scenario())
@@ -0,0 +1,41 @@
+# Copyright (c) 2025 Preisz Consulting, LLC.
+# This file is part of Engramic, licensed under the Engramic Community License.
+# See the LICENSE file in the project root for more details.
+
+from pathlib import Path
+
+import pytest
+
+from engramic.core.prompt import Prompt
+from engramic.core.template_registry import TemplateRegistry
+
+
+class PromptHello(Prompt):
+    def render_prompt(self) -> str:
+        return str(self.get_template("""Hello ${prompt_str}""").render(**self.input_data))
+
+
+def test_template_compiled_once() -> None:
+    TemplateRegistry.clear()
+
+    first = PromptHello(prompt_str='one')
+    second = PromptHello(prompt_str='two')
+
+    assert first.render_prompt() == 'Hello one'
+    assert second.render_prompt() == 'Hello two'
+    assert TemplateRegistry.size() == 1
+    assert first.get_template("""Hello ${prompt_str}""") is second.get_template("""Hello ${prompt_str}""")
+
+
+def test_template_module_written_and_reloaded(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(TemplateRegistry.MODULE_ROOT_ENV, str(tmp_path))
+    TemplateRegistry.clear()
+
+    assert PromptHello(prompt_str='disk').render_prompt() == 'Hello disk'
+    assert len(list(tmp_path.glob('PromptHello_*.py'))) == 1
+
+    # A fresh registry (e.g. a new process) loads the module from disk.
+    TemplateRegistry.clear()
+    assert PromptHello(prompt_str='again').render_prompt() == 'Hello again'
+
+    TemplateRegistry.clear()
@@ -0,0 +1,72 @@
+import asyncio
+from enum import Enum
+from typing import Any
+
+import pluggy
+
+from engramic.application.retrieve.retrieve_service import RetrieveMetric, RetrieveService
+from engramic.core.index import Index
+from engramic.core.metrics_tracker import MetricsTracker
+from engramic.infrastructure.system.plugin_specifications import vector_db_impl
+from engramic.infrastructure.system.service import Service
+from engramic.infrastructure.system.write_behind_buffer import WriteBehindBuffer
+
+
+class Vectors:
+    """Fails the first upsert of every batch, and every upsert of the engrams named broken."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    @vector_db_impl
+    def upsert_batch(self, collection_name: str, items: list[dict[str, Any]], args: dict[str, Any]) -> None:
+        del collection_name, args
+        self.calls += 1
+        if self.calls == 1 or any(item['obj_id'] == 'broken' for item in items):
+            error = 'vector store is unavailable'
+            raise OSError(error)
+
+
+def vector_item(obj_id: str) -> dict[str, Any]:
+    return {
+        'index_list': [Index(text=f'{obj_id} text', embedding=[1.0, 0.0])],
+        'obj_id': obj_id,
+        'filters': None,
+        'type_filter': 'native',
+        'location_filter': None,
+        'tracking_id': f'tracking-{obj_id}',
+    }
+
+
+def test_failed_vector_batches_are_retried_then_acknowledged() -> None:
+    vector_manager = pluggy.PluginManager('vector_db')
+    vector_manager.register(Vectors())
+    sent: list[tuple[Enum, dict[str, Any]]] = []
+
+    # Only what write_vector_batch and its failure callback read is set up.
+    service = RetrieveService.__new__(RetrieveService)
+    service.vector_db_engram_plugin = {'func': vector_manager.hook, 'args': {}}
+    service.metrics_tracker = MetricsTracker[RetrieveMetric]()
+
+    def send_message_async(topic: Enum, message: dict[str, Any]) -> None:
+        sent.append((topic, message))
+
+    service.send_message_async = send_message_async  # type: ignore[method-assign,assignment]
+
+    async def scenario() -> None:
+        service.vector_buffer = WriteBehindBuffer(
+            service.write_vector_batch, retries=2, retry_delay=0.001, on_failure=service.on_vector_batch_failed
+        )
+        service.vector_buffer.add('main', vector_item('flaky'))
+        await service.vector_buffer.flush()
+        service.vector_buffer.add('main', vector_item('broken'))
+        await service.vector_buffer.flush()
+
+    asyncio.run(scenario())
+
+    assert [(topic, message['parent_id'], message['tracking_id']) for topic, message in sent] == [
+        (Service.Topic.INDICES_INSERTED, 'flaky', 'tracking-flaky'),
+        (Service.Topic.INDICES_INSERT_FAILED, 'broken', 'tracking-broken'),
+    ]
+    assert sent[1][1]['error'] == 'vector store is unavailable'
+    assert service.metrics_tracker.get_and_reset_packet()['metrics']['VECTOR_BATCHES_FAILED'] == 1
@@ -0,0 +1,185 @@
+import asyncio
+import json
+from typing import Any
+
+import jwt
+import pytest
+
+from engramic.core.interface.llm import LLM
+from engramic.infrastructure.system.websocket_manager import WebsocketManager
+
+SECRET = 'a test signing key that is long enough for HS256'
+
+
+class Request:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+
+class FakeClient:
+    """A websocket as handler() sees it: the request path, what the server sends, and messages from the client."""
+
+    def __init__(self, sub: str | None, *conversation_ids: str, client_id: str | None = None) -> None:
+        token = jwt.encode({'sub': sub} if sub is not None else {}, SECRET, algorithm='HS256')
+        query = [
+            f'access_token={token}',
+            *(f'conversation_id={conversation_id}' for conversation_id in conversation_ids),
+        ]
+        if client_id is not None:
+            query.append(f'client_id={client_id}')
+        self.request = Request('/?' + '&'.join(query))
+        self.sent: list[str] = []
+        self.closed_with: int | None = None
+        self.incoming: asyncio.Queue[str | None] = asyncio.Queue()
+
+    async def send(self, packet: str) -> None:
+        self.sent.append(packet)
+
+    async def close(self, code: int, reason: str) -> None:
+        del reason
+        self.closed_with = code
+        self.incoming.put_nowait(None)
+
+    def __aiter__(self) -> 'FakeClient':
+        return self
+
+    async def __anext__(self) -> str:
+        message = await self.incoming.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    def say(self, action: str, conversation_id: str) -> None:
+        self.incoming.put_nowait(json.dumps({'action': action, 'conversation_id': conversation_id}))
+
+
+class FakeHost:
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+
+    def run_background(self, coro: Any) -> asyncio.Task[Any]:
+        return self.loop.create_task(coro)
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def connect(manager: WebsocketManager, client: FakeClient) -> asyncio.Task[None]:
+    task = asyncio.create_task(manager.handler(client))  # type: ignore[arg-type]
+    await settle()
+    return task
+
+
+async def disconnect(*clients: FakeClient) -> None:
+    for client in clients:
+        client.incoming.put_nowait(None)
+    await settle()
+
+
+def test_packets_route_to_owners_and_watchers_and_slow_clients_disconnect(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('JWT_SECRET_KEY', SECRET)
+
+    async def scenario() -> None:
+        host = FakeHost(asyncio.get_running_loop())
+        manager = WebsocketManager(host, queue_size=2, coalesce_bytes=1)  # type: ignore[arg-type]
+
+        # A single client still gets legacy packets that name no stream.
+        watcher = FakeClient('a', 'conv-1')
+        await connect(manager, watcher)
+        manager.send_message(LLM.StreamPacket('legacy', False, ''))
+        await settle()
+        assert watcher.sent == ['legacy']
+
+        other, unbound = FakeClient('b', 'conv-2'), FakeClient('c')
+        await connect(manager, other)
+        await connect(manager, unbound)
+
+        manager.register_stream('r1', 'conv-1')
+        manager.register_stream('r2', None, 'c')
+        manager.register_stream('r3', 'conv-nobody-watches', 'd')
+        manager.send_message(LLM.StreamPacket('hello', False, '', 'r1'))
+        manager.send_message(LLM.StreamPacket('mine', False, '', 'r2'))
+        manager.send_message(LLM.StreamPacket('secret', False, '', 'r3'))
+        manager.send_message(LLM.StreamPacket('legacy', False, ''))
+        await settle()
+
+        assert watcher.sent == ['legacy', 'hello']
+        assert other.sent == []
+        assert unbound.sent == ['mine']
+
+        # Overflow the watcher's queue before its writer can drain it.
+        for token in ('1', '2', '3'):
+            manager.send_message(LLM.StreamPacket(token, False, '', 'r1'))
+        await settle()
+
+        assert 'a' not in manager.connections
+        assert watcher.closed_with == WebsocketManager.SLOW_CLIENT_CLOSE_CODE
+
+        manager.end_stream('r1')
+        await disconnect(other, unbound)
+        await manager.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_reconnects_keep_watchers_and_unwatched_streams_reach_no_one(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('JWT_SECRET_KEY', SECRET)
+
+    async def scenario() -> None:
+        host = FakeHost(asyncio.get_running_loop())
+        manager = WebsocketManager(host, coalesce_bytes=1)  # type: ignore[arg-type]
+
+        old, new, unbound = FakeClient('a', 'conv-1'), FakeClient('a', 'conv-1'), FakeClient('c')
+        await connect(manager, old)
+        await connect(manager, unbound)
+        # The replaced connection is closed, and its handler cleans up after the new one registered.
+        await connect(manager, new)
+
+        assert old.closed_with == 4003
+        assert manager.watchers == {'conv-1': {'a'}}
+        manager.register_stream('r1', 'conv-1')
+        manager.send_message(LLM.StreamPacket('hello', False, '', 'r1'))
+        await settle()
+        assert (old.sent, new.sent, unbound.sent) == ([], ['hello'], [])
+
+        new.say('unsubscribe', 'conv-1')
+        await settle()
+        assert manager.watchers == {}
+
+        # Nobody watches the conversation now, and the unbound client must not receive another user's stream.
+        manager.send_message(LLM.StreamPacket('again', False, '', 'r1'))
+        await settle()
+        assert (new.sent, unbound.sent) == (['hello'], [])
+
+        await disconnect(new, unbound)
+        await manager.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_client_id_must_match_the_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('JWT_SECRET_KEY', SECRET)
+
+    async def scenario() -> None:
+        host = FakeHost(asyncio.get_running_loop())
+        manager = WebsocketManager(host)  # type: ignore[arg-type]
+
+        spoofed = FakeClient('alice', client_id='bob')
+        await manager.handler(spoofed)  # type: ignore[arg-type]
+        assert spoofed.closed_with == WebsocketManager.CLIENT_MISMATCH_CLOSE_CODE
+        assert manager.connections == {}
+
+        alice = FakeClient('alice', client_id='alice')
+        await connect(manager, alice)
+        assert list(manager.connections) == ['alice']
+
+        anonymous = FakeClient(None)
+        await connect(manager, anonymous)
+        assert len(manager.connections) == 2
+
+        await disconnect(alice, anonymous)
+        assert manager.connections == {}
+
+    asyncio.run(scenario())
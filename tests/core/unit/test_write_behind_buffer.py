@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any
+
+from engramic.core.interface.db import DB
+from engramic.infrastructure.system.write_behind_buffer import WriteBehindBuffer
+
+
+def test_write_behind_buffer_batches_per_table() -> None:
+    writes: list[tuple[DB.DBTables, list[Any]]] = []
+
+    async def write(table: DB.DBTables, items: list[Any]) -> None:
+        await asyncio.sleep(0)
+        writes.append((table, items))
+
+    async def scenario() -> None:
+        buffer = WriteBehindBuffer(write, max_batch=3, flush_delay=0.01)
+        for index in range(4):
+            buffer.add(DB.DBTables.ENGRAM, index)
+        buffer.add(DB.DBTables.META, 'meta')
+
+        await asyncio.sleep(0.05)
+        assert sorted(writes, key=lambda write: len(write[1])) == [
+            (DB.DBTables.ENGRAM, [3]),
+            (DB.DBTables.META, ['meta']),
+            (DB.DBTables.ENGRAM, [0, 1, 2]),
+        ]
+
+        buffer.add(DB.DBTables.HISTORY, 'response')
+        await buffer.flush()
+        assert writes[-1] == (DB.DBTables.HISTORY, ['response'])
+
+    asyncio.run(scenario())
+
+
+def test_write_behind_buffer_retries_then_reports_failure() -> None:
+    attempts: list[str] = []
+    failures: list[tuple[str, list[Any], str]] = []
+
+    async def write(table: str, items: list[Any]) -> None:
+        attempts.append(table)
+        if table == 'broken' or attempts.count(table) < 2:
+            error = f'{table} is unavailable'
+            raise OSError(error)
+
+    def on_failure(table: str, items: list[Any], error: Exception) -> None:
+        failures.append((table, items, str(error)))
+
+    async def scenario() -> None:
+        buffer = WriteBehindBuffer(write, flush_delay=0.01, retries=2, retry_delay=0.001, on_failure=on_failure)
+        buffer.add('flaky', 1)
+        buffer.add('broken', 2)
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert attempts.count('flaky') == 2
+    assert attempts.count('broken') == 3
+    assert failures == [('broken', [2], 'broken is unavailable')]
+
+
+def test_write_behind_buffer_retried_batch_cannot_overwrite_a_newer_write() -> None:
+    store: dict[str, str] = {}
+    committed: list[list[Any]] = []
+    attempts: list[str] = []
+
+    async def write(table: str, items: list[Any]) -> None:
+        attempts.append(items[0][1])
+        if attempts == ['old']:
+            error = f'{table} is unavailable'
+            raise OSError(error)
+        await asyncio.sleep(0)
+        store.update(items)
+        committed.append(items)
+
+    async def scenario() -> None:
+        buffer = WriteBehindBuffer(write, max_batch=1, retries=1, retry_delay=0.02)
+        buffer.add('engram', ('id', 'old'))
+        await asyncio.sleep(0.005)  # the old batch failed and waits for its retry
+        buffer.add('engram', ('id', 'new'))
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert attempts == ['old', 'old', 'new']
+    assert committed == [[('id', 'old')], [('id', 'new')]]
+    assert store == {'id': 'new'}